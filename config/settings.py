@@ -8,6 +8,45 @@ ORGANIZATION = "GradeEntrySystem"
 # データベース設定
 DB_PATH = "data/database.db"
 BACKUP_DIR = "data/backups"
+# WALモード（集計・エクスポートを読み取り専用接続で書き込みと分離する）
+# ネットワーク共有フォルダ上のDBなどWALが使えない環境では False にする
+USE_WAL = True
+# 成績を講座・授業日・生徒ID順に格納する（WITHOUT ROWID テーブル）
+# 講座・授業日単位の読み取りのページ数が減る。切り替えると次回起動時にテーブルを作り直す
+CLUSTERED_GRADE_ENTRIES = False
+# 他の利用者の書き込みが終わるのを待つ時間（秒）。共有フォルダ上のDBを複数人で使う場合、
+# 待ちきれなかった書き込みは間隔をあけて再試行する（待ち時間はクエリ統計に出力される）
+BUSY_TIMEOUT_SECONDS = 5.0
+# 他の利用者・スクリプトによる変更を確認する間隔（ミリ秒）。変更があった場合は
+# 変更された講座・授業日を表示している画面だけを更新する（0 の場合は確認しない）
+CHANGE_POLL_INTERVAL_MS = 2000
+
+# 成績サービス（python -m service.server で起動。1つのプロセスがデータベースを開き、
+# 複数のデスクトップアプリ・スクリプトはファイルを共有せずサービス経由で使う）
+# SERVICE_URL を指定すると、デスクトップアプリはデータベースファイルの代わりにサービスに接続する
+SERVICE_URL = None  # 例: "http://127.0.0.1:8765"
+SERVICE_HOST = "127.0.0.1"
+SERVICE_PORT = 8765
+SERVICE_WORKERS = 4
+# 1回のトランザクションでまとめてコミットする書き込みの最大件数と、書き込みの待ち行列の上限
+SERVICE_WRITE_BATCH_SIZE = 100
+SERVICE_WRITE_QUEUE_SIZE = 1000
+SERVICE_TIMEOUT_SECONDS = 60.0
+
+# クエリ計測設定（--query-stats 指定時は設定に関わらず有効）
+QUERY_STATS_ENABLED = False
+SLOW_QUERY_THRESHOLD_MS = 100
+SLOW_QUERY_LOG = "data/slow_queries.log"
+
+# 年度の開始月（年度末アーカイブ data/archive_YYYY.db の区切り）
+ACADEMIC_YEAR_START_MONTH = 4
+
+# この件数以上の差し替えインポートは一括ロードモードで実行
+BULK_LOAD_THRESHOLD = 5000
+
+# 空きページがこの割合・ページ数を超えたら空き領域を解放（incremental vacuum）
+FREELIST_VACUUM_RATIO = 0.2
+FREELIST_VACUUM_MIN_PAGES = 256
 
 # ウィンドウ設定
 WINDOW_WIDTH = 1400
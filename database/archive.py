@@ -0,0 +1,397 @@
+"""終了した年度の講座・名簿・成績の年度別アーカイブ（data/archive_YYYY.db）"""
+
+import logging
+import re
+from dataclasses import dataclass
+from datetime import date
+from pathlib import Path
+from typing import TYPE_CHECKING, List, Optional, Tuple
+
+from config.settings import ACADEMIC_YEAR_START_MONTH
+from database.change_log import ALL_CHANGE_LOG_TRIGGERS
+from database.dates import from_day_number, to_day_number
+from database.events import CourseChanged, RosterChanged, GradesChanged
+
+if TYPE_CHECKING:
+    from database.db_manager import DatabaseManager
+
+logger = logging.getLogger(__name__)
+
+# アーカイブのファイル名（作業用データベースと同じフォルダに置く）と ATTACH 時のスキーマ名
+ARCHIVE_FILE_NAME = "archive_{year}.db"
+ARCHIVE_SCHEMA = "archive_{year}"
+ARCHIVE_SCHEMA_PATTERN = re.compile(r"archive_\d{4}")
+
+# アーカイブに移す列（init_db.sql のテーブル定義の列）
+COURSE_COLUMNS = ('course_id', 'course_name', 'note1', 'note2', 'note3', 'created_at', 'updated_at')
+ROSTER_COLUMNS = (
+    'id', 'course_id', 'student_id', 'student_number', 'class_number', 'student_name',
+    'note1', 'note2', 'note3', 'created_at', 'updated_at'
+)
+GRADE_COLUMNS = (
+    'id', 'course_id', 'entry_date', 'student_id', 'grade1', 'grade2', 'grade3',
+    'grade4', 'grade5', 'grade6', 'note1', 'note2', 'created_at', 'updated_at', 'row_version'
+)
+
+
+def academic_year_of(day: date) -> int:
+    """
+    日付の属する年度（ACADEMIC_YEAR_START_MONTH 月始まり）
+    
+    Args:
+        day: 日付
+        
+    Returns:
+        年度（開始月の属する西暦年）
+    """
+    return day.year if day.month >= ACADEMIC_YEAR_START_MONTH else day.year - 1
+
+
+def academic_year_range(year: int) -> Tuple[int, int]:
+    """
+    年度の初日と末日の日番号
+    
+    Args:
+        year: 年度
+        
+    Returns:
+        (初日の日番号, 末日の日番号)
+    """
+    start = date(year, ACADEMIC_YEAR_START_MONTH, 1).toordinal()
+    end = date(year + 1, ACADEMIC_YEAR_START_MONTH, 1).toordinal() - 1
+    return start, end
+
+
+@dataclass
+class ArchiveRecord:
+    """アーカイブ済みの年度"""
+    academic_year: int
+    path: Path
+    start_date: str
+    end_date: str
+    course_count: int
+    grade_count: int
+    archived_at: str
+    
+    @property
+    def schema(self) -> str:
+        """ATTACH 時のスキーマ名"""
+        return ARCHIVE_SCHEMA.format(year=self.academic_year)
+
+
+class ArchiveManager:
+    """
+    年度末アーカイブの作成と、期間を指定した読み取り時のアーカイブの ATTACH を行うクラス
+    
+    終了した年度の成績と、その年度に成績のある講座・名簿を archive_YYYY.db に移し、
+    作業用データベースからは成績と、成績が残らなくなった講座（名簿を含む）を削除する。
+    アーカイブは作業用データベースと同じスキーマで、成績一覧・統計の読み取りでは
+    期間が重なる年度のアーカイブだけを ATTACH して結合する。
+    アーカイブした成績は読み取り専用（ID指定の更新・削除は作業用データベースのみが対象）。
+    """
+    
+    def __init__(self, db: 'DatabaseManager'):
+        """
+        初期化
+        
+        Args:
+            db: データベースマネージャー（作業用データベース）
+        """
+        self.db = db
+        # この実行中にスキーマを確認（マイグレーションを適用）したアーカイブ
+        self._checked_paths = set()
+    
+    def archive_path(self, year: int) -> Path:
+        """年度のアーカイブファイルのパス"""
+        return self.db.db_path.parent / ARCHIVE_FILE_NAME.format(year=year)
+    
+    def list_archives(self) -> List[ArchiveRecord]:
+        """
+        アーカイブ済みの年度の一覧
+        
+        Returns:
+            アーカイブのリスト（年度順）
+        """
+        rows = self.db.fetch_all(
+            "SELECT academic_year, file_name, start_date, end_date, course_count, grade_count, "
+            "archived_at FROM grade_archives ORDER BY academic_year"
+        )
+        return [
+            ArchiveRecord(
+                academic_year=row['academic_year'],
+                path=self.db.db_path.parent / row['file_name'],
+                start_date=from_day_number(row['start_date']),
+                end_date=from_day_number(row['end_date']),
+                course_count=row['course_count'],
+                grade_count=row['grade_count'],
+                archived_at=row['archived_at']
+            )
+            for row in rows
+        ]
+    
+    def archive_year(self, year: int) -> ArchiveRecord:
+        """
+        終了した年度の講座・名簿・成績をアーカイブに移す
+        
+        その年度の成績をすべて移し、成績のある講座は名簿とともにアーカイブに複製する。
+        作業用データベースに成績が残らなくなった講座は名簿とともに削除する。
+        同じ年度を再度アーカイブすると、その後に入力された成績を追加で移す。
+        
+        作業用データベース（WAL）とアーカイブにまたがるトランザクションは1つの単位で
+        コミットされないため、アーカイブへの複製と作業用データベースからの削除は別の
+        トランザクションで行う。複製をコミットしてから削除するため、途中で失敗しても
+        成績は失われない（同じ年度をもう一度アーカイブすればよい）。複製した後に
+        変更された成績は削除せず、次にアーカイブしたときに移す。
+        
+        Args:
+            year: 年度
+            
+        Returns:
+            アーカイブの情報
+            
+        Raises:
+            ValueError: 年度が終了していない、またはその年度の成績がない場合
+            RuntimeError: トランザクション中に呼ばれた場合
+        """
+        if year >= academic_year_of(date.today()):
+            raise ValueError(f"{year}年度はまだ終了していません")
+        if self.db.in_transaction:
+            raise RuntimeError("トランザクション中はアーカイブできません")
+        
+        start_day, end_day = academic_year_range(year)
+        row = self.db.fetch_one(
+            "SELECT COUNT(*) AS count FROM grade_entries WHERE entry_date BETWEEN ? AND ?",
+            (start_day, end_day)
+        )
+        if row['count'] == 0:
+            raise ValueError(f"{year}年度の成績がありません")
+        
+        path = self.archive_path(year)
+        schema = ARCHIVE_SCHEMA.format(year=year)
+        try:
+            self._check_archive(path)
+            self.db.commit()
+            self.db.detach_database(schema)
+            self.db.attach_database(path, schema)
+            try:
+                # 1. アーカイブに複製してコミット（作業用データベースは変更しない）
+                with self.db.transaction():
+                    self._copy_year(schema, start_day, end_day)
+                
+                # 2. 複製した成績を作業用データベースから削除（アーカイブは変更しない）
+                # 年度の移動は削除として変更ログに記録しない（連携先では成績はそのまま残る）
+                with self.db.transaction(), self.db.suspend_triggers(ALL_CHANGE_LOG_TRIGGERS):
+                    deleted_courses = self._remove_year(schema, start_day, end_day)
+                    counts = self.db.fetch_one(
+                        f"SELECT (SELECT COUNT(*) FROM {schema}.courses) AS course_count, "
+                        f"(SELECT COUNT(*) FROM {schema}.grade_entries) AS grade_count"
+                    )
+                    self.db.execute_query(
+                        """
+                        INSERT INTO main.grade_archives
+                            (academic_year, file_name, start_date, end_date, course_count, grade_count)
+                        VALUES (?, ?, ?, ?, ?, ?)
+                        ON CONFLICT(academic_year) DO UPDATE SET
+                            file_name = excluded.file_name,
+                            course_count = excluded.course_count,
+                            grade_count = excluded.grade_count,
+                            archived_at = CURRENT_TIMESTAMP
+                        """,
+                        (year, path.name, start_day, end_day,
+                         counts['course_count'], counts['grade_count'])
+                    )
+            finally:
+                self.db.detach_database(schema)
+            
+            self.db.maintenance.after_bulk_delete()
+            # 変更ログに記録しないため、範囲を限らず知らせる
+            self.db.publish(CourseChanged(), RosterChanged(), GradesChanged())
+            logger.info(
+                f"{year}年度をアーカイブしました: {row['count']}件 -> {path} "
+                f"(作業用データベースから削除した講座: {deleted_courses}件)"
+            )
+            return next(record for record in self.list_archives() if record.academic_year == year)
+        except Exception as e:
+            logger.error(f"アーカイブエラー ({year}年度): {e}")
+            raise
+    
+    def _copy_year(self, schema: str, start_day: int, end_day: int):
+        """
+        ATTACH 済みのアーカイブに年度の成績・講座・名簿を複製（トランザクションは呼び出し側）
+        
+        書き込むのはアーカイブのみ。作業用データベースに残っている成績は、前回の複製の後に
+        変更されていても作業用データベースの内容で置き換える。
+        """
+        period = (start_day, end_day)
+        self.db.execute_query("DROP TABLE IF EXISTS temp.archive_courses")
+        self.db.execute_query(
+            "CREATE TEMP TABLE archive_courses AS "
+            "SELECT DISTINCT course_id FROM main.grade_entries WHERE entry_date BETWEEN ? AND ?",
+            period
+        )
+        
+        # 生徒ID は作業用データベースと同じ値を使う
+        self.db.execute_query(
+            f"""
+            INSERT INTO {schema}.students (student_id, student_number)
+            SELECT student_id, student_number FROM main.students
+            WHERE student_id IN (
+                SELECT student_id FROM main.grade_entries WHERE entry_date BETWEEN ? AND ?
+                UNION
+                SELECT student_id FROM main.course_students
+                WHERE course_id IN (SELECT course_id FROM temp.archive_courses)
+            )
+            ON CONFLICT DO NOTHING
+            """,
+            period
+        )
+        
+        course_columns = ', '.join(COURSE_COLUMNS)
+        course_updates = ', '.join(f"{column} = excluded.{column}" for column in COURSE_COLUMNS[1:])
+        self.db.execute_query(
+            f"""
+            INSERT INTO {schema}.courses ({course_columns})
+            SELECT {course_columns} FROM main.courses
+            WHERE course_id IN (SELECT course_id FROM temp.archive_courses)
+            ON CONFLICT(course_id) DO UPDATE SET {course_updates}
+            """
+        )
+        
+        # 名簿はアーカイブ時点のものに置き換える（成績より先に入れて入力状況サマリーを正しく集計する）
+        roster_columns = ', '.join(ROSTER_COLUMNS)
+        self.db.execute_query(
+            f"DELETE FROM {schema}.course_students "
+            "WHERE course_id IN (SELECT course_id FROM temp.archive_courses)"
+        )
+        self.db.execute_query(
+            f"""
+            INSERT INTO {schema}.course_students ({roster_columns})
+            SELECT {roster_columns} FROM main.course_students
+            WHERE course_id IN (SELECT course_id FROM temp.archive_courses)
+            """
+        )
+        
+        # 前回の複製の後に削除できなかった成績は、作業用データベースの現在の内容で入れ直す
+        # （差し替えインポートで ID が変わった成績は、講座・授業日・生徒が同じ行を置き換える）
+        self.db.execute_query(
+            f"""
+            DELETE FROM {schema}.grade_entries
+            WHERE id IN (SELECT id FROM main.grade_entries WHERE entry_date BETWEEN ? AND ?)
+               OR (course_id, entry_date, student_id) IN (
+                   SELECT course_id, entry_date, student_id FROM main.grade_entries
+                   WHERE entry_date BETWEEN ? AND ?
+               )
+            """,
+            period + period
+        )
+        grade_columns = ', '.join(GRADE_COLUMNS)
+        self.db.execute_query(
+            f"""
+            INSERT INTO {schema}.grade_entries ({grade_columns})
+            SELECT {grade_columns} FROM main.grade_entries
+            WHERE entry_date BETWEEN ? AND ?
+            """,
+            period
+        )
+        
+        # アーカイブ側のトリガーが記録した変更ログは使わない
+        self.db.execute_query(f"DELETE FROM {schema}.change_log")
+        self.db.execute_query("DROP TABLE temp.archive_courses")
+    
+    def _remove_year(self, schema: str, start_day: int, end_day: int) -> int:
+        """
+        アーカイブに複製した年度の成績と、成績が残らなくなった講座を作業用データベースから削除
+        （トランザクションは呼び出し側。書き込むのは作業用データベースのみ）
+        
+        複製した後に変更された成績（行バージョンが異なる）と入力された成績は削除しない。
+        
+        Returns:
+            作業用データベースから削除した講座の数
+        """
+        period = (start_day, end_day)
+        self.db.execute_query(
+            f"""
+            DELETE FROM main.grade_entries
+            WHERE entry_date BETWEEN ? AND ?
+              AND (id, row_version) IN (
+                  SELECT id, row_version FROM {schema}.grade_entries
+                  WHERE entry_date BETWEEN ? AND ?
+              )
+            """,
+            period + period
+        )
+        remaining = self.db.fetch_one(
+            "SELECT COUNT(*) AS count FROM main.grade_entries WHERE entry_date BETWEEN ? AND ?",
+            period
+        )['count']
+        if remaining:
+            logger.warning(f"複製の後に変更された成績を作業用データベースに残しました: {remaining}件")
+        
+        cursor = self.db.execute_query(
+            f"""
+            DELETE FROM main.courses
+            WHERE course_id IN (SELECT course_id FROM {schema}.courses)
+              AND NOT EXISTS (SELECT 1 FROM main.grade_entries g WHERE g.course_id = courses.course_id)
+            """
+        )
+        return cursor.rowcount
+    
+    def attach_for_range(self, start_date: Optional[str], end_date: Optional[str],
+                         readonly: bool = True) -> List[str]:
+        """
+        期間が重なる年度のアーカイブを読み取りに使う接続に ATTACH する
+        
+        期間の指定がない場合は ATTACH しない（作業用データベースのみを読む）。
+        今回使わないアーカイブは DETACH する（同時に ATTACH できるデータベースの数には
+        上限がある）。スナップショットの読み取り中は ATTACH できないため、
+        read_snapshot() の前に呼んでおくこと。
+        
+        Args:
+            start_date: 開始日 (YYYY-MM-DD)
+            end_date: 終了日 (YYYY-MM-DD)
+            readonly: 読み取り専用接続で読むか（DatabaseManager.fetch_all などと同じ指定）
+            
+        Returns:
+            ATTACH したアーカイブのスキーマ名（年度順）
+        """
+        if not start_date and not end_date:
+            return []
+        
+        # 年度（主キー）の範囲で検索する
+        query = "SELECT academic_year, file_name FROM grade_archives WHERE 1=1"
+        params = []
+        if start_date:
+            query += " AND academic_year >= ?"
+            params.append(academic_year_of(date.fromordinal(to_day_number(start_date))))
+        if end_date:
+            query += " AND academic_year <= ?"
+            params.append(academic_year_of(date.fromordinal(to_day_number(end_date))))
+        query += " ORDER BY academic_year"
+        archives = []
+        for row in self.db.fetch_all(query, tuple(params)):
+            path = self.db.db_path.parent / row['file_name']
+            if not path.exists():
+                logger.warning(f"アーカイブが見つかりません: {path}")
+                continue
+            archives.append((ARCHIVE_SCHEMA.format(year=row['academic_year']), path))
+        
+        attached = set(self.db.attached_databases(readonly))
+        needed = {schema for schema, _ in archives}
+        for schema in attached - needed:
+            self.db.detach_database(schema, readonly)
+        for schema, path in archives:
+            if schema not in attached:
+                self._check_archive(path)
+                self.db.attach_database(path, schema, readonly)
+        return [schema for schema, _ in archives]
+    
+    def _check_archive(self, path: Path):
+        """アーカイブを作成、または既存のアーカイブに新しいマイグレーションを適用（実行中に1回）"""
+        if path in self._checked_paths:
+            return
+        # 循環インポートを避けるためここでインポート
+        from database.db_manager import DatabaseManager
+        archive = DatabaseManager(str(path), use_wal=False,
+                                  clustered_grades=self.db.clustered_grades)
+        archive.close()
+        self._checked_paths.add(path)
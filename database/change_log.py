@@ -0,0 +1,241 @@
+"""変更ログ（change_log）による成績・名簿・講座の差分エクスポート"""
+
+import csv
+import logging
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Sequence, Tuple
+
+from database.dates import date_sql
+
+if TYPE_CHECKING:
+    from database.db_manager import DatabaseManager
+
+logger = logging.getLogger(__name__)
+
+# 変更ログを記録するトリガー（init_db.sql。一括処理では停止して record() でまとめて記録する）
+CHANGE_LOG_TRIGGERS = {
+    'grade_entries': (
+        'trg_grade_entries_change_insert',
+        'trg_grade_entries_change_update',
+        'trg_grade_entries_change_delete',
+    ),
+    'course_students': (
+        'trg_course_students_change_insert',
+        'trg_course_students_change_update',
+        'trg_course_students_change_delete',
+    ),
+    'courses': (
+        'trg_courses_change_insert',
+        'trg_courses_change_update',
+        'trg_courses_change_delete',
+    ),
+}
+ALL_CHANGE_LOG_TRIGGERS = tuple(name for names in CHANGE_LOG_TRIGGERS.values() for name in names)
+
+# 差分エクスポートの表ごとの出力ファイル名・行IDの列・出力する列（列名, t を別名とするSQL式）
+# 授業日は YYYY-MM-DD 形式、成績の生徒は生徒番号で出力する（成績一覧のエクスポートと同じ）
+EXPORT_TABLES = {
+    'courses': ('courses_changes.csv', 'course_id', (
+        ('course_id', 't.course_id'),
+        ('course_name', 't.course_name'),
+        ('note1', 't.note1'),
+        ('note2', 't.note2'),
+        ('note3', 't.note3'),
+        ('created_at', 't.created_at'),
+        ('updated_at', 't.updated_at'),
+    )),
+    'course_students': ('course_students_changes.csv', 'id', (
+        ('id', 't.id'),
+        ('course_id', 't.course_id'),
+        ('student_number', 't.student_number'),
+        ('class_number', 't.class_number'),
+        ('student_name', 't.student_name'),
+        ('note1', 't.note1'),
+        ('note2', 't.note2'),
+        ('note3', 't.note3'),
+        ('created_at', 't.created_at'),
+        ('updated_at', 't.updated_at'),
+    )),
+    'grade_entries': ('grade_entries_changes.csv', 'id', (
+        ('id', 't.id'),
+        ('course_id', 't.course_id'),
+        ('entry_date', date_sql('t.entry_date')),
+        ('student_number',
+         '(SELECT student_number FROM students s WHERE s.student_id = t.student_id)'),
+        ('grade1', 't.grade1'),
+        ('grade2', 't.grade2'),
+        ('grade3', 't.grade3'),
+        ('grade4', 't.grade4'),
+        ('grade5', 't.grade5'),
+        ('grade6', 't.grade6'),
+        ('note1', 't.note1'),
+        ('note2', 't.note2'),
+        ('created_at', 't.created_at'),
+        ('updated_at', 't.updated_at'),
+    )),
+}
+
+# 表ごとの変更ログの course_id・entry_date 列に記録する列（トリガーと同じ。database/change_watcher.py で使用）
+SCOPE_COLUMNS = {
+    'grade_entries': ('course_id', 'entry_date'),
+    'course_students': ('course_id', 'NULL'),
+    'courses': ('course_id', 'NULL'),
+}
+
+# 差分CSVの operation 列の値
+OPERATION_UPSERT = 'upsert'
+OPERATION_DELETE = 'delete'
+
+
+@dataclass
+class ChangeExport:
+    """差分エクスポート1回分の結果"""
+    since: int
+    watermark: int
+    paths: Dict[str, Path] = field(default_factory=dict)
+    # 表ごとの (追加・更新された行数, 削除された行数)
+    counts: Dict[str, Tuple[int, int]] = field(default_factory=dict)
+    
+    @property
+    def row_count(self) -> int:
+        """出力した行数の合計"""
+        return sum(upserts + deletes for upserts, deletes in self.counts.values())
+
+
+class ChangeLog:
+    """
+    変更ログの記録・差分エクスポート・古いログの削除を行うクラス
+    
+    成績・名簿・講座の追加・更新・削除はトリガーで change_log に通し番号（seq）付きで
+    記録される。export_changes() は指定した通し番号（ウォーターマーク）より後に変更された
+    行だけを、現在の内容（削除された行は削除の印）で書き出し、次回に渡す通し番号を返す。
+    同じ行の複数回の変更は1行にまとめるため、出力はその間に変更された行数に比例する。
+    """
+    
+    def __init__(self, db: 'DatabaseManager'):
+        """
+        初期化
+        
+        Args:
+            db: データベースマネージャー
+        """
+        self.db = db
+    
+    def watermark(self, readonly: bool = False) -> int:
+        """
+        最後に記録された変更の通し番号（変更がなければ 0）
+        
+        Args:
+            readonly: 読み取り専用接続で読むか
+        """
+        row = self.db.fetch_one(
+            "SELECT seq FROM sqlite_sequence WHERE name = 'change_log'", readonly=readonly
+        )
+        return row['seq'] if row else 0
+    
+    def record(self, table: str, operation: str, condition: str, params: Sequence = ()):
+        """
+        条件に合う行の変更をまとめて記録（トリガーを停止した一括処理用。トランザクションは呼び出し側）
+        
+        削除の記録は削除する前に、追加の記録は追加した後に呼ぶ。
+        
+        Args:
+            table: 表名（CHANGE_LOG_TRIGGERS のいずれか）
+            operation: 'I' 追加 / 'U' 更新 / 'D' 削除
+            condition: 対象の行の条件（WHERE に続けるSQL）
+            params: 条件のパラメータ
+        """
+        id_column = EXPORT_TABLES[table][1]
+        course_column, date_column = SCOPE_COLUMNS[table]
+        self.db.execute_query(
+            f"INSERT INTO change_log (table_name, row_id, operation, course_id, entry_date) "
+            f"SELECT ?, {id_column}, ?, {course_column}, {date_column} FROM {table} WHERE {condition}",
+            (table, operation, *params)
+        )
+    
+    def export_changes(self, output_dir: str, since: int = 0) -> ChangeExport:
+        """
+        通し番号 since より後に変更された成績・名簿・講座を表ごとのCSVに書き出す
+        
+        各CSVの先頭列 operation は 'upsert'（現在の内容で追加・更新）または
+        'delete'（削除。ID以外の列は空）。すべての表を同じスナップショットから読むため、
+        返したウォーターマークまでの変更がちょうど含まれる。
+        
+        Args:
+            output_dir: 出力先のフォルダ
+            since: 前回のエクスポートで返されたウォーターマーク（0 の場合は記録されたすべての変更）
+            
+        Returns:
+            エクスポート結果（watermark を次回の since に渡す）
+        """
+        try:
+            directory = Path(output_dir)
+            directory.mkdir(parents=True, exist_ok=True)
+            
+            with self.db.read_snapshot():
+                result = ChangeExport(since=since, watermark=self.watermark(readonly=True))
+                for table, (file_name, id_column, columns) in EXPORT_TABLES.items():
+                    path = directory / file_name
+                    result.counts[table] = self._export_table(
+                        path, table, id_column, columns, since, result.watermark
+                    )
+                    result.paths[table] = path
+            
+            logger.info(
+                f"差分エクスポート完了: {since} -> {result.watermark} "
+                f"({result.row_count}件) -> {directory}"
+            )
+            return result
+        except Exception as e:
+            logger.error(f"差分エクスポートエラー: {e}")
+            raise
+    
+    def _export_table(self, path: Path, table: str, id_column: str,
+                      columns: Sequence[Tuple[str, str]], since: int,
+                      watermark: int) -> Tuple[int, int]:
+        """1つの表の差分をCSVに書き出し、(追加・更新, 削除) の行数を返す"""
+        query = f"""
+            WITH changed AS (
+                SELECT row_id FROM change_log
+                WHERE seq > ? AND seq <= ? AND table_name = ?
+                GROUP BY row_id
+            )
+            SELECT changed.row_id, t.{id_column} IS NOT NULL AS present,
+                   {', '.join(expression for _, expression in columns)}
+            FROM changed
+            LEFT JOIN {table} t ON t.{id_column} = changed.row_id
+        """
+        upserts = deletes = 0
+        with open(path, 'w', encoding='utf-8-sig', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['operation'] + [name for name, _ in columns])
+            for row in self.db.fetch_iter(query, (since, watermark, table), readonly=True):
+                if row['present']:
+                    upserts += 1
+                    writer.writerow([OPERATION_UPSERT] + ['' if value is None else value
+                                                          for value in tuple(row)[2:]])
+                else:
+                    deletes += 1
+                    writer.writerow([OPERATION_DELETE, row['row_id']] + [''] * (len(columns) - 1))
+        return upserts, deletes
+    
+    def prune(self, upto: int) -> int:
+        """
+        通し番号 upto 以前の変更ログを削除（連携先が upto までの取り込みを終えた後に使用）
+        
+        Args:
+            upto: 削除する最後の通し番号
+            
+        Returns:
+            削除した件数
+        """
+        try:
+            with self.db.transaction():
+                cursor = self.db.execute_query("DELETE FROM change_log WHERE seq <= ?", (upto,))
+            logger.info(f"変更ログを削除しました: {upto} 以前 {cursor.rowcount}件")
+            self.db.maintenance.after_bulk_delete()
+            return cursor.rowcount
+        except Exception as e:
+            logger.error(f"変更ログ削除エラー: {e}")
+            raise
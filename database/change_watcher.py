@@ -0,0 +1,158 @@
+"""他の接続・プロセスによるデータベースの変更の検知（画面の部分的な更新用）"""
+
+import logging
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Dict, List, Optional, Set
+
+from database.dates import from_day_number
+from database.events import CourseChanged, RosterChanged, GradesChanged
+
+if TYPE_CHECKING:
+    from database.db_manager import DatabaseManager
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ChangeSet:
+    """
+    前回の確認以降に他の接続・プロセスがコミットした変更の範囲
+    
+    full が True の場合は範囲が分からない（変更ログが削除された・年度末アーカイブ・
+    データベースの置き換えなど）ため、すべてが変更されたものとして扱う。
+    """
+    since: int
+    watermark: int
+    full: bool = False
+    # 追加・更新・削除された講座のID
+    courses: Set[int] = field(default_factory=set)
+    # 名簿が変更された講座のID
+    rosters: Set[int] = field(default_factory=set)
+    # 成績が変更された講座ID -> 授業日（YYYY-MM-DD）
+    grades: Dict[int, Set[str]] = field(default_factory=dict)
+    
+    def events(self) -> List:
+        """
+        変更の範囲を変更イベント（database.events）に変換
+    
+        Returns:
+            CourseChanged / RosterChanged / GradesChanged のリスト（full の場合は範囲を限らないもの）
+        """
+        if self.full:
+            return [CourseChanged(), RosterChanged(), GradesChanged()]
+        events = [CourseChanged(course_id) for course_id in sorted(self.courses)]
+        events.extend(RosterChanged(course_id) for course_id in sorted(self.rosters))
+        events.extend(
+            GradesChanged(course_id, entry_date)
+            for course_id, dates in sorted(self.grades.items())
+            for entry_date in sorted(dates)
+        )
+        return events
+
+
+class ChangeWatcher:
+    """
+    他の接続・プロセスのコミットを検知し、変更ログから変更された講座・授業日を求めるクラス
+    
+    poll() は通常 PRAGMA data_version（他の接続がコミットすると変わる値）を読むだけで、
+    変わった場合にのみ前回の通し番号より後の変更ログを講座・授業日ごとにまとめて読む。
+    自身の接続による書き込みはコミット時に DatabaseManager.publish() で知らせているため、
+    通し番号を進めるだけで知らせない。
+    """
+    
+    def __init__(self, db: 'DatabaseManager'):
+        """
+        初期化（現在の状態を基準にする）
+        
+        Args:
+            db: データベースマネージャー
+        """
+        self.db = db
+        self._total_changes, self._data_version = db.change_token()
+        self._since = db.changes.watermark()
+        self._archives = self._archive_marker()
+    
+    def _archive_marker(self) -> tuple:
+        """年度末アーカイブの記録（アーカイブは変更ログに記録されないため別に確認する）"""
+        row = self.db.fetch_one(
+            "SELECT COUNT(*) AS count, MAX(archived_at) AS archived_at FROM grade_archives"
+        )
+        return row['count'], row['archived_at']
+    
+    def poll(self) -> Optional[ChangeSet]:
+        """
+        前回の確認以降の他の接続・プロセスによる変更を取得
+        
+        Returns:
+            変更の範囲（変更がない・自身の接続の書き込みのみ・トランザクション中の場合は None）
+        """
+        if self.db.connection.in_transaction:
+            return None
+        
+        try:
+            total_changes, data_version = self.db.change_token()
+            if data_version == self._data_version:
+                if total_changes != self._total_changes:
+                    # 自身の書き込みのみ: 次回に読む範囲に含めない
+                    self._since = self.db.changes.watermark()
+                    self._archives = self._archive_marker()
+                    self._total_changes = total_changes
+                return None
+            
+            since = self._since
+            watermark = self.db.changes.watermark()
+            archives = self._archive_marker()
+            changes = ChangeSet(since=since, watermark=watermark)
+            
+            if archives != self._archives or watermark < since:
+                changes.full = True
+            elif watermark > since:
+                changes.full = not self._read_changes(changes)
+            
+            # 読み取りに失敗した場合は次回に同じ範囲を読み直すよう、最後に基準を更新する
+            self._since = watermark
+            self._archives = archives
+            self._total_changes, self._data_version = total_changes, data_version
+            if not changes.full and not (changes.courses or changes.rosters or changes.grades):
+                # 集計表の再計算・最適化など、表示に関わらない書き込み
+                return None
+            logger.debug(
+                f"他の接続による変更を検知しました: {since} -> {watermark} "
+                f"(全体: {changes.full}, 講座: {len(changes.courses)}, "
+                f"名簿: {len(changes.rosters)}, 成績: {len(changes.grades)}講座)"
+            )
+            return changes
+        except Exception as e:
+            logger.error(f"変更検知エラー: {e}")
+            raise
+    
+    def _read_changes(self, changes: ChangeSet) -> bool:
+        """
+        通し番号の範囲の変更ログを講座・授業日ごとにまとめて changes に加える
+        
+        Returns:
+            範囲の変更ログがすべて残っていたか（古いログが削除されていれば False）
+        """
+        rows = self.db.fetch_all(
+            """
+            SELECT table_name, course_id, entry_date, COUNT(*) AS count
+            FROM change_log
+            WHERE seq > ? AND seq <= ?
+            GROUP BY table_name, course_id, entry_date
+            """,
+            (changes.since, changes.watermark)
+        )
+        logged = 0
+        for row in rows:
+            logged += row['count']
+            course_id = row['course_id']
+            if course_id is None:
+                # 講座・授業日の列がない時点のログ
+                return False
+            if row['table_name'] == 'courses':
+                changes.courses.add(course_id)
+            elif row['table_name'] == 'course_students':
+                changes.rosters.add(course_id)
+            elif row['table_name'] == 'grade_entries':
+                changes.grades.setdefault(course_id, set()).add(from_day_number(row['entry_date']))
+        return logged == changes.watermark - changes.since
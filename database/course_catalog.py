@@ -0,0 +1,120 @@
+"""講座一覧の共有キャッシュ（講座ID・講座名の索引付き）"""
+
+import logging
+import threading
+from typing import TYPE_CHECKING, Dict, Iterable, Optional
+
+from database.events import ChangeBatch
+from models.course import Course
+
+if TYPE_CHECKING:
+    from database.db_manager import DatabaseManager
+
+logger = logging.getLogger(__name__)
+
+# 講座一覧の問い合わせ（CourseRepository.get_all_courses と同じ並び順）
+COURSES_QUERY = """
+    SELECT course_id, course_name, note1, note2, note3,
+           created_at, updated_at
+    FROM courses
+    ORDER BY course_name
+"""
+
+
+class CourseIndex:
+    """
+    ある時点の講座一覧と、講座ID・講座名の索引（読み込んだ後は変更しない）
+    
+    保持している Course は CourseCatalog の利用者全員で共有されるため、変更しないこと。
+    """
+    
+    def __init__(self, courses: Iterable[Course], version: int):
+        """
+        初期化
+        
+        Args:
+            courses: 講座（講座名順）
+            version: 読み込んだ時点の CourseCatalog.version
+        """
+        self.courses = tuple(courses)
+        self.version = version
+        self.by_id: Dict[int, Course] = {course.course_id: course for course in self.courses}
+        self.by_name: Dict[str, Course] = {course.course_name: course for course in self.courses}
+    
+    def __len__(self) -> int:
+        return len(self.courses)
+    
+    def get(self, course_id: int) -> Optional[Course]:
+        """講座IDで講座を取得（存在しない場合は None）"""
+        return self.by_id.get(course_id)
+    
+    def find(self, course_name: str) -> Optional[Course]:
+        """講座名で講座を取得（存在しない場合は None）"""
+        return self.by_name.get(course_name)
+    
+    def course_id(self, course_name: str) -> Optional[int]:
+        """講座名の講座ID（存在しない場合は None。CSVインポートの講座名の解決用）"""
+        course = self.by_name.get(course_name)
+        return course.course_id if course else None
+
+
+class CourseCatalog:
+    """
+    講座一覧を1つだけ保持し、講座ID・講座名での参照に使うクラス
+    
+    講座の変更（変更イベントの CourseChanged）で破棄し、次の参照で読み込み直す。
+    他の接続・プロセスのコミットは PRAGMA data_version で検知して読み込み直す。
+    未コミットの変更を含む可能性があるため、トランザクション中は保持せずに毎回読み込む。
+    """
+    
+    def __init__(self, db: 'DatabaseManager'):
+        """
+        初期化
+        
+        Args:
+            db: データベースマネージャー（events を作成済みであること）
+        """
+        self.db = db
+        # 読み込み直すたびに増える版番号（保持している一覧が古いかどうかの判定用）
+        self.version = 0
+        self.loads = 0
+        self._index: Optional[CourseIndex] = None
+        self._data_version: Optional[int] = None
+        self._lock = threading.Lock()
+        # 画面より先に購読し、画面が講座一覧を読み込み直す時点で破棄済みにする
+        db.events.subscribe(self.on_data_changed)
+    
+    def index(self) -> CourseIndex:
+        """
+        現在の講座一覧と索引を取得
+        
+        Returns:
+            講座一覧と索引（CSVの取り込みなど、同じ処理の中では同じものを使い続ける）
+        """
+        if self.db.connection.in_transaction:
+            return CourseIndex(self._load(), self.version)
+        
+        with self._lock:
+            data_version = self.db.change_token()[1]
+            if self._index is None or data_version != self._data_version:
+                courses = self._load()
+                self.version += 1
+                self._index = CourseIndex(courses, self.version)
+                self._data_version = data_version
+                logger.debug(f"講座一覧を読み込みました ({len(courses)}件, 版: {self.version})")
+            return self._index
+    
+    def _load(self) -> list:
+        """講座一覧をデータベースから読み込む"""
+        self.loads += 1
+        return [Course.from_row(row) for row in self.db.fetch_all(COURSES_QUERY)]
+    
+    def invalidate(self):
+        """保持している講座一覧を破棄（次の参照で読み込み直す）"""
+        with self._lock:
+            self._index = None
+    
+    def on_data_changed(self, changes: ChangeBatch):
+        """講座が変更されたコミットの後に講座一覧を破棄（database.events の購読者）"""
+        if changes.courses_changed():
+            self.invalidate()
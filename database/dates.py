@@ -0,0 +1,60 @@
+"""授業日の格納形式（日番号）と YYYY-MM-DD 形式の文字列との変換"""
+
+from datetime import date
+from functools import lru_cache
+from typing import Union
+
+# 授業日はテーブルに整数の日番号（date.toordinal() と同じ。西暦1年1月1日が1）で格納する。
+# リポジトリの外とは YYYY-MM-DD 形式の文字列でやり取りし、変換はリポジトリで行う。
+# SQL 上では julianday() との差を使って変換する（julianday('0001-01-01') = 1721425.5）
+JULIAN_DAY_OFFSET = 1721424.5
+
+
+def to_day_number(value: Union[str, date]) -> int:
+    """
+    授業日を日番号に変換（クエリのパラメータ用）
+    
+    Args:
+        value: 授業日（YYYY-MM-DD 形式の文字列または date）
+        
+    Returns:
+        日番号
+        
+    Raises:
+        ValueError: 日付として解釈できない場合
+    """
+    if isinstance(value, date):
+        return value.toordinal()
+    try:
+        return date.fromisoformat(value.strip()).toordinal()
+    except (AttributeError, ValueError):
+        raise ValueError(f"不正な日付です: {value}") from None
+
+
+@lru_cache(maxsize=4096)
+def from_day_number(day_number: int) -> str:
+    """
+    日番号を YYYY-MM-DD 形式の文字列に変換（授業日の種類は少ないため結果をキャッシュ）
+    
+    Args:
+        day_number: 日番号
+        
+    Returns:
+        YYYY-MM-DD 形式の文字列
+    """
+    return date.fromordinal(day_number).isoformat()
+
+
+def date_sql(column: str) -> str:
+    """
+    日番号の列を YYYY-MM-DD 形式の文字列にするSQL式（SELECT の列用）
+    
+    WHERE・ORDER BY では変換せずに列を直接使うこと（インデックスが使われなくなる）。
+    
+    Args:
+        column: 日番号の列名（s.entry_date のようにテーブル名・別名を付けてもよい）
+        
+    Returns:
+        SQL式
+    """
+    return f"date({column} + {JULIAN_DAY_OFFSET})"
@@ -1,60 +1,325 @@
+import random
 import sqlite3
-import shutil
+import time
+from contextlib import contextmanager
 from pathlib import Path
 from datetime import datetime
-from typing import Optional, List, Tuple, Any
+from typing import Optional, Iterator, List, Sequence, Tuple, Any
 import logging
 
+from database.query_stats import LockWaitStats, QueryStats
+from database.maintenance import MaintenanceScheduler
+from database.archive import ArchiveManager
+from database.change_log import ChangeLog
+from database.events import EventBus
+from database.course_catalog import CourseCatalog
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# 型変換は列名で指定したときだけ行う（例: SELECT x AS "x [timestamp]"）
+# 宣言型（TIMESTAMP, DATE）による変換は全行・全列で datetime を生成し、
+# 一覧表示やエクスポートでは使われないため行わない。日時は文字列のまま返る
+DETECT_TYPES = sqlite3.PARSE_COLNAMES
+
+# 成績テーブルを STRICT テーブルで作成するため SQLite 3.37 以降が必要
+MIN_SQLITE_VERSION = (3, 37, 0)
+
+# スキーマ定義（init_db.sql）と既存データベース用マイグレーションの配置先
+MIGRATIONS_DIR = Path(__file__).parent / "migrations"
+
+# 成績テーブルの格納形式を切り替えるスクリプト（MIGRATIONS_DIR 内。適用後に init_db.sql を再実行する）
+GRADE_LAYOUT_SCRIPTS = {True: "layout_clustered.sql", False: "layout_rowid.sql"}
+
+# fetch_iter で1回に読み込む行数
+FETCH_BATCH_SIZE = 1000
+
+# 書き込みロックを busy_timeout 秒待っても取得できなかった場合の再試行回数と
+# 最初の再試行までの間隔（秒。再試行のたびに倍にし、利用者どうしで重ならないようずらす）
+BUSY_RETRY_COUNT = 3
+BUSY_RETRY_BACKOFF = 0.2
+
+
+def is_busy_error(error: Exception) -> bool:
+    """他の接続・プロセスがロックを保持していたために失敗したか（database is locked）"""
+    return isinstance(error, sqlite3.OperationalError) and str(error).startswith(
+        ("database is locked", "database is busy")
+    )
+
 
 class DatabaseManager:
     """データベース接続・操作を管理するクラス"""
     
-    def __init__(self, db_path: str = "data/database.db"):
+    def __init__(self, db_path: str = "data/database.db",
+                 query_stats: Optional[QueryStats] = None,
+                 use_wal: bool = True,
+                 clustered_grades: bool = False,
+                 busy_timeout: float = 5.0):
         """
         初期化とデータベース接続
         
         Args:
             db_path: データベースファイルのパス
+            query_stats: クエリ計測（指定時のみ実行時間を記録）
+            use_wal: WALモードを使用するか（WAL時のみ読み取り専用の集計用接続を使用）
+            clustered_grades: 成績を講座・授業日・生徒ID順に格納するか
+                （WITHOUT ROWID テーブル。既存のデータベースは接続時に作り直す）
+            busy_timeout: 他の利用者の書き込みが終わるのを待つ時間（秒。共有フォルダ上の
+                データベースを複数人で使う場合。超えた場合は間隔をあけて再試行する）
         """
         self.db_path = Path(db_path)
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
         self.connection: Optional[sqlite3.Connection] = None
+        self.query_stats: Optional[QueryStats] = query_stats
+        self.use_wal = use_wal
+        self.clustered_grades = clustered_grades
+        self.busy_timeout = busy_timeout
+        self.lock_stats = LockWaitStats()
+        self.wal_enabled = False
+        self._read_connection: Optional[sqlite3.Connection] = None
+        self._snapshot_depth = 0
+        self._transaction_depth = 0
+        self.maintenance = MaintenanceScheduler(self)
+        self.archives = ArchiveManager(self)
+        self.changes = ChangeLog(self)
+        # 変更イベント（publish() したイベントはコミット後に購読者へ知らせる）
+        self.events = EventBus()
+        self._pending_events: List[Any] = []
+        # 講座一覧の共有キャッシュ（講座の変更イベントで破棄する）
+        self.course_catalog = CourseCatalog(self)
         self._connect()
-        self.create_tables()
+        # 他の利用者の書き込み中に起動した場合は待ってから作成・移行する（IF NOT EXISTS のため再実行できる）
+        self._retry_busy(self.create_tables)
     
     def _connect(self):
         """データベースに接続"""
+        if sqlite3.sqlite_version_info < MIN_SQLITE_VERSION:
+            required = '.'.join(map(str, MIN_SQLITE_VERSION))
+            message = f"SQLite {required} 以上が必要です（現在: {sqlite3.sqlite_version}）"
+            logger.error(message)
+            raise RuntimeError(message)
         try:
+            # 書き込みは最初に書き込みロックを取得する（BEGIN IMMEDIATE）。読み取りから始めた
+            # トランザクションが途中で書き込もうとして他の利用者と衝突すると、待たずに失敗するため
             self.connection = sqlite3.connect(
                 self.db_path,
+                timeout=self.busy_timeout,
+                isolation_level="IMMEDIATE",
                 check_same_thread=False,
-                detect_types=sqlite3.PARSE_DECLTYPES | sqlite3.PARSE_COLNAMES
+                detect_types=DETECT_TYPES
             )
             self.connection.row_factory = sqlite3.Row
             # 外部キー制約を有効化
             self.connection.execute("PRAGMA foreign_keys = ON")
+            # 新規作成時のみ有効（既存DBは MaintenanceScheduler が初回VACUUM時に切り替える）
+            self._retry_busy(lambda: self.connection.execute("PRAGMA auto_vacuum = INCREMENTAL"))
+            if self.use_wal:
+                # ネットワーク共有上などWALが使えない場合は従来のジャーナルのまま
+                mode = self._retry_busy(
+                    lambda: self.connection.execute("PRAGMA journal_mode = WAL").fetchone()[0]
+                )
+                self.wal_enabled = str(mode).lower() == "wal"
             logger.info(f"データベースに接続しました: {self.db_path}")
         except sqlite3.Error as e:
             logger.error(f"データベース接続エラー: {e}")
             raise
     
+    def _get_read_connection(self) -> sqlite3.Connection:
+        """
+        集計・エクスポート用の読み取り専用接続を取得（初回に接続）
+        
+        WALモードでは書き込み中でも読み取りがブロックされないため、
+        一覧表示や大量エクスポートを対話的な保存処理と分離できる。
+        WALが使えない場合はメイン接続を返す。
+        """
+        if not self.wal_enabled:
+            return self.connection
+        
+        if self._read_connection is None:
+            try:
+                uri = f"{self.db_path.resolve().as_uri()}?mode=ro"
+                self._read_connection = sqlite3.connect(
+                    uri,
+                    uri=True,
+                    timeout=self.busy_timeout,
+                    check_same_thread=False,
+                    detect_types=DETECT_TYPES
+                )
+                self._read_connection.row_factory = sqlite3.Row
+                logger.info("読み取り専用接続を開きました")
+            except sqlite3.Error as e:
+                logger.error(f"読み取り専用接続エラー: {e}")
+                raise
+        return self._read_connection
+    
+    def _connection_for_read(self, readonly: bool) -> sqlite3.Connection:
+        """読み取りに使う接続を選択"""
+        # 未コミットの変更がある場合は自身の変更が見えるようメイン接続で読む
+        if not readonly or self.connection.in_transaction:
+            return self.connection
+        return self._get_read_connection()
+    
+    def attached_databases(self, readonly: bool = False) -> List[str]:
+        """
+        読み取りに使う接続に ATTACH されているデータベースのスキーマ名
+        
+        Args:
+            readonly: 読み取り専用接続を対象にするか（fetch_all などと同じ指定）
+            
+        Returns:
+            スキーマ名のリスト（main・temp を除く）
+        """
+        rows = self._connection_for_read(readonly).execute("PRAGMA database_list").fetchall()
+        return [row[1] for row in rows if row[1] not in ('main', 'temp')]
+    
+    def attach_database(self, path: Path, schema: str, readonly: bool = False):
+        """
+        別のデータベースファイルを読み取りに使う接続に ATTACH する
+        
+        読み取り専用接続には読み取り専用で ATTACH する。トランザクション中
+        （read_snapshot() のブロック内を含む）は ATTACH できない。
+        
+        Args:
+            path: データベースファイルのパス
+            schema: スキーマ名（英数字と _ のみ。SQL文にそのまま埋め込む）
+            readonly: 読み取り専用接続を対象にするか
+        """
+        connection = self._connection_for_read(readonly)
+        try:
+            if connection is self._read_connection:
+                connection.execute(f"ATTACH DATABASE ? AS {schema}",
+                                   (f"{path.resolve().as_uri()}?mode=ro",))
+            else:
+                connection.execute(f"ATTACH DATABASE ? AS {schema}", (str(path),))
+            logger.info(f"データベースを ATTACH しました: {path} ({schema})")
+        except sqlite3.Error as e:
+            logger.error(f"ATTACH エラー ({path}): {e}")
+            raise
+    
+    def detach_database(self, schema: str, readonly: bool = False):
+        """
+        ATTACH したデータベースを DETACH する
+        
+        ATTACH されていない場合と、トランザクション中で DETACH できない場合は何もしない。
+        
+        Args:
+            schema: スキーマ名
+            readonly: 読み取り専用接続を対象にするか
+        """
+        connection = self._connection_for_read(readonly)
+        if connection.in_transaction or schema not in self.attached_databases(readonly):
+            return
+        connection.execute(f"DETACH DATABASE {schema}")
+    
+    @contextmanager
+    def read_snapshot(self):
+        """
+        読み取り専用接続で1つのスナップショットを保持する（コンテキストマネージャー）
+        
+        ブロック内の readonly=True の読み取りはすべて開始時点の同じ状態を参照し、
+        その間に行われた書き込みの影響を受けない。入れ子で使用した場合は
+        最も外側のスナップショットを共有する。
+        """
+        connection = self._get_read_connection()
+        if connection is self.connection:
+            yield self
+            return
+        
+        if self._snapshot_depth == 0:
+            connection.execute("BEGIN")
+            # 最初の読み取りの時点でスナップショットが確定する
+            connection.execute("SELECT 1 FROM sqlite_master LIMIT 1").fetchall()
+        
+        self._snapshot_depth += 1
+        try:
+            yield self
+        finally:
+            self._snapshot_depth -= 1
+            if self._snapshot_depth == 0:
+                connection.rollback()
+    
     def create_tables(self):
-        """テーブルを作成"""
+        """
+        テーブルを作成
+        
+        既存のデータベースには、PRAGMA user_version より新しい番号の
+        マイグレーション（migrations/NNN_*.sql）を適用してから init_db.sql を実行する。
+        新規作成時は init_db.sql が最新のスキーマなのでマイグレーションは不要。
+        成績テーブルの格納形式が clustered_grades と異なる場合は作り直す。
+        """
         try:
-            init_sql_path = Path(__file__).parent / "migrations" / "init_db.sql"
-            with open(init_sql_path, 'r', encoding='utf-8') as f:
+            migrations = sorted(MIGRATIONS_DIR.glob("[0-9][0-9][0-9]_*.sql"))
+            latest_version = int(migrations[-1].name[:3]) if migrations else 0
+            
+            current_version = self.connection.execute("PRAGMA user_version").fetchone()[0]
+            is_existing = self.connection.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'grade_entries'"
+            ).fetchone() is not None
+            
+            if is_existing:
+                for migration_path in migrations:
+                    if int(migration_path.name[:3]) > current_version:
+                        self._apply_migration(migration_path)
+            
+            with open(MIGRATIONS_DIR / "init_db.sql", 'r', encoding='utf-8') as f:
                 sql_script = f.read()
             
             self.connection.executescript(sql_script)
+            if self.is_grade_layout_clustered() != self.clustered_grades:
+                self._apply_migration(MIGRATIONS_DIR / GRADE_LAYOUT_SCRIPTS[self.clustered_grades],
+                                      update_version=False)
+                # 作り直しで削除されたビュー・トリガー・インデックスを再作成
+                self.connection.executescript(sql_script)
+            if current_version != latest_version:
+                self.connection.execute(f"PRAGMA user_version = {latest_version}")
             self.connection.commit()
             logger.info("テーブルを作成しました")
         except Exception as e:
             logger.error(f"テーブル作成エラー: {e}")
             raise
     
+    def is_grade_layout_clustered(self) -> bool:
+        """成績テーブルが WITHOUT ROWID テーブル（講座・授業日・生徒ID順の格納）か"""
+        row = self.connection.execute(
+            "SELECT wr FROM pragma_table_list WHERE schema = 'main' AND name = 'grade_entries'"
+        ).fetchone()
+        return bool(row and row[0])
+    
+    def _apply_migration(self, migration_path: Path, update_version: bool = True):
+        """
+        マイグレーションを1つのトランザクションで適用
+        
+        テーブルの再作成で参照先が一時的に消えるため、適用中は外部キー制約を無効にし、
+        コミット前に PRAGMA foreign_key_check で整合性を確認する。
+        
+        Args:
+            migration_path: マイグレーションSQLファイルのパス
+            update_version: ファイル名の番号を PRAGMA user_version に記録するか
+                （格納形式の切り替えなど番号のないスクリプトでは False）
+        """
+        with open(migration_path, 'r', encoding='utf-8') as f:
+            sql_script = f.read()
+        
+        self.connection.commit()
+        self.connection.execute("PRAGMA foreign_keys = OFF")
+        try:
+            self.connection.executescript(f"BEGIN;\n{sql_script}")
+            violations = self.connection.execute("PRAGMA foreign_key_check").fetchall()
+            if violations:
+                raise sqlite3.IntegrityError(
+                    f"外部キー制約違反があります: {[tuple(row) for row in violations[:5]]}"
+                )
+            if update_version:
+                self.connection.execute(f"PRAGMA user_version = {int(migration_path.name[:3])}")
+            self.connection.commit()
+            logger.info(f"マイグレーションを適用しました: {migration_path.name}")
+        except Exception:
+            if self.connection.in_transaction:
+                self.connection.rollback()
+            raise
+        finally:
+            self.connection.execute("PRAGMA foreign_keys = ON")
+    
     def backup_database(self, backup_dir: str = "data/backups") -> str:
         """
         データベースをバックアップ
@@ -72,7 +337,13 @@ class DatabaseManager:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             backup_file = backup_path / f"database_backup_{timestamp}.db"
             
-            shutil.copy2(self.db_path, backup_file)
+            # WALモードではファイルコピーだと未チェックポイントの変更が漏れるため
+            # SQLiteのオンラインバックアップAPIを使用
+            backup_connection = sqlite3.connect(backup_file)
+            try:
+                self.connection.backup(backup_connection)
+            finally:
+                backup_connection.close()
             logger.info(f"データベースをバックアップしました: {backup_file}")
             
             return str(backup_file)
@@ -80,6 +351,55 @@ class DatabaseManager:
             logger.error(f"バックアップエラー: {e}")
             raise
     
+    def enable_query_stats(self, slow_threshold_ms: float = 100.0,
+                           slow_log_path: Optional[str] = None) -> QueryStats:
+        """
+        クエリ計測を有効化
+        
+        Args:
+            slow_threshold_ms: スロークエリとして記録する閾値（ミリ秒）
+            slow_log_path: スロークエリログの出力先
+            
+        Returns:
+            クエリ計測オブジェクト
+        """
+        if self.query_stats is None:
+            self.query_stats = QueryStats(slow_threshold_ms, slow_log_path)
+            logger.info(f"クエリ計測を有効化しました (閾値: {slow_threshold_ms}ms)")
+        return self.query_stats
+    
+    def explain_query_plan(self, query: str, params: Tuple = ()) -> List[str]:
+        """
+        EXPLAIN QUERY PLAN の結果を取得
+        
+        Args:
+            query: SQL クエリ
+            params: パラメータ
+            
+        Returns:
+            実行計画の各行（detail列）
+        """
+        rows = self.connection.execute(f"EXPLAIN QUERY PLAN {query}", params).fetchall()
+        return [row['detail'] for row in rows]
+    
+    def _execute(self, query: str, params: Tuple,
+                 connection: Optional[sqlite3.Connection] = None) -> sqlite3.Cursor:
+        """計測なしでクエリを実行"""
+        try:
+            cursor = (connection or self.connection).cursor()
+            cursor.execute(query, params)
+            return cursor
+        except sqlite3.Error as e:
+            logger.error(f"クエリ実行エラー: {e}\nQuery: {query}\nParams: {params}")
+            raise
+    
+    def _record_query(self, query: str, params: Tuple, started: float, rows: int):
+        """クエリ計測が有効な場合に実行時間を記録"""
+        self.query_stats.record(
+            query, params, time.perf_counter() - started, rows,
+            explain=self.explain_query_plan
+        )
+    
     def execute_query(self, query: str, params: Tuple = ()) -> sqlite3.Cursor:
         """
         クエリを実行
@@ -91,52 +411,326 @@ class DatabaseManager:
         Returns:
             カーソルオブジェクト
         """
+        if self.query_stats is None:
+            return self._execute(query, params)
+        
+        started = time.perf_counter()
+        cursor = self._execute(query, params)
+        self._record_query(query, params, started, max(cursor.rowcount, 0))
+        return cursor
+    
+    def execute_many(self, query: str, params_list: List[Tuple]) -> sqlite3.Cursor:
+        """
+        同じクエリを複数のパラメータでまとめて実行
+        
+        Args:
+            query: SQL クエリ
+            params_list: パラメータのリスト
+            
+        Returns:
+            カーソルオブジェクト
+        """
+        started = time.perf_counter()
         try:
             cursor = self.connection.cursor()
-            cursor.execute(query, params)
-            return cursor
+            cursor.executemany(query, params_list)
         except sqlite3.Error as e:
-            logger.error(f"クエリ実行エラー: {e}\nQuery: {query}\nParams: {params}")
+            logger.error(f"クエリ実行エラー: {e}\nQuery: {query}\nRows: {len(params_list)}")
             raise
+        if self.query_stats is not None:
+            self.query_stats.record(
+                query, (), time.perf_counter() - started, max(cursor.rowcount, 0)
+            )
+        return cursor
     
-    def fetch_all(self, query: str, params: Tuple = ()) -> List[sqlite3.Row]:
+    def fetch_all(self, query: str, params: Tuple = (),
+                  readonly: bool = False) -> List[sqlite3.Row]:
         """
         全レコードを取得
         
         Args:
             query: SQL クエリ
             params: パラメータ
+            readonly: 読み取り専用接続で実行するか（集計・エクスポート用）
             
         Returns:
             レコードのリスト
         """
-        cursor = self.execute_query(query, params)
-        return cursor.fetchall()
+        started = time.perf_counter()
+        rows = self._execute(query, params, self._connection_for_read(readonly)).fetchall()
+        if self.query_stats is not None:
+            self._record_query(query, params, started, len(rows))
+        return rows
     
-    def fetch_one(self, query: str, params: Tuple = ()) -> Optional[sqlite3.Row]:
+    def fetch_iter(self, query: str, params: Tuple = (), readonly: bool = False,
+                   batch_size: int = FETCH_BATCH_SIZE) -> Iterator[sqlite3.Row]:
+        """
+        レコードを少しずつ読み込みながら1件ずつ返す（全件をリストにしない）
+        
+        最後まで読み込むか、ジェネレーターを閉じるまでカーソルを保持する。
+        クエリの記録（query_stats）はカーソルを閉じた時点で行う。
+        
+        Args:
+            query: SQL クエリ
+            params: パラメータ
+            readonly: 読み取り専用接続で実行するか（集計・エクスポート用）
+            batch_size: 1回に読み込む行数
+            
+        Yields:
+            レコード
+        """
+        started = time.perf_counter()
+        cursor = self._execute(query, params, self._connection_for_read(readonly))
+        count = 0
+        try:
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                count += len(rows)
+                yield from rows
+        finally:
+            cursor.close()
+            # 途中でジェネレーターを閉じた場合も、それまでに読んだ行数で記録する
+            if self.query_stats is not None:
+                self._record_query(query, params, started, count)
+    
+    def fetch_one(self, query: str, params: Tuple = (),
+                  readonly: bool = False) -> Optional[sqlite3.Row]:
         """
         1レコードを取得
         
         Args:
             query: SQL クエリ
             params: パラメータ
+            readonly: 読み取り専用接続で実行するか（集計・エクスポート用）
             
         Returns:
             レコード（存在しない場合はNone）
         """
-        cursor = self.execute_query(query, params)
-        return cursor.fetchone()
+        started = time.perf_counter()
+        row = self._execute(query, params, self._connection_for_read(readonly)).fetchone()
+        if self.query_stats is not None:
+            self._record_query(query, params, started, 1 if row is not None else 0)
+        return row
+    
+    def change_token(self) -> Tuple[int, int]:
+        """
+        データベースへの書き込みを検知するための値（キャッシュの無効化用）
+        
+        メイン接続で変更した行数の累計（トリガーによる変更を含む）と、他の接続・
+        プロセスのコミットで増える PRAGMA data_version の組。前回と異なれば
+        その間に書き込みがあった。
+        
+        Returns:
+            (変更行数の累計, data_version)
+        """
+        data_version = self.connection.execute("PRAGMA data_version").fetchone()[0]
+        return self.connection.total_changes, data_version
+    
+    @property
+    def in_transaction(self) -> bool:
+        """transaction() のブロック内かどうか"""
+        return self._transaction_depth > 0
+    
+    @contextmanager
+    def transaction(self):
+        """
+        トランザクション（コンテキストマネージャー）
+        
+        最も外側のブロックは BEGIN IMMEDIATE〜COMMIT、入れ子のブロックは SAVEPOINT で実行する。
+        他の利用者が書き込み中の場合は、開始時に書き込みロックを待つ（_begin_write）。
+        例外発生時はそのブロックの変更のみを取り消して例外を再送出する。
+        リポジトリの更新系メソッドはこのブロック内で呼ばれると自身ではコミットせず、
+        最も外側のブロックの終了時にまとめて1回だけコミットされる。
+        
+        使用例:
+            with db.transaction():
+                course_id = course_repo.create_course(course)
+                student_repo.import_from_csv_with_replacement(roster_csv, course_id)
+        """
+        depth = self._transaction_depth
+        savepoint = f"sp_{depth}"
+        pending = len(self._pending_events)
+        
+        if depth == 0:
+            # 暗黙に開始済みのトランザクションがあればそのまま引き継ぐ
+            if not self.connection.in_transaction:
+                self._begin_write()
+        else:
+            self.connection.execute(f"SAVEPOINT {savepoint}")
+        
+        self._transaction_depth += 1
+        try:
+            yield self
+        except BaseException:
+            self._transaction_depth -= 1
+            if depth == 0:
+                self.rollback()
+            else:
+                self.connection.execute(f"ROLLBACK TO SAVEPOINT {savepoint}")
+                self.connection.execute(f"RELEASE SAVEPOINT {savepoint}")
+                # 取り消した変更のイベントは知らせない
+                del self._pending_events[pending:]
+            raise
+        
+        self._transaction_depth -= 1
+        if depth == 0:
+            self.commit()
+        else:
+            self.connection.execute(f"RELEASE SAVEPOINT {savepoint}")
+    
+    @contextmanager
+    def bulk_load(self, table: str, suspend_triggers: Sequence[str] = ()):
+        """
+        大量投入用の一括ロードモード（コンテキストマネージャー）
+        
+        ブロック全体を1つのトランザクションで実行し、その間は外部キー検査を
+        コミット時まで遅延させ、対象テーブルの二次インデックスを削除しておく。
+        終了時にインデックスを再作成してコミットし、統計情報を更新する。
+        例外発生時はロールバックされ、インデックスも元の状態に戻る。
+        transaction() の内側で使用した場合は外側のコミットに含まれる。
+        
+        Args:
+            table: 投入先のテーブル名
+            suspend_triggers: ブロック内で停止するトリガー名（集計表の更新など。
+                停止中の反映は呼び出し側がブロック内でまとめて行う）
+        """
+        # UNIQUE制約の自動インデックス（sqlがNULL）は削除できないため対象外
+        indexes = self.fetch_all(
+            "SELECT name, sql FROM sqlite_master "
+            "WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL",
+            (table,)
+        )
+        
+        started = time.perf_counter()
+        with self.transaction(), self.suspend_triggers(suspend_triggers):
+            self.connection.execute("PRAGMA defer_foreign_keys = ON")
+            for index in indexes:
+                self.connection.execute(f'DROP INDEX "{index["name"]}"')
+            
+            yield self
+            
+            for index in indexes:
+                self.connection.execute(index['sql'])
+        
+        if self.in_transaction:
+            # 外側のトランザクションに含めて統計情報のみ更新
+            self.connection.execute(f'ANALYZE "{table}"')
+        else:
+            self.maintenance.after_bulk_load(table)
+        logger.info(
+            f"一括ロード完了: {table} "
+            f"(インデックス再作成: {len(indexes)}件, {time.perf_counter() - started:.2f}秒)"
+        )
+    
+    @contextmanager
+    def suspend_triggers(self, names: Sequence[str]):
+        """
+        ブロック内でトリガーを停止（コンテキストマネージャー。transaction() の内側で使用）
+        
+        トリガーを削除しておき、終了時に同じ定義で作り直す。トリガーの削除も
+        トランザクションに含まれるため、例外でロールバックされた場合も元に戻る。
+        
+        Args:
+            names: 停止するトリガー名（存在しないものは無視）
+        """
+        triggers = []
+        if names:
+            placeholders = ','.join('?' * len(names))
+            triggers = self.fetch_all(
+                "SELECT name, sql FROM sqlite_master "
+                f"WHERE type = 'trigger' AND name IN ({placeholders})",
+                tuple(names)
+            )
+        for trigger in triggers:
+            self.connection.execute(f'DROP TRIGGER "{trigger["name"]}"')
+        
+        yield
+        
+        for trigger in triggers:
+            self.connection.execute(trigger['sql'])
+    
+    def publish(self, *events):
+        """
+        変更イベントを購読者に知らせる（database.events）
+        
+        トランザクション中はコミットするまでためておき、コミット後にまとめて知らせる。
+        ロールバックした場合は知らせない。
+        
+        Args:
+            events: 変更イベント（CourseChanged / RosterChanged / GradesChanged）
+        """
+        if self.in_transaction or self.connection.in_transaction:
+            self._pending_events.extend(events)
+        else:
+            self.events.publish(events)
+    
+    def _begin_write(self):
+        """
+        書き込みロックを取得してトランザクションを開始
+        
+        busy_timeout 秒待っても取得できなければ間隔をあけて再試行し、
+        待ち時間を lock_stats に記録する。ブロックの処理は開始前のため再試行しても安全。
+        """
+        started = time.perf_counter()
+        self._retry_busy(lambda: self.connection.execute("BEGIN IMMEDIATE"))
+        self.lock_stats.record_wait(time.perf_counter() - started)
+    
+    def _retry_busy(self, action):
+        """
+        ロック待ちで失敗した場合に、間隔を倍にしながら action を再試行
+        
+        Args:
+            action: 実行する処理（失敗しても状態が変わらないもの）
+            
+        Returns:
+            action の戻り値
+            
+        Raises:
+            sqlite3.OperationalError: BUSY_RETRY_COUNT 回再試行しても失敗した場合、
+                またはロック待ち以外のエラーの場合
+        """
+        delay = BUSY_RETRY_BACKOFF
+        for attempt in range(BUSY_RETRY_COUNT + 1):
+            try:
+                return action()
+            except sqlite3.OperationalError as e:
+                if not is_busy_error(e):
+                    raise
+                if attempt == BUSY_RETRY_COUNT:
+                    self.lock_stats.record_failure()
+                    logger.error(f"データベースのロックを取得できませんでした: {e}")
+                    raise
+                self.lock_stats.record_retry()
+                logger.warning(
+                    f"他の利用者が書き込み中のため再試行します ({attempt + 1}/{BUSY_RETRY_COUNT}): {e}"
+                )
+                time.sleep(delay * random.uniform(0.5, 1.5))
+                delay *= 2
     
     def commit(self):
-        """トランザクションをコミット"""
+        """
+        トランザクションをコミット（transaction() のブロック内では何もしない）
+        
+        他の接続が読み取り中でコミットできない場合（WALを使わない場合）は再試行する。
+        コミット後に、トランザクション中に publish() された変更イベントを知らせる。
+        """
+        if self.in_transaction:
+            return
         try:
-            self.connection.commit()
+            self._retry_busy(self.connection.commit)
         except sqlite3.Error as e:
             logger.error(f"コミットエラー: {e}")
             raise
+        
+        events, self._pending_events = self._pending_events, []
+        if events:
+            self.events.publish(events)
     
     def rollback(self):
-        """トランザクションをロールバック"""
+        """トランザクションをロールバック（ためていた変更イベントは破棄する）"""
+        self._pending_events = []
         try:
             self.connection.rollback()
             logger.warning("トランザクションをロールバックしました")
@@ -144,11 +738,28 @@ class DatabaseManager:
             logger.error(f"ロールバックエラー: {e}")
             raise
     
+    def interrupt(self):
+        """
+        実行中のクエリを中断（別のスレッドから呼び出せる）
+        
+        中断されたクエリは sqlite3.OperationalError（interrupted）になる。
+        実行中のクエリがなければ何もしない。
+        """
+        for connection in (self.connection, self._read_connection):
+            if connection is not None:
+                connection.interrupt()
+    
     def close(self):
-        """データベース接続を閉じる"""
+        """データベース接続を閉じる（終了時のメンテナンスを実行）"""
+        if self._read_connection:
+            self._read_connection.close()
+            self._read_connection = None
         if self.connection:
+            self.maintenance.on_close()
             self.connection.close()
             logger.info("データベース接続を閉じました")
+        if self.query_stats:
+            self.query_stats.close()
     
     def __enter__(self):
         """コンテキストマネージャー: with文で使用"""
@@ -0,0 +1,138 @@
+"""講座・名簿・成績の変更イベントと、画面に知らせるためのイベントバス（同じプロセス内）"""
+
+import logging
+from dataclasses import dataclass
+from typing import Callable, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class CourseChanged:
+    """講座が追加・更新・削除された（course_id が None の場合はすべての講座）"""
+    course_id: Optional[int] = None
+
+
+@dataclass(frozen=True)
+class RosterChanged:
+    """講座の名簿が変更された（course_id が None の場合はすべての講座）"""
+    course_id: Optional[int] = None
+
+
+@dataclass(frozen=True)
+class GradesChanged:
+    """
+    成績が変更された
+    
+    course_id が None の場合はすべての講座、entry_date（YYYY-MM-DD）が None の場合は
+    すべての授業日の成績が変更されたものとして扱う。
+    """
+    course_id: Optional[int] = None
+    entry_date: Optional[str] = None
+
+
+class ChangeBatch:
+    """1回のコミット（または他の接続の変更の確認1回）分の変更イベント"""
+    
+    def __init__(self, events: Iterable):
+        """
+        初期化
+        
+        Args:
+            events: 変更イベント（重複は除く）
+        """
+        self.events = tuple(dict.fromkeys(events))
+    
+    def __bool__(self) -> bool:
+        return bool(self.events)
+    
+    def __repr__(self) -> str:
+        return f"ChangeBatch({list(self.events)!r})"
+    
+    def courses_changed(self) -> bool:
+        """講座（講座名などの一覧）が変更されたか"""
+        return any(isinstance(event, CourseChanged) for event in self.events)
+    
+    def roster_changed(self, course_id: Optional[int] = None) -> bool:
+        """
+        名簿が変更されたか
+        
+        Args:
+            course_id: 講座ID（None の場合はいずれかの講座）
+        """
+        return any(
+            isinstance(event, RosterChanged)
+            and (course_id is None or event.course_id is None or event.course_id == course_id)
+            for event in self.events
+        )
+    
+    def grades_changed(self, course_ids: Optional[Iterable[int]] = None,
+                       start_date: Optional[str] = None, end_date: Optional[str] = None) -> bool:
+        """
+        条件に合う授業の成績が変更されたか
+        
+        Args:
+            course_ids: 講座IDの一覧（None の場合はすべての講座）
+            start_date: 期間の開始日（YYYY-MM-DD。None の場合は制限なし）
+            end_date: 期間の終了日（YYYY-MM-DD。None の場合は制限なし）
+        """
+        courses = None if course_ids is None else set(course_ids)
+        return any(
+            isinstance(event, GradesChanged)
+            and (courses is None or event.course_id is None or event.course_id in courses)
+            and (event.entry_date is None or (
+                (start_date is None or event.entry_date >= start_date)
+                and (end_date is None or event.entry_date <= end_date)
+            ))
+            for event in self.events
+        )
+
+
+class EventBus:
+    """
+    変更イベントを購読している画面に知らせるクラス
+    
+    DatabaseManager.publish() はトランザクション中のイベントをためておき、コミットした
+    時点でまとめて publish() する（ロールバックした変更は知らせない）。購読者はコミットした
+    スレッドから同期的に呼ばれる。購読者の例外は記録するだけで、書き込み側には伝えない。
+    """
+    
+    def __init__(self):
+        """初期化"""
+        self._handlers: List[Callable[[ChangeBatch], None]] = []
+    
+    def subscribe(self, handler: Callable[[ChangeBatch], None]):
+        """
+        変更イベントを購読
+        
+        Args:
+            handler: ChangeBatch を受け取る関数
+        """
+        if handler not in self._handlers:
+            self._handlers.append(handler)
+    
+    def unsubscribe(self, handler: Callable[[ChangeBatch], None]):
+        """
+        購読をやめる（購読していなければ何もしない）
+        
+        Args:
+            handler: subscribe() に渡した関数
+        """
+        if handler in self._handlers:
+            self._handlers.remove(handler)
+    
+    def publish(self, events: Iterable):
+        """
+        変更イベントを購読者に知らせる
+        
+        Args:
+            events: 変更イベント（空の場合は何もしない）
+        """
+        batch = ChangeBatch(events)
+        if not batch:
+            return
+        for handler in list(self._handlers):
+            try:
+                handler(batch)
+            except Exception as e:
+                logger.error(f"変更イベント処理エラー ({handler!r}): {e}")
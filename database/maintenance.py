@@ -0,0 +1,212 @@
+"""データベースの定期メンテナンス（統計情報更新・最適化・空き領域の解放）"""
+
+import logging
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, List, Optional
+
+from config.settings import FREELIST_VACUUM_RATIO, FREELIST_VACUUM_MIN_PAGES
+
+if TYPE_CHECKING:
+    from database.db_manager import DatabaseManager
+
+logger = logging.getLogger(__name__)
+
+# PRAGMA auto_vacuum の値
+AUTO_VACUUM_NONE = 0
+AUTO_VACUUM_INCREMENTAL = 2
+
+
+@dataclass
+class MaintenanceRecord:
+    """メンテナンス1回分の実行記録"""
+    task: str
+    started_at: datetime
+    duration: float
+    size_before: int
+    size_after: int
+    detail: str = ""
+    
+    @property
+    def size_saved(self) -> int:
+        """削減されたファイルサイズ（バイト）"""
+        return self.size_before - self.size_after
+    
+    def to_dict(self) -> dict:
+        """辞書形式に変換"""
+        return {
+            'task': self.task,
+            'started_at': self.started_at.isoformat(timespec='seconds'),
+            'duration': self.duration,
+            'size_before': self.size_before,
+            'size_after': self.size_after,
+            'detail': self.detail
+        }
+
+
+class MaintenanceScheduler:
+    """
+    DatabaseManager のイベントに合わせてメンテナンスを実行するクラス
+    
+    - 接続終了時: PRAGMA optimize（必要な統計情報のみ更新）
+    - 一括ロード後: 対象テーブルの ANALYZE
+    - 差し替えインポート後など: 空きページが閾値を超えたら incremental vacuum
+    """
+    
+    def __init__(self, db: 'DatabaseManager',
+                 freelist_ratio: float = FREELIST_VACUUM_RATIO,
+                 freelist_min_pages: int = FREELIST_VACUUM_MIN_PAGES):
+        """
+        初期化
+        
+        Args:
+            db: データベースマネージャー
+            freelist_ratio: 全ページに対する空きページの割合の閾値
+            freelist_min_pages: 空き領域の解放を行う最小の空きページ数
+        """
+        self.db = db
+        self.freelist_ratio = freelist_ratio
+        self.freelist_min_pages = freelist_min_pages
+        self.records: List[MaintenanceRecord] = []
+    
+    def file_size(self) -> int:
+        """データベースファイル（WALファイルを含む）のサイズ（バイト）"""
+        size = 0
+        for suffix in ("", "-wal"):
+            path = Path(f"{self.db.db_path}{suffix}")
+            if path.exists():
+                size += path.stat().st_size
+        return size
+    
+    def _pragma_value(self, name: str) -> int:
+        """値を1つ返すPRAGMAを実行"""
+        return self.db.connection.execute(f"PRAGMA {name}").fetchone()[0]
+    
+    def _run(self, task: str,
+             action: Callable[[], Optional[str]]) -> Optional[MaintenanceRecord]:
+        """
+        タスクを実行し、前後のファイルサイズと所要時間を記録
+        
+        メンテナンスの失敗で本来の処理を止めないよう、エラーはログに記録して None を返す
+        """
+        size_before = self.file_size()
+        started_at = datetime.now()
+        started = time.perf_counter()
+        
+        try:
+            detail = action() or ""
+        except Exception as e:
+            logger.warning(f"メンテナンスエラー ({task}): {e}")
+            return None
+        
+        record = MaintenanceRecord(
+            task=task,
+            started_at=started_at,
+            duration=time.perf_counter() - started,
+            size_before=size_before,
+            size_after=self.file_size(),
+            detail=detail
+        )
+        self.records.append(record)
+        logger.info(
+            f"メンテナンス完了: {task} ({record.duration:.2f}秒, "
+            f"{record.size_before:,} -> {record.size_after:,} bytes){' ' + detail if detail else ''}"
+        )
+        return record
+    
+    def optimize(self) -> Optional[MaintenanceRecord]:
+        """PRAGMA optimize を実行"""
+        def action():
+            self.db.connection.execute("PRAGMA optimize")
+            self.db.commit()
+        return self._run("optimize", action)
+    
+    def analyze(self, table: Optional[str] = None) -> Optional[MaintenanceRecord]:
+        """
+        ANALYZE を実行
+        
+        Args:
+            table: 対象テーブル（Noneの場合はデータベース全体）
+        """
+        def action():
+            self.db.connection.execute(f'ANALYZE "{table}"' if table else "ANALYZE")
+            self.db.commit()
+        return self._run(f"analyze {table}" if table else "analyze", action)
+    
+    def vacuum_if_needed(self, force: bool = False) -> Optional[MaintenanceRecord]:
+        """
+        空きページが閾値を超えていれば解放する
+        
+        auto_vacuum が INCREMENTAL のデータベースは incremental vacuum で解放する。
+        それ以前に作成されたデータベースは、初回のみ auto_vacuum を INCREMENTAL に
+        切り替えて VACUUM する（以降は incremental vacuum で済む）。
+        
+        Args:
+            force: 閾値に関わらず空きページがあれば解放する
+            
+        Returns:
+            実行した場合は実行記録、不要または実行できない場合は None
+        """
+        if self.db.in_transaction:
+            return None
+        
+        freelist_count = self._pragma_value("freelist_count")
+        page_count = self._pragma_value("page_count")
+        if force:
+            if freelist_count == 0 and self._pragma_value("auto_vacuum") == AUTO_VACUUM_INCREMENTAL:
+                return None
+        elif (freelist_count < self.freelist_min_pages
+                or freelist_count < page_count * self.freelist_ratio):
+            return None
+        
+        detail = f"(空きページ {freelist_count}/{page_count})"
+        if self._pragma_value("auto_vacuum") == AUTO_VACUUM_INCREMENTAL:
+            def action():
+                self.db.commit()
+                # execute() では1ステップ（1ページ）しか解放されないため executescript で最後まで実行
+                self.db.connection.executescript("PRAGMA incremental_vacuum;")
+                self._checkpoint()
+                return detail
+            return self._run("incremental_vacuum", action)
+        
+        def action():
+            self.db.commit()
+            self.db.connection.execute(f"PRAGMA auto_vacuum = {AUTO_VACUUM_INCREMENTAL}")
+            self.db.connection.execute("VACUUM")
+            self._checkpoint()
+            return detail
+        return self._run("vacuum", action)
+    
+    def _checkpoint(self):
+        """WALの内容をデータベースファイルに反映して切り詰める"""
+        if self.db.wal_enabled:
+            self.db.connection.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchall()
+    
+    def after_bulk_load(self, table: str):
+        """一括ロード後の処理: 統計情報の更新と空き領域の確認"""
+        self.analyze(table)
+        self.vacuum_if_needed()
+    
+    def after_bulk_delete(self):
+        """差し替えインポートなど大量削除後の処理: 空き領域の確認"""
+        self.vacuum_if_needed()
+    
+    def run_all(self) -> List[MaintenanceRecord]:
+        """
+        手動メンテナンス: 空き領域の解放・ANALYZE・PRAGMA optimize をすべて実行
+        
+        Returns:
+            今回実行したタスクの記録
+        """
+        first = len(self.records)
+        self.vacuum_if_needed(force=True)
+        self.analyze()
+        self.optimize()
+        return self.records[first:]
+    
+    def on_close(self):
+        """接続終了時の処理: 空き領域の確認と PRAGMA optimize"""
+        self.vacuum_if_needed()
+        self.optimize()
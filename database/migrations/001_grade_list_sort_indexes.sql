@@ -0,0 +1,5 @@
+-- 001: grade_list_view から ORDER BY を削除し、並べ替え用の複合インデックスに置き換える
+-- （ビューとインデックスは init_db.sql で再作成される）
+DROP VIEW IF EXISTS grade_list_view;
+DROP INDEX IF EXISTS idx_grade_entries_date;
+DROP INDEX IF EXISTS idx_grade_entries_student;
@@ -0,0 +1,4 @@
+-- 002: UNIQUE 制約のインデックスと先頭列が重複する単一列インデックスを削除する
+-- （成績一覧用の複合インデックスは init_db.sql で作成される）
+DROP INDEX IF EXISTS idx_course_students_course;
+DROP INDEX IF EXISTS idx_grade_entries_course;
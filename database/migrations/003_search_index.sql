@@ -0,0 +1,21 @@
+-- 003: 既存の名簿・成績備考から全文検索インデックスを作成する
+-- （同期用トリガーは init_db.sql で作成される。定義は init_db.sql と同じ）
+CREATE VIRTUAL TABLE IF NOT EXISTS student_search USING fts5(
+    student_number,
+    student_name,
+    content='course_students',
+    content_rowid='id',
+    tokenize='trigram'
+);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS grade_note_search USING fts5(
+    note1,
+    note2,
+    content='grade_entries',
+    content_rowid='id',
+    tokenize='trigram'
+);
+
+-- 備考が NULL の行はトークンを持たないため、rebuild で全行を読んでも索引には載らない
+INSERT INTO student_search (student_search) VALUES ('rebuild');
+INSERT INTO grade_note_search (grade_note_search) VALUES ('rebuild');
@@ -0,0 +1,30 @@
+-- 004: 既存の成績・名簿から入力状況サマリーを作成する
+-- （同期用トリガーは init_db.sql で作成される。テーブル定義は init_db.sql と同じ）
+CREATE TABLE IF NOT EXISTS grade_entry_summary (
+    course_id INTEGER NOT NULL,
+    entry_date DATE NOT NULL,
+    row_count INTEGER NOT NULL DEFAULT 0,
+    entered_count INTEGER NOT NULL DEFAULT 0,
+    roster_size INTEGER NOT NULL DEFAULT 0,
+    last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (course_id, entry_date),
+    FOREIGN KEY (course_id) REFERENCES courses(course_id) ON DELETE CASCADE
+) WITHOUT ROWID;
+
+DELETE FROM grade_entry_summary;
+
+INSERT INTO grade_entry_summary
+    (course_id, entry_date, row_count, entered_count, roster_size, last_updated)
+SELECT
+    ge.course_id,
+    ge.entry_date,
+    COUNT(*),
+    SUM(cs.id IS NOT NULL
+        AND (ge.grade1 IS NOT NULL OR ge.grade2 IS NOT NULL OR ge.grade3 IS NOT NULL
+             OR ge.grade4 IS NOT NULL OR ge.grade5 IS NOT NULL OR ge.grade6 IS NOT NULL)),
+    (SELECT COUNT(*) FROM course_students r WHERE r.course_id = ge.course_id),
+    MAX(COALESCE(ge.updated_at, ge.created_at))
+FROM grade_entries ge
+LEFT JOIN course_students cs
+    ON cs.course_id = ge.course_id AND cs.student_number = ge.student_number
+GROUP BY ge.course_id, ge.entry_date;
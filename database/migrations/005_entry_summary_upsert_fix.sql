@@ -0,0 +1,4 @@
+-- 005: 成績の UPSERT で UNIQUE 制約違反になる入力状況サマリーのトリガーを作り直す
+-- （削除のみ。修正後の定義で init_db.sql が再作成する。サマリーの内容は変わらない）
+DROP TRIGGER IF EXISTS trg_grade_entries_summary_insert;
+DROP TRIGGER IF EXISTS trg_grade_entries_summary_update;
@@ -0,0 +1,129 @@
+-- 006: grade_entries・grade_entry_summary を STRICT テーブルに作り直し、授業日を日番号（整数）にする
+-- （テーブル定義は init_db.sql と同じ。ビュー・トリガー・インデックスは init_db.sql で再作成される）
+--
+-- 授業日の文字列は区切りの '/' と桁数の違い（2024/1/5 など）を YYYY-MM-DD に揃えてから変換する。
+-- 日付として解釈できない行、数値の成績に数値以外が入っている行、揃えた結果同じ講座・
+-- 授業日・生徒になった行のうち更新の古い行は grade_entries_rejected に元の値のまま移す。
+
+-- 授業日を参照するビューとトリガー（テーブルの置き換え中に参照先がなくなるため削除）
+DROP VIEW IF EXISTS grade_list_view;
+DROP TRIGGER IF EXISTS trg_course_students_summary_insert;
+DROP TRIGGER IF EXISTS trg_course_students_summary_delete;
+DROP TRIGGER IF EXISTS trg_course_students_summary_update;
+
+-- 各行の授業日の日番号（解釈できない行は含まない）
+CREATE TEMP TABLE entry_day_numbers AS
+WITH normalized AS (
+    SELECT id, replace(trim(entry_date), '/', '-') AS value
+    FROM grade_entries
+),
+year_split AS (
+    SELECT id,
+           substr(value, 1, instr(value, '-') - 1) AS y,
+           substr(value, instr(value, '-') + 1) AS rest
+    FROM normalized
+),
+parts AS (
+    SELECT id, y,
+           substr(rest, 1, instr(rest, '-') - 1) AS m,
+           substr(rest, instr(rest, '-') + 1) AS d
+    FROM year_split
+),
+iso AS (
+    SELECT id, printf('%04d-%02d-%02d', y, m, d) AS value
+    FROM parts
+    WHERE length(y) BETWEEN 1 AND 4 AND y NOT GLOB '*[^0-9]*'
+      AND length(m) BETWEEN 1 AND 2 AND m NOT GLOB '*[^0-9]*'
+      AND length(d) BETWEEN 1 AND 2 AND d NOT GLOB '*[^0-9]*'
+)
+-- julianday() は 2月30日などを翌月の日付として扱うため、日付に戻して元の値と一致するものだけを使う
+SELECT id, CAST(julianday(value) - 1721424.5 AS INTEGER) AS entry_date
+FROM iso
+WHERE value >= '0001-01-01' AND date(julianday(value)) = value;
+
+CREATE TABLE grade_entries_new (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    course_id INTEGER NOT NULL,
+    entry_date INTEGER NOT NULL CHECK(entry_date BETWEEN 1 AND 3652059),
+    student_number TEXT NOT NULL,
+    grade1 INTEGER CHECK(grade1 IS NULL OR (grade1 >= 0 AND grade1 <= 4)),
+    grade2 INTEGER CHECK(grade2 IS NULL OR (grade2 >= 0 AND grade2 <= 4)),
+    grade3 INTEGER CHECK(grade3 IS NULL OR (grade3 >= 0 AND grade3 <= 4)),
+    grade4 REAL,
+    grade5 REAL,
+    grade6 REAL,
+    note1 TEXT,
+    note2 TEXT,
+    created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+    updated_at TEXT DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (course_id) REFERENCES courses(course_id) ON DELETE CASCADE,
+    UNIQUE(course_id, entry_date, student_number)
+) STRICT;
+
+-- 同じ講座・授業日・生徒の行が複数ある場合は更新の新しい行を残す（先に挿入した行が優先）
+INSERT OR IGNORE INTO grade_entries_new
+    (id, course_id, entry_date, student_number, grade1, grade2, grade3,
+     grade4, grade5, grade6, note1, note2, created_at, updated_at)
+SELECT ge.id, ge.course_id, n.entry_date, ge.student_number, ge.grade1, ge.grade2, ge.grade3,
+       ge.grade4, ge.grade5, ge.grade6, ge.note1, ge.note2, ge.created_at, ge.updated_at
+FROM grade_entries ge
+JOIN entry_day_numbers n ON n.id = ge.id
+WHERE typeof(ge.grade4) IN ('null', 'integer', 'real')
+  AND typeof(ge.grade5) IN ('null', 'integer', 'real')
+  AND typeof(ge.grade6) IN ('null', 'integer', 'real')
+ORDER BY COALESCE(ge.updated_at, ge.created_at) DESC, ge.id DESC;
+
+-- 移せなかった行
+CREATE TABLE grade_entries_rejected AS
+SELECT * FROM grade_entries
+WHERE id NOT IN (SELECT id FROM grade_entries_new);
+
+-- grade_entries_rejected に移した行の備考を全文検索の索引から除く（索引の rowid は成績ID）
+INSERT INTO grade_note_search (grade_note_search, rowid, note1, note2)
+SELECT 'delete', id, note1, note2
+FROM grade_entries_rejected
+WHERE note1 IS NOT NULL OR note2 IS NOT NULL;
+
+-- 削除済みの成績IDを再利用しないよう、AUTOINCREMENT の採番位置を引き継ぐ
+CREATE TEMP TABLE grade_entries_sequence AS
+SELECT seq FROM sqlite_sequence WHERE name = 'grade_entries';
+
+DROP TABLE grade_entries;
+ALTER TABLE grade_entries_new RENAME TO grade_entries;
+
+UPDATE sqlite_sequence
+SET seq = MAX(seq, (SELECT COALESCE(MAX(seq), 0) FROM temp.grade_entries_sequence))
+WHERE name = 'grade_entries';
+
+DROP TABLE temp.entry_day_numbers;
+DROP TABLE temp.grade_entries_sequence;
+
+-- 入力状況サマリー（授業日が日番号になるため作り直して再集計する。集計内容は 004 と同じ）
+DROP TABLE IF EXISTS grade_entry_summary;
+
+CREATE TABLE grade_entry_summary (
+    course_id INTEGER NOT NULL,
+    entry_date INTEGER NOT NULL,
+    row_count INTEGER NOT NULL DEFAULT 0,
+    entered_count INTEGER NOT NULL DEFAULT 0,
+    roster_size INTEGER NOT NULL DEFAULT 0,
+    last_updated TEXT DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (course_id, entry_date),
+    FOREIGN KEY (course_id) REFERENCES courses(course_id) ON DELETE CASCADE
+) STRICT, WITHOUT ROWID;
+
+INSERT INTO grade_entry_summary
+    (course_id, entry_date, row_count, entered_count, roster_size, last_updated)
+SELECT
+    ge.course_id,
+    ge.entry_date,
+    COUNT(*),
+    SUM(cs.id IS NOT NULL
+        AND (ge.grade1 IS NOT NULL OR ge.grade2 IS NOT NULL OR ge.grade3 IS NOT NULL
+             OR ge.grade4 IS NOT NULL OR ge.grade5 IS NOT NULL OR ge.grade6 IS NOT NULL)),
+    (SELECT COUNT(*) FROM course_students r WHERE r.course_id = ge.course_id),
+    MAX(COALESCE(ge.updated_at, ge.created_at))
+FROM grade_entries ge
+LEFT JOIN course_students cs
+    ON cs.course_id = ge.course_id AND cs.student_number = ge.student_number
+GROUP BY ge.course_id, ge.entry_date;
@@ -0,0 +1,105 @@
+-- 007: 生徒番号ごとの整数の生徒ID（students）を作り、course_students・grade_entries を
+-- 生徒IDで参照するよう作り直す
+-- （テーブル定義は init_db.sql と同じ。ビュー・トリガー・インデックスは init_db.sql で再作成される）
+--
+-- 生徒IDは名簿・成績に現れる生徒番号に生徒番号順で割り当てる。名簿にない生徒の成績も
+-- 生徒IDを割り当てて残す（これまでどおり名簿に登録されると成績一覧に表示される）。
+-- 生徒番号は前後の空白も含めてそのまま比較する（空白だけが異なる番号は別の生徒になり、
+-- これまでの名簿と成績の対応付けと変わらない）。
+-- 行の内容・ID は変わらないため、全文検索の索引と入力状況サマリーは作り直さない。
+
+-- 生徒番号を参照するビューとトリガー（テーブルの置き換え中に参照先がなくなるため削除）
+DROP VIEW IF EXISTS grade_list_view;
+DROP TRIGGER IF EXISTS trg_grade_entries_summary_insert;
+DROP TRIGGER IF EXISTS trg_grade_entries_summary_delete;
+DROP TRIGGER IF EXISTS trg_grade_entries_summary_update;
+DROP TRIGGER IF EXISTS trg_course_students_summary_insert;
+DROP TRIGGER IF EXISTS trg_course_students_summary_delete;
+DROP TRIGGER IF EXISTS trg_course_students_summary_update;
+
+CREATE TABLE students (
+    student_id INTEGER PRIMARY KEY,
+    student_number TEXT NOT NULL UNIQUE
+) STRICT;
+
+INSERT INTO students (student_number)
+SELECT student_number FROM course_students
+UNION
+SELECT student_number FROM grade_entries
+ORDER BY 1;
+
+-- 削除済みのIDを再利用しないよう、AUTOINCREMENT の採番位置を引き継ぐ
+CREATE TEMP TABLE saved_sequence AS
+SELECT name, seq FROM sqlite_sequence WHERE name IN ('course_students', 'grade_entries');
+
+-- 名簿
+CREATE TABLE course_students_new (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    course_id INTEGER NOT NULL,
+    student_id INTEGER NOT NULL,
+    student_number TEXT NOT NULL,
+    class_number TEXT,
+    student_name TEXT NOT NULL,
+    note1 TEXT,
+    note2 TEXT,
+    note3 TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (course_id) REFERENCES courses(course_id) ON DELETE CASCADE,
+    FOREIGN KEY (student_id) REFERENCES students(student_id),
+    UNIQUE(course_id, student_number)
+);
+
+INSERT INTO course_students_new
+    (id, course_id, student_id, student_number, class_number, student_name,
+     note1, note2, note3, created_at, updated_at)
+SELECT cs.id, cs.course_id, s.student_id, cs.student_number, cs.class_number, cs.student_name,
+       cs.note1, cs.note2, cs.note3, cs.created_at, cs.updated_at
+FROM course_students cs
+JOIN students s ON s.student_number = cs.student_number;
+
+DROP TABLE course_students;
+ALTER TABLE course_students_new RENAME TO course_students;
+
+-- 成績
+CREATE TABLE grade_entries_new (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    course_id INTEGER NOT NULL,
+    entry_date INTEGER NOT NULL CHECK(entry_date BETWEEN 1 AND 3652059),
+    student_id INTEGER NOT NULL,
+    grade1 INTEGER CHECK(grade1 IS NULL OR (grade1 >= 0 AND grade1 <= 4)),
+    grade2 INTEGER CHECK(grade2 IS NULL OR (grade2 >= 0 AND grade2 <= 4)),
+    grade3 INTEGER CHECK(grade3 IS NULL OR (grade3 >= 0 AND grade3 <= 4)),
+    grade4 REAL,
+    grade5 REAL,
+    grade6 REAL,
+    note1 TEXT,
+    note2 TEXT,
+    created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+    updated_at TEXT DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (course_id) REFERENCES courses(course_id) ON DELETE CASCADE,
+    FOREIGN KEY (student_id) REFERENCES students(student_id),
+    UNIQUE(course_id, entry_date, student_id)
+) STRICT;
+
+INSERT INTO grade_entries_new
+    (id, course_id, entry_date, student_id, grade1, grade2, grade3,
+     grade4, grade5, grade6, note1, note2, created_at, updated_at)
+SELECT ge.id, ge.course_id, ge.entry_date, s.student_id, ge.grade1, ge.grade2, ge.grade3,
+       ge.grade4, ge.grade5, ge.grade6, ge.note1, ge.note2, ge.created_at, ge.updated_at
+FROM grade_entries ge
+JOIN students s ON s.student_number = ge.student_number;
+
+DROP TABLE grade_entries;
+ALTER TABLE grade_entries_new RENAME TO grade_entries;
+
+UPDATE sqlite_sequence
+SET seq = MAX(seq, (SELECT seq FROM temp.saved_sequence s WHERE s.name = sqlite_sequence.name))
+WHERE name IN (SELECT name FROM temp.saved_sequence);
+
+-- 行がなく採番位置が引き継がれなかったテーブル
+INSERT INTO sqlite_sequence (name, seq)
+SELECT name, seq FROM temp.saved_sequence
+WHERE name NOT IN (SELECT name FROM sqlite_sequence);
+
+DROP TABLE temp.saved_sequence;
@@ -0,0 +1,5 @@
+-- 008: 成績に行バージョン（row_version）を追加する
+-- 成績入力画面は読み込んだ時点の行バージョンを条件に更新し、その間に他の利用者が
+-- 保存・削除していた場合は上書きせずに競合として知らせる（楽観的排他制御）
+-- 既存の成績は 1 から始める（init_db.sql と同じく最後の列に追加される）
+ALTER TABLE grade_entries ADD COLUMN row_version INTEGER NOT NULL DEFAULT 1;
@@ -0,0 +1,25 @@
+-- 009: 変更ログに変更された行の講座・授業日を記録する
+-- 他のプロセスの書き込みを検知したとき、画面は変更された講座・授業日の表示だけを更新する
+-- （database/change_watcher.py）。削除された行の講座も分かるよう、トリガーで記録する
+-- 変更ログの導入前のデータベースでは先に元の形で作成する（列は init_db.sql と同じく最後に追加される）
+CREATE TABLE IF NOT EXISTS change_log (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    table_name TEXT NOT NULL,
+    row_id INTEGER NOT NULL,
+    operation TEXT NOT NULL CHECK(operation IN ('I', 'U', 'D')),
+    changed_at TEXT DEFAULT CURRENT_TIMESTAMP
+) STRICT;
+
+ALTER TABLE change_log ADD COLUMN course_id INTEGER;
+ALTER TABLE change_log ADD COLUMN entry_date INTEGER;
+
+-- 講座・授業日を記録するトリガーは init_db.sql で作り直す
+DROP TRIGGER IF EXISTS trg_grade_entries_change_insert;
+DROP TRIGGER IF EXISTS trg_grade_entries_change_update;
+DROP TRIGGER IF EXISTS trg_grade_entries_change_delete;
+DROP TRIGGER IF EXISTS trg_course_students_change_insert;
+DROP TRIGGER IF EXISTS trg_course_students_change_update;
+DROP TRIGGER IF EXISTS trg_course_students_change_delete;
+DROP TRIGGER IF EXISTS trg_courses_change_insert;
+DROP TRIGGER IF EXISTS trg_courses_change_update;
+DROP TRIGGER IF EXISTS trg_courses_change_delete;
@@ -9,10 +9,18 @@ CREATE TABLE IF NOT EXISTS courses (
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
--- 講座生徒名簿テーブル
+-- 生徒テーブル（生徒番号ごとの整数の生徒ID。名簿・成績は生徒番号ではなく生徒IDで参照する）
+-- 行は削除しない（名簿を差し替えても生徒IDが変わらず、名簿にない生徒の成績もそのまま残る）
+CREATE TABLE IF NOT EXISTS students (
+    student_id INTEGER PRIMARY KEY,
+    student_number TEXT NOT NULL UNIQUE
+) STRICT;
+
+-- 講座生徒名簿テーブル（student_id は student_number の生徒ID。リポジトリで設定する）
 CREATE TABLE IF NOT EXISTS course_students (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
     course_id INTEGER NOT NULL,
+    student_id INTEGER NOT NULL,
     student_number TEXT NOT NULL,
     class_number TEXT,
     student_name TEXT NOT NULL,
@@ -22,15 +30,19 @@ CREATE TABLE IF NOT EXISTS course_students (
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     FOREIGN KEY (course_id) REFERENCES courses(course_id) ON DELETE CASCADE,
+    FOREIGN KEY (student_id) REFERENCES students(student_id),
     UNIQUE(course_id, student_number)
 );
 
--- 成績入力テーブル
+-- 成績入力テーブル（STRICT: 宣言と異なる型の値は格納できない）
+-- entry_date: 授業日の日番号（date.toordinal() と同じ整数。database/dates.py で変換）
+-- student_id: 生徒ID（生徒番号は students から引く）
+-- row_version: 保存のたびに1増える行バージョン（成績入力画面は読み込んだ時点の値を条件に更新する）
 CREATE TABLE IF NOT EXISTS grade_entries (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
     course_id INTEGER NOT NULL,
-    entry_date DATE NOT NULL,
-    student_number TEXT NOT NULL,
+    entry_date INTEGER NOT NULL CHECK(entry_date BETWEEN 1 AND 3652059),
+    student_id INTEGER NOT NULL,
     grade1 INTEGER CHECK(grade1 IS NULL OR (grade1 >= 0 AND grade1 <= 4)),
     grade2 INTEGER CHECK(grade2 IS NULL OR (grade2 >= 0 AND grade2 <= 4)),
     grade3 INTEGER CHECK(grade3 IS NULL OR (grade3 >= 0 AND grade3 <= 4)),
@@ -39,23 +51,30 @@ CREATE TABLE IF NOT EXISTS grade_entries (
     grade6 REAL,
     note1 TEXT,
     note2 TEXT,
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+    updated_at TEXT DEFAULT CURRENT_TIMESTAMP,
+    row_version INTEGER NOT NULL DEFAULT 1,
     FOREIGN KEY (course_id) REFERENCES courses(course_id) ON DELETE CASCADE,
-    UNIQUE(course_id, entry_date, student_number)
-);
+    FOREIGN KEY (student_id) REFERENCES students(student_id),
+    UNIQUE(course_id, entry_date, student_id)
+) STRICT;
 
 -- インデックス作成
-CREATE INDEX IF NOT EXISTS idx_course_students_course ON course_students(course_id);
-CREATE INDEX IF NOT EXISTS idx_grade_entries_course ON grade_entries(course_id);
-CREATE INDEX IF NOT EXISTS idx_grade_entries_date ON grade_entries(entry_date);
-CREATE INDEX IF NOT EXISTS idx_grade_entries_student ON grade_entries(student_number);
+-- 講座IDでの検索は UNIQUE 制約のインデックス（先頭列が course_id）で行う
+-- 成績一覧の名簿結合用（生徒番号・生徒名・クラスをテーブルを読まずに取得し、クラスの絞り込みもインデックス上で行う）
+CREATE INDEX IF NOT EXISTS idx_course_students_list ON course_students(course_id, student_id, class_number, student_name, student_number);
+-- 成績一覧の並べ替え用（ORDER BY の列順と一致させ、一時B-treeでのソートを避ける）
+CREATE INDEX IF NOT EXISTS idx_grade_entries_date_course ON grade_entries(entry_date, course_id, student_id);
+CREATE INDEX IF NOT EXISTS idx_grade_entries_student_date ON grade_entries(student_id, entry_date, course_id);
 
 -- 成績一覧ビュー
+-- 並べ替えは呼び出し側で行う。course_id は grade_entries 側の列を公開し、
+-- ORDER BY に grade_entries のインデックスが使われるようにする
+-- （名簿とは講座ID・生徒IDで結合し、生徒番号は名簿のインデックスから取得する）
 CREATE VIEW IF NOT EXISTS grade_list_view AS
 SELECT 
     ge.id,
-    c.course_id,
+    ge.course_id,
     c.course_name,
     ge.entry_date,
     cs.student_number,
@@ -74,5 +93,324 @@ SELECT
 FROM grade_entries ge
 JOIN courses c ON ge.course_id = c.course_id
 JOIN course_students cs ON ge.course_id = cs.course_id 
-    AND ge.student_number = cs.student_number
-ORDER BY c.course_name, ge.entry_date, cs.student_number;
+    AND ge.student_id = cs.student_id;
+
+-- 全文検索（trigram: 3文字以上の部分一致をインデックスで検索）
+-- 生徒番号・氏名（名簿）
+CREATE VIRTUAL TABLE IF NOT EXISTS student_search USING fts5(
+    student_number,
+    student_name,
+    content='course_students',
+    content_rowid='id',
+    tokenize='trigram'
+);
+
+CREATE TRIGGER IF NOT EXISTS trg_course_students_search_insert
+AFTER INSERT ON course_students
+BEGIN
+    INSERT INTO student_search (rowid, student_number, student_name)
+    VALUES (new.id, new.student_number, new.student_name);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_course_students_search_delete
+AFTER DELETE ON course_students
+BEGIN
+    INSERT INTO student_search (student_search, rowid, student_number, student_name)
+    VALUES ('delete', old.id, old.student_number, old.student_name);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_course_students_search_update
+AFTER UPDATE OF student_number, student_name ON course_students
+BEGIN
+    INSERT INTO student_search (student_search, rowid, student_number, student_name)
+    VALUES ('delete', old.id, old.student_number, old.student_name);
+    INSERT INTO student_search (rowid, student_number, student_name)
+    VALUES (new.id, new.student_number, new.student_name);
+END;
+
+-- 成績の備考（備考のある行のみ索引に登録し、成績入力時の負荷を抑える）
+CREATE VIRTUAL TABLE IF NOT EXISTS grade_note_search USING fts5(
+    note1,
+    note2,
+    content='grade_entries',
+    content_rowid='id',
+    tokenize='trigram'
+);
+
+CREATE TRIGGER IF NOT EXISTS trg_grade_entries_search_insert
+AFTER INSERT ON grade_entries
+WHEN new.note1 IS NOT NULL OR new.note2 IS NOT NULL
+BEGIN
+    INSERT INTO grade_note_search (rowid, note1, note2)
+    VALUES (new.id, new.note1, new.note2);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_grade_entries_search_delete
+AFTER DELETE ON grade_entries
+WHEN old.note1 IS NOT NULL OR old.note2 IS NOT NULL
+BEGIN
+    INSERT INTO grade_note_search (grade_note_search, rowid, note1, note2)
+    VALUES ('delete', old.id, old.note1, old.note2);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_grade_entries_search_update
+AFTER UPDATE OF note1, note2 ON grade_entries
+BEGIN
+    INSERT INTO grade_note_search (grade_note_search, rowid, note1, note2)
+    SELECT 'delete', old.id, old.note1, old.note2
+    WHERE old.note1 IS NOT NULL OR old.note2 IS NOT NULL;
+    INSERT INTO grade_note_search (rowid, note1, note2)
+    SELECT new.id, new.note1, new.note2
+    WHERE new.note1 IS NOT NULL OR new.note2 IS NOT NULL;
+END;
+
+-- 入力状況サマリー（講座・授業日ごと。成績行を読まずに入力状況を表示するためトリガーで更新）
+-- row_count: 成績行の数（0になったら行を削除）
+-- entered_count: 名簿の生徒のうち成績1〜6のいずれかが入力済みの人数
+-- roster_size: 講座の名簿の人数
+-- entry_date は grade_entries と同じ日番号
+CREATE TABLE IF NOT EXISTS grade_entry_summary (
+    course_id INTEGER NOT NULL,
+    entry_date INTEGER NOT NULL,
+    row_count INTEGER NOT NULL DEFAULT 0,
+    entered_count INTEGER NOT NULL DEFAULT 0,
+    roster_size INTEGER NOT NULL DEFAULT 0,
+    last_updated TEXT DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (course_id, entry_date),
+    FOREIGN KEY (course_id) REFERENCES courses(course_id) ON DELETE CASCADE
+) STRICT, WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_grade_entry_summary_date ON grade_entry_summary(entry_date, course_id);
+
+-- サマリー行の追加は INSERT OR IGNORE を使わない（トリガー内の衝突処理は元の文の指定で
+-- 上書きされ、成績の UPSERT（ON CONFLICT DO UPDATE）から呼ばれると UNIQUE 制約違反になる）
+
+CREATE TRIGGER IF NOT EXISTS trg_grade_entries_summary_insert
+AFTER INSERT ON grade_entries
+BEGIN
+    INSERT INTO grade_entry_summary (course_id, entry_date, roster_size)
+    SELECT new.course_id, new.entry_date,
+           (SELECT COUNT(*) FROM course_students WHERE course_id = new.course_id)
+    WHERE NOT EXISTS (SELECT 1 FROM grade_entry_summary
+                      WHERE course_id = new.course_id AND entry_date = new.entry_date);
+    UPDATE grade_entry_summary
+    SET row_count = row_count + 1,
+        entered_count = entered_count + (
+            (new.grade1 IS NOT NULL OR new.grade2 IS NOT NULL OR new.grade3 IS NOT NULL
+             OR new.grade4 IS NOT NULL OR new.grade5 IS NOT NULL OR new.grade6 IS NOT NULL)
+            AND EXISTS (SELECT 1 FROM course_students
+                        WHERE course_id = new.course_id AND student_id = new.student_id)
+        ),
+        last_updated = CURRENT_TIMESTAMP
+    WHERE course_id = new.course_id AND entry_date = new.entry_date;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_grade_entries_summary_delete
+AFTER DELETE ON grade_entries
+BEGIN
+    UPDATE grade_entry_summary
+    SET row_count = row_count - 1,
+        entered_count = entered_count - (
+            (old.grade1 IS NOT NULL OR old.grade2 IS NOT NULL OR old.grade3 IS NOT NULL
+             OR old.grade4 IS NOT NULL OR old.grade5 IS NOT NULL OR old.grade6 IS NOT NULL)
+            AND EXISTS (SELECT 1 FROM course_students
+                        WHERE course_id = old.course_id AND student_id = old.student_id)
+        ),
+        last_updated = CURRENT_TIMESTAMP
+    WHERE course_id = old.course_id AND entry_date = old.entry_date;
+    DELETE FROM grade_entry_summary
+    WHERE course_id = old.course_id AND entry_date = old.entry_date AND row_count <= 0;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_grade_entries_summary_update
+AFTER UPDATE OF course_id, entry_date, student_id,
+    grade1, grade2, grade3, grade4, grade5, grade6 ON grade_entries
+BEGIN
+    UPDATE grade_entry_summary
+    SET row_count = row_count - 1,
+        entered_count = entered_count - (
+            (old.grade1 IS NOT NULL OR old.grade2 IS NOT NULL OR old.grade3 IS NOT NULL
+             OR old.grade4 IS NOT NULL OR old.grade5 IS NOT NULL OR old.grade6 IS NOT NULL)
+            AND EXISTS (SELECT 1 FROM course_students
+                        WHERE course_id = old.course_id AND student_id = old.student_id)
+        )
+    WHERE course_id = old.course_id AND entry_date = old.entry_date;
+    INSERT INTO grade_entry_summary (course_id, entry_date, roster_size)
+    SELECT new.course_id, new.entry_date,
+           (SELECT COUNT(*) FROM course_students WHERE course_id = new.course_id)
+    WHERE NOT EXISTS (SELECT 1 FROM grade_entry_summary
+                      WHERE course_id = new.course_id AND entry_date = new.entry_date);
+    UPDATE grade_entry_summary
+    SET row_count = row_count + 1,
+        entered_count = entered_count + (
+            (new.grade1 IS NOT NULL OR new.grade2 IS NOT NULL OR new.grade3 IS NOT NULL
+             OR new.grade4 IS NOT NULL OR new.grade5 IS NOT NULL OR new.grade6 IS NOT NULL)
+            AND EXISTS (SELECT 1 FROM course_students
+                        WHERE course_id = new.course_id AND student_id = new.student_id)
+        ),
+        last_updated = CURRENT_TIMESTAMP
+    WHERE course_id = new.course_id AND entry_date = new.entry_date;
+    DELETE FROM grade_entry_summary
+    WHERE course_id = old.course_id AND entry_date = old.entry_date AND row_count <= 0;
+END;
+
+-- 名簿の増減: 人数と、その生徒の入力済み件数を授業日ごとに反映
+CREATE TRIGGER IF NOT EXISTS trg_course_students_summary_insert
+AFTER INSERT ON course_students
+BEGIN
+    UPDATE grade_entry_summary
+    SET roster_size = roster_size + 1,
+        entered_count = entered_count + EXISTS (
+            SELECT 1 FROM grade_entries g
+            WHERE g.course_id = new.course_id
+              AND g.entry_date = grade_entry_summary.entry_date
+              AND g.student_id = new.student_id
+              AND (g.grade1 IS NOT NULL OR g.grade2 IS NOT NULL OR g.grade3 IS NOT NULL
+                   OR g.grade4 IS NOT NULL OR g.grade5 IS NOT NULL OR g.grade6 IS NOT NULL)
+        )
+    WHERE course_id = new.course_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_course_students_summary_delete
+AFTER DELETE ON course_students
+BEGIN
+    UPDATE grade_entry_summary
+    SET roster_size = roster_size - 1,
+        entered_count = entered_count - EXISTS (
+            SELECT 1 FROM grade_entries g
+            WHERE g.course_id = old.course_id
+              AND g.entry_date = grade_entry_summary.entry_date
+              AND g.student_id = old.student_id
+              AND (g.grade1 IS NOT NULL OR g.grade2 IS NOT NULL OR g.grade3 IS NOT NULL
+                   OR g.grade4 IS NOT NULL OR g.grade5 IS NOT NULL OR g.grade6 IS NOT NULL)
+        )
+    WHERE course_id = old.course_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_course_students_summary_update
+AFTER UPDATE OF course_id, student_id ON course_students
+BEGIN
+    UPDATE grade_entry_summary
+    SET roster_size = roster_size - 1,
+        entered_count = entered_count - EXISTS (
+            SELECT 1 FROM grade_entries g
+            WHERE g.course_id = old.course_id
+              AND g.entry_date = grade_entry_summary.entry_date
+              AND g.student_id = old.student_id
+              AND (g.grade1 IS NOT NULL OR g.grade2 IS NOT NULL OR g.grade3 IS NOT NULL
+                   OR g.grade4 IS NOT NULL OR g.grade5 IS NOT NULL OR g.grade6 IS NOT NULL)
+        )
+    WHERE course_id = old.course_id;
+    UPDATE grade_entry_summary
+    SET roster_size = roster_size + 1,
+        entered_count = entered_count + EXISTS (
+            SELECT 1 FROM grade_entries g
+            WHERE g.course_id = new.course_id
+              AND g.entry_date = grade_entry_summary.entry_date
+              AND g.student_id = new.student_id
+              AND (g.grade1 IS NOT NULL OR g.grade2 IS NOT NULL OR g.grade3 IS NOT NULL
+                   OR g.grade4 IS NOT NULL OR g.grade5 IS NOT NULL OR g.grade6 IS NOT NULL)
+        )
+    WHERE course_id = new.course_id;
+END;
+
+-- 年度末アーカイブ（database/archive.py）の一覧
+-- file_name: アーカイブのファイル名（作業用データベースと同じフォルダに置く）
+-- start_date, end_date: 年度の初日・末日の日番号
+-- course_count, grade_count: アーカイブ内の講座・成績の件数
+CREATE TABLE IF NOT EXISTS grade_archives (
+    academic_year INTEGER PRIMARY KEY,
+    file_name TEXT NOT NULL,
+    start_date INTEGER NOT NULL,
+    end_date INTEGER NOT NULL,
+    course_count INTEGER NOT NULL DEFAULT 0,
+    grade_count INTEGER NOT NULL DEFAULT 0,
+    archived_at TEXT DEFAULT CURRENT_TIMESTAMP
+) STRICT;
+
+-- 変更ログ（差分エクスポート用。database/change_log.py）
+-- 成績・名簿・講座の行の追加・更新・削除をトリガーで記録する
+-- seq: 通し番号（AUTOINCREMENT のため単調増加で、古いログを削除しても再利用しない）
+-- table_name: 変更された表, row_id: その行のID（成績は id, 名簿は id, 講座は course_id）
+-- operation: 'I' 追加 / 'U' 更新 / 'D' 削除
+-- course_id: 変更された行の講座, entry_date: 成績の授業日（他の表は NULL。
+-- 画面の部分的な更新用。database/change_watcher.py）
+CREATE TABLE IF NOT EXISTS change_log (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    table_name TEXT NOT NULL,
+    row_id INTEGER NOT NULL,
+    operation TEXT NOT NULL CHECK(operation IN ('I', 'U', 'D')),
+    changed_at TEXT DEFAULT CURRENT_TIMESTAMP,
+    course_id INTEGER,
+    entry_date INTEGER
+) STRICT;
+
+CREATE TRIGGER IF NOT EXISTS trg_grade_entries_change_insert
+AFTER INSERT ON grade_entries
+BEGIN
+    INSERT INTO change_log (table_name, row_id, operation, course_id, entry_date)
+    VALUES ('grade_entries', new.id, 'I', new.course_id, new.entry_date);
+END;
+
+-- 講座・授業日が変わった場合は変更前の授業も記録する
+CREATE TRIGGER IF NOT EXISTS trg_grade_entries_change_update
+AFTER UPDATE ON grade_entries
+BEGIN
+    INSERT INTO change_log (table_name, row_id, operation, course_id, entry_date)
+    VALUES ('grade_entries', new.id, 'U', new.course_id, new.entry_date);
+    INSERT INTO change_log (table_name, row_id, operation, course_id, entry_date)
+    SELECT 'grade_entries', new.id, 'U', old.course_id, old.entry_date
+    WHERE old.course_id IS NOT new.course_id OR old.entry_date IS NOT new.entry_date;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_grade_entries_change_delete
+AFTER DELETE ON grade_entries
+BEGIN
+    INSERT INTO change_log (table_name, row_id, operation, course_id, entry_date)
+    VALUES ('grade_entries', old.id, 'D', old.course_id, old.entry_date);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_course_students_change_insert
+AFTER INSERT ON course_students
+BEGIN
+    INSERT INTO change_log (table_name, row_id, operation, course_id)
+    VALUES ('course_students', new.id, 'I', new.course_id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_course_students_change_update
+AFTER UPDATE ON course_students
+BEGIN
+    INSERT INTO change_log (table_name, row_id, operation, course_id)
+    VALUES ('course_students', new.id, 'U', new.course_id);
+    INSERT INTO change_log (table_name, row_id, operation, course_id)
+    SELECT 'course_students', new.id, 'U', old.course_id
+    WHERE old.course_id IS NOT new.course_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_course_students_change_delete
+AFTER DELETE ON course_students
+BEGIN
+    INSERT INTO change_log (table_name, row_id, operation, course_id)
+    VALUES ('course_students', old.id, 'D', old.course_id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_courses_change_insert
+AFTER INSERT ON courses
+BEGIN
+    INSERT INTO change_log (table_name, row_id, operation, course_id)
+    VALUES ('courses', new.course_id, 'I', new.course_id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_courses_change_update
+AFTER UPDATE ON courses
+BEGIN
+    INSERT INTO change_log (table_name, row_id, operation, course_id)
+    VALUES ('courses', new.course_id, 'U', new.course_id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_courses_change_delete
+AFTER DELETE ON courses
+BEGIN
+    INSERT INTO change_log (table_name, row_id, operation, course_id)
+    VALUES ('courses', old.course_id, 'D', old.course_id);
+END;
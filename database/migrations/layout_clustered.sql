@@ -0,0 +1,62 @@
+-- 成績（grade_entries）を講座・授業日・生徒ID順に格納する WITHOUT ROWID テーブルに作り直す
+-- （設定 CLUSTERED_GRADE_ENTRIES が有効な場合に DatabaseManager が適用する。元に戻すのは layout_rowid.sql）
+-- ビュー・トリガー・インデックスは init_db.sql で再作成される
+--
+-- 同じ講座・授業日の成績が隣接したページに並ぶため、講座・授業日を指定した読み取りのページ数が減る。
+-- 成績ID（id）は UNIQUE 制約付きの列として残し、ID指定の更新・削除と全文検索の索引に使う。
+-- WITHOUT ROWID テーブルは AUTOINCREMENT を使えないため、挿入時のIDはリポジトリが
+-- sqlite_sequence の採番位置から決め、挿入後にトリガーで採番位置を進める。
+
+-- 成績を参照するビューとトリガー（テーブルの置き換え中に参照先がなくなるため削除）
+DROP VIEW IF EXISTS grade_list_view;
+DROP TRIGGER IF EXISTS trg_course_students_summary_insert;
+DROP TRIGGER IF EXISTS trg_course_students_summary_delete;
+DROP TRIGGER IF EXISTS trg_course_students_summary_update;
+
+-- テーブルの削除で消える AUTOINCREMENT の採番位置を退避
+CREATE TEMP TABLE saved_sequence AS
+SELECT seq FROM sqlite_sequence WHERE name = 'grade_entries';
+
+CREATE TABLE grade_entries_new (
+    id INTEGER NOT NULL UNIQUE,
+    course_id INTEGER NOT NULL,
+    entry_date INTEGER NOT NULL CHECK(entry_date BETWEEN 1 AND 3652059),
+    student_id INTEGER NOT NULL,
+    grade1 INTEGER CHECK(grade1 IS NULL OR (grade1 >= 0 AND grade1 <= 4)),
+    grade2 INTEGER CHECK(grade2 IS NULL OR (grade2 >= 0 AND grade2 <= 4)),
+    grade3 INTEGER CHECK(grade3 IS NULL OR (grade3 >= 0 AND grade3 <= 4)),
+    grade4 REAL,
+    grade5 REAL,
+    grade6 REAL,
+    note1 TEXT,
+    note2 TEXT,
+    created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+    updated_at TEXT DEFAULT CURRENT_TIMESTAMP,
+    row_version INTEGER NOT NULL DEFAULT 1,
+    PRIMARY KEY (course_id, entry_date, student_id),
+    FOREIGN KEY (course_id) REFERENCES courses(course_id) ON DELETE CASCADE,
+    FOREIGN KEY (student_id) REFERENCES students(student_id)
+) STRICT, WITHOUT ROWID;
+
+INSERT INTO grade_entries_new
+SELECT * FROM grade_entries
+ORDER BY course_id, entry_date, student_id;
+
+DROP TABLE grade_entries;
+ALTER TABLE grade_entries_new RENAME TO grade_entries;
+
+INSERT INTO sqlite_sequence (name, seq)
+SELECT 'grade_entries', MAX(
+    COALESCE((SELECT seq FROM temp.saved_sequence), 0),
+    COALESCE((SELECT MAX(id) FROM grade_entries), 0)
+);
+
+DROP TABLE temp.saved_sequence;
+
+-- 挿入されたIDまで採番位置を進める（AUTOINCREMENT と同じく削除済みのIDを再利用しない）
+CREATE TRIGGER trg_grade_entries_sequence
+AFTER INSERT ON grade_entries
+BEGIN
+    UPDATE sqlite_sequence SET seq = new.id
+    WHERE name = 'grade_entries' AND seq < new.id;
+END;
@@ -0,0 +1,53 @@
+-- 成績（grade_entries）を rowid テーブル（init_db.sql と同じ定義）に戻す
+-- （layout_clustered.sql で作り直したデータベースで CLUSTERED_GRADE_ENTRIES を無効にした場合に適用する）
+-- ビュー・トリガー・インデックスは init_db.sql で再作成される
+
+-- 成績を参照するビューとトリガー（テーブルの置き換え中に参照先がなくなるため削除）
+DROP VIEW IF EXISTS grade_list_view;
+DROP TRIGGER IF EXISTS trg_course_students_summary_insert;
+DROP TRIGGER IF EXISTS trg_course_students_summary_delete;
+DROP TRIGGER IF EXISTS trg_course_students_summary_update;
+
+-- 採番位置はトリガーで管理していたため、テーブルの削除後も残る行を退避して付け直す
+CREATE TEMP TABLE saved_sequence AS
+SELECT seq FROM sqlite_sequence WHERE name = 'grade_entries';
+DELETE FROM sqlite_sequence WHERE name = 'grade_entries';
+
+CREATE TABLE grade_entries_new (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    course_id INTEGER NOT NULL,
+    entry_date INTEGER NOT NULL CHECK(entry_date BETWEEN 1 AND 3652059),
+    student_id INTEGER NOT NULL,
+    grade1 INTEGER CHECK(grade1 IS NULL OR (grade1 >= 0 AND grade1 <= 4)),
+    grade2 INTEGER CHECK(grade2 IS NULL OR (grade2 >= 0 AND grade2 <= 4)),
+    grade3 INTEGER CHECK(grade3 IS NULL OR (grade3 >= 0 AND grade3 <= 4)),
+    grade4 REAL,
+    grade5 REAL,
+    grade6 REAL,
+    note1 TEXT,
+    note2 TEXT,
+    created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+    updated_at TEXT DEFAULT CURRENT_TIMESTAMP,
+    row_version INTEGER NOT NULL DEFAULT 1,
+    FOREIGN KEY (course_id) REFERENCES courses(course_id) ON DELETE CASCADE,
+    FOREIGN KEY (student_id) REFERENCES students(student_id),
+    UNIQUE(course_id, entry_date, student_id)
+) STRICT;
+
+INSERT INTO grade_entries_new
+SELECT * FROM grade_entries
+ORDER BY id;
+
+DROP TABLE grade_entries;
+ALTER TABLE grade_entries_new RENAME TO grade_entries;
+
+UPDATE sqlite_sequence
+SET seq = MAX(seq, (SELECT seq FROM temp.saved_sequence))
+WHERE name = 'grade_entries' AND EXISTS (SELECT 1 FROM temp.saved_sequence);
+
+-- 行がなく採番位置が引き継がれなかった場合
+INSERT INTO sqlite_sequence (name, seq)
+SELECT 'grade_entries', seq FROM temp.saved_sequence
+WHERE NOT EXISTS (SELECT 1 FROM sqlite_sequence WHERE name = 'grade_entries');
+
+DROP TABLE temp.saved_sequence;
@@ -0,0 +1,277 @@
+"""クエリ計測・スロークエリログ・書き込みロック待ちの計測"""
+
+import json
+import logging
+import re
+import threading
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# スロークエリ専用ロガー（ファイル出力は QueryStats 側で設定）
+slow_query_logger = logging.getLogger("database.slow_query")
+
+# p95 算出用に保持する実行時間サンプル数（文ごと）
+MAX_DURATION_SAMPLES = 1000
+
+_WHITESPACE_PATTERN = re.compile(r"\s+")
+_IN_LIST_PATTERN = re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)", re.IGNORECASE)
+
+
+def normalize_query(query: str) -> str:
+    """
+    集計キー用にSQL文を正規化
+    
+    空白を1つにまとめ、IN (?, ?, ...) のようなプレースホルダ列を
+    IN (?...) に畳み込む（件数違いを同じ文として扱うため）
+    
+    Args:
+        query: SQL クエリ
+        
+    Returns:
+        正規化されたSQL文
+    """
+    normalized = _WHITESPACE_PATTERN.sub(" ", query).strip()
+    return _IN_LIST_PATTERN.sub("IN (?...)", normalized)
+
+
+@dataclass
+class QueryStat:
+    """正規化済みSQL文ごとの計測値"""
+    query: str
+    calls: int = 0
+    total_time: float = 0.0
+    max_time: float = 0.0
+    rows: int = 0
+    durations: Deque[float] = field(
+        default_factory=lambda: deque(maxlen=MAX_DURATION_SAMPLES)
+    )
+    
+    @property
+    def p95_time(self) -> float:
+        """直近サンプルの95パーセンタイル実行時間（秒）"""
+        if not self.durations:
+            return 0.0
+        samples = sorted(self.durations)
+        index = max(0, int(round(0.95 * len(samples))) - 1)
+        return samples[index]
+    
+    def to_dict(self) -> dict:
+        """辞書形式に変換（時間はミリ秒）"""
+        return {
+            'query': self.query,
+            'calls': self.calls,
+            'total_ms': round(self.total_time * 1000, 3),
+            'avg_ms': round(self.total_time * 1000 / self.calls, 3) if self.calls else 0.0,
+            'p95_ms': round(self.p95_time * 1000, 3),
+            'max_ms': round(self.max_time * 1000, 3),
+            'rows': self.rows
+        }
+
+
+class QueryStats:
+    """DatabaseManager のクエリ実行を計測するクラス"""
+    
+    def __init__(self, slow_threshold_ms: float = 100.0,
+                 slow_log_path: Optional[str] = None):
+        """
+        初期化
+        
+        Args:
+            slow_threshold_ms: スロークエリとして記録する閾値（ミリ秒）
+            slow_log_path: スロークエリログの出力先（Noneの場合は通常ログのみ）
+        """
+        self.slow_threshold_ms = slow_threshold_ms
+        self.slow_log_path = Path(slow_log_path) if slow_log_path else None
+        self.started_at = datetime.now()
+        self._stats: Dict[str, QueryStat] = {}
+        self._lock = threading.Lock()
+        self._slow_handler: Optional[logging.Handler] = None
+        
+        if self.slow_log_path:
+            self._attach_slow_log_handler()
+    
+    def _attach_slow_log_handler(self):
+        """スロークエリログのファイルハンドラを設定"""
+        self.slow_log_path.parent.mkdir(parents=True, exist_ok=True)
+        handler = logging.FileHandler(str(self.slow_log_path), encoding='utf-8')
+        handler.setFormatter(logging.Formatter("%(asctime)s - %(message)s"))
+        slow_query_logger.addHandler(handler)
+        self._slow_handler = handler
+    
+    def record(self, query: str, params: Tuple, elapsed: float, rows: int,
+               explain: Optional[Callable[[str, Tuple], List[str]]] = None):
+        """
+        クエリ1回分の計測値を記録
+        
+        Args:
+            query: 実行したSQL クエリ
+            params: パラメータ
+            elapsed: 実行時間（秒）
+            rows: 取得・変更した行数
+            explain: スロークエリ時に実行計画を取得する関数
+        """
+        key = normalize_query(query)
+        with self._lock:
+            stat = self._stats.get(key)
+            if stat is None:
+                stat = self._stats[key] = QueryStat(query=key)
+            stat.calls += 1
+            stat.total_time += elapsed
+            stat.max_time = max(stat.max_time, elapsed)
+            stat.rows += rows
+            stat.durations.append(elapsed)
+        
+        elapsed_ms = elapsed * 1000
+        if elapsed_ms >= self.slow_threshold_ms:
+            self._log_slow_query(query, params, elapsed_ms, rows, explain)
+    
+    def _log_slow_query(self, query: str, params: Tuple, elapsed_ms: float,
+                        rows: int, explain: Optional[Callable[[str, Tuple], List[str]]]):
+        """スロークエリをパラメータと実行計画付きで記録"""
+        plan: List[str] = []
+        if explain is not None:
+            try:
+                plan = explain(query, params)
+            except Exception as e:
+                plan = [f"(実行計画の取得に失敗: {e})"]
+        
+        message = (
+            f"スロークエリ ({elapsed_ms:.1f}ms, {rows}行): {normalize_query(query)}\n"
+            f"  Params: {params}\n"
+            f"  Plan:\n" + "\n".join(f"    {line}" for line in plan)
+        )
+        slow_query_logger.warning(message)
+    
+    def snapshot(self) -> List[dict]:
+        """
+        計測結果を取得（合計時間の降順）
+        
+        Returns:
+            文ごとの計測値の辞書リスト
+        """
+        with self._lock:
+            stats = [stat.to_dict() for stat in self._stats.values()]
+        return sorted(stats, key=lambda s: s['total_ms'], reverse=True)
+    
+    def reset(self):
+        """計測結果をクリア"""
+        with self._lock:
+            self._stats.clear()
+        self.started_at = datetime.now()
+    
+    def export_json(self, json_path: str, lock_waits: Optional[dict] = None) -> str:
+        """
+        計測結果をJSONファイルに出力
+        
+        Args:
+            json_path: 出力先ファイルのパス
+            lock_waits: あわせて出力する書き込みロック待ちの計測結果（LockWaitStats.snapshot()）
+            
+        Returns:
+            出力したファイルのパス
+        """
+        try:
+            path = Path(json_path)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            
+            data = {
+                'started_at': self.started_at.isoformat(timespec='seconds'),
+                'exported_at': datetime.now().isoformat(timespec='seconds'),
+                'slow_threshold_ms': self.slow_threshold_ms,
+                'queries': self.snapshot()
+            }
+            if lock_waits is not None:
+                data['lock_waits'] = lock_waits
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+            
+            logger.info(f"クエリ統計をエクスポートしました: {path} ({len(data['queries'])}文)")
+            return str(path)
+        except Exception as e:
+            logger.error(f"クエリ統計エクスポートエラー: {e}")
+            raise
+    
+    def close(self):
+        """スロークエリログのハンドラを解放"""
+        if self._slow_handler:
+            slow_query_logger.removeHandler(self._slow_handler)
+            self._slow_handler.close()
+            self._slow_handler = None
+
+
+class LockWaitStats:
+    """
+    書き込みロックの待ち時間と競合の計測（DatabaseManager が常に記録する）
+    
+    複数の利用者が同じデータベースファイルを共有している場合に、書き込みの開始
+    （BEGIN IMMEDIATE）やコミットでどれだけ待たされたか、待ちきれずに再試行・
+    失敗した回数、保存時に他の利用者の変更と競合した回数を数える。
+    """
+    
+    def __init__(self):
+        """初期化"""
+        self.started_at = datetime.now()
+        self.acquisitions = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.waits: Deque[float] = deque(maxlen=MAX_DURATION_SAMPLES)
+        self.busy_retries = 0
+        self.busy_failures = 0
+        self.conflicts = 0
+        self._lock = threading.Lock()
+    
+    def record_wait(self, elapsed: float):
+        """
+        書き込みロックを取得するまでの待ち時間を記録
+        
+        Args:
+            elapsed: 待ち時間（秒。再試行した場合はその間の時間を含む）
+        """
+        with self._lock:
+            self.acquisitions += 1
+            self.total_wait += elapsed
+            self.max_wait = max(self.max_wait, elapsed)
+            self.waits.append(elapsed)
+    
+    def record_retry(self):
+        """ロック待ちがタイムアウトして再試行したことを記録"""
+        with self._lock:
+            self.busy_retries += 1
+    
+    def record_failure(self):
+        """再試行してもロックを取得できなかったことを記録"""
+        with self._lock:
+            self.busy_failures += 1
+    
+    def record_conflict(self):
+        """保存時に他の利用者の変更と競合したことを記録"""
+        with self._lock:
+            self.conflicts += 1
+    
+    def snapshot(self) -> dict:
+        """
+        計測結果を取得（時間はミリ秒）
+        
+        Returns:
+            計測値の辞書
+        """
+        with self._lock:
+            samples = sorted(self.waits)
+            p95 = samples[max(0, int(round(0.95 * len(samples))) - 1)] if samples else 0.0
+            return {
+                'started_at': self.started_at.isoformat(timespec='seconds'),
+                'acquisitions': self.acquisitions,
+                'total_wait_ms': round(self.total_wait * 1000, 3),
+                'avg_wait_ms': (round(self.total_wait * 1000 / self.acquisitions, 3)
+                                if self.acquisitions else 0.0),
+                'p95_wait_ms': round(p95 * 1000, 3),
+                'max_wait_ms': round(self.max_wait * 1000, 3),
+                'busy_retries': self.busy_retries,
+                'busy_failures': self.busy_failures,
+                'conflicts': self.conflicts
+            }
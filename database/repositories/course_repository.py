@@ -5,6 +5,7 @@ from pathlib import Path
 from datetime import datetime
 
 from database.db_manager import DatabaseManager
+from database.events import CourseChanged, RosterChanged, GradesChanged
 from models.course import Course
 
 logger = logging.getLogger(__name__)
@@ -26,27 +27,22 @@ class CourseRepository:
     
     def get_all_courses(self) -> List[Course]:
         """
-        全講座を取得
+        全講座を取得（講座一覧の共有キャッシュから。講座名順）
+        
+        返した Course は他の画面と共有されるため変更しないこと。
         
         Returns:
             講座のリスト
         """
         try:
-            query = """
-                SELECT course_id, course_name, note1, note2, note3, 
-                       created_at, updated_at
-                FROM courses
-                ORDER BY course_name
-            """
-            rows = self.db.fetch_all(query)
-            return [Course(**dict(row)) for row in rows]
+            return list(self.db.course_catalog.index().courses)
         except Exception as e:
             logger.error(f"講座取得エラー: {e}")
             raise
     
     def get_course_by_id(self, course_id: int) -> Optional[Course]:
         """
-        講座IDで講座を取得
+        講座IDで講座を取得（講座一覧の共有キャッシュから）
         
         Args:
             course_id: 講座ID
@@ -55,21 +51,14 @@ class CourseRepository:
             講座オブジェクト（存在しない場合はNone）
         """
         try:
-            query = """
-                SELECT course_id, course_name, note1, note2, note3,
-                       created_at, updated_at
-                FROM courses
-                WHERE course_id = ?
-            """
-            row = self.db.fetch_one(query, (course_id,))
-            return Course(**dict(row)) if row else None
+            return self.db.course_catalog.index().get(course_id)
         except Exception as e:
             logger.error(f"講座取得エラー (ID: {course_id}): {e}")
             raise
     
     def get_course_by_name(self, course_name: str) -> Optional[Course]:
         """
-        講座名で講座を取得
+        講座名で講座を取得（講座一覧の共有キャッシュから）
         
         Args:
             course_name: 講座名
@@ -78,14 +67,7 @@ class CourseRepository:
             講座オブジェクト（存在しない場合はNone）
         """
         try:
-            query = """
-                SELECT course_id, course_name, note1, note2, note3,
-                       created_at, updated_at
-                FROM courses
-                WHERE course_name = ?
-            """
-            row = self.db.fetch_one(query, (course_name,))
-            return Course(**dict(row)) if row else None
+            return self.db.course_catalog.index().find(course_name)
         except Exception as e:
             logger.error(f"講座取得エラー (名前: {course_name}): {e}")
             raise
@@ -105,15 +87,15 @@ class CourseRepository:
                 INSERT INTO courses (course_name, note1, note2, note3)
                 VALUES (?, ?, ?, ?)
             """
-            cursor = self.db.execute_query(
-                query,
-                (course.course_name, course.note1, course.note2, course.note3)
-            )
-            self.db.commit()
+            with self.db.transaction():
+                cursor = self.db.execute_query(
+                    query,
+                    (course.course_name, course.note1, course.note2, course.note3)
+                )
+                self.db.publish(CourseChanged(cursor.lastrowid))
             logger.info(f"講座を作成しました: {course.course_name}")
             return cursor.lastrowid
         except Exception as e:
-            self.db.rollback()
             logger.error(f"講座作成エラー: {e}")
             raise
     
@@ -131,15 +113,15 @@ class CourseRepository:
                     updated_at = CURRENT_TIMESTAMP
                 WHERE course_id = ?
             """
-            self.db.execute_query(
-                query,
-                (course.course_name, course.note1, course.note2, 
-                 course.note3, course.course_id)
-            )
-            self.db.commit()
+            with self.db.transaction():
+                self.db.execute_query(
+                    query,
+                    (course.course_name, course.note1, course.note2, 
+                     course.note3, course.course_id)
+                )
+                self.db.publish(CourseChanged(course.course_id))
             logger.info(f"講座を更新しました: {course.course_name}")
         except Exception as e:
-            self.db.rollback()
             logger.error(f"講座更新エラー: {e}")
             raise
     
@@ -152,11 +134,13 @@ class CourseRepository:
         """
         try:
             query = "DELETE FROM courses WHERE course_id = ?"
-            self.db.execute_query(query, (course_id,))
-            self.db.commit()
+            with self.db.transaction():
+                self.db.execute_query(query, (course_id,))
+                # 名簿・成績もカスケード削除される
+                self.db.publish(CourseChanged(course_id), RosterChanged(course_id),
+                                GradesChanged(course_id))
             logger.info(f"講座を削除しました (ID: {course_id})")
         except Exception as e:
-            self.db.rollback()
             logger.error(f"講座削除エラー: {e}")
             raise
     
@@ -214,40 +198,42 @@ class CourseRepository:
                 return result
             
             # Step 3: トランザクション内で削除と挿入を実行
-            # 全講座を削除
-            delete_query = "DELETE FROM courses"
-            cursor = self.db.execute_query(delete_query)
-            result['deleted'] = cursor.rowcount
-            logger.info(f"削除完了: {result['deleted']}件")
+            with self.db.transaction():
+                # 全講座を削除
+                delete_query = "DELETE FROM courses"
+                cursor = self.db.execute_query(delete_query)
+                result['deleted'] = cursor.rowcount
+                logger.info(f"削除完了: {result['deleted']}件")
             
-            # Step 4: CSVデータを挿入
-            insert_query = """
-                INSERT INTO courses (course_name, note1, note2, note3)
-                VALUES (?, ?, ?, ?)
-            """
+                # Step 4: CSVデータを挿入
+                insert_query = """
+                    INSERT INTO courses (course_name, note1, note2, note3)
+                    VALUES (?, ?, ?, ?)
+                """
+            
+                for course_data in csv_data:
+                    try:
+                        self.db.execute_query(
+                            insert_query,
+                            (course_data['course_name'], course_data['note1'],
+                             course_data['note2'], course_data['note3'])
+                        )
+                        result['created'] += 1
+                    except Exception as e:
+                        error_msg = f"挿入エラー: 講座名={course_data['course_name']}: {str(e)}"
+                        result['errors'].append(error_msg)
+                        logger.error(error_msg)
             
-            for course_data in csv_data:
-                try:
-                    self.db.execute_query(
-                        insert_query,
-                        (course_data['course_name'], course_data['note1'],
-                         course_data['note2'], course_data['note3'])
-                    )
-                    result['created'] += 1
-                except Exception as e:
-                    error_msg = f"挿入エラー: 講座名={course_data['course_name']}: {str(e)}"
-                    result['errors'].append(error_msg)
-                    logger.error(error_msg)
+                # 講座IDが変わり、名簿・成績もカスケード削除される
+                self.db.publish(CourseChanged(), RosterChanged(), GradesChanged())
             
-            # Step 5: コミット
-            self.db.commit()
+            self.db.maintenance.after_bulk_delete()
             
             logger.info(f"CSV差し替えインポート完了: 削除={result['deleted']}, "
                        f"作成={result['created']}, エラー={len(result['errors'])}")
             return result
         
         except Exception as e:
-            self.db.rollback()
             logger.error(f"CSVインポートエラー: {e}")
             result['errors'].append(f"致命的エラー: {str(e)}")
             raise
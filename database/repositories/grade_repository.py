@@ -1,14 +1,110 @@
-from typing import List, Optional, Dict
+from typing import Iterator, List, Optional, Dict, Sequence, Tuple
+from array import array
 import csv
 import logging
+import math
+import sqlite3
 from pathlib import Path
 from datetime import datetime
 
+from config.settings import BULK_LOAD_THRESHOLD
+from database.change_log import CHANGE_LOG_TRIGGERS
+from database.dates import date_sql, from_day_number, to_day_number
 from database.db_manager import DatabaseManager
-from models.grade import Grade, GradeListItem
+from database.events import GradesChanged
+from database.result_cache import ResultCache
+from database.repositories.student_repository import StudentRepository
+from database.search import match_rowids
+from models.grade_frame import GradeFrame
+from models.grade import (
+    Grade, GradeListItem, GradeEntrySummary, GradeStatistics, GradeMatrix,
+    GRADE_COLUMNS, LEVEL_GRADE_COLUMNS, SCORE_GRADE_COLUMNS, GRADE_LEVELS, SCORE_PERCENTILES
+)
 
 logger = logging.getLogger(__name__)
 
+# 成績一覧で並べ替えに使える列と、実際の ORDER BY の列順
+# （init_db.sql の複合インデックスの列順と一致する。成績のインデックス上の生徒は生徒ID順のため、
+#   授業日順・講座名順は同じ授業日・講座の中だけ、生徒番号順は絞り込んだ行を一時B-treeで並べ替える）
+SORT_COLUMNS = {
+    'entry_date': ('entry_date', 'course_id', 'student_number'),
+    'course_name': ('course_name', 'entry_date', 'student_number'),
+    'student_number': ('student_number', 'entry_date', 'course_id'),
+}
+DEFAULT_SORT_BY = 'entry_date'
+SORT_ORDERS = ('ASC', 'DESC')
+
+# 入力状況サマリー（grade_entry_summary）を成績の1行ごとに更新するトリガー
+# （一括ロード中は停止し、最後に rebuild_entry_summary でまとめて集計する）
+ENTRY_SUMMARY_TRIGGERS = (
+    'trg_grade_entries_summary_insert',
+    'trg_grade_entries_summary_delete',
+    'trg_grade_entries_summary_update',
+)
+
+# 成績一覧で取得する列（GradeListItem のフィールド順。from_row は位置で受け取る）
+GRADE_LIST_COLUMNS = (
+    'id', 'course_id', 'course_name', 'entry_date', 'student_number', 'student_name',
+    'class_number', 'grade1', 'grade2', 'grade3', 'grade4', 'grade5', 'grade6',
+    'note1', 'note2', 'created_at', 'updated_at'
+)
+# 授業日（日番号）を YYYY-MM-DD 形式で取得する列
+# （成績一覧・エクスポートは行数が多いため日番号のまま取得し、from_day_number で変換する）
+ENTRY_DATE_COLUMN = f"{date_sql('entry_date')} AS entry_date"
+# 成績の生徒IDから生徒番号を取得する列（講座・授業日で絞り込んだ行だけを並べ替えるため、
+# students を結合せず副問い合わせで引く）
+STUDENT_NUMBER_COLUMN = """(
+    SELECT student_number FROM students WHERE students.student_id = grade_entries.student_id
+) AS student_number"""
+
+# 成績（Grade）として取得する列（フィールド順。from_row は位置で受け取る）
+GRADE_COLUMNS_SQL = f"""
+    id, course_id, {ENTRY_DATE_COLUMN}, {STUDENT_NUMBER_COLUMN},
+    grade1, grade2, grade3, grade4, grade5, grade6,
+    note1, note2, created_at, updated_at, row_version
+"""
+
+# 新しい成績ID（AUTOINCREMENT と同じく採番位置の次の値）
+# 講座・授業日順の格納形式（WITHOUT ROWID）では id が自動採番されないため、挿入時に必ず指定する
+NEXT_GRADE_ID = "COALESCE((SELECT seq FROM sqlite_sequence WHERE name = 'grade_entries'), 0) + 1"
+
+# 成績統計の集計単位と、grade_list_view のキー列・表示名の列
+STATISTICS_GROUPS = {
+    'course': ('course_id', 'course_name'),
+    'class': ('class_number', 'class_number'),
+    'date': (date_sql('entry_date'), date_sql('entry_date')),
+}
+# 統計のキャッシュキーに含めないフィルタ（並べ替えの指定）
+STATISTICS_IGNORED_FILTERS = ('sort_by', 'sort_order')
+
+# 名簿の全文検索結果（course_students の rowid）をその生徒の成績IDに変換する副問い合わせ
+# （一致した成績IDから行を引けるよう、条件は id IN (...) の形にまとめる。
+#   prefix はアーカイブを検索する場合のスキーマ名と "."）
+STUDENT_GRADE_IDS_QUERY = """
+    SELECT g.id FROM {prefix}course_students s
+    JOIN {prefix}grade_entries g ON g.course_id = s.course_id AND g.student_id = s.student_id
+    WHERE s.id IN ({rowids})
+"""
+
+
+class GradeConflictError(Exception):
+    """
+    読み込んだ後に他の利用者が同じ成績を保存・削除していたため、保存しなかった
+    
+    Attributes:
+        grade: 保存しようとした成績
+        current: データベース上の現在の成績（削除されていた場合は None）
+    """
+    
+    def __init__(self, grade: Grade, current: Optional[Grade]):
+        self.grade = grade
+        self.current = current
+        action = "削除" if current is None else "更新"
+        super().__init__(
+            f"他の利用者が先に成績を{action}しています "
+            f"(講座ID: {grade.course_id}, 日付: {grade.entry_date}, 生徒: {grade.student_number})"
+        )
+
 
 class GradeRepository:
     """成績データのCRUD操作を行うリポジトリ"""
@@ -21,6 +117,8 @@ class GradeRepository:
             db_manager: データベースマネージャー
         """
         self.db = db_manager
+        # 成績統計の結果（書き込みがあると破棄される）
+        self.statistics_cache = ResultCache(db_manager)
     
     def get_grades_by_course_date(self, course_id: int, entry_date: str) -> List[Grade]:
         """
@@ -34,16 +132,14 @@ class GradeRepository:
             成績のリスト
         """
         try:
-            query = """
-                SELECT id, course_id, entry_date, student_number,
-                       grade1, grade2, grade3, grade4, grade5, grade6,
-                       note1, note2, created_at, updated_at
+            query = f"""
+                SELECT {GRADE_COLUMNS_SQL}
                 FROM grade_entries
                 WHERE course_id = ? AND entry_date = ?
                 ORDER BY student_number
             """
-            rows = self.db.fetch_all(query, (course_id, entry_date))
-            return [Grade(**dict(row)) for row in rows]
+            rows = self.db.fetch_all(query, (course_id, to_day_number(entry_date)))
+            return [Grade.from_row(row) for row in rows]
         except Exception as e:
             logger.error(f"成績取得エラー (講座ID: {course_id}, 日付: {entry_date}): {e}")
             raise
@@ -59,108 +155,625 @@ class GradeRepository:
                 - end_date: 終了日
                 - student_number: 生徒番号（部分一致）
                 - class_number: クラス番号
-                - sort_by: ソート列名
+                - keyword: 生徒番号・氏名・備考のいずれかに含まれる文字列
+                - sort_by: ソート列名（SORT_COLUMNS のいずれか、既定は授業日）
                 - sort_order: 'ASC' or 'DESC'
+                期間を指定した場合は、期間が重なる年度のアーカイブの成績も含む
                 
         Returns:
             成績一覧のリスト
+            
+        Raises:
+            ValueError: ソート列名またはソート順が不正な場合
         """
         try:
-            query = "SELECT * FROM grade_list_view WHERE 1=1"
-            params = []
+            query, params = self.build_grade_list_query(filters, self._attach_archives(filters))
+            rows = self.db.fetch_all(query, params, readonly=True)
+            items = [GradeListItem.from_row(row) for row in rows]
+            for item in items:
+                item.entry_date = from_day_number(item.entry_date)
+            return items
+        except Exception as e:
+            logger.error(f"成績一覧取得エラー: {e}")
+            raise
+    
+    def iter_grade_list(self, filters: Optional[Dict] = None) -> Iterator[GradeListItem]:
+        """
+        成績一覧を少しずつ読み込みながら1件ずつ返す（全件をリストにしない。サービスの応答用）
+        
+        Args:
+            filters: フィルタ条件の辞書（get_grade_list と同じ）
             
-            if filters:
-                if filters.get('course_ids'):
-                    placeholders = ','.join('?' * len(filters['course_ids']))
-                    query += f" AND course_id IN ({placeholders})"
-                    params.extend(filters['course_ids'])
-                
-                if filters.get('start_date'):
-                    query += " AND entry_date >= ?"
-                    params.append(filters['start_date'])
-                
-                if filters.get('end_date'):
-                    query += " AND entry_date <= ?"
-                    params.append(filters['end_date'])
-                
-                if filters.get('student_number'):
-                    query += " AND student_number LIKE ?"
-                    params.append(f"%{filters['student_number']}%")
-                
-                if filters.get('class_number'):
-                    query += " AND class_number = ?"
-                    params.append(filters['class_number'])
-                
-                # ソート
-                sort_by = filters.get('sort_by', 'entry_date')
-                sort_order = filters.get('sort_order', 'ASC')
-                query += f" ORDER BY {sort_by} {sort_order}"
+        Yields:
+            成績一覧の行（get_grade_list と同じ並び順）
+            
+        Raises:
+            ValueError: ソート列名またはソート順が不正な場合
+        """
+        query, params = self.build_grade_list_query(filters, self._attach_archives(filters))
+        for row in self.db.fetch_iter(query, params, readonly=True):
+            item = GradeListItem.from_row(row)
+            item.entry_date = from_day_number(item.entry_date)
+            yield item
+    
+    def get_grade_frame(self, filters: Optional[Dict] = None) -> GradeFrame:
+        """
+        成績一覧を列指向の GradeFrame で取得（大量の行の集計・エクスポート用）
+        
+        行を1件ずつ読みながら列の配列に追加するため、GradeListItem を作らない。
+        
+        Args:
+            filters: フィルタ条件の辞書（get_grade_list と同じ）
             
-            rows = self.db.fetch_all(query, tuple(params))
-            return [GradeListItem.from_dict(dict(row)) for row in rows]
+        Returns:
+            成績一覧の GradeFrame（get_grade_list と同じ並び順）
+            
+        Raises:
+            ValueError: ソート列名またはソート順が不正な場合
+        """
+        try:
+            query, params = self.build_grade_list_query(filters, self._attach_archives(filters))
+            frame = GradeFrame.from_rows(self.db.fetch_iter(query, params, readonly=True))
+            # 授業日はカテゴリ列の値の一覧（授業日の数）だけを変換する
+            frame.columns['entry_date'] = frame.columns['entry_date'].map_categories(from_day_number)
+            return frame
         except Exception as e:
             logger.error(f"成績一覧取得エラー: {e}")
             raise
     
-    def create_or_update_grade(self, grade: Grade) -> int:
+    def build_grade_list_query(self, filters: Optional[Dict] = None,
+                               archives: Sequence[str] = ()) -> Tuple[str, tuple]:
         """
-        成績を作成または更新（UPSERT）
+        成績一覧のSQL文とパラメータを作成（実行計画の確認にも使用）
+        
+        アーカイブを指定した場合は、各アーカイブの grade_list_view を UNION ALL で結合する
+        （ORDER BY は結合全体に付け、SQLite はそれぞれを並べ替えてからマージする）。
         
         Args:
-            grade: 成績オブジェクト
+            filters: フィルタ条件の辞書（get_grade_list と同じ）
+            archives: 結合するアーカイブのスキーマ名（ATTACH 済みであること）
             
         Returns:
-            成績ID
+            (SQL クエリ, パラメータ)
+        """
+        query, params = self._build_filtered_select(', '.join(GRADE_LIST_COLUMNS), filters, archives)
+        query += self._build_order_by(filters or {})
+        return query, tuple(params)
+    
+    def _attach_archives(self, filters: Optional[Dict]) -> List[str]:
+        """フィルタ条件の期間が重なる年度のアーカイブを ATTACH し、スキーマ名を返す"""
+        filters = filters or {}
+        return self.db.archives.attach_for_range(
+            filters.get('start_date'), filters.get('end_date'), readonly=True
+        )
+    
+    @classmethod
+    def _build_filtered_select(cls, columns: str, filters: Optional[Dict],
+                               archives: Sequence[str] = ()) -> Tuple[str, list]:
+        """
+        grade_list_view を絞り込む SELECT 文を作成（アーカイブを指定した場合は UNION ALL で結合）
+        
+        Args:
+            columns: 取得する列（SELECT に続ける式）
+            filters: フィルタ条件の辞書（get_grade_list と同じ。並べ替えの指定は無視）
+            archives: 結合するアーカイブのスキーマ名
+            
+        Returns:
+            (SQL クエリ, パラメータ)
+        """
+        conditions, params = cls._build_filter_conditions(filters)
+        query = f"SELECT {columns} FROM grade_list_view WHERE 1=1{conditions}"
+        for schema in archives:
+            conditions, archive_params = cls._build_filter_conditions(filters, schema)
+            query += f" UNION ALL SELECT {columns} FROM {schema}.grade_list_view WHERE 1=1{conditions}"
+            params.extend(archive_params)
+        return query, params
+    
+    @staticmethod
+    def _build_filter_conditions(filters: Optional[Dict],
+                                 schema: Optional[str] = None) -> Tuple[str, list]:
+        """
+        grade_list_view に対する絞り込み条件を作成（成績一覧・統計で共通）
+        
+        Args:
+            filters: フィルタ条件の辞書（get_grade_list と同じ。並べ替えの指定は無視）
+            schema: 絞り込む grade_list_view のスキーマ名（アーカイブの場合。
+                全文検索の副問い合わせを同じデータベースの表で行う）
+            
+        Returns:
+            (WHERE 1=1 に続ける " AND ..." の条件, パラメータ)
+        """
+        query = ""
+        params = []
+        prefix = f"{schema}." if schema else ""
+        
+        if filters:
+            if filters.get('course_ids'):
+                placeholders = ','.join('?' * len(filters['course_ids']))
+                query += f" AND course_id IN ({placeholders})"
+                params.extend(filters['course_ids'])
+            
+            if filters.get('start_date'):
+                query += " AND entry_date >= ?"
+                params.append(to_day_number(filters['start_date']))
+            
+            if filters.get('end_date'):
+                query += " AND entry_date <= ?"
+                params.append(to_day_number(filters['end_date']))
+            
+            if filters.get('student_number'):
+                student_query, student_params = match_rowids(
+                    'student_search', ['student_number'], filters['student_number'], schema
+                )
+                student_ids_query = STUDENT_GRADE_IDS_QUERY.format(prefix=prefix, rowids=student_query)
+                query += f" AND id IN ({student_ids_query})"
+                params.extend(student_params)
+            
+            if filters.get('class_number'):
+                query += " AND class_number = ?"
+                params.append(filters['class_number'])
+        
+            if filters.get('keyword'):
+                note_query, note_params = match_rowids(
+                    'grade_note_search', ['note1', 'note2'], filters['keyword'], schema
+                )
+                student_query, student_params = match_rowids(
+                    'student_search', ['student_number', 'student_name'], filters['keyword'], schema
+                )
+                student_ids_query = STUDENT_GRADE_IDS_QUERY.format(prefix=prefix, rowids=student_query)
+                query += f" AND id IN ({note_query} UNION ALL {student_ids_query})"
+                params.extend(note_params)
+                params.extend(student_params)
+        
+        return query, params
+    
+    def search_grades(self, keyword: str, filters: Optional[Dict] = None) -> List[GradeListItem]:
+        """
+        生徒番号・氏名・備考の部分一致で成績を検索（全文検索インデックスを使用）
+        
+        Args:
+            keyword: 検索文字列（3文字以上でインデックス検索）
+            filters: 追加のフィルタ条件（get_grade_list と同じ）
+            
+        Returns:
+            成績一覧のリスト
+        """
+        return self.get_grade_list({**(filters or {}), 'keyword': keyword})
+    
+    def get_entry_summary(self, filters: Optional[Dict] = None) -> List[GradeEntrySummary]:
+        """
+        講座・授業日ごとの入力状況を取得（トリガーで更新されるサマリーから読むため成績行は走査しない）
+        
+        Args:
+            filters: フィルタ条件の辞書
+                - course_ids: 講座IDのリスト
+                - start_date: 開始日
+                - end_date: 終了日
+                - missing_only: 未入力の生徒がいる授業のみ
+                
+        Returns:
+            入力状況のリスト（授業日の新しい順、同日は講座名順）
         """
         try:
-            query = """
-                INSERT INTO grade_entries 
-                (course_id, entry_date, student_number, grade1, grade2, grade3,
-                 grade4, grade5, grade6, note1, note2)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ON CONFLICT(course_id, entry_date, student_number)
-                DO UPDATE SET
-                    grade1 = excluded.grade1,
-                    grade2 = excluded.grade2,
-                    grade3 = excluded.grade3,
-                    grade4 = excluded.grade4,
-                    grade5 = excluded.grade5,
-                    grade6 = excluded.grade6,
-                    note1 = excluded.note1,
-                    note2 = excluded.note2,
-                    updated_at = CURRENT_TIMESTAMP
+            query = f"""
+                SELECT s.course_id, c.course_name, {date_sql('s.entry_date')} AS entry_date,
+                       s.entered_count, s.roster_size, s.last_updated
+                FROM grade_entry_summary s
+                JOIN courses c ON c.course_id = s.course_id
+                WHERE 1=1
             """
-            cursor = self.db.execute_query(
-                query,
-                (grade.course_id, grade.entry_date, grade.student_number,
-                 grade.grade1, grade.grade2, grade.grade3,
-                 grade.grade4, grade.grade5, grade.grade6,
-                 grade.note1, grade.note2)
+            params = []
+            filters = filters or {}
+            
+            if filters.get('course_ids'):
+                placeholders = ','.join('?' * len(filters['course_ids']))
+                query += f" AND s.course_id IN ({placeholders})"
+                params.extend(filters['course_ids'])
+            
+            if filters.get('start_date'):
+                query += " AND s.entry_date >= ?"
+                params.append(to_day_number(filters['start_date']))
+            
+            if filters.get('end_date'):
+                query += " AND s.entry_date <= ?"
+                params.append(to_day_number(filters['end_date']))
+            
+            if filters.get('missing_only'):
+                query += " AND s.entered_count < s.roster_size"
+            
+            query += " ORDER BY s.entry_date DESC, c.course_name"
+            
+            rows = self.db.fetch_all(query, tuple(params), readonly=True)
+            return [GradeEntrySummary.from_row(row) for row in rows]
+        except Exception as e:
+            logger.error(f"入力状況取得エラー: {e}")
+            raise
+    
+    def rebuild_entry_summary(self):
+        """
+        入力状況サマリーを成績・名簿から作り直す
+        
+        通常はトリガーで更新されるため不要。トリガーを停止して一括ロードした後に使用する
+        （集計内容は migrations/004_entry_summary.sql と同じ）
+        """
+        try:
+            with self.db.transaction():
+                self.db.execute_query("DELETE FROM grade_entry_summary")
+                self.db.execute_query("""
+                    INSERT INTO grade_entry_summary
+                        (course_id, entry_date, row_count, entered_count, roster_size, last_updated)
+                    SELECT
+                        ge.course_id,
+                        ge.entry_date,
+                        COUNT(*),
+                        SUM(cs.id IS NOT NULL
+                            AND (ge.grade1 IS NOT NULL OR ge.grade2 IS NOT NULL
+                                 OR ge.grade3 IS NOT NULL OR ge.grade4 IS NOT NULL
+                                 OR ge.grade5 IS NOT NULL OR ge.grade6 IS NOT NULL)),
+                        (SELECT COUNT(*) FROM course_students r WHERE r.course_id = ge.course_id),
+                        MAX(COALESCE(ge.updated_at, ge.created_at))
+                    FROM grade_entries ge
+                    LEFT JOIN course_students cs
+                        ON cs.course_id = ge.course_id AND cs.student_id = ge.student_id
+                    GROUP BY ge.course_id, ge.entry_date
+                """)
+            logger.info("入力状況サマリーを再集計しました")
+        except Exception as e:
+            logger.error(f"入力状況サマリー再集計エラー: {e}")
+            raise
+    
+    def get_grade_statistics(self, group_by: str = 'course',
+                             filters: Optional[Dict] = None) -> List[GradeStatistics]:
+        """
+        グループごとの成績統計を取得（結果はフィルタごとにキャッシュ）
+        
+        grade1〜3 は段階（0〜4）ごとの件数、grade4〜6 は件数・平均・最小・最大と
+        パーセンタイル（SCORE_PERCENTILES）を1つのSQL文で集計する。
+        同じ条件での再取得は、その間にデータベースへの書き込みがなければ
+        キャッシュから返す（返したリストは変更しないこと）。
+        
+        Args:
+            group_by: 集計単位（'course': 講座, 'class': クラス, 'date': 授業日）
+            filters: フィルタ条件の辞書（get_grade_list と同じ）
+            
+        Returns:
+            グループごとの統計のリスト（表示名順）
+            
+        Raises:
+            ValueError: 集計単位が不正な場合
+        """
+        if group_by not in STATISTICS_GROUPS:
+            raise ValueError(f"不正な集計単位です: {group_by}")
+        
+        key = (group_by, self._statistics_filter_key(filters))
+        try:
+            return self.statistics_cache.get_or_compute(
+                key, lambda: self._fetch_grade_statistics(group_by, filters)
             )
-            self.db.commit()
+        except Exception as e:
+            logger.error(f"成績統計取得エラー ({group_by}): {e}")
+            raise
+    
+    def _fetch_grade_statistics(self, group_by: str,
+                                filters: Optional[Dict]) -> List[GradeStatistics]:
+        """成績統計を集計（キャッシュを使わない）"""
+        query, params = self.build_grade_statistics_query(group_by, filters,
+                                                          self._attach_archives(filters))
+        rows = self.db.fetch_all(query, params, readonly=True)
+        return [GradeStatistics.from_dict(row) for row in rows]
+    
+    def build_grade_statistics_query(self, group_by: str, filters: Optional[Dict] = None,
+                                     archives: Sequence[str] = ()) -> Tuple[str, tuple]:
+        """
+        成績統計のSQL文とパラメータを作成（実行計画の確認にも使用）
+        
+        パーセンタイルはウィンドウ関数で各列のグループ内順位と件数を求め、
+        順位が ceil(p * 件数 / 100) の値を取る（最近順位法、NULL は除く）。
+        
+        Args:
+            group_by: 集計単位（STATISTICS_GROUPS のいずれか）
+            filters: フィルタ条件の辞書（get_grade_list と同じ）
+            archives: 結合するアーカイブのスキーマ名（ATTACH 済みであること）
             
-            # 作成または更新されたIDを取得
-            if cursor.lastrowid > 0:
-                grade_id = cursor.lastrowid
-            else:
-                # 更新の場合は既存IDを取得
-                id_query = """
-                    SELECT id FROM grade_entries
-                    WHERE course_id = ? AND entry_date = ? AND student_number = ?
-                """
-                row = self.db.fetch_one(
-                    id_query,
-                    (grade.course_id, grade.entry_date, grade.student_number)
+        Returns:
+            (SQL クエリ, パラメータ)
+        """
+        key_column, label_column = STATISTICS_GROUPS[group_by]
+        
+        windows = []
+        aggregates = []
+        for column in LEVEL_GRADE_COLUMNS:
+            for level in GRADE_LEVELS:
+                aggregates.append(f"SUM({column} = {level}) AS {column}_{level}")
+        for column in SCORE_GRADE_COLUMNS:
+            windows.append(
+                f"ROW_NUMBER() OVER (PARTITION BY group_key ORDER BY {column} NULLS LAST)"
+                f" AS {column}_rank"
+            )
+            windows.append(f"COUNT({column}) OVER (PARTITION BY group_key) AS {column}_count")
+            aggregates.extend([
+                f"COUNT({column}) AS {column}_count",
+                f"AVG({column}) AS {column}_mean",
+                f"MIN({column}) AS {column}_min",
+                f"MAX({column}) AS {column}_max",
+            ])
+            for p in SCORE_PERCENTILES:
+                aggregates.append(
+                    f"MIN(CASE WHEN {column}_rank = ({p} * {column}_count + 99) / 100"
+                    f" THEN {column} END) AS {column}_p{p}"
                 )
-                grade_id = row['id'] if row else None
+        
+        grade_columns = ', '.join(LEVEL_GRADE_COLUMNS + SCORE_GRADE_COLUMNS)
+        filtered_query, params = self._build_filtered_select(
+            f"{key_column} AS group_key, {label_column} AS group_label, {grade_columns}",
+            filters, archives
+        )
+        query = f"""
+            WITH filtered AS (
+                {filtered_query}
+            ),
+            ranked AS (
+                SELECT *, {', '.join(windows)}
+                FROM filtered
+            )
+            SELECT group_key, group_label, COUNT(*) AS row_count,
+                   {', '.join(aggregates)}
+            FROM ranked
+            GROUP BY group_key, group_label
+            ORDER BY group_label, group_key
+        """
+        return query, tuple(params)
+    
+    @staticmethod
+    def _statistics_filter_key(filters: Optional[Dict]) -> tuple:
+        """フィルタ条件をキャッシュのキー（ハッシュ可能な値）に変換"""
+        items = []
+        for name, value in sorted((filters or {}).items()):
+            if name in STATISTICS_IGNORED_FILTERS or not value:
+                continue
+            if isinstance(value, (list, tuple, set)):
+                value = tuple(value)
+            items.append((name, value))
+        return tuple(items)
+    
+    def get_grade_matrix(self, course_id: int, field: str,
+                         start_date: Optional[str] = None,
+                         end_date: Optional[str] = None) -> GradeMatrix:
+        """
+        講座の1つの成績項目を生徒×授業日の行列で取得
+        
+        名簿の生徒を生徒番号順の行、期間内に成績のある授業日を日付順の列とし、
+        1つのSQL文で取得する。列の位置は DENSE_RANK() で求めるため、
+        値は行優先の配列に直接格納し、セルごとのオブジェクトは作らない。
+        
+        Args:
+            course_id: 講座ID
+            field: 成績項目（GRADE_COLUMNS のいずれか）
+            start_date: 開始日 (YYYY-MM-DD)
+            end_date: 終了日 (YYYY-MM-DD)
+            
+        Returns:
+            成績の行列
+            
+        Raises:
+            ValueError: 成績項目が不正な場合
+        """
+        if field not in GRADE_COLUMNS:
+            raise ValueError(f"不正な成績項目です: {field}")
+        
+        try:
+            query, params = self.build_grade_matrix_query(course_id, field, start_date, end_date)
+            rows = self.db.fetch_all(query, params, readonly=True)
+            
+            student_numbers = []
+            student_names = []
+            class_numbers = []
+            dates = {}
+            cells = []
+            for row in rows:
+                if not student_numbers or student_numbers[-1] != row['student_number']:
+                    student_numbers.append(row['student_number'])
+                    student_names.append(row['student_name'])
+                    class_numbers.append(row['class_number'])
+                column = row['date_index']
+                if column is None:
+                    continue
+                if column not in dates:
+                    dates[column] = row['entry_date']
+                if row['value'] is not None:
+                    cells.append((len(student_numbers) - 1, column - 1, row['value']))
+            
+            column_count = len(dates)
+            values = array('d', [math.nan]) * (len(student_numbers) * column_count)
+            for row_index, column_index, value in cells:
+                values[row_index * column_count + column_index] = value
             
-            logger.info(f"成績を保存しました (ID: {grade_id})")
-            return grade_id
+            return GradeMatrix(
+                course_id=course_id,
+                field=field,
+                student_numbers=student_numbers,
+                student_names=student_names,
+                class_numbers=class_numbers,
+                entry_dates=[dates[column] for column in sorted(dates)],
+                values=values
+            )
+        except Exception as e:
+            logger.error(f"成績行列取得エラー (講座ID: {course_id}, 項目: {field}): {e}")
+            raise
+    
+    def build_grade_matrix_query(self, course_id: int, field: str,
+                                 start_date: Optional[str] = None,
+                                 end_date: Optional[str] = None) -> Tuple[str, tuple]:
+        """
+        成績行列のSQL文とパラメータを作成（実行計画の確認にも使用）
+        
+        成績のない生徒も行に含めるため名簿に LEFT JOIN する（その場合 date_index は NULL）。
+        
+        Args:
+            course_id: 講座ID
+            field: 成績項目（呼び出し側で GRADE_COLUMNS に含まれることを確認済み）
+            start_date: 開始日
+            end_date: 終了日
+            
+        Returns:
+            (SQL クエリ, パラメータ)
+        """
+        join_conditions = ""
+        params = []
+        if start_date:
+            join_conditions += " AND g.entry_date >= ?"
+            params.append(to_day_number(start_date))
+        if end_date:
+            join_conditions += " AND g.entry_date <= ?"
+            params.append(to_day_number(end_date))
+        params.append(course_id)
+        
+        query = f"""
+            SELECT s.student_number, s.student_name, s.class_number,
+                   {date_sql('g.entry_date')} AS entry_date, g.{field} AS value,
+                   CASE WHEN g.entry_date IS NOT NULL
+                        THEN DENSE_RANK() OVER (ORDER BY g.entry_date IS NULL, g.entry_date)
+                   END AS date_index
+            FROM course_students s
+            LEFT JOIN grade_entries g
+                ON g.course_id = s.course_id AND g.student_id = s.student_id{join_conditions}
+            WHERE s.course_id = ?
+            ORDER BY s.student_number, g.entry_date
+        """
+        return query, tuple(params)
+    
+    @staticmethod
+    def _build_order_by(filters: Dict) -> str:
+        """
+        ホワイトリストに基づいて ORDER BY 句を作成
+        
+        同じ値の行の順序も決まるよう、インデックスの列順どおりに全列を並べる
+        （降順の場合はすべての列を降順にしてインデックスを逆順に読む）
+        
+        Args:
+            filters: フィルタ条件の辞書（sort_by, sort_order）
+            
+        Returns:
+            ORDER BY 句
+        """
+        sort_by = filters.get('sort_by') or DEFAULT_SORT_BY
+        sort_order = str(filters.get('sort_order') or 'ASC').upper()
+        
+        if sort_by not in SORT_COLUMNS:
+            raise ValueError(f"並べ替えできない列です: {sort_by}")
+        if sort_order not in SORT_ORDERS:
+            raise ValueError(f"不正なソート順です: {sort_order}")
+        
+        return " ORDER BY " + ", ".join(f"{column} {sort_order}" for column in SORT_COLUMNS[sort_by])
+    
+    def create_or_update_grade(self, grade: Grade, check_conflict: bool = False) -> int:
+        """
+        成績を作成または更新（UPSERT）
+        
+        check_conflict=True の場合は読み込んだ時点から変更されていないときだけ保存する
+        （楽観的排他制御）。grade.id が None なら未登録の成績として作成し、そうでなければ
+        grade.id と grade.row_version が一致する行だけを更新する。保存後は grade.id と
+        grade.row_version を保存した行の値に更新する。
+        
+        Args:
+            grade: 成績オブジェクト
+            check_conflict: 他の利用者の変更を上書きしないか（成績入力画面用）
+            
+        Returns:
+            成績ID
+            
+        Raises:
+            GradeConflictError: check_conflict=True で、他の利用者が先に同じ成績を
+                作成・更新・削除していた場合
+        """
+        try:
+            values = (grade.grade1, grade.grade2, grade.grade3,
+                      grade.grade4, grade.grade5, grade.grade6,
+                      grade.note1, grade.note2)
+            entry_date = to_day_number(grade.entry_date)
+            with self.db.transaction():
+                student_id = StudentRepository(self.db).register_student_numbers(
+                    [grade.student_number]
+                )[grade.student_number]
+                key = (grade.course_id, entry_date, student_id)
+            
+                if not check_conflict:
+                    query = f"""
+                        INSERT INTO grade_entries 
+                        (id, course_id, entry_date, student_id, grade1, grade2, grade3,
+                         grade4, grade5, grade6, note1, note2)
+                        VALUES ({NEXT_GRADE_ID}, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                        ON CONFLICT(course_id, entry_date, student_id)
+                        DO UPDATE SET
+                            grade1 = excluded.grade1,
+                            grade2 = excluded.grade2,
+                            grade3 = excluded.grade3,
+                            grade4 = excluded.grade4,
+                            grade5 = excluded.grade5,
+                            grade6 = excluded.grade6,
+                            note1 = excluded.note1,
+                            note2 = excluded.note2,
+                            updated_at = CURRENT_TIMESTAMP,
+                            row_version = row_version + 1
+                        RETURNING id, row_version
+                    """
+                    params = key + values
+                elif grade.id is None:
+                    # 読み込んだ時点で未登録だった成績は、その間に作成されていれば保存しない
+                    query = f"""
+                        INSERT INTO grade_entries 
+                        (id, course_id, entry_date, student_id, grade1, grade2, grade3,
+                         grade4, grade5, grade6, note1, note2)
+                        VALUES ({NEXT_GRADE_ID}, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                        ON CONFLICT(course_id, entry_date, student_id) DO NOTHING
+                        RETURNING id, row_version
+                    """
+                    params = key + values
+                else:
+                    # 差し替えインポートで入れ直された成績は ID が変わるため、ID も条件に含める
+                    query = """
+                        UPDATE grade_entries SET
+                            grade1 = ?, grade2 = ?, grade3 = ?,
+                            grade4 = ?, grade5 = ?, grade6 = ?,
+                            note1 = ?, note2 = ?,
+                            updated_at = CURRENT_TIMESTAMP,
+                            row_version = row_version + 1
+                        WHERE id = ? AND row_version = ?
+                        RETURNING id, row_version
+                    """
+                    params = values + (grade.id, grade.row_version)
+                
+                # 作成・更新のどちらでも対象の成績IDと新しい行バージョンが返る
+                row = self.db.execute_query(query, params).fetchone()
+                if row is None:
+                    current = self._get_grade_by_key(*key)
+                    self.db.lock_stats.record_conflict()
+                    raise GradeConflictError(grade, current)
+                self.db.publish(GradesChanged(grade.course_id, grade.entry_date))
+            
+            grade.id, grade.row_version = row['id'], row['row_version']
+            logger.info(f"成績を保存しました (ID: {grade.id})")
+            return grade.id
+        except GradeConflictError as e:
+            logger.warning(f"成績保存の競合: {e}")
+            raise
         except Exception as e:
-            self.db.rollback()
             logger.error(f"成績保存エラー: {e}")
             raise
     
+    def _get_grade_by_key(self, course_id: int, entry_date: int,
+                          student_id: int) -> Optional[Grade]:
+        """講座ID・授業日（日番号）・生徒IDで成績を取得（競合時の現在の内容の確認用）"""
+        row = self.db.fetch_one(
+            f"""
+            SELECT {GRADE_COLUMNS_SQL}
+            FROM grade_entries
+            WHERE course_id = ? AND entry_date = ? AND student_id = ?
+            """,
+            (course_id, entry_date, student_id)
+        )
+        return Grade.from_row(row) if row else None
+    
     def delete_grade(self, grade_id: int):
         """
         成績を削除
@@ -169,12 +782,14 @@ class GradeRepository:
             grade_id: 成績ID
         """
         try:
-            query = "DELETE FROM grade_entries WHERE id = ?"
-            self.db.execute_query(query, (grade_id,))
-            self.db.commit()
+            query = "DELETE FROM grade_entries WHERE id = ? RETURNING course_id, entry_date"
+            with self.db.transaction():
+                row = self.db.execute_query(query, (grade_id,)).fetchone()
+                if row is not None:
+                    self.db.publish(GradesChanged(row['course_id'],
+                                                  from_day_number(row['entry_date'])))
             logger.info(f"成績を削除しました (ID: {grade_id})")
         except Exception as e:
-            self.db.rollback()
             logger.error(f"成績削除エラー: {e}")
             raise
     
@@ -199,14 +814,17 @@ class GradeRepository:
             
             if filters.get('start_date'):
                 query += " AND entry_date >= ?"
-                params.append(filters['start_date'])
+                params.append(to_day_number(filters['start_date']))
             
             if filters.get('end_date'):
                 query += " AND entry_date <= ?"
-                params.append(filters['end_date'])
+                params.append(to_day_number(filters['end_date']))
             
-            cursor = self.db.execute_query(query, tuple(params))
+            with self.db.transaction():
+                cursor = self.db.execute_query(query, tuple(params))
+                self.db.publish(*self._filter_events(filters))
             deleted_count = cursor.rowcount
+            self.db.maintenance.after_bulk_delete()
             
             logger.info(f"フィルタ条件で成績を削除しました ({deleted_count}件)")
             return deleted_count
@@ -223,48 +841,30 @@ class GradeRepository:
             filters: フィルタ条件
         """
         try:
-            grades = self.get_grade_list(filters)
+            # 書き込みと並行しても一貫した内容になるようスナップショット上で読む
+            # （スナップショットの読み取り中は ATTACH できないため、アーカイブは先に ATTACH する）
+            self._attach_archives(filters)
+            with self.db.read_snapshot():
+                frame = self.get_grade_frame(filters)
             
             Path(csv_path).parent.mkdir(parents=True, exist_ok=True)
+            frame.to_csv(csv_path)
             
-            with open(csv_path, 'w', encoding='utf-8-sig', newline='') as f:
-                fieldnames = [
-                    'course_name', 'entry_date', 'student_number', 'student_name',
-                    'class_number', 'grade1', 'grade2', 'grade3', 'grade4',
-                    'grade5', 'grade6', 'note1', 'note2'
-                ]
-                writer = csv.DictWriter(f, fieldnames=fieldnames)
-                
-                writer.writeheader()
-                for grade in grades:
-                    writer.writerow({
-                        'course_name': grade.course_name,
-                        'entry_date': grade.entry_date,
-                        'student_number': grade.student_number,
-                        'student_name': grade.student_name,
-                        'class_number': grade.class_number or '',
-                        'grade1': grade.grade1 if grade.grade1 is not None else '',
-                        'grade2': grade.grade2 if grade.grade2 is not None else '',
-                        'grade3': grade.grade3 if grade.grade3 is not None else '',
-                        'grade4': grade.grade4 if grade.grade4 is not None else '',
-                        'grade5': grade.grade5 if grade.grade5 is not None else '',
-                        'grade6': grade.grade6 if grade.grade6 is not None else '',
-                        'note1': grade.note1 or '',
-                        'note2': grade.note2 or ''
-                    })
-            
-            logger.info(f"CSVエクスポート完了: {len(grades)}件 -> {csv_path}")
+            logger.info(f"CSVエクスポート完了: {len(frame)}件 -> {csv_path}")
         except Exception as e:
             logger.error(f"CSVエクスポートエラー: {e}")
             raise
     
-    def import_from_csv_with_replacement(self, csv_path: str, filters: Dict) -> dict:
+    def import_from_csv_with_replacement(self, csv_path: str, filters: Dict,
+                                         bulk_load: Optional[bool] = None) -> dict:
         """
         CSVファイルから成績を一括インポート（差し替え式）
         
         Args:
             csv_path: CSVファイルのパス
             filters: 差し替え範囲のフィルタ条件
+            bulk_load: 一括ロードモードを使うか（Noneの場合は件数が
+                BULK_LOAD_THRESHOLD 以上のとき自動で使用）
             
         Returns:
             インポート結果（deleted, created, errors, backup_path）
@@ -275,12 +875,11 @@ class GradeRepository:
             # Step 1: 自動バックアップ作成
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             
-            # 講座名を取得（バックアップファイル名用）
+            # 講座名から講座IDを引く索引（CSVの全行で共有。講座名はバックアップファイル名にも使う）
+            courses = self.db.course_catalog.index()
             course_name = "all"
             if filters.get('course_ids') and len(filters['course_ids']) == 1:
-                from database.repositories.course_repository import CourseRepository
-                course_repo = CourseRepository(self.db)
-                course = course_repo.get_course_by_id(filters['course_ids'][0])
+                course = courses.get(filters['course_ids'][0])
                 if course:
                     course_name = course.course_name
             
@@ -315,15 +914,12 @@ class GradeRepository:
                             continue
                         
                         # 講座IDを取得
-                        course_query = "SELECT course_id FROM courses WHERE course_name = ?"
-                        course_row = self.db.fetch_one(course_query, (course_name_csv,))
+                        course_id = courses.course_id(course_name_csv)
                         
-                        if not course_row:
+                        if course_id is None:
                             result['errors'].append(f"行 {row_num}: 講座が見つかりません: {course_name_csv}")
                             continue
                         
-                        course_id = course_row['course_id']
-                        
                         # 成績データの準備
                         def parse_value(val, type_func):
                             val = val.strip() if val else ''
@@ -360,68 +956,137 @@ class GradeRepository:
                 logger.warning("CSVに有効なデータがありません")
                 return result
             
-            # Step 3: トランザクション内で削除と挿入を実行
-            # 削除クエリの構築
-            delete_query = "DELETE FROM grade_entries WHERE 1=1"
-            delete_params = []
-            
-            if filters.get('course_ids'):
-                placeholders = ','.join('?' * len(filters['course_ids']))
-                delete_query += f" AND course_id IN ({placeholders})"
-                delete_params.extend(filters['course_ids'])
-            
-            if filters.get('start_date'):
-                delete_query += " AND entry_date >= ?"
-                delete_params.append(filters['start_date'])
-            
-            if filters.get('end_date'):
-                delete_query += " AND entry_date <= ?"
-                delete_params.append(filters['end_date'])
-            
-            logger.info(f"削除クエリ: {delete_query}")
-            logger.info(f"削除パラメータ: {delete_params}")
-            
-            # 削除実行
-            cursor = self.db.execute_query(delete_query, tuple(delete_params))
-            result['deleted'] = cursor.rowcount
-            logger.info(f"削除完了: {result['deleted']}件")
-            
-            # Step 4: CSVデータを挿入
-            insert_query = """
-                INSERT INTO grade_entries 
-                (course_id, entry_date, student_number, grade1, grade2, grade3,
-                 grade4, grade5, grade6, note1, note2)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """
+            # Step 3-5: トランザクション内で削除と挿入を実行してコミット
+            if bulk_load is None:
+                bulk_load = len(csv_data) >= BULK_LOAD_THRESHOLD
             
-            for grade_data in csv_data:
-                try:
-                    self.db.execute_query(
-                        insert_query,
-                        (grade_data['course_id'], grade_data['entry_date'], grade_data['student_number'],
-                         grade_data['grade1'], grade_data['grade2'], grade_data['grade3'],
-                         grade_data['grade4'], grade_data['grade5'], grade_data['grade6'],
-                         grade_data['note1'], grade_data['note2'])
-                    )
-                    result['created'] += 1
-                except Exception as e:
-                    error_msg = f"挿入エラー: 講座ID={grade_data['course_id']}, 日付={grade_data['entry_date']}, 生徒={grade_data['student_number']}: {str(e)}"
-                    result['errors'].append(error_msg)
-                    logger.error(error_msg)
-            
-            # Step 5: コミット
-            self.db.commit()
+            if bulk_load:
+                logger.info(f"一括ロードモードでインポートします ({len(csv_data)}件)")
+                with self.db.bulk_load('grade_entries', suspend_triggers=ENTRY_SUMMARY_TRIGGERS):
+                    self._replace_grades(csv_data, filters, result, bulk_load=True)
+                    self.rebuild_entry_summary()
+            else:
+                with self.db.transaction():
+                    self._replace_grades(csv_data, filters, result)
+                self.db.maintenance.after_bulk_delete()
             
             logger.info(f"CSV差し替えインポート完了: 削除={result['deleted']}, "
                        f"作成={result['created']}, エラー={len(result['errors'])}")
             return result
         
         except Exception as e:
-            self.db.rollback()
             logger.error(f"CSVインポートエラー: {e}")
             result['errors'].append(f"致命的エラー: {str(e)}")
             raise
     
+    def _replace_grades(self, csv_data: List[dict], filters: Dict, result: dict,
+                        bulk_load: bool = False):
+        """
+        差し替え範囲の成績を削除し、CSVデータを挿入（トランザクションは呼び出し側）
+        
+        Args:
+            csv_data: 挿入する成績データのリスト
+            filters: 差し替え範囲のフィルタ条件
+            result: インポート結果（deleted, created, errors を更新）
+            bulk_load: executemany でまとめて挿入するか
+        """
+        # 差し替え範囲の条件
+        conditions = "1=1"
+        condition_params = []
+        
+        if filters.get('course_ids'):
+            placeholders = ','.join('?' * len(filters['course_ids']))
+            conditions += f" AND course_id IN ({placeholders})"
+            condition_params.extend(filters['course_ids'])
+        
+        if filters.get('start_date'):
+            conditions += " AND entry_date >= ?"
+            condition_params.append(to_day_number(filters['start_date']))
+        
+        if filters.get('end_date'):
+            conditions += " AND entry_date <= ?"
+            condition_params.append(to_day_number(filters['end_date']))
+        
+        # 一括ロードでは変更ログのトリガーを止め、削除・挿入した行をまとめて記録する
+        suspended = CHANGE_LOG_TRIGGERS['grade_entries'] if bulk_load else ()
+        with self.db.suspend_triggers(suspended):
+            if bulk_load:
+                self.db.changes.record('grade_entries', 'D', conditions, condition_params)
+        
+            delete_query = f"DELETE FROM grade_entries WHERE {conditions}"
+            logger.info(f"削除クエリ: {delete_query}")
+            logger.info(f"削除パラメータ: {condition_params}")
+        
+            # 削除実行
+            cursor = self.db.execute_query(delete_query, tuple(condition_params))
+            result['deleted'] = cursor.rowcount
+            logger.info(f"削除完了: {result['deleted']}件")
+            
+            last_id = self.db.fetch_one(f"SELECT {NEXT_GRADE_ID} - 1 AS id")['id']
+            self._insert_grades(csv_data, result, bulk_load)
+            
+            if bulk_load:
+                self.db.changes.record('grade_entries', 'I', "id > ?", (last_id,))
+    
+        lessons = {(grade_data['course_id'], grade_data['entry_date']) for grade_data in csv_data}
+        self.db.publish(*self._filter_events(filters),
+                        *(GradesChanged(course_id, entry_date) for course_id, entry_date in lessons))
+    
+    @staticmethod
+    def _filter_events(filters: Dict) -> List[GradesChanged]:
+        """フィルタ条件の範囲の成績の変更イベント（講座の指定がなければすべての講座）"""
+        return [GradesChanged(course_id) for course_id in filters.get('course_ids') or [None]]
+    
+    def _insert_grades(self, csv_data: List[dict], result: dict, bulk_load: bool):
+        """
+        CSVデータを挿入（_replace_grades から使用）
+        
+        Args:
+            csv_data: 挿入する成績データのリスト
+            result: インポート結果（created, errors を更新）
+            bulk_load: executemany でまとめて挿入するか
+        """
+        insert_query = f"""
+            INSERT INTO grade_entries 
+            (id, course_id, entry_date, student_id, grade1, grade2, grade3,
+             grade4, grade5, grade6, note1, note2)
+            VALUES ({NEXT_GRADE_ID}, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """
+        student_ids = StudentRepository(self.db).register_student_numbers(
+            grade_data['student_number'] for grade_data in csv_data
+        )
+        rows = [
+            (grade_data['course_id'], to_day_number(grade_data['entry_date']),
+             student_ids[grade_data['student_number']],
+             grade_data['grade1'], grade_data['grade2'], grade_data['grade3'],
+             grade_data['grade4'], grade_data['grade5'], grade_data['grade6'],
+             grade_data['note1'], grade_data['note2'])
+            for grade_data in csv_data
+        ]
+        
+        if bulk_load:
+            # まとめて挿入し、制約違反があった場合のみ1行ずつ挿入し直してエラー行を特定
+            self.db.execute_query("SAVEPOINT bulk_insert")
+            try:
+                self.db.execute_many(insert_query, rows)
+                self.db.execute_query("RELEASE SAVEPOINT bulk_insert")
+                result['created'] += len(rows)
+                return
+            except sqlite3.IntegrityError as e:
+                logger.warning(f"一括挿入で制約違反が発生したため1行ずつ挿入します: {e}")
+                self.db.execute_query("ROLLBACK TO SAVEPOINT bulk_insert")
+                self.db.execute_query("RELEASE SAVEPOINT bulk_insert")
+        
+        for grade_data, params in zip(csv_data, rows):
+            try:
+                self.db.execute_query(insert_query, params)
+                result['created'] += 1
+            except Exception as e:
+                error_msg = (f"挿入エラー: 講座ID={params[0]}, 日付={from_day_number(params[1])}, "
+                             f"生徒={grade_data['student_number']}: {str(e)}")
+                result['errors'].append(error_msg)
+                logger.error(error_msg)
+    
     def _normalize_date(self, date_str: str) -> Optional[str]:
         """
         日付文字列を YYYY-MM-DD 形式に統一
@@ -460,7 +1125,10 @@ class GradeRepository:
             parts = date_str_normalized.split('-')
             if len(parts) == 3:
                 year, month, day = parts
-                return f"{year:0>4}-{month:0>2}-{day:0>2}"
+                normalized = f"{year:0>4}-{month:0>2}-{day:0>2}"
+                # 存在しない日付（2月30日など）は格納できないため不正とする
+                to_day_number(normalized)
+                return normalized
         except:
             pass
         
@@ -479,37 +1147,43 @@ class GradeRepository:
         result = {'created': 0, 'updated': 0, 'errors': []}
         
         try:
-            with open(csv_path, 'r', encoding='utf-8-sig') as f:
+            # 全行を1トランザクションで保存（各行の保存はセーブポイント単位）
+            with self.db.transaction(), open(csv_path, 'r', encoding='utf-8-sig') as f:
+                # 講座名から講座IDを引く索引（CSVの全行で共有）
+                courses = self.db.course_catalog.index()
                 reader = csv.DictReader(f)
                 
                 for row_num, row in enumerate(reader, start=2):
                     try:
                         course_name = row.get('course_name', '').strip()
-                        entry_date = row.get('entry_date', '').strip()
+                        entry_date_raw = row.get('entry_date', '').strip()
                         student_number = row.get('student_number', '').strip()
                         
-                        if not all([course_name, entry_date, student_number]):
+                        if not all([course_name, entry_date_raw, student_number]):
                             result['errors'].append(f"行 {row_num}: 必須項目が空です")
                             continue
                         
+                        entry_date = self._normalize_date(entry_date_raw)
+                        if not entry_date:
+                            result['errors'].append(f"行 {row_num}: 日付フォーマットが不正です: {entry_date_raw}")
+                            continue
+                        
                         # 講座IDを取得
-                        course_query = "SELECT course_id FROM courses WHERE course_name = ?"
-                        course_row = self.db.fetch_one(course_query, (course_name,))
+                        course_id = courses.course_id(course_name)
                         
-                        if not course_row:
+                        if course_id is None:
                             result['errors'].append(f"行 {row_num}: 講座が見つかりません: {course_name}")
                             continue
                         
-                        course_id = course_row['course_id']
-                        
                         # 既存の成績を確認
                         existing_query = """
                             SELECT id FROM grade_entries
+                            JOIN students USING (student_id)
                             WHERE course_id = ? AND entry_date = ? AND student_number = ?
                         """
                         existing = self.db.fetch_one(
                             existing_query,
-                            (course_id, entry_date, student_number)
+                            (course_id, to_day_number(entry_date), student_number)
                         )
                         
                         # 成績データの準備
@@ -550,6 +1224,5 @@ class GradeRepository:
             return result
         
         except Exception as e:
-            self.db.rollback()
             logger.error(f"CSVファイル読み込みエラー: {e}")
             raise
@@ -1,15 +1,23 @@
-from typing import List, Optional
+from typing import Dict, Iterable, List, Optional
 import csv
 import logging
 from pathlib import Path
 from datetime import datetime
 
 from database.db_manager import DatabaseManager
+from database.events import RosterChanged
+from database.search import match_rowids
 from models.student import Student
 
 logger = logging.getLogger(__name__)
 
-
+# 生徒番号を students に登録する（登録済みの番号はそのままで、生徒IDは変わらない）
+REGISTER_STUDENT_QUERY = """
+    INSERT INTO students (student_number) VALUES (?)
+    ON CONFLICT(student_number) DO NOTHING
+"""
+# 生徒IDを一度に引く生徒番号の数（SQL文のパラメータ数の上限より十分小さくする）
+STUDENT_ID_CHUNK_SIZE = 500
 
 
 class StudentRepository:
@@ -24,6 +32,34 @@ class StudentRepository:
         """
         self.db = db_manager
     
+    def register_student_numbers(self, student_numbers: Iterable[str]) -> Dict[str, int]:
+        """
+        生徒番号を登録し、生徒IDを取得（トランザクションは呼び出し側）
+        
+        名簿・成績は生徒番号ではなく生徒IDで保存するため、書き込みの前に呼び出す。
+        未登録の番号は新しい生徒IDを割り当て、登録済みの番号は既存の生徒IDを返す。
+        
+        Args:
+            student_numbers: 生徒番号（重複してもよい）
+            
+        Returns:
+            生徒番号から生徒IDへの辞書
+        """
+        numbers = list(dict.fromkeys(student_numbers))
+        self.db.execute_many(REGISTER_STUDENT_QUERY, [(number,) for number in numbers])
+        
+        student_ids = {}
+        for start in range(0, len(numbers), STUDENT_ID_CHUNK_SIZE):
+            chunk = numbers[start:start + STUDENT_ID_CHUNK_SIZE]
+            placeholders = ','.join('?' * len(chunk))
+            rows = self.db.fetch_all(
+                f"SELECT student_number, student_id FROM students "
+                f"WHERE student_number IN ({placeholders})",
+                tuple(chunk)
+            )
+            student_ids.update((row['student_number'], row['student_id']) for row in rows)
+        return student_ids
+    
     def get_students_by_course(self, course_id: int) -> List[Student]:
         """
         講座IDで生徒を取得
@@ -43,7 +79,7 @@ class StudentRepository:
                 ORDER BY student_number
             """
             rows = self.db.fetch_all(query, (course_id,))
-            return [Student(**dict(row)) for row in rows]
+            return [Student.from_row(row) for row in rows]
         except Exception as e:
             logger.error(f"生徒取得エラー (講座ID: {course_id}): {e}")
             raise
@@ -67,7 +103,7 @@ class StudentRepository:
                 WHERE course_id = ? AND student_number = ?
             """
             row = self.db.fetch_one(query, (course_id, student_number))
-            return Student(**dict(row)) if row else None
+            return Student.from_row(row) if row else None
         except Exception as e:
             logger.error(f"生徒取得エラー (講座ID: {course_id}, 番号: {student_number}): {e}")
             raise
@@ -90,11 +126,43 @@ class StudentRepository:
                 WHERE id = ?
             """
             row = self.db.fetch_one(query, (student_id,))
-            return Student(**dict(row)) if row else None
+            return Student.from_row(row) if row else None
         except Exception as e:
             logger.error(f"生徒取得エラー (ID: {student_id}): {e}")
             raise
     
+    def search_students(self, keyword: str, course_id: Optional[int] = None) -> List[Student]:
+        """
+        生徒番号・氏名の部分一致で生徒を検索（全文検索インデックスを使用）
+        
+        Args:
+            keyword: 検索文字列（3文字以上でインデックス検索）
+            course_id: 講座ID（指定しない場合は全講座）
+            
+        Returns:
+            生徒のリスト（講座ID・生徒番号順）
+        """
+        try:
+            search_query, params = match_rowids(
+                'student_search', ['student_number', 'student_name'], keyword
+            )
+            query = f"""
+                SELECT id, course_id, student_number, class_number, student_name,
+                       note1, note2, note3, created_at, updated_at
+                FROM course_students
+                WHERE id IN ({search_query})
+            """
+            if course_id:
+                query += " AND course_id = ?"
+                params.append(course_id)
+            query += " ORDER BY course_id, student_number"
+            
+            rows = self.db.fetch_all(query, tuple(params))
+            return [Student.from_row(row) for row in rows]
+        except Exception as e:
+            logger.error(f"生徒検索エラー (検索文字列: {keyword}): {e}")
+            raise
+    
     def create_student(self, student: Student) -> int:
         """
         生徒を作成
@@ -108,20 +176,22 @@ class StudentRepository:
         try:
             query = """
                 INSERT INTO course_students 
-                (course_id, student_number, class_number, student_name, 
+                (course_id, student_id, student_number, class_number, student_name, 
                  note1, note2, note3)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
             """
-            cursor = self.db.execute_query(
-                query,
-                (student.course_id, student.student_number, student.class_number,
-                 student.student_name, student.note1, student.note2, student.note3)
-            )
-            self.db.commit()
+            with self.db.transaction():
+                student_ids = self.register_student_numbers([student.student_number])
+                cursor = self.db.execute_query(
+                    query,
+                    (student.course_id, student_ids[student.student_number],
+                     student.student_number, student.class_number,
+                     student.student_name, student.note1, student.note2, student.note3)
+                )
+                self.db.publish(RosterChanged(student.course_id))
             logger.info(f"生徒を作成しました: {student.student_name}")
             return cursor.lastrowid
         except Exception as e:
-            self.db.rollback()
             logger.error(f"生徒作成エラー: {e}")
             raise
     
@@ -129,26 +199,32 @@ class StudentRepository:
         """
         生徒を更新
         
+        生徒番号を変更した場合は、変更後の番号の成績がこの生徒の成績になる。
+        
         Args:
             student: 生徒オブジェクト
         """
         try:
             query = """
                 UPDATE course_students
-                SET student_number = ?, class_number = ?, student_name = ?,
+                SET student_id = ?, student_number = ?, class_number = ?, student_name = ?,
                     note1 = ?, note2 = ?, note3 = ?,
                     updated_at = CURRENT_TIMESTAMP
                 WHERE id = ?
+                RETURNING course_id
             """
-            self.db.execute_query(
-                query,
-                (student.student_number, student.class_number, student.student_name,
-                 student.note1, student.note2, student.note3, student.id)
-            )
-            self.db.commit()
+            with self.db.transaction():
+                student_ids = self.register_student_numbers([student.student_number])
+                row = self.db.execute_query(
+                    query,
+                    (student_ids[student.student_number], student.student_number,
+                     student.class_number, student.student_name,
+                     student.note1, student.note2, student.note3, student.id)
+                ).fetchone()
+                if row is not None:
+                    self.db.publish(RosterChanged(row['course_id']))
             logger.info(f"生徒を更新しました: {student.student_name}")
         except Exception as e:
-            self.db.rollback()
             logger.error(f"生徒更新エラー: {e}")
             raise
     
@@ -160,12 +236,13 @@ class StudentRepository:
             student_id: 生徒ID
         """
         try:
-            query = "DELETE FROM course_students WHERE id = ?"
-            self.db.execute_query(query, (student_id,))
-            self.db.commit()
+            query = "DELETE FROM course_students WHERE id = ? RETURNING course_id"
+            with self.db.transaction():
+                row = self.db.execute_query(query, (student_id,)).fetchone()
+                if row is not None:
+                    self.db.publish(RosterChanged(row['course_id']))
             logger.info(f"生徒を削除しました (ID: {student_id})")
         except Exception as e:
-            self.db.rollback()
             logger.error(f"生徒削除エラー: {e}")
             raise
     
@@ -186,12 +263,11 @@ class StudentRepository:
             # Step 1: 自動バックアップ作成
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             
-            # 講座名を取得（バックアップファイル名用）
+            # 講座名から講座IDを引く索引（CSVの全行で共有。講座名はバックアップファイル名にも使う）
+            courses = self.db.course_catalog.index()
             course_name = "all"
             if course_id:
-                from database.repositories.course_repository import CourseRepository
-                course_repo = CourseRepository(self.db)
-                course = course_repo.get_course_by_id(course_id)
+                course = courses.get(course_id)
                 if course:
                     course_name = course.course_name
             
@@ -220,15 +296,12 @@ class StudentRepository:
                             continue
                         
                         # 講座IDを取得
-                        course_query = "SELECT course_id FROM courses WHERE course_name = ?"
-                        course_row = self.db.fetch_one(course_query, (course_name_csv,))
+                        csv_course_id = courses.course_id(course_name_csv)
                         
-                        if not course_row:
+                        if csv_course_id is None:
                             result['errors'].append(f"行 {row_num}: 講座が見つかりません: {course_name_csv}")
                             continue
                         
-                        csv_course_id = course_row['course_id']
-                        
                         # course_id指定時は、その講座のみを対象
                         if course_id and csv_course_id != course_id:
                             continue
@@ -254,48 +327,54 @@ class StudentRepository:
                 return result
             
             # Step 3: トランザクション内で削除と挿入を実行
-            if course_id:
-                # 指定講座のみ削除
-                delete_query = "DELETE FROM course_students WHERE course_id = ?"
-                cursor = self.db.execute_query(delete_query, (course_id,))
-            else:
-                # 全生徒を削除
-                delete_query = "DELETE FROM course_students"
-                cursor = self.db.execute_query(delete_query)
+            with self.db.transaction():
+                if course_id:
+                    # 指定講座のみ削除
+                    delete_query = "DELETE FROM course_students WHERE course_id = ?"
+                    cursor = self.db.execute_query(delete_query, (course_id,))
+                else:
+                    # 全生徒を削除
+                    delete_query = "DELETE FROM course_students"
+                    cursor = self.db.execute_query(delete_query)
             
-            result['deleted'] = cursor.rowcount
-            logger.info(f"削除完了: {result['deleted']}件")
+                result['deleted'] = cursor.rowcount
+                logger.info(f"削除完了: {result['deleted']}件")
             
-            # Step 4: CSVデータを挿入
-            insert_query = """
-                INSERT INTO course_students 
-                (course_id, student_number, class_number, student_name, note1, note2, note3)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            """
+                # Step 4: CSVデータを挿入（生徒IDは番号ごとに変わらないため、成績はそのまま残る）
+                insert_query = """
+                    INSERT INTO course_students 
+                    (course_id, student_id, student_number, class_number, student_name,
+                     note1, note2, note3)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """
+                student_ids = self.register_student_numbers(
+                    student_data['student_number'] for student_data in csv_data
+                )
+            
+                for student_data in csv_data:
+                    try:
+                        self.db.execute_query(
+                            insert_query,
+                            (student_data['course_id'], student_ids[student_data['student_number']],
+                             student_data['student_number'],
+                             student_data['class_number'], student_data['student_name'],
+                             student_data['note1'], student_data['note2'], student_data['note3'])
+                        )
+                        result['created'] += 1
+                    except Exception as e:
+                        error_msg = f"挿入エラー: 講座ID={student_data['course_id']}, 生徒番号={student_data['student_number']}: {str(e)}"
+                        result['errors'].append(error_msg)
+                        logger.error(error_msg)
             
-            for student_data in csv_data:
-                try:
-                    self.db.execute_query(
-                        insert_query,
-                        (student_data['course_id'], student_data['student_number'],
-                         student_data['class_number'], student_data['student_name'],
-                         student_data['note1'], student_data['note2'], student_data['note3'])
-                    )
-                    result['created'] += 1
-                except Exception as e:
-                    error_msg = f"挿入エラー: 講座ID={student_data['course_id']}, 生徒番号={student_data['student_number']}: {str(e)}"
-                    result['errors'].append(error_msg)
-                    logger.error(error_msg)
+                self.db.publish(RosterChanged(course_id or None))
             
-            # Step 5: コミット
-            self.db.commit()
+            self.db.maintenance.after_bulk_delete()
             
             logger.info(f"CSV差し替えインポート完了: 削除={result['deleted']}, "
                        f"作成={result['created']}, エラー={len(result['errors'])}")
             return result
         
         except Exception as e:
-            self.db.rollback()
             logger.error(f"CSVインポートエラー: {e}")
             result['errors'].append(f"致命的エラー: {str(e)}")
             raise
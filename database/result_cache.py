@@ -0,0 +1,84 @@
+"""データベースの変更で無効になる問い合わせ結果のキャッシュ"""
+
+import logging
+import threading
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Callable, Hashable, Optional
+
+if TYPE_CHECKING:
+    from database.db_manager import DatabaseManager
+
+logger = logging.getLogger(__name__)
+
+# 保持する結果の件数（超えた場合は最も古く使われたものから破棄）
+DEFAULT_MAX_ENTRIES = 32
+
+
+class ResultCache:
+    """
+    集計結果などをキーごとに保持するキャッシュ
+    
+    取得のたびに DatabaseManager.change_token() を確認し、前回から書き込みが
+    あればすべて破棄する（自身の接続の更新・他のプロセスのコミットのどちらも検知）。
+    未コミットの変更は取り消される可能性があるため、トランザクション中は保持しない。
+    """
+    
+    def __init__(self, db: 'DatabaseManager', max_entries: int = DEFAULT_MAX_ENTRIES):
+        """
+        初期化
+        
+        Args:
+            db: データベースマネージャー
+            max_entries: 保持する結果の最大件数
+        """
+        self.db = db
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: 'OrderedDict[Hashable, Any]' = OrderedDict()
+        self._token: Optional[tuple] = None
+        self._lock = threading.Lock()
+    
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """
+        キャッシュ済みの結果を返す（ない場合は compute() の結果を保持して返す）
+        
+        返した結果は呼び出し側で共有されるため、変更しないこと。
+        
+        Args:
+            key: 結果のキー（フィルタ条件など、ハッシュ可能な値）
+            compute: 結果を求める関数
+            
+        Returns:
+            結果
+        """
+        if self.db.connection.in_transaction:
+            return compute()
+        
+        with self._lock:
+            token = self.db.change_token()
+            if token != self._token:
+                self._entries.clear()
+                self._token = token
+            
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+        
+        result = compute()
+        
+        with self._lock:
+            # 計算中に書き込みがあった場合は古い結果の可能性があるため保持しない
+            if self.db.change_token() == self._token:
+                self._entries[key] = result
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return result
+    
+    def clear(self):
+        """保持している結果をすべて破棄"""
+        with self._lock:
+            self._entries.clear()
+            self._token = None
@@ -0,0 +1,48 @@
+"""全文検索（FTS5 trigram）の検索条件の作成"""
+
+from typing import List, Optional, Sequence, Tuple
+
+# trigram トークナイザでインデックスを使って検索できる最小文字数
+TRIGRAM_MIN_LENGTH = 3
+
+
+def escape_like(text: str) -> str:
+    """
+    LIKE のワイルドカード文字をエスケープ（ESCAPE '\\' と組み合わせて使用）
+    
+    Args:
+        text: 検索文字列
+        
+    Returns:
+        エスケープ済みの文字列
+    """
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def match_rowids(fts_table: str, columns: Sequence[str], text: str,
+                 schema: Optional[str] = None) -> Tuple[str, List[str]]:
+    """
+    指定列のいずれかに検索文字列を含む行の rowid を返す副問い合わせを作成
+    
+    3文字以上は MATCH でインデックスを使って検索する。
+    trigram では2文字以下を MATCH できないため、その場合は LIKE で全件を照合する。
+    
+    Args:
+        fts_table: FTS5 テーブル名
+        columns: 検索対象の列名
+        text: 検索文字列（部分一致）
+        schema: FTS5 テーブルのスキーマ名（ATTACH したデータベースを検索する場合）
+        
+    Returns:
+        (副問い合わせのSQL, パラメータ)
+    """
+    # MATCH の左辺はテーブル名と同じ名前の隠し列（スキーマ名は付けない）
+    source = f"{schema}.{fts_table}" if schema else fts_table
+    if len(text) >= TRIGRAM_MIN_LENGTH:
+        phrase = '"' + text.replace('"', '""') + '"'
+        query = f"SELECT rowid FROM {source} WHERE {fts_table} MATCH ?"
+        return query, [f"{{{' '.join(columns)}}} : {phrase}"]
+    
+    pattern = f"%{escape_like(text)}%"
+    condition = " OR ".join(f"{column} LIKE ? ESCAPE '\\'" for column in columns)
+    return f"SELECT rowid FROM {source} WHERE {condition}", [pattern] * len(columns)
@@ -38,17 +38,34 @@ a = Analysis(
     hiddenimports=[
         # 基本モジュール
         'database',
+        'database.dates',
         'database.db_manager',
+        'database.query_stats',
+        'database.maintenance',
+        'database.search',
+        'database.result_cache',
+        'database.archive',
+        'database.change_log',
+        'database.change_watcher',
+        'database.events',
+        'database.course_catalog',
         'database.repositories',
         'database.repositories.course_repository',
         'database.repositories.student_repository',
         'database.repositories.grade_repository',
         
+        # 成績サービス（接続用クライアント）
+        'service',
+        'service.protocol',
+        'service.client',
+        'service.async_repositories',
+        
         # モデル
         'models',
         'models.course',
         'models.student',
         'models.grade',
+        'models.grade_frame',
         'models.split',
         
         # ビュー
@@ -58,10 +75,14 @@ a = Analysis(
         'views.course_management_view',
         'views.student_management_view',
         'views.grade_list_view',
+        'views.entry_progress_view',
+        'views.grade_matrix_view',
+        'views.change_notifier',
         'views.pdf_split_view',
         'views.widgets',
         'views.widgets.image_preview_widget',
         'views.widgets.student_grade_card',
+        'views.widgets.course_combo',
         'views.widgets.split_settings_dialog',
         'views.widgets.student_assignment_item',
         
@@ -2,6 +2,7 @@
 """スキャン分割・成績入力システム メインエントリーポイント"""
 
 import sys
+import argparse
 import logging
 from pathlib import Path
 
@@ -27,6 +28,29 @@ from PySide6.QtGui import QIcon
 from views.main_window import MainWindow
 
 
+def parse_args(argv):
+    """
+    コマンドライン引数を解析（Qt用の引数はそのまま残す）
+    
+    Args:
+        argv: コマンドライン引数
+        
+    Returns:
+        (解析結果, Qtに渡す引数リスト)
+    """
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument(
+        "--query-stats", metavar="JSON_PATH",
+        help="クエリ計測を有効化し、終了時に統計をJSONで出力する"
+    )
+    parser.add_argument(
+        "--service-url", metavar="URL",
+        help="データベースファイルの代わりに成績サービスに接続する（例: http://127.0.0.1:8765）"
+    )
+    args, qt_args = parser.parse_known_args(argv[1:])
+    return args, [argv[0]] + qt_args
+
+
 def main():
     """アプリケーションメイン関数"""
     logger.info("=" * 60)
@@ -34,12 +58,14 @@ def main():
     logger.info("=" * 60)
     
     try:
-        app = QApplication(sys.argv)
+        args, qt_args = parse_args(sys.argv)
+        
+        app = QApplication(qt_args)
         app.setApplicationName("スキャン分割・成績入力システム")
         app.setOrganizationName("GradeEntrySystem")
         
         # メインウィンドウ作成
-        window = MainWindow()
+        window = MainWindow(query_stats_path=args.query_stats, service_url=args.service_url)
         window.show()
         
         logger.info("メインウィンドウを表示しました")
@@ -1,9 +1,8 @@
 from dataclasses import dataclass
 from typing import Optional
-from datetime import datetime
 
 
-@dataclass
+@dataclass(slots=True)
 class Course:
     """講座モデル"""
     course_id: Optional[int]
@@ -11,8 +10,8 @@ class Course:
     note1: Optional[str] = None
     note2: Optional[str] = None
     note3: Optional[str] = None
-    created_at: Optional[datetime] = None
-    updated_at: Optional[datetime] = None
+    created_at: Optional[str] = None
+    updated_at: Optional[str] = None
     
     def to_dict(self) -> dict:
         """辞書形式に変換"""
@@ -26,6 +25,16 @@ class Course:
             'updated_at': self.updated_at
         }
     
+    @classmethod
+    def from_row(cls, row) -> 'Course':
+        """
+        SELECT の行（sqlite3.Row）から生成
+        
+        辞書に変換せず位置で受け取るため、列はフィールドと同じ順で選択すること
+        （course_id, course_name, note1〜3, created_at, updated_at）
+        """
+        return cls(*row)
+    
     @classmethod
     def from_dict(cls, data: dict) -> 'Course':
         """辞書形式から生成"""
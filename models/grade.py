@@ -1,9 +1,19 @@
-from dataclasses import dataclass
-from typing import Optional
+import math
+from array import array
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
 from datetime import datetime
 
+# 段階評価の成績（0〜4の件数で集計）と数値の成績（平均・分位数で集計）
+LEVEL_GRADE_COLUMNS = ('grade1', 'grade2', 'grade3')
+SCORE_GRADE_COLUMNS = ('grade4', 'grade5', 'grade6')
+GRADE_LEVELS = (0, 1, 2, 3, 4)
+GRADE_COLUMNS = LEVEL_GRADE_COLUMNS + SCORE_GRADE_COLUMNS
+# 数値の成績で求めるパーセンタイル（最近順位法）
+SCORE_PERCENTILES = (25, 50, 75)
 
-@dataclass
+
+@dataclass(slots=True)
 class Grade:
     """成績モデル"""
     id: Optional[int]
@@ -18,8 +28,10 @@ class Grade:
     grade6: Optional[float] = None
     note1: Optional[str] = None
     note2: Optional[str] = None
-    created_at: Optional[datetime] = None
-    updated_at: Optional[datetime] = None
+    created_at: Optional[str] = None
+    updated_at: Optional[str] = None
+    # 読み込んだ時点の行バージョン（保存のたびに1増える。未保存の成績は None）
+    row_version: Optional[int] = None
     
     def to_dict(self) -> dict:
         """辞書形式に変換"""
@@ -37,9 +49,21 @@ class Grade:
             'note1': self.note1,
             'note2': self.note2,
             'created_at': self.created_at,
-            'updated_at': self.updated_at
+            'updated_at': self.updated_at,
+            'row_version': self.row_version
         }
     
+    @classmethod
+    def from_row(cls, row) -> 'Grade':
+        """
+        SELECT の行（sqlite3.Row）から生成
+        
+        辞書に変換せず位置で受け取るため、列はフィールドと同じ順で選択すること
+        （id, course_id, entry_date, student_number, grade1〜6, note1, note2, created_at, updated_at,
+        row_version。row_version は省略可）
+        """
+        return cls(*row)
+    
     @classmethod
     def from_dict(cls, data: dict) -> 'Grade':
         """辞書形式から生成"""
@@ -57,11 +81,12 @@ class Grade:
             note1=data.get('note1'),
             note2=data.get('note2'),
             created_at=data.get('created_at'),
-            updated_at=data.get('updated_at')
+            updated_at=data.get('updated_at'),
+            row_version=data.get('row_version')
         )
 
 
-@dataclass
+@dataclass(slots=True)
 class GradeListItem:
     """成績一覧表示用モデル"""
     id: int
@@ -79,8 +104,18 @@ class GradeListItem:
     grade6: Optional[float]
     note1: Optional[str]
     note2: Optional[str]
-    created_at: datetime
-    updated_at: datetime
+    created_at: str
+    updated_at: str
+    
+    @classmethod
+    def from_row(cls, row) -> 'GradeListItem':
+        """
+        SELECT の行（sqlite3.Row）から生成
+        
+        辞書に変換せず位置で受け取るため、列はフィールドと同じ順で選択すること
+        （grade_repository.GRADE_LIST_COLUMNS）
+        """
+        return cls(*row)
     
     @classmethod
     def from_dict(cls, data: dict) -> 'GradeListItem':
@@ -104,3 +139,138 @@ class GradeListItem:
             created_at=data['created_at'],
             updated_at=data['updated_at']
         )
+
+
+@dataclass(slots=True)
+class GradeEntrySummary:
+    """講座・授業日ごとの入力状況モデル"""
+    course_id: int
+    course_name: str
+    entry_date: str
+    entered_count: int
+    roster_size: int
+    last_updated: Optional[str] = None
+    
+    @property
+    def missing_count(self) -> int:
+        """未入力の人数"""
+        return max(self.roster_size - self.entered_count, 0)
+    
+    @property
+    def last_updated_at(self) -> Optional[datetime]:
+        """最終更新日時（表示するときに文字列から変換する）"""
+        return datetime.fromisoformat(self.last_updated) if self.last_updated else None
+    
+    @classmethod
+    def from_row(cls, row) -> 'GradeEntrySummary':
+        """
+        SELECT の行（sqlite3.Row）から生成
+        
+        辞書に変換せず位置で受け取るため、列はフィールドと同じ順で選択すること
+        （course_id, course_name, entry_date, entered_count, roster_size, last_updated）
+        """
+        return cls(*row)
+    
+    @classmethod
+    def from_dict(cls, data: dict) -> 'GradeEntrySummary':
+        """辞書形式から生成"""
+        return cls(
+            course_id=data['course_id'],
+            course_name=data['course_name'],
+            entry_date=data['entry_date'],
+            entered_count=data['entered_count'],
+            roster_size=data['roster_size'],
+            last_updated=data.get('last_updated')
+        )
+
+
+@dataclass(slots=True)
+class ScoreStatistics:
+    """数値の成績（grade4〜6）1列分の統計量"""
+    count: int
+    mean: Optional[float] = None
+    minimum: Optional[float] = None
+    maximum: Optional[float] = None
+    percentiles: Dict[int, Optional[float]] = field(default_factory=dict)
+    
+    @property
+    def median(self) -> Optional[float]:
+        """中央値"""
+        return self.percentiles.get(50)
+
+
+@dataclass(slots=True)
+class GradeStatistics:
+    """講座・クラス・授業日などのグループごとの成績統計"""
+    group_key: Any
+    group_label: str
+    row_count: int
+    level_counts: Dict[str, List[int]] = field(default_factory=dict)
+    scores: Dict[str, ScoreStatistics] = field(default_factory=dict)
+    
+    @classmethod
+    def from_dict(cls, data: dict) -> 'GradeStatistics':
+        """
+        集計クエリの行から生成
+        
+        列名は grade1_0〜grade1_4（段階ごとの件数）、grade4_count / grade4_mean /
+        grade4_min / grade4_max / grade4_p25 など（GradeRepository.get_grade_statistics）
+        """
+        level_counts = {
+            column: [data[f"{column}_{level}"] or 0 for level in GRADE_LEVELS]
+            for column in LEVEL_GRADE_COLUMNS
+        }
+        scores = {
+            column: ScoreStatistics(
+                count=data[f"{column}_count"],
+                mean=data[f"{column}_mean"],
+                minimum=data[f"{column}_min"],
+                maximum=data[f"{column}_max"],
+                percentiles={p: data[f"{column}_p{p}"] for p in SCORE_PERCENTILES}
+            )
+            for column in SCORE_GRADE_COLUMNS
+        }
+        return cls(
+            group_key=data['group_key'],
+            group_label=str(data['group_label'] if data['group_label'] is not None else ""),
+            row_count=data['row_count'],
+            level_counts=level_counts,
+            scores=scores
+        )
+
+
+@dataclass(slots=True)
+class GradeMatrix:
+    """
+    講座の1つの成績項目を生徒×授業日の行列で保持するモデル
+    
+    値はセルごとのオブジェクトを作らず、行優先の1次元配列（array('d')）に格納する。
+    成績がないセルは NaN。
+    """
+    course_id: int
+    field: str
+    student_numbers: List[str]
+    student_names: List[str]
+    class_numbers: List[Optional[str]]
+    entry_dates: List[str]
+    values: array
+    
+    @property
+    def row_count(self) -> int:
+        """行（生徒）の数"""
+        return len(self.student_numbers)
+    
+    @property
+    def column_count(self) -> int:
+        """列（授業日）の数"""
+        return len(self.entry_dates)
+    
+    def value(self, row: int, column: int) -> Optional[float]:
+        """セルの値（成績がない場合は None）"""
+        value = self.values[row * self.column_count + column]
+        return None if math.isnan(value) else value
+    
+    def row_values(self, row: int) -> array:
+        """1人分の値（授業日順、成績がない日は NaN）"""
+        start = row * self.column_count
+        return self.values[start:start + self.column_count]
@@ -0,0 +1,390 @@
+"""
+列指向の成績データ（大量の行の集計・エクスポート用）
+
+GradeListItem を1行ごとに作らず、列ごとに型付きの配列（array）で保持する。
+- grade1〜3: 1バイト整数（未入力は -1）
+- grade4〜6: 倍精度浮動小数点数（未入力は NaN）
+- 講座名・授業日・生徒番号・氏名・クラス: 値の一覧と整数コードの配列（カテゴリ列）
+- 備考: 文字列のリスト
+NumPy がある環境では to_numpy() でコピーせずに配列として参照できる。
+"""
+
+import csv
+import math
+import sys
+from array import array
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, TextIO, Union
+
+from models.grade import LEVEL_GRADE_COLUMNS, SCORE_GRADE_COLUMNS, SCORE_PERCENTILES, ScoreStatistics
+
+# 数値の列と array の型コード
+NUMERIC_COLUMNS = {
+    'id': 'q',
+    'course_id': 'i',
+    **{column: 'b' for column in LEVEL_GRADE_COLUMNS},
+    **{column: 'd' for column in SCORE_GRADE_COLUMNS},
+}
+# 同じ値が繰り返し現れる文字列の列（カテゴリ列）
+CATEGORICAL_COLUMNS = ('course_name', 'entry_date', 'student_number', 'student_name', 'class_number')
+# 値がほぼ重複しない文字列の列
+TEXT_COLUMNS = ('note1', 'note2')
+FRAME_COLUMNS = tuple(NUMERIC_COLUMNS) + CATEGORICAL_COLUMNS + TEXT_COLUMNS
+
+# 整数列・カテゴリ列の欠損値
+MISSING_CODE = -1
+
+# CSVエクスポートの既定の列（GradeRepository.export_to_csv と同じ）
+CSV_COLUMNS = (
+    'course_name', 'entry_date', 'student_number', 'student_name',
+    'class_number', 'grade1', 'grade2', 'grade3', 'grade4',
+    'grade5', 'grade6', 'note1', 'note2'
+)
+
+
+class CategoricalColumn:
+    """重複の多い文字列の列（値の一覧と、各行の値の位置を表す整数コードの配列）"""
+    
+    def __init__(self, categories: Optional[List[Any]] = None,
+                 codes: Optional[array] = None):
+        """
+        初期化
+        
+        Args:
+            categories: 値の一覧（コード順）
+            codes: 各行のコード（欠損は MISSING_CODE）
+        """
+        self.categories: List[Any] = categories if categories is not None else []
+        self.codes = codes if codes is not None else array('i')
+        self._lookup = {value: code for code, value in enumerate(self.categories)}
+    
+    def append(self, value: Any):
+        """行を追加（文字列は sys.intern で共有）"""
+        if value is None:
+            self.codes.append(MISSING_CODE)
+            return
+        
+        code = self._lookup.get(value)
+        if code is None:
+            code = len(self.categories)
+            self.categories.append(sys.intern(value) if isinstance(value, str) else value)
+            self._lookup[value] = code
+        self.codes.append(code)
+    
+    def code_of(self, value: Any) -> Optional[int]:
+        """値のコード（含まれない場合は None）"""
+        if value is None:
+            return MISSING_CODE
+        return self._lookup.get(value)
+    
+    def map_categories(self, func: Callable[[Any], Any]) -> 'CategoricalColumn':
+        """
+        値の一覧だけを変換した列（各行のコードはそのまま共有する）
+        
+        Args:
+            func: 値の変換関数（異なる値は異なる値に変換すること）
+            
+        Returns:
+            変換後の列
+        """
+        return CategoricalColumn([func(value) for value in self.categories], self.codes)
+    
+    def take(self, indices: Iterable[int]) -> 'CategoricalColumn':
+        """指定した行のみの列（値の一覧は共有する）"""
+        column = CategoricalColumn.__new__(CategoricalColumn)
+        column.categories = self.categories
+        column.codes = array('i', (self.codes[i] for i in indices))
+        column._lookup = self._lookup
+        return column
+    
+    def __len__(self) -> int:
+        """行数"""
+        return len(self.codes)
+    
+    def __getitem__(self, index: int) -> Any:
+        """行の値（欠損は None）"""
+        code = self.codes[index]
+        return None if code == MISSING_CODE else self.categories[code]
+
+
+def _decode(typecode: str, value: Any) -> Any:
+    """数値の列の値を Python の値に変換（欠損は None）"""
+    if typecode == 'd':
+        return None if math.isnan(value) else value
+    if typecode == 'b' and value == MISSING_CODE:
+        return None
+    return value
+
+
+class GradeFrame:
+    """
+    列指向の成績データ
+    
+    GradeRepository.get_grade_frame() で作成する。行の順序は取得時の並び順のまま。
+    """
+    
+    def __init__(self, columns: Dict[str, Union[array, CategoricalColumn, List[Optional[str]]]]):
+        """
+        初期化
+        
+        Args:
+            columns: 列名と列データ（FRAME_COLUMNS の順に全列）
+        """
+        self.columns = columns
+    
+    @classmethod
+    def empty(cls) -> 'GradeFrame':
+        """行のない GradeFrame"""
+        columns = {}
+        for name in FRAME_COLUMNS:
+            if name in NUMERIC_COLUMNS:
+                columns[name] = array(NUMERIC_COLUMNS[name])
+            elif name in CATEGORICAL_COLUMNS:
+                columns[name] = CategoricalColumn()
+            else:
+                columns[name] = []
+        return cls(columns)
+    
+    @classmethod
+    def from_rows(cls, rows: Iterable[Sequence]) -> 'GradeFrame':
+        """
+        grade_list_view の行（sqlite3.Row）から作成
+        
+        行は1件ずつ列に追加するため、rows にイテレーターを渡せば全行を同時に保持しない。
+        FRAME_COLUMNS 以外の列（作成日時など）は無視する。
+        
+        Args:
+            rows: 列名で参照できる行（keys() を持つもの）
+            
+        Returns:
+            GradeFrame
+        """
+        frame = cls.empty()
+        appenders = None
+        for row in rows:
+            if appenders is None:
+                appenders = frame._appenders(row.keys())
+            for position, append in appenders:
+                append(row[position])
+        return frame
+    
+    def _appenders(self, names: Sequence[str]) -> List[tuple]:
+        """結果の列の位置と、その値を列に追加する関数の組"""
+        appenders = []
+        for position, name in enumerate(names):
+            if name not in self.columns:
+                continue
+            column = self.columns[name]
+            typecode = NUMERIC_COLUMNS.get(name)
+            if typecode == 'b':
+                append = (lambda c: lambda v: c.append(MISSING_CODE if v is None else v))(column)
+            elif typecode == 'd':
+                append = (lambda c: lambda v: c.append(math.nan if v is None else v))(column)
+            else:
+                append = column.append
+            appenders.append((position, append))
+        return appenders
+    
+    def __len__(self) -> int:
+        """行数"""
+        return len(self.columns['id'])
+    
+    def values(self, name: str) -> List[Any]:
+        """
+        列の値を Python の値のリストで取得（欠損は None）
+        
+        Args:
+            name: 列名
+        """
+        column = self.columns[name]
+        if isinstance(column, CategoricalColumn):
+            return [column[i] for i in range(len(column))]
+        if isinstance(column, array):
+            return [_decode(column.typecode, value) for value in column]
+        return list(column)
+    
+    def value(self, name: str, index: int) -> Any:
+        """1つのセルの値（欠損は None）"""
+        column = self.columns[name]
+        if isinstance(column, array):
+            return _decode(column.typecode, column[index])
+        return column[index]
+    
+    def take(self, indices: Sequence[int]) -> 'GradeFrame':
+        """
+        指定した行のみの GradeFrame を作成
+        
+        Args:
+            indices: 行番号（この順に並ぶ）
+        """
+        columns = {}
+        for name, column in self.columns.items():
+            if isinstance(column, CategoricalColumn):
+                columns[name] = column.take(indices)
+            elif isinstance(column, array):
+                columns[name] = array(column.typecode, (column[i] for i in indices))
+            else:
+                columns[name] = [column[i] for i in indices]
+        return GradeFrame(columns)
+    
+    def filter(self, predicate: Optional[Callable[[int], bool]] = None,
+               **conditions: Any) -> 'GradeFrame':
+        """
+        条件に一致する行のみの GradeFrame を作成
+        
+        カテゴリ列の条件は値ではなくコードで比較する。
+        
+        使用例:
+            frame.filter(class_number='1', grade1=[3, 4])
+            frame.filter(lambda i: (frame.value('grade4', i) or 0) >= 80)
+            
+        Args:
+            predicate: 行番号を受け取り、残す行で True を返す関数
+            conditions: 列名=値（リスト・タプル・集合の場合はいずれかに一致）
+            
+        Returns:
+            一致した行の GradeFrame
+        """
+        matches = []
+        for name, expected in conditions.items():
+            column = self.columns[name]
+            expected = set(expected) if isinstance(expected, (list, tuple, set)) else {expected}
+            if isinstance(column, CategoricalColumn):
+                codes = {column.code_of(value) for value in expected} - {None}
+                matches.append((column.codes, codes))
+            elif isinstance(column, array) and column.typecode == 'b':
+                matches.append((column, {MISSING_CODE if v is None else v for v in expected}))
+            else:
+                matches.append(([self.value(name, i) for i in range(len(self))], expected))
+        
+        indices = [
+            i for i in range(len(self))
+            if all(values[i] in accepted for values, accepted in matches)
+            and (predicate is None or predicate(i))
+        ]
+        return self.take(indices)
+    
+    def group_by(self, key: str) -> Dict[Any, array]:
+        """
+        キー列の値ごとの行番号を取得（最初に現れた順）
+        
+        Args:
+            key: キー列名
+            
+        Returns:
+            キーの値と行番号の配列の辞書
+        """
+        column = self.columns[key]
+        codes = column.codes if isinstance(column, CategoricalColumn) else column
+        groups: Dict[Any, array] = {}
+        for index, code in enumerate(codes):
+            group = groups.get(code)
+            if group is None:
+                group = groups[code] = array('i')
+            group.append(index)
+        
+        if isinstance(column, CategoricalColumn):
+            return {column.categories[code] if code != MISSING_CODE else None: rows
+                    for code, rows in groups.items()}
+        if isinstance(column, array):
+            return {_decode(column.typecode, code): rows for code, rows in groups.items()}
+        return groups
+    
+    def aggregate(self, key: str, column: str) -> Dict[Any, ScoreStatistics]:
+        """
+        キー列の値ごとに成績列の統計量を求める
+        
+        パーセンタイルは GradeRepository.get_grade_statistics と同じ最近順位法。
+        
+        Args:
+            key: キー列名
+            column: 成績の列名（grade1〜6）
+            
+        Returns:
+            キーの値と統計量の辞書
+        """
+        data = self.columns[column]
+        missing = MISSING_CODE if data.typecode == 'b' else None
+        result = {}
+        for group, rows in self.group_by(key).items():
+            if missing is None:
+                values = sorted(v for v in (data[i] for i in rows) if not math.isnan(v))
+            else:
+                values = sorted(v for v in (data[i] for i in rows) if v != missing)
+            count = len(values)
+            result[group] = ScoreStatistics(
+                count=count,
+                mean=sum(values) / count if count else None,
+                minimum=values[0] if count else None,
+                maximum=values[-1] if count else None,
+                percentiles={
+                    p: values[max((p * count + 99) // 100, 1) - 1] if count else None
+                    for p in SCORE_PERCENTILES
+                }
+            )
+        return result
+    
+    def to_csv(self, file: Union[str, TextIO], columns: Sequence[str] = CSV_COLUMNS):
+        """
+        CSVに書き出す（欠損は空欄）
+        
+        Args:
+            file: 出力先のパス（UTF-8 BOM付き）または書き込み可能なファイル
+            columns: 出力する列名（この順にヘッダーを出力）
+        """
+        if isinstance(file, str):
+            with open(file, 'w', encoding='utf-8-sig', newline='') as f:
+                self.to_csv(f, columns)
+            return
+        
+        readers = []
+        for name in columns:
+            column = self.columns[name]
+            if isinstance(column, array):
+                readers.append((lambda c: lambda i: _decode(c.typecode, c[i]))(column))
+            else:
+                readers.append(column.__getitem__)
+        
+        writer = csv.writer(file)
+        writer.writerow(columns)
+        for i in range(len(self)):
+            writer.writerow([
+                '' if value is None else value
+                for value in (read(i) for read in readers)
+            ])
+    
+    def to_numpy(self, name: str):
+        """
+        列を NumPy 配列で取得（数値の列・カテゴリ列のコードはコピーせずに参照）
+        
+        Args:
+            name: 列名（カテゴリ列はコードの int32 配列。値は columns[name].categories）
+            
+        Returns:
+            numpy.ndarray
+            
+        Raises:
+            ImportError: NumPy がインストールされていない場合
+        """
+        try:
+            import numpy as np
+        except ImportError as e:
+            raise ImportError("to_numpy には NumPy が必要です") from e
+        
+        column = self.columns[name]
+        if isinstance(column, CategoricalColumn):
+            column = column.codes
+        if isinstance(column, array):
+            return np.frombuffer(column, dtype=column.typecode)
+        return np.array(column, dtype=object)
+    
+    def nbytes(self) -> int:
+        """配列部分のおおよそのメモリ使用量（バイト。文字列の本体は含まない）"""
+        total = 0
+        for column in self.columns.values():
+            if isinstance(column, CategoricalColumn):
+                column = column.codes
+            if isinstance(column, array):
+                total += column.itemsize * len(column)
+            else:
+                total += 8 * len(column)
+        return total
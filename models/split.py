@@ -33,7 +33,7 @@ class SplitSettings:
         )
 
 
-@dataclass
+@dataclass(slots=True)
 class StudentPageAssignment:
     """生徒のページ割り当て情報"""
     student: Student        # 生徒オブジェクト
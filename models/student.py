@@ -1,9 +1,8 @@
 from dataclasses import dataclass
 from typing import Optional
-from datetime import datetime
 
 
-@dataclass
+@dataclass(slots=True)
 class Student:
     """生徒モデル"""
     id: Optional[int]
@@ -14,8 +13,8 @@ class Student:
     note1: Optional[str] = None
     note2: Optional[str] = None
     note3: Optional[str] = None
-    created_at: Optional[datetime] = None
-    updated_at: Optional[datetime] = None
+    created_at: Optional[str] = None
+    updated_at: Optional[str] = None
     
     def to_dict(self) -> dict:
         """辞書形式に変換"""
@@ -32,6 +31,16 @@ class Student:
             'updated_at': self.updated_at
         }
     
+    @classmethod
+    def from_row(cls, row) -> 'Student':
+        """
+        SELECT の行（sqlite3.Row）から生成
+        
+        辞書に変換せず位置で受け取るため、列はフィールドと同じ順で選択すること
+        （id, course_id, student_number, class_number, student_name, note1〜3, created_at, updated_at）
+        """
+        return cls(*row)
+    
     @classmethod
     def from_dict(cls, data: dict) -> 'Student':
         """辞書形式から生成"""
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+非同期API（AsyncRepositories）の並行読み取りベンチマーク
+成績を一括投入したデータベースに対して、多数のタスクが同時に読み取りを行う場合の
+処理件数/秒を、読み取りの種類（授業日の成績・入力状況の参照、期間ごとの統計、
+講座の成績一覧）ごとに、イベントループ内でリポジトリを直接呼ぶ方式と、
+読み取り用スレッドの数を変えた AsyncRepositories で比較する
+
+あわせて、読み取り中のイベントループの応答性（10ms ごとのタイマーの最大遅れ）を測る
+
+使い方:
+    python scripts/benchmark_async_reads.py [件数] [同時タスク数] [1タスクあたりの参照回数]
+    （省略時は 200000, 32, 20）
+"""
+
+import asyncio
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# プロジェクトルートをパスに追加
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root))
+
+import logging
+logging.disable(logging.WARNING)
+
+from database.db_manager import DatabaseManager
+from database.repositories.grade_repository import GradeRepository, ENTRY_SUMMARY_TRIGGERS
+from service.async_repositories import AsyncRepositories
+from benchmark_bulk_load import generate_grade_rows, prepare_database, COURSE_COUNT
+
+DEFAULT_SIZE = 200_000
+DEFAULT_TASKS = 32
+DEFAULT_READS = 20
+READER_COUNTS = (1, 2, 4, 8)
+# イベントループの応答性を測るタイマーの間隔（秒）
+TICK_INTERVAL = 0.01
+# 統計の期間の最大の授業日数
+STATISTICS_MAX_DAYS = 30
+
+
+def lookup_call(rng: random.Random, entry_dates: list) -> tuple:
+    """授業日の成績・入力状況の参照（1件ごとの処理は小さい）"""
+    course_id = rng.randint(1, COURSE_COUNT)
+    if rng.random() < 0.7:
+        return 'get_grades_by_course_date', (course_id, rng.choice(entry_dates))
+    return 'get_entry_summary', ({'course_ids': [course_id]},)
+
+
+def statistics_call(rng: random.Random, entry_dates: list) -> tuple:
+    """期間を変えたクラスごとの統計（SQLite 内の集計が大半。期間が毎回違うためキャッシュされない）"""
+    start = rng.randrange(len(entry_dates) - 1)
+    end = min(start + rng.randint(1, STATISTICS_MAX_DAYS), len(entry_dates) - 1)
+    return 'get_grade_statistics', ('class', {
+        'start_date': entry_dates[start], 'end_date': entry_dates[end]
+    })
+
+
+def list_call(rng: random.Random, entry_dates: list) -> tuple:
+    """講座の成績一覧（行からモデルを作る Python 側の処理が大半）"""
+    return 'get_grade_list', ({'course_ids': [rng.randint(1, COURSE_COUNT)]},)
+
+
+# 読み取りの種類 -> (名前, 1回分の呼び出しを作る関数, 1タスクあたりの回数の割合)
+WORKLOADS = (
+    ("参照", lookup_call, 1.0),
+    ("集計", statistics_call, 0.25),
+    ("一覧", list_call, 0.1),
+)
+
+
+def read_plan(make_call, tasks: int, reads: int, entry_dates: list) -> list:
+    """タスクごとの読み取り (メソッド名, 引数) のリスト"""
+    rng = random.Random(tasks * reads)
+    return [[make_call(rng, entry_dates) for _ in range(reads)] for _ in range(tasks)]
+
+
+async def measure_lag(stop: asyncio.Event) -> float:
+    """TICK_INTERVAL ごとのタイマーの最大遅れ（秒）"""
+    worst = 0.0
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(TICK_INTERVAL)
+        worst = max(worst, time.perf_counter() - started - TICK_INTERVAL)
+    return worst
+
+
+async def run_tasks(plan: list, call) -> tuple:
+    """すべてのタスクを同時に実行し、(所要時間, 読み取った行数, タイマーの最大遅れ) を返す"""
+    stop = asyncio.Event()
+    lag = asyncio.create_task(measure_lag(stop))
+    await asyncio.sleep(0)
+    
+    async def task(calls):
+        rows = 0
+        for name, args in calls:
+            rows += len(await call(name, args))
+        return rows
+    
+    started = time.perf_counter()
+    rows = sum(await asyncio.gather(*(task(calls) for calls in plan)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    return elapsed, rows, await lag
+
+
+async def run_blocking(db_path: Path, plan: list) -> tuple:
+    """イベントループ内でリポジトリを直接呼ぶ（読み取り中はループが止まる）"""
+    db = DatabaseManager(str(db_path))
+    repo = GradeRepository(db)
+    
+    async def call(name, args):
+        return getattr(repo, name)(*args)
+    
+    try:
+        return await run_tasks(plan, call)
+    finally:
+        db.close()
+
+
+async def run_async(db_path: Path, plan: list, readers: int) -> tuple:
+    """AsyncRepositories で読み取る"""
+    async with AsyncRepositories(str(db_path), readers=readers) as repos:
+        async def call(name, args):
+            return await repos.call('grades', name, *args)
+        return await run_tasks(plan, call)
+
+
+def compare(db_path: Path, plan: list, title: str) -> bool:
+    """直接呼ぶ方式と読み取り用スレッドの数を変えた非同期APIを比較（結果が一致しなければ False）"""
+    total = sum(len(calls) for calls in plan)
+    print()
+    print(title)
+    print(f"{'方式':<22} {'時間(秒)':>10} {'読み取り/秒':>12} {'ループの最大遅れ(ms)':>20}")
+    
+    results = [("ループ内で直接呼ぶ", asyncio.run(run_blocking(db_path, plan)))]
+    for readers in READER_COUNTS:
+        results.append((f"非同期API（読み取り{readers}）",
+                        asyncio.run(run_async(db_path, plan, readers))))
+    
+    expected_rows = results[0][1][1]
+    for label, (elapsed, rows, lag) in results:
+        if rows != expected_rows:
+            print(f"✗ {label}: 読み取った行数が一致しません ({rows:,} != {expected_rows:,})")
+            return False
+        print(f"{label:<22} {elapsed:>10.2f} {total / elapsed:>12.0f} {lag * 1000:>20.1f}")
+    return True
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_SIZE
+    tasks = int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_TASKS
+    reads = int(sys.argv[3]) if len(sys.argv) > 3 else DEFAULT_READS
+    
+    print("=" * 60)
+    print(f"非同期API 並行読み取りベンチマーク（{size:,}行）")
+    print("=" * 60)
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "bench_async.db"
+        db = prepare_database(db_path)
+        try:
+            repo = GradeRepository(db)
+            grade_rows = generate_grade_rows(size)
+            with db.bulk_load('grade_entries', suspend_triggers=ENTRY_SUMMARY_TRIGGERS):
+                repo._replace_grades(grade_rows, {}, {'deleted': 0, 'created': 0, 'errors': []},
+                                     bulk_load=True)
+                repo.rebuild_entry_summary()
+        finally:
+            db.close()
+        
+        entry_dates = sorted({row['entry_date'] for row in grade_rows})
+        for workload, make_call, share in WORKLOADS:
+            count = max(1, int(reads * share))
+            plan = read_plan(make_call, tasks, count, entry_dates)
+            if not compare(db_path, plan, f"{workload}（{tasks}タスク × {count}回）"):
+                return 1
+    
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+成績CSV差し替えインポートのベンチマーク
+差し替え処理（削除＋挿入＋コミット）について、行単位ロードと
+一括ロードモードの所要時間を比較する
+
+使い方:
+    python scripts/benchmark_bulk_load.py [件数 ...]
+    （省略時は 10000 100000 1000000）
+"""
+
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# プロジェクトルートをパスに追加
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root))
+
+import logging
+logging.disable(logging.INFO)
+
+from database.db_manager import DatabaseManager
+from database.repositories.grade_repository import GradeRepository, ENTRY_SUMMARY_TRIGGERS
+from database.repositories.student_repository import StudentRepository
+
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+COURSE_COUNT = 20
+STUDENTS_PER_COURSE = 40
+
+
+def generate_grade_rows(size: int) -> list:
+    """ベンチマーク用の成績データ（インポート時のCSV解析後と同じ形式）を作成"""
+    rng = random.Random(size)
+    rows = []
+    day = 0
+    while len(rows) < size:
+        entry_date = f"{2000 + day // 336:04d}-{day // 28 % 12 + 1:02d}-{day % 28 + 1:02d}"
+        for course_id in range(1, COURSE_COUNT + 1):
+            for student in range(STUDENTS_PER_COURSE):
+                if len(rows) >= size:
+                    return rows
+                rows.append({
+                    'course_id': course_id,
+                    'entry_date': entry_date,
+                    'student_number': f"S{student:04d}",
+                    'grade1': rng.randint(0, 4),
+                    'grade2': rng.randint(0, 4),
+                    'grade3': rng.randint(0, 4),
+                    'grade4': round(rng.uniform(0, 100), 1),
+                    'grade5': None,
+                    'grade6': None,
+                    'note1': None,
+                    'note2': None
+                })
+        day += 1
+    return rows
+
+
+def prepare_database(db_path: Path, clustered_grades: bool = False) -> DatabaseManager:
+    """講座と名簿を登録したデータベースを作成"""
+    db = DatabaseManager(str(db_path), clustered_grades=clustered_grades)
+    db.execute_many(
+        "INSERT INTO courses (course_name) VALUES (?)",
+        [(f"講座{course:02d}",) for course in range(COURSE_COUNT)]
+    )
+    student_ids = StudentRepository(db).register_student_numbers(
+        f"S{student:04d}" for student in range(STUDENTS_PER_COURSE)
+    )
+    db.execute_many(
+        "INSERT INTO course_students (course_id, student_id, student_number, student_name) "
+        "VALUES (?, ?, ?, ?)",
+        [(course + 1, student_ids[f"S{student:04d}"], f"S{student:04d}", f"生徒{student:04d}")
+         for course in range(COURSE_COUNT) for student in range(STUDENTS_PER_COURSE)]
+    )
+    db.commit()
+    return db
+
+
+def run_replace(work_dir: Path, grade_rows: list, bulk_load: bool) -> float:
+    """
+    既存データを同じ件数だけ入れた状態で差し替え（削除＋挿入＋コミット）を実行し、
+    秒数を返す（CSV解析と自動バックアップは計測対象外）
+    """
+    db_path = work_dir / f"bench_{'bulk' if bulk_load else 'row'}.db"
+    db = prepare_database(db_path)
+    repo = GradeRepository(db)
+    try:
+        # 差し替え対象となる既存データを投入
+        with db.bulk_load('grade_entries', suspend_triggers=ENTRY_SUMMARY_TRIGGERS):
+            repo._replace_grades(grade_rows, {}, {'deleted': 0, 'created': 0, 'errors': []},
+                                 bulk_load=True)
+            repo.rebuild_entry_summary()
+        
+        result = {'deleted': 0, 'created': 0, 'errors': []}
+        started = time.perf_counter()
+        if bulk_load:
+            with db.bulk_load('grade_entries', suspend_triggers=ENTRY_SUMMARY_TRIGGERS):
+                repo._replace_grades(grade_rows, {}, result, bulk_load=True)
+                repo.rebuild_entry_summary()
+        else:
+            with db.transaction():
+                repo._replace_grades(grade_rows, {}, result)
+        elapsed = time.perf_counter() - started
+        
+        if result['errors']:
+            print(f"  警告: エラー {len(result['errors'])}件")
+        return elapsed
+    finally:
+        db.close()
+        db_path.unlink(missing_ok=True)
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES
+    
+    print("=" * 60)
+    print("成績CSV差し替えインポート ベンチマーク")
+    print("=" * 60)
+    print(f"{'件数':>10} {'行単位(秒)':>12} {'一括(秒)':>12} {'倍率':>8}")
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        work_dir = Path(tmp)
+        
+        for size in sizes:
+            grade_rows = generate_grade_rows(size)
+            
+            row_time = run_replace(work_dir, grade_rows, bulk_load=False)
+            bulk_time = run_replace(work_dir, grade_rows, bulk_load=True)
+            
+            print(f"{size:>10,} {row_time:>12.2f} {bulk_time:>12.2f} {row_time / bulk_time:>7.1f}x")
+    
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
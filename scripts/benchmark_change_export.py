@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+差分エクスポートのベンチマーク
+成績を一括投入したデータベースに1日分の編集（成績の更新・追加・削除、名簿の追加）を
+行い、成績全件のエクスポート（export_to_csv）と前回のウォーターマーク以降の
+差分エクスポート（db.changes.export_changes）の所要時間と出力行数を比較する
+
+あわせて、編集前の全件（通し番号 0 からの差分）に編集後の差分を適用した結果が
+編集後の成績と一致することを確認する
+
+使い方:
+    python scripts/benchmark_change_export.py [件数] [編集件数]
+    （省略時は 300000, 1000）
+"""
+
+import csv
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# プロジェクトルートをパスに追加
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root))
+
+import logging
+logging.disable(logging.INFO)
+
+from database.change_log import OPERATION_DELETE
+from database.repositories.grade_repository import GradeRepository, ENTRY_SUMMARY_TRIGGERS
+from models.grade import Grade
+from benchmark_bulk_load import generate_grade_rows, prepare_database
+
+DEFAULT_SIZE = 300_000
+DEFAULT_EDITS = 1_000
+REPEAT = 3
+
+
+def apply_changes(rows: dict, path: Path) -> dict:
+    """差分CSVを id をキーとする行の辞書に適用"""
+    with open(path, encoding='utf-8-sig', newline='') as f:
+        for row in csv.DictReader(f):
+            operation = row.pop('operation')
+            if operation == OPERATION_DELETE:
+                rows.pop(row['id'], None)
+            else:
+                rows[row['id']] = row
+    return rows
+
+
+def edit_day(db, repo: GradeRepository, grade_rows: list, edits: int):
+    """1日分の編集（既存成績の更新・新しい授業日の入力・削除・名簿の追加）"""
+    rng = random.Random(edits)
+    for grade_data in rng.sample(grade_rows, edits):
+        repo.create_or_update_grade(Grade(
+            id=None, course_id=grade_data['course_id'], entry_date=grade_data['entry_date'],
+            student_number=grade_data['student_number'], grade1=rng.randint(0, 4)
+        ))
+    for student in range(edits // 10):
+        repo.create_or_update_grade(Grade(
+            id=None, course_id=1, entry_date="2099-04-01",
+            student_number=f"S{student:04d}", grade1=3
+        ))
+    ids = [row['id'] for row in db.fetch_all("SELECT id FROM grade_entries LIMIT ?", (edits,))]
+    for grade_id in rng.sample(ids, edits // 10):
+        repo.delete_grade(grade_id)
+    with db.transaction():
+        db.execute_query(
+            "INSERT INTO course_students (course_id, student_id, student_number, student_name) "
+            "SELECT 2, student_id, student_number, '追加' FROM students "
+            "WHERE student_number NOT IN (SELECT student_number FROM course_students WHERE course_id = 2) "
+            "LIMIT 5"
+        )
+
+
+def best_time(action) -> float:
+    """REPEAT 回実行した最短の所要時間（秒）"""
+    best = float('inf')
+    for _ in range(REPEAT):
+        started = time.perf_counter()
+        action()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_SIZE
+    edits = int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_EDITS
+    
+    print("=" * 60)
+    print(f"差分エクスポート ベンチマーク（{size:,}行, 編集{edits:,}件）")
+    print("=" * 60)
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp_dir = Path(tmp)
+        db = prepare_database(tmp_dir / "bench_changes.db")
+        try:
+            repo = GradeRepository(db)
+            grade_rows = generate_grade_rows(size)
+            with db.bulk_load('grade_entries', suspend_triggers=ENTRY_SUMMARY_TRIGGERS):
+                repo._replace_grades(grade_rows, {}, {'deleted': 0, 'created': 0, 'errors': []},
+                                     bulk_load=True)
+                repo.rebuild_entry_summary()
+            
+            initial = db.changes.export_changes(str(tmp_dir / "initial"))
+            edit_day(db, repo, grade_rows, edits)
+            
+            full_path = tmp_dir / "grades_full.csv"
+            full_time = best_time(lambda: repo.export_to_csv(str(full_path)))
+            delta_time = best_time(
+                lambda: db.changes.export_changes(str(tmp_dir / "delta"), since=initial.watermark)
+            )
+            delta = db.changes.export_changes(str(tmp_dir / "delta"), since=initial.watermark)
+            
+            # 編集前の全件に差分を適用した結果が編集後の全件と一致することを確認
+            applied = apply_changes(
+                apply_changes({}, initial.paths['grade_entries']), delta.paths['grade_entries']
+            )
+            current = apply_changes({}, db.changes.export_changes(
+                str(tmp_dir / "current")).paths['grade_entries'])
+            if applied != current or len(current) != db.fetch_one(
+                    "SELECT COUNT(*) AS count FROM grade_entries")['count']:
+                print("✗ 差分を適用した結果が編集後の成績と一致しません")
+                return 1
+            print("✓ 差分を適用した結果が編集後の成績と一致")
+            
+            with open(full_path, encoding='utf-8-sig') as f:
+                full_rows = sum(1 for _ in f) - 1
+            print(f"{'方式':<18} {'時間(秒)':>10} {'出力行数':>10}")
+            print(f"{'全件エクスポート':<18} {full_time:>10.3f} {full_rows:>10,}")
+            print(f"{'差分エクスポート':<18} {delta_time:>10.3f} {delta.row_count:>10,}")
+            for table, (upserts, deletes) in delta.counts.items():
+                print(f"  {table:<16} 追加・更新 {upserts:,}件, 削除 {deletes:,}件")
+        finally:
+            db.close()
+    
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+成績テーブルの格納形式のベンチマーク
+rowid 順の格納（従来）と講座・授業日・生徒ID順の格納（CLUSTERED_GRADE_ENTRIES）で、
+講座・授業日を指定した成績取得（get_grades_by_course_date）1回あたりの
+ページ読み込み数と所要時間を比較する
+
+ページ読み込み数は、キャッシュが空の接続で1回取得したときのファイル読み込みの
+システムコール回数（/proc/self/io の syscr。SQLite は1ページを1回で読む）で数える。
+成績は生徒ごとにまとめて入力された順（生徒番号順のCSVの差し替えインポートなど）と
+授業ごとに入力された順の2通りで投入する
+
+使い方:
+    python scripts/benchmark_clustered_layout.py [件数]
+    （省略時は 300000。Linux のみ）
+"""
+
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# プロジェクトルートをパスに追加
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root))
+
+import logging
+logging.disable(logging.INFO)
+
+from database.db_manager import DatabaseManager
+from database.repositories.grade_repository import GradeRepository, ENTRY_SUMMARY_TRIGGERS
+from benchmark_bulk_load import generate_grade_rows, prepare_database
+
+DEFAULT_SIZE = 300_000
+SAMPLE_LESSONS = 200
+PROC_IO = Path("/proc/self/io")
+
+INSERT_ORDERS = {
+    '生徒ごと': lambda row: (row['student_number'], row['entry_date'], row['course_id']),
+    '授業ごと': lambda row: (row['course_id'], row['entry_date'], row['student_number']),
+}
+LAYOUTS = {'rowid順': False, '講座・授業日順': True}
+
+
+def read_syscalls() -> int:
+    """このプロセスのこれまでの読み込みシステムコール回数"""
+    for line in PROC_IO.read_text().splitlines():
+        if line.startswith("syscr:"):
+            return int(line.split()[1])
+    raise RuntimeError("syscr を取得できません")
+
+
+def build_database(db_path: Path, grade_rows: list, clustered: bool):
+    """成績を投入したデータベースを作成し、WALの内容をデータベースファイルに書き戻す"""
+    db = prepare_database(db_path, clustered_grades=clustered)
+    try:
+        repo = GradeRepository(db)
+        with db.bulk_load('grade_entries', suspend_triggers=ENTRY_SUMMARY_TRIGGERS):
+            repo._replace_grades(grade_rows, {}, {'deleted': 0, 'created': 0, 'errors': []},
+                                 bulk_load=True)
+            repo.rebuild_entry_summary()
+        db.execute_query("PRAGMA wal_checkpoint(TRUNCATE)")
+    finally:
+        db.close()
+
+
+def measure(db_path: Path, clustered: bool, lessons: list) -> tuple:
+    """1回あたりのページ読み込み数（キャッシュなし）の平均と所要時間（キャッシュあり）の中央値"""
+    reads = []
+    for course_id, entry_date in lessons:
+        db = DatabaseManager(str(db_path), clustered_grades=clustered)
+        try:
+            repo = GradeRepository(db)
+            before = read_syscalls()
+            repo.get_grades_by_course_date(course_id, entry_date)
+            reads.append(read_syscalls() - before)
+        finally:
+            db.close()
+    
+    db = DatabaseManager(str(db_path), clustered_grades=clustered)
+    try:
+        repo = GradeRepository(db)
+        times = []
+        for course_id, entry_date in lessons:
+            started = time.perf_counter()
+            repo.get_grades_by_course_date(course_id, entry_date)
+            times.append(time.perf_counter() - started)
+    finally:
+        db.close()
+    return statistics.mean(reads), statistics.median(times)
+
+
+def main():
+    if not PROC_IO.exists():
+        print("/proc/self/io がないため計測できません（Linux のみ）")
+        return 1
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_SIZE
+    
+    print("=" * 60)
+    print(f"成績テーブルの格納形式 ベンチマーク（{size:,}行, 授業{SAMPLE_LESSONS}件）")
+    print("=" * 60)
+    print(f"{'入力順':<8} {'格納形式':<14} {'ページ読込/回':>14} {'時間(ms)':>10} {'サイズ(MB)':>11}")
+    
+    grade_rows = generate_grade_rows(size)
+    lessons = sorted({(row['course_id'], row['entry_date']) for row in grade_rows})
+    lessons = random.Random(size).sample(lessons, min(SAMPLE_LESSONS, len(lessons)))
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        for order_label, order_key in INSERT_ORDERS.items():
+            ordered_rows = sorted(grade_rows, key=order_key)
+            for layout_label, clustered in LAYOUTS.items():
+                db_path = Path(tmp) / f"bench_{int(clustered)}.db"
+                build_database(db_path, ordered_rows, clustered)
+                reads, elapsed = measure(db_path, clustered, lessons)
+                print(f"{order_label:<8} {layout_label:<14} {reads:>14.1f} "
+                      f"{elapsed * 1000:>10.3f} {db_path.stat().st_size / 1_000_000:>11.1f}")
+                db_path.unlink()
+    
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
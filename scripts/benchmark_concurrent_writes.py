@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+複数の利用者による同時保存のベンチマーク
+同じデータベースファイルを複数のプロセス（利用者）が開き、少数の成績を
+「読み込み → 値を1増やす → 保存」で繰り返し更新する。その間、別のプロセスが
+長い書き込みトランザクション（大きなインポートなど）を何度か実行する。
+
+従来の保存（create_or_update_grade で無条件に上書き）と、行バージョンで競合を
+検出する保存（check_conflict=True。競合したら読み込み直して再度保存）について、
+失われた更新の件数・ロック待ちで失敗した保存の件数・ロック待ち時間を比較する
+
+使い方:
+    python scripts/benchmark_concurrent_writes.py [利用者数] [1人あたりの保存回数]
+    （省略時は 4, 200）
+"""
+
+import multiprocessing
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# プロジェクトルートをパスに追加
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root))
+
+import logging
+logging.disable(logging.WARNING)
+
+from database.dates import to_day_number
+from database.db_manager import DatabaseManager
+from database.repositories.grade_repository import GradeRepository, GradeConflictError
+from models.grade import Grade
+from benchmark_bulk_load import prepare_database
+
+DEFAULT_USERS = 4
+DEFAULT_SAVES = 200
+# 更新を取り合う成績（講座1・同じ授業日の生徒）
+SHARED_GRADES = 5
+ENTRY_DATE = "2024-04-10"
+# 長い書き込みトランザクションの長さ（秒）と回数、利用者側のロック待ち時間（秒）
+LONG_TRANSACTION_SECONDS = 0.5
+LONG_TRANSACTION_COUNT = 3
+BUSY_TIMEOUT = 0.1
+
+
+def student_number(index: int) -> str:
+    """共有する成績の生徒番号"""
+    return f"S{index:04d}"
+
+
+def teacher(db_path: str, user: int, saves: int, check_conflict: bool, queue):
+    """利用者1人分の保存を繰り返し、(成功, 競合, ロック待ちで失敗, ロック待ち計測) を返す"""
+    db = DatabaseManager(db_path, busy_timeout=BUSY_TIMEOUT)
+    repo = GradeRepository(db)
+    succeeded = conflicts = failures = 0
+    try:
+        for i in range(saves):
+            number = student_number((user + i) % SHARED_GRADES)
+            grade = next(g for g in repo.get_grades_by_course_date(1, ENTRY_DATE)
+                         if g.student_number == number)
+            while True:
+                grade.grade4 = (grade.grade4 or 0) + 1
+                try:
+                    repo.create_or_update_grade(grade, check_conflict=check_conflict)
+                    succeeded += 1
+                    break
+                except GradeConflictError as e:
+                    # 最新の内容を読み込み直して同じ操作をやり直す
+                    conflicts += 1
+                    grade = e.current
+                except Exception:
+                    failures += 1
+                    break
+    finally:
+        queue.put((succeeded, conflicts, failures, db.lock_stats.snapshot()))
+        db.close()
+
+
+def long_writer(db_path: str):
+    """書き込みロックを長く保持するトランザクションを何度か実行"""
+    db = DatabaseManager(db_path, busy_timeout=5.0)
+    try:
+        for _ in range(LONG_TRANSACTION_COUNT):
+            time.sleep(LONG_TRANSACTION_SECONDS)
+            with db.transaction():
+                db.execute_query("UPDATE courses SET note1 = 'import' WHERE course_id = 2")
+                time.sleep(LONG_TRANSACTION_SECONDS)
+    finally:
+        db.close()
+
+
+def run(db_path: str, users: int, saves: int, check_conflict: bool) -> dict:
+    """利用者プロセスと長い書き込みのプロセスを同時に実行して結果を集計"""
+    queue = multiprocessing.Queue()
+    processes = [multiprocessing.Process(target=long_writer, args=(db_path,))]
+    processes += [
+        multiprocessing.Process(target=teacher, args=(db_path, user, saves, check_conflict, queue))
+        for user in range(users)
+    ]
+    started = time.perf_counter()
+    for process in processes:
+        process.start()
+    results = [queue.get() for _ in range(users)]
+    for process in processes:
+        process.join()
+    elapsed = time.perf_counter() - started
+    
+    db = DatabaseManager(db_path)
+    try:
+        total = db.fetch_one(
+            "SELECT SUM(grade4) AS total FROM grade_entries WHERE course_id = 1 AND entry_date = ?",
+            (to_day_number(ENTRY_DATE),)
+        )['total']
+    finally:
+        db.close()
+    
+    succeeded = sum(r[0] for r in results)
+    return {
+        'elapsed': elapsed,
+        'succeeded': succeeded,
+        'lost': succeeded - int(total or 0),
+        'conflicts': sum(r[1] for r in results),
+        'failures': sum(r[2] for r in results),
+        'max_wait_ms': max(r[3]['max_wait_ms'] for r in results),
+        'p95_wait_ms': max(r[3]['p95_wait_ms'] for r in results),
+        'retries': sum(r[3]['busy_retries'] for r in results),
+    }
+
+
+def main():
+    users = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_USERS
+    saves = int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_SAVES
+    
+    print("=" * 60)
+    print(f"同時保存 ベンチマーク（利用者{users}人 × {saves}回, 共有する成績{SHARED_GRADES}件）")
+    print("=" * 60)
+    print(f"{'保存方式':<16} {'成功':>6} {'失われた更新':>12} {'競合':>6} {'失敗':>6} "
+          f"{'再試行':>6} {'待ちp95(ms)':>12} {'待ち最大(ms)':>12} {'時間(秒)':>9}")
+    
+    for label, check_conflict in (("無条件に上書き", False), ("行バージョンで検出", True)):
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = Path(tmp) / "bench_concurrent.db"
+            db = prepare_database(db_path)
+            try:
+                repo = GradeRepository(db)
+                for index in range(SHARED_GRADES):
+                    repo.create_or_update_grade(Grade(
+                        id=None, course_id=1, entry_date=ENTRY_DATE,
+                        student_number=student_number(index), grade4=0.0
+                    ))
+            finally:
+                db.close()
+            
+            result = run(str(db_path), users, saves, check_conflict)
+            print(f"{label:<16} {result['succeeded']:>6} {result['lost']:>12} "
+                  f"{result['conflicts']:>6} {result['failures']:>6} {result['retries']:>6} "
+                  f"{result['p95_wait_ms']:>12.1f} {result['max_wait_ms']:>12.1f} "
+                  f"{result['elapsed']:>9.2f}")
+    
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
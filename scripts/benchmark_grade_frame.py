@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+成績一覧の取得形式のベンチマーク
+同じ条件の成績一覧について、行ごとの GradeListItem（get_grade_list）と
+列指向の GradeFrame（get_grade_frame）の所要時間と保持メモリを比較する
+
+使い方:
+    python scripts/benchmark_grade_frame.py [件数 ...]
+    （省略時は 100000 300000）
+"""
+
+import gc
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+# プロジェクトルートをパスに追加
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root))
+
+import logging
+logging.disable(logging.INFO)
+
+from database.repositories.grade_repository import GradeRepository, ENTRY_SUMMARY_TRIGGERS
+from benchmark_bulk_load import generate_grade_rows, prepare_database
+
+DEFAULT_SIZES = [100_000, 300_000]
+
+
+def measure(action) -> tuple:
+    """action の所要時間（秒）と、戻り値が保持しているメモリ（バイト）を計測"""
+    gc.collect()
+    started = time.perf_counter()
+    result = action()
+    elapsed = time.perf_counter() - started
+    del result
+    
+    # メモリは時間計測とは別に実行して計測（tracemalloc は処理を遅くするため）
+    gc.collect()
+    tracemalloc.start()
+    result = action()
+    held = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    return elapsed, held
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES
+    
+    print("=" * 60)
+    print("成績一覧 取得形式ベンチマーク")
+    print("=" * 60)
+    print(f"{'件数':>10} {'形式':>14} {'時間(秒)':>10} {'メモリ(MB)':>12}")
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in sizes:
+            db_path = Path(tmp) / f"bench_{size}.db"
+            db = prepare_database(db_path)
+            repo = GradeRepository(db)
+            try:
+                with db.bulk_load('grade_entries', suspend_triggers=ENTRY_SUMMARY_TRIGGERS):
+                    repo._replace_grades(generate_grade_rows(size), {},
+                                         {'deleted': 0, 'created': 0, 'errors': []},
+                                         bulk_load=True)
+                    repo.rebuild_entry_summary()
+                
+                for label, action in (("GradeListItem", repo.get_grade_list),
+                                      ("GradeFrame", repo.get_grade_frame)):
+                    elapsed, held = measure(action)
+                    print(f"{size:>10,} {label:>14} {elapsed:>10.2f} {held / 1_000_000:>12.1f}")
+            finally:
+                db.close()
+    
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+モデル生成のマイクロベンチマーク
+リポジトリと同じSELECTで取得した行から、従来の生成方法
+（__slots__ なしのデータクラス・行を辞書に変換して生成）と
+現在の生成方法（__slots__ 付き・from_row で位置から生成）の
+所要時間とメモリを比較する
+
+使い方:
+    python scripts/benchmark_models.py [件数]
+    （省略時は 100000）
+"""
+
+import gc
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import MISSING, fields, make_dataclass
+from pathlib import Path
+
+# プロジェクトルートをパスに追加
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root))
+
+import logging
+logging.disable(logging.INFO)
+
+from database.repositories.grade_repository import (
+    GradeRepository, ENTRY_DATE_COLUMN, ENTRY_SUMMARY_TRIGGERS, STUDENT_NUMBER_COLUMN
+)
+from models.grade import Grade, GradeListItem
+from benchmark_bulk_load import generate_grade_rows, prepare_database
+
+DEFAULT_SIZE = 100_000
+REPEAT = 5
+
+GRADE_QUERY = f"""
+    SELECT id, course_id, {ENTRY_DATE_COLUMN}, {STUDENT_NUMBER_COLUMN},
+           grade1, grade2, grade3, grade4, grade5, grade6,
+           note1, note2, created_at, updated_at
+    FROM grade_entries
+"""
+
+
+def legacy_class(model: type) -> type:
+    """同じフィールドと from_dict を持つ __slots__ なしのデータクラス（従来のモデル）"""
+    spec = []
+    for f in fields(model):
+        if f.default is MISSING:
+            spec.append((f.name, f.type))
+        else:
+            spec.append((f.name, f.type, f.default))
+    return make_dataclass(f"Legacy{model.__name__}", spec,
+                          namespace={'from_dict': model.__dict__['from_dict']})
+
+
+def best_time(build, rows) -> float:
+    """REPEAT 回実行した最短の所要時間（秒）"""
+    best = float('inf')
+    for _ in range(REPEAT):
+        gc.collect()
+        started = time.perf_counter()
+        result = build(rows)
+        best = min(best, time.perf_counter() - started)
+        del result
+    return best
+
+
+def held_memory(build, rows) -> int:
+    """生成したオブジェクトのリストが保持するメモリ（バイト）"""
+    gc.collect()
+    tracemalloc.start()
+    result = build(rows)
+    held = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    return held
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_SIZE
+    
+    print("=" * 60)
+    print(f"モデル生成 マイクロベンチマーク（{size:,}行）")
+    print("=" * 60)
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        db = prepare_database(Path(tmp) / "bench_models.db")
+        repo = GradeRepository(db)
+        try:
+            with db.bulk_load('grade_entries', suspend_triggers=ENTRY_SUMMARY_TRIGGERS):
+                repo._replace_grades(generate_grade_rows(size), {},
+                                     {'deleted': 0, 'created': 0, 'errors': []}, bulk_load=True)
+                repo.rebuild_entry_summary()
+            
+            query, params = repo.build_grade_list_query()
+            cases = [
+                (Grade, db.fetch_all(GRADE_QUERY),
+                 lambda cls: lambda rows: [cls(**dict(row)) for row in rows]),
+                (GradeListItem, db.fetch_all(query, params),
+                 lambda cls: lambda rows: [cls.from_dict(dict(row)) for row in rows]),
+            ]
+        finally:
+            db.close()
+    
+    print(f"{'モデル':<16} {'方式':<22} {'時間(秒)':>10} {'メモリ(MB)':>12}")
+    for model, rows, legacy_build in cases:
+        legacy = legacy_class(model)
+        builds = [
+            ("辞書経由・slotsなし", legacy_build(legacy)),
+            ("from_row・slots", lambda rows, model=model: [model.from_row(row) for row in rows]),
+        ]
+        
+        # 両方式で同じ値になることを確認
+        old_values = [tuple(getattr(o, f.name) for f in fields(legacy)) for o in builds[0][1](rows[:100])]
+        new_values = [tuple(getattr(o, f.name) for f in fields(model)) for o in builds[1][1](rows[:100])]
+        if old_values != new_values:
+            print(f"✗ {model.__name__}: 生成結果が一致しません")
+            return 1
+        
+        results = []
+        for label, build in builds:
+            elapsed = best_time(build, rows)
+            held = held_memory(build, rows)
+            results.append((elapsed, held))
+            print(f"{model.__name__:<16} {label:<22} {elapsed:>10.3f} {held / 1_000_000:>12.1f}")
+        
+        (old_time, old_held), (new_time, new_held) = results
+        print(f"{'':<16} {'比率（現在/従来）':<22} {new_time / old_time:>10.2f} {new_held / old_held:>12.2f}")
+    
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
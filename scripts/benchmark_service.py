@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+成績サービスのベンチマーク
+複数の利用者（スレッド）が成績を1件ずつ保存する場合について、各利用者が同じ
+データベースファイルを開く方式（1件ごとにコミット）と、成績サービス経由の方式
+（同時に届いた保存をまとめてコミット）の所要時間を、ワーカー数を変えて比較する
+
+あわせて、成績一覧（全件）の取得について、ローカルの get_grade_list と
+サービス経由（NDJSON で1行ずつ受信）の所要時間と、最初の1行が届くまでの時間を比較する
+
+使い方:
+    python scripts/benchmark_service.py [利用者数] [1人あたりの保存回数] [一覧の件数]
+    （省略時は 8, 100, 100000）
+"""
+
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# プロジェクトルートをパスに追加
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root))
+
+import logging
+logging.disable(logging.WARNING)
+
+from database.db_manager import DatabaseManager
+from database.repositories.grade_repository import GradeRepository, ENTRY_SUMMARY_TRIGGERS
+from models.grade import Grade
+from service import client as service_client
+from service.server import GradeService, ServiceHTTPServer
+from benchmark_bulk_load import generate_grade_rows, prepare_database, STUDENTS_PER_COURSE
+
+DEFAULT_USERS = 8
+DEFAULT_SAVES = 100
+DEFAULT_LIST_SIZE = 100_000
+WORKER_COUNTS = (1, 4, 8)
+
+
+def grade_for(user: int, index: int) -> Grade:
+    """利用者ごとに別の授業日の成績（保存どうしは競合しない）"""
+    return Grade(
+        id=None, course_id=user + 1, entry_date=f"2099-04-{index // STUDENTS_PER_COURSE + 1:02d}",
+        student_number=f"S{index % STUDENTS_PER_COURSE:04d}", grade1=index % 5
+    )
+
+
+def save_all(users: int, saves: int, repository_for) -> float:
+    """利用者ごとのスレッドで保存を繰り返し、所要時間（秒）を返す"""
+    barrier = threading.Barrier(users)
+    
+    def teacher(user: int):
+        repo = repository_for()
+        barrier.wait()
+        for index in range(saves):
+            repo.create_or_update_grade(grade_for(user, index), check_conflict=True)
+    
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=users) as executor:
+        list(executor.map(teacher, range(users)))
+    return time.perf_counter() - started
+
+
+def run_shared_file(db_path: Path, users: int, saves: int) -> float:
+    """各利用者が同じデータベースファイルを開いて保存"""
+    managers = []
+    lock = threading.Lock()
+    
+    def repository_for():
+        db = DatabaseManager(str(db_path), busy_timeout=30.0)
+        with lock:
+            managers.append(db)
+        return GradeRepository(db)
+    
+    try:
+        return save_all(users, saves, repository_for)
+    finally:
+        for db in managers:
+            db.close()
+
+
+def start_service(db_path: Path, workers: int):
+    """成績サービスを別スレッドで起動して (サービス, サーバー, URL) を返す"""
+    service = GradeService(str(db_path))
+    server = ServiceHTTPServer(('127.0.0.1', 0), service, workers)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return service, server, f"http://127.0.0.1:{server.server_port}"
+
+
+def stop_service(service: GradeService, server: ServiceHTTPServer):
+    """成績サービスを停止"""
+    server.shutdown()
+    server.server_close()
+    service.close()
+
+
+def run_service(db_path: Path, users: int, saves: int, workers: int):
+    """成績サービス経由で保存し、(所要時間, コミット回数) を返す"""
+    service, server, url = start_service(db_path, workers)
+    try:
+        elapsed = save_all(users, saves, lambda: service_client.connect(url)[3])
+        return elapsed, service.batch_count
+    finally:
+        stop_service(service, server)
+
+
+def compare_writes(users: int, saves: int):
+    """保存の所要時間を比較"""
+    total = users * saves
+    print(f"{'方式':<24} {'時間(秒)':>10} {'保存/秒':>10} {'コミット回数':>12}")
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "bench_service.db"
+        prepare_database(db_path).close()
+        elapsed = run_shared_file(db_path, users, saves)
+        print(f"{'ファイルを共有':<24} {elapsed:>10.2f} {total / elapsed:>10.0f} {total:>12,}")
+    for workers in WORKER_COUNTS:
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = Path(tmp) / "bench_service.db"
+            prepare_database(db_path).close()
+            elapsed, batches = run_service(db_path, users, saves, workers)
+            label = f"サービス（ワーカー{workers}）"
+            print(f"{label:<24} {elapsed:>10.2f} {total / elapsed:>10.0f} {batches:>12,}")
+
+
+def compare_list(size: int):
+    """成績一覧の取得時間を比較"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "bench_service_list.db"
+        db = prepare_database(db_path)
+        try:
+            repo = GradeRepository(db)
+            with db.bulk_load('grade_entries', suspend_triggers=ENTRY_SUMMARY_TRIGGERS):
+                repo._replace_grades(generate_grade_rows(size), {},
+                                     {'deleted': 0, 'created': 0, 'errors': []}, bulk_load=True)
+                repo.rebuild_entry_summary()
+            
+            started = time.perf_counter()
+            local_rows = len(repo.get_grade_list({}))
+            local_time = time.perf_counter() - started
+        finally:
+            db.close()
+        
+        service, server, url = start_service(db_path, WORKER_COUNTS[-1])
+        try:
+            remote = service_client.connect(url)[3]
+            started = time.perf_counter()
+            remote_rows = len(remote.get_grade_list({}))
+            remote_time = time.perf_counter() - started
+            
+            started = time.perf_counter()
+            rows = remote.iter_grade_list({})
+            next(rows)
+            first_row_time = time.perf_counter() - started
+            rows.close()
+        finally:
+            stop_service(service, server)
+    
+    if remote_rows != local_rows:
+        print(f"✗ サービス経由の件数が一致しません ({remote_rows:,} != {local_rows:,})")
+        return 1
+    print(f"{'方式':<24} {'時間(秒)':>10} {'件数':>10}")
+    print(f"{'ローカル':<24} {local_time:>10.2f} {local_rows:>10,}")
+    print(f"{'サービス経由':<24} {remote_time:>10.2f} {remote_rows:>10,}")
+    print(f"  最初の1行が届くまで {first_row_time * 1000:.1f}ms")
+    return 0
+
+
+def main():
+    users = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_USERS
+    saves = int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_SAVES
+    size = int(sys.argv[3]) if len(sys.argv) > 3 else DEFAULT_LIST_SIZE
+    
+    print("=" * 60)
+    print(f"成績サービス ベンチマーク（利用者{users}人 × {saves}回, 一覧{size:,}件）")
+    print("=" * 60)
+    compare_writes(users, saves)
+    print()
+    return compare_list(size)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+日時の型変換のベンチマーク
+同じデータベースの成績一覧（get_grade_list）を、従来の接続設定
+（PARSE_DECLTYPES: 宣言型が TIMESTAMP/DATE の列を全行 datetime/date に変換）と
+現在の接続設定（PARSE_COLNAMES のみ: 列名で指定したときだけ変換）で取得し、
+所要時間を比較する
+
+使い方:
+    python scripts/benchmark_type_conversion.py [件数 ...]
+    （省略時は 100000 300000）
+"""
+
+import gc
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# プロジェクトルートをパスに追加
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root))
+
+import logging
+logging.disable(logging.INFO)
+
+from database import db_manager
+from database.db_manager import DatabaseManager
+from database.repositories.grade_repository import GradeRepository, ENTRY_SUMMARY_TRIGGERS
+from benchmark_bulk_load import generate_grade_rows, prepare_database
+
+DEFAULT_SIZES = [100_000, 300_000]
+REPEAT = 3
+LEGACY_DETECT_TYPES = sqlite3.PARSE_DECLTYPES | sqlite3.PARSE_COLNAMES
+
+
+def best_time(action) -> float:
+    """REPEAT 回実行した最短の所要時間（秒）"""
+    best = float('inf')
+    for _ in range(REPEAT):
+        gc.collect()
+        started = time.perf_counter()
+        result = action()
+        best = min(best, time.perf_counter() - started)
+        del result
+    return best
+
+
+def measure_list(db_path: Path, detect_types: int) -> float:
+    """指定した型変換の設定で既存のデータベースを開き、成績一覧の取得時間を計測"""
+    # 読み取り専用接続は初回の読み取り時に開かれるため、計測が終わるまで設定を保持する
+    current = db_manager.DETECT_TYPES
+    db_manager.DETECT_TYPES = detect_types
+    db = DatabaseManager(str(db_path))
+    try:
+        return best_time(GradeRepository(db).get_grade_list)
+    finally:
+        db.close()
+        db_manager.DETECT_TYPES = current
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES
+    
+    print("=" * 60)
+    print("日時の型変換 ベンチマーク（get_grade_list）")
+    print("=" * 60)
+    print(f"{'件数':>10} {'接続設定':>16} {'時間(秒)':>10}")
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in sizes:
+            db_path = Path(tmp) / f"bench_{size}.db"
+            db = prepare_database(db_path)
+            repo = GradeRepository(db)
+            try:
+                with db.bulk_load('grade_entries', suspend_triggers=ENTRY_SUMMARY_TRIGGERS):
+                    repo._replace_grades(generate_grade_rows(size), {},
+                                         {'deleted': 0, 'created': 0, 'errors': []},
+                                         bulk_load=True)
+                    repo.rebuild_entry_summary()
+            finally:
+                db.close()
+            
+            results = []
+            for label, detect_types in (("PARSE_DECLTYPES", LEGACY_DETECT_TYPES),
+                                        ("PARSE_COLNAMES", db_manager.DETECT_TYPES)):
+                elapsed = measure_list(db_path, detect_types)
+                results.append(elapsed)
+                print(f"{size:>10,} {label:>16} {elapsed:>10.2f}")
+            
+            old_time, new_time = results
+            print(f"{'':>10} {'比率（現在/従来）':>16} {new_time / old_time:>10.2f}")
+    
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
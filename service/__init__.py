@@ -0,0 +1 @@
+"""成績サービス（1つのプロセスがデータベースを開き、リポジトリの操作をHTTPで公開する）パッケージ"""
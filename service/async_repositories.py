@@ -0,0 +1,360 @@
+"""
+リポジトリの非同期（asyncio）API
+
+リポジトリのメソッドをデータベース専用のスレッドで実行し、イベントループを止めずに
+await で結果を受け取る。
+
+    async with AsyncRepositories("data/database.db") as repos:
+        courses = await repos.courses.get_all_courses()
+        async for item in repos.grades.iter_grade_list({'course_ids': [1]}):
+            ...
+
+- 読み取りは readers 個のスレッド（スレッドごとの接続）で並行して、書き込みは
+  1つのスレッドで順に実行する（同じプロセス内で書き込みロックを取り合わない）
+- 同時に実行中・待機中の呼び出しは max_pending 件までで、それを超えると
+  空くまで await で待つ（背圧）
+- 待機中の呼び出しをキャンセルすると実行されず、実行中の読み取りはクエリを中断する
+  （実行中の書き込みは最後まで実行する）
+"""
+
+import asyncio
+import logging
+import queue
+import threading
+from concurrent.futures import Future
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+from config.settings import (
+    DB_PATH, USE_WAL, CLUSTERED_GRADE_ENTRIES, BUSY_TIMEOUT_SECONDS, SERVICE_WORKERS
+)
+from database.db_manager import DatabaseManager
+from service.protocol import OPERATIONS, REPOSITORY_CLASSES, create_repositories
+
+logger = logging.getLogger(__name__)
+
+# 書き込み専用スレッドで実行するメソッド（サービスで公開している書き込みと、一括処理用のもの）
+WRITE_METHODS = frozenset(
+    name for operations in OPERATIONS.values()
+    for name, operation in operations.items() if operation.write
+) | {'register_student_numbers', 'rebuild_entry_summary'}
+# 結果を少しずつ返すメソッドの接頭辞（async for で受け取る）
+STREAM_PREFIX = 'iter_'
+
+# 同時に実行中・待機中にできる呼び出しの数（超えると空くまで待つ）
+DEFAULT_MAX_PENDING = 64
+# iter_* の結果を受け渡す単位（件数）と、受け取られずに溜められるまとまりの数
+STREAM_BATCH_SIZE = 500
+STREAM_BUFFER_BATCHES = 4
+# iter_* の受け取りが止まっている間、中断されていないか確認する間隔（秒）
+STREAM_POLL_INTERVAL = 0.1
+
+# スレッドを止める印と、iter_* の終わりの印
+_STOP = object()
+_END = object()
+
+
+class _Job:
+    """データベース専用スレッドで実行する1件の呼び出し"""
+    
+    __slots__ = ('function', 'future', 'db', 'lock', 'interruptible')
+    
+    def __init__(self, function: Callable[[Dict[str, Any]], Any], interruptible: bool):
+        """
+        初期化
+        
+        Args:
+            function: 実行する関数（そのスレッドのリポジトリ名 -> リポジトリの辞書を受け取る）
+            interruptible: キャンセル時に実行中のクエリを中断してよいか（読み取りのみ）
+        """
+        self.function = function
+        self.future: Future = Future()
+        # 実行中のスレッドの DatabaseManager（キャンセル時にクエリを中断するため）
+        self.db: Optional[DatabaseManager] = None
+        self.lock = threading.Lock()
+        self.interruptible = interruptible
+    
+    def interrupt(self):
+        """実行中の読み取りのクエリを中断（実行前・実行後・書き込みの場合は何もしない）"""
+        with self.lock:
+            if self.db is not None and self.interruptible:
+                self.db.interrupt()
+
+
+class DatabaseExecutor:
+    """
+    データベース専用のスレッドで呼び出しを実行するエグゼキューター
+    
+    読み取り用のスレッドはそれぞれ自身の DatabaseManager を持ち、書き込みは
+    1つのスレッドの DatabaseManager で実行する。
+    """
+    
+    def __init__(self, db_path: str = DB_PATH, readers: int = SERVICE_WORKERS,
+                 use_wal: bool = USE_WAL,
+                 clustered_grades: bool = CLUSTERED_GRADE_ENTRIES,
+                 busy_timeout: float = BUSY_TIMEOUT_SECONDS):
+        """
+        初期化（接続を開き、スレッドを開始）
+        
+        Args:
+            db_path: データベースファイルのパス
+            readers: 読み取り用のスレッドの数
+            use_wal: WALモードを使用するか（読み取りを書き込みと並行させるため通常は True）
+            clustered_grades: 成績を講座・授業日・生徒ID順に格納するか
+            busy_timeout: 他のプロセスの書き込みが終わるのを待つ時間（秒）
+        """
+        options = {
+            'use_wal': use_wal,
+            'clustered_grades': clustered_grades,
+            'busy_timeout': busy_timeout,
+        }
+        # 作成・移行は書き込み用の接続で先に済ませる
+        self.writer_db = DatabaseManager(db_path, **options)
+        self.reader_dbs = [DatabaseManager(db_path, **options) for _ in range(readers)]
+        self._write_jobs: queue.Queue = queue.Queue()
+        self._read_jobs: queue.Queue = queue.Queue()
+        self._threads = [threading.Thread(
+            target=self._work, args=(self._write_jobs, self.writer_db),
+            name="db-executor-writer", daemon=True
+        )]
+        self._threads += [
+            threading.Thread(target=self._work, args=(self._read_jobs, db),
+                             name=f"db-executor-reader-{index}", daemon=True)
+            for index, db in enumerate(self.reader_dbs)
+        ]
+        for thread in self._threads:
+            thread.start()
+    
+    def submit(self, job: _Job, write: bool) -> Future:
+        """
+        呼び出しを実行待ちに追加
+        
+        Args:
+            job: 呼び出し
+            write: 書き込み専用スレッドで実行するか
+            
+        Returns:
+            結果（または例外）が設定される Future（実行前なら cancel() で取り消せる）
+        """
+        (self._write_jobs if write else self._read_jobs).put(job)
+        return job.future
+    
+    @staticmethod
+    def _work(jobs: queue.Queue, db: DatabaseManager):
+        """データベース専用スレッド: 実行待ちの呼び出しを順に実行する"""
+        repositories = create_repositories(db)
+        while True:
+            job = jobs.get()
+            if job is _STOP:
+                break
+            # 実行前にキャンセルされた呼び出しは実行しない
+            if not job.future.set_running_or_notify_cancel():
+                continue
+            
+            with job.lock:
+                job.db = db
+            error = result = None
+            try:
+                result = job.function(repositories)
+            except BaseException as e:
+                error = e
+            with job.lock:
+                job.db = None
+            
+            if error is None:
+                job.future.set_result(result)
+            else:
+                job.future.set_exception(error)
+    
+    def close(self):
+        """実行待ちの呼び出しを終えてからスレッドを止め、すべての接続を閉じる"""
+        self._write_jobs.put(_STOP)
+        for _ in self.reader_dbs:
+            self._read_jobs.put(_STOP)
+        for thread in self._threads:
+            thread.join()
+        for db in self.reader_dbs:
+            db.close()
+        self.writer_db.close()
+
+
+class AsyncRepository:
+    """リポジトリのメソッドを同じ名前・引数の async メソッドとして呼び出すクラス"""
+    
+    def __init__(self, owner: 'AsyncRepositories', repository: str):
+        """
+        初期化
+        
+        Args:
+            owner: 呼び出しを実行する AsyncRepositories
+            repository: リポジトリ名（REPOSITORY_CLASSES のキー）
+        """
+        self._owner = owner
+        self._repository = repository
+    
+    def __getattr__(self, name: str):
+        """リポジトリの公開メソッドを呼び出す async 関数（iter_* は async ジェネレーター）を返す"""
+        if name.startswith('_') or not callable(
+                getattr(REPOSITORY_CLASSES[self._repository], name, None)):
+            raise AttributeError(f"リポジトリのメソッドではありません: {self._repository}.{name}")
+        
+        if name.startswith(STREAM_PREFIX):
+            def stream(*args, **kwargs) -> AsyncIterator:
+                return self._owner.stream(self._repository, name, *args, **kwargs)
+            return stream
+        
+        async def call(*args, **kwargs):
+            return await self._owner.call(self._repository, name, *args, **kwargs)
+        return call
+
+
+class AsyncRepositories:
+    """
+    講座・生徒・成績のリポジトリの非同期API
+    
+    courses / students / grades の各メソッドはローカルのリポジトリと同じ引数で
+    呼び出し、await で結果を受け取る。
+    """
+    
+    def __init__(self, db_path: str = DB_PATH, readers: int = SERVICE_WORKERS,
+                 max_pending: int = DEFAULT_MAX_PENDING, **db_options):
+        """
+        初期化（接続を開き、データベース専用のスレッドを開始）
+        
+        Args:
+            db_path: データベースファイルのパス
+            readers: 読み取り用のスレッドの数（同時に実行する読み取りの数）
+            max_pending: 同時に実行中・待機中にできる呼び出しの数（超えると空くまで待つ）
+            **db_options: DatabaseExecutor に渡す接続の設定（use_wal など）
+        """
+        self.executor = DatabaseExecutor(db_path, readers, **db_options)
+        self.max_pending = max_pending
+        self._slots = asyncio.Semaphore(max_pending)
+        self._pending = 0
+        self.courses = AsyncRepository(self, 'courses')
+        self.students = AsyncRepository(self, 'students')
+        self.grades = AsyncRepository(self, 'grades')
+    
+    async def call(self, repository: str, name: str, *args, **kwargs) -> Any:
+        """
+        リポジトリのメソッドをデータベース専用のスレッドで実行
+        
+        実行中・待機中の呼び出しが max_pending 件ある間は、空くまで待ってから追加する。
+        await しているタスクがキャンセルされた場合、実行前なら実行せず、
+        実行中の読み取りはクエリを中断する。
+        
+        Args:
+            repository: リポジトリ名
+            name: メソッド名
+            *args, **kwargs: リポジトリのメソッドと同じ引数
+            
+        Returns:
+            リポジトリのメソッドの戻り値
+        """
+        write = name in WRITE_METHODS
+        job = _Job(lambda repositories: getattr(repositories[repository], name)(*args, **kwargs),
+                   interruptible=not write)
+        future = await self._submit(job, write)
+        try:
+            return await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            job.interrupt()
+            raise
+    
+    async def _submit(self, job: _Job, write: bool) -> Future:
+        """空きを待ってから実行待ちに追加（呼び出しが終わると空きを戻す）"""
+        await self._slots.acquire()
+        self._pending += 1
+        loop = asyncio.get_running_loop()
+        future = self.executor.submit(job, write)
+        future.add_done_callback(lambda _: loop.call_soon_threadsafe(self._release))
+        return future
+    
+    def _release(self):
+        """呼び出しが終わった空きを戻す（イベントループのスレッドで実行）"""
+        self._pending -= 1
+        self._slots.release()
+    
+    async def stream(self, repository: str, name: str, *args,
+                     batch_size: int = STREAM_BATCH_SIZE, **kwargs) -> AsyncIterator:
+        """
+        iter_* のメソッドの結果を読み取り用のスレッドで読みながら1件ずつ返す（async for で使用）
+        
+        読み込んだ結果は batch_size 件ずつ受け渡し、受け取られていないまとまりが
+        STREAM_BUFFER_BATCHES 個溜まると、読み込みを止めて待つ（背圧）。
+        途中で async for を抜けるかキャンセルされた場合は読み込みを打ち切る。
+        
+        Args:
+            repository: リポジトリ名
+            name: メソッド名（iter_*）
+            *args, **kwargs: リポジトリのメソッドと同じ引数
+            batch_size: 1回に受け渡す件数
+            
+        Yields:
+            メソッドが返す要素
+        """
+        loop = asyncio.get_running_loop()
+        batches: asyncio.Queue = asyncio.Queue()
+        credits = threading.Semaphore(STREAM_BUFFER_BATCHES)
+        stopped = threading.Event()
+        
+        def send(item):
+            loop.call_soon_threadsafe(batches.put_nowait, item)
+        
+        def produce(repositories: Dict[str, Any]):
+            items = getattr(repositories[repository], name)(*args, **kwargs)
+            batch: List[Any] = []
+            try:
+                for item in items:
+                    batch.append(item)
+                    if len(batch) < batch_size:
+                        continue
+                    # 受け取り側が追いつくまで待つ（中断されたら打ち切る）
+                    while not credits.acquire(timeout=STREAM_POLL_INTERVAL):
+                        if stopped.is_set():
+                            return
+                    send(batch)
+                    batch = []
+                if batch:
+                    send(batch)
+                send(_END)
+            except BaseException as e:
+                send(e)
+            finally:
+                close = getattr(items, 'close', None)
+                if close is not None:
+                    close()
+        
+        job = _Job(produce, interruptible=True)
+        future = await self._submit(job, write=False)
+        try:
+            while True:
+                batch = await batches.get()
+                credits.release()
+                if batch is _END:
+                    break
+                if isinstance(batch, BaseException):
+                    raise batch
+                for item in batch:
+                    yield item
+        finally:
+            stopped.set()
+            future.cancel()
+            job.interrupt()
+    
+    @property
+    def pending(self) -> int:
+        """実行中・待機中の呼び出しの数"""
+        return self._pending
+    
+    async def close(self):
+        """実行待ちの呼び出しを終えてから接続を閉じる（イベントループは止めない）"""
+        await asyncio.get_running_loop().run_in_executor(None, self.executor.close)
+        logger.info("非同期リポジトリを閉じました")
+    
+    async def __aenter__(self):
+        """async with で使用"""
+        return self
+    
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        """async with の終了時に接続を閉じる"""
+        await self.close()
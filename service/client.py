@@ -0,0 +1,305 @@
+"""
+成績サービスのクライアント
+
+RemoteCourseRepository などはローカルのリポジトリと同じメソッド名・引数で
+サービスの操作を呼び出すため、ビューはデータベースファイルの代わりにサービスを使える。
+"""
+
+import base64
+import json
+import logging
+import urllib.error
+import urllib.request
+from contextlib import contextmanager
+from dataclasses import fields, is_dataclass
+from pathlib import Path
+from typing import Any, Iterator, Optional, Tuple
+
+from config.settings import SERVICE_TIMEOUT_SECONDS
+from database.events import EventBus, CourseChanged, RosterChanged, GradesChanged
+from database.repositories.grade_repository import GradeConflictError
+from models.grade import Grade
+from service.protocol import (
+    find_operation, decode_row, decode_result, API_PREFIX, HEALTH_PATH,
+    RESULT_STREAM, FILE_UPLOAD, FILE_DOWNLOAD
+)
+
+logger = logging.getLogger(__name__)
+
+
+class ServiceError(Exception):
+    """サービスの呼び出しに失敗した（接続できない・サービス側のエラー・混雑）"""
+
+
+class ServiceClient:
+    """成績サービスへのリクエストを送るクラス"""
+    
+    def __init__(self, base_url: str, timeout: float = SERVICE_TIMEOUT_SECONDS):
+        """
+        初期化
+        
+        Args:
+            base_url: サービスのURL（例: http://127.0.0.1:8765）
+            timeout: 応答を待つ時間（秒）
+        """
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+    
+    def health(self) -> dict:
+        """
+        サービスの状態を取得（接続の確認に使用）
+        
+        Raises:
+            ServiceError: サービスに接続できない場合
+        """
+        try:
+            with urllib.request.urlopen(self.base_url + HEALTH_PATH, timeout=self.timeout) as response:
+                return json.load(response)
+        except (urllib.error.URLError, OSError) as e:
+            raise ServiceError(f"成績サービスに接続できません ({self.base_url}): {e}") from e
+    
+    def call(self, repository: str, name: str, *args, **kwargs) -> Any:
+        """
+        サービスの操作を呼び出す
+        
+        Args:
+            repository: リポジトリ名（'courses' / 'students' / 'grades'）
+            name: メソッド名
+            *args, **kwargs: リポジトリのメソッドと同じ引数
+            
+        Returns:
+            リポジトリのメソッドと同じ形式の戻り値
+            
+        Raises:
+            GradeConflictError: 他の利用者が先に成績を保存していた場合
+            ValueError: 引数が不正な場合
+            ServiceError: 接続できない・サービス側で失敗した場合
+        """
+        operation = find_operation(repository, name)
+        if operation is None:
+            raise AttributeError(f"成績サービスで公開されていない操作です: {repository}.{name}")
+        
+        body = {'kwargs': kwargs}
+        csv_path = None
+        if operation.file is not None:
+            csv_path, args = args[0], args[1:]
+            if operation.file == FILE_UPLOAD:
+                body['file'] = base64.b64encode(Path(csv_path).read_bytes()).decode('ascii')
+        body['args'] = [arg.to_dict() if is_dataclass(arg) else arg for arg in args]
+        
+        with self._post(repository, name, body, args) as response:
+            if operation.file == FILE_DOWNLOAD:
+                Path(csv_path).parent.mkdir(parents=True, exist_ok=True)
+                Path(csv_path).write_bytes(response.read())
+                return None
+            if operation.result == RESULT_STREAM:
+                return [decode_row(operation.model, row)
+                        for rows in self._read_lines(response) for row in rows]
+            data = json.load(response)
+        
+        if operation.argument is not None and 'argument' in data:
+            # 保存後の内容（IDや行バージョン）を呼び出し側のモデルに反映する
+            saved = data['argument']
+            for field in fields(args[0]):
+                setattr(args[0], field.name, saved.get(field.name))
+        return decode_result(operation, data['result'])
+    
+    def iterate(self, repository: str, name: str, *args, **kwargs) -> Iterator:
+        """
+        一覧を受け取りながら1件ずつ返す（RESULT_STREAM の操作用）
+        
+        Args:
+            repository: リポジトリ名
+            name: メソッド名
+            *args, **kwargs: リポジトリのメソッドと同じ引数
+            
+        Yields:
+            モデル
+        """
+        operation = find_operation(repository, name)
+        with self._post(repository, name, {'args': list(args), 'kwargs': kwargs}, args) as response:
+            for rows in self._read_lines(response):
+                for row in rows:
+                    yield decode_row(operation.model, row)
+    
+    @staticmethod
+    def _read_lines(response) -> Iterator[list]:
+        """NDJSON の応答を1行（行の配列）ずつ読む（最後の行がエラーの場合は例外）"""
+        for line in response:
+            rows = json.loads(line)
+            if isinstance(rows, dict):
+                raise ServiceError(f"一覧の取得に失敗しました: {rows.get('error')}")
+            yield rows
+    
+    def _post(self, repository: str, name: str, body: dict, args: Tuple):
+        """
+        操作を呼び出すリクエストを送り、応答を返す（エラーの応答は例外に変換）
+        
+        Args:
+            repository: リポジトリ名
+            name: メソッド名
+            body: リクエストの内容
+            args: 呼び出し側の位置引数（競合時に保存しようとした成績を例外に含める）
+        """
+        request = urllib.request.Request(
+            f"{self.base_url}{API_PREFIX}{repository}/{name}",
+            data=json.dumps(body, ensure_ascii=False).encode('utf-8'),
+            headers={'Content-Type': 'application/json; charset=utf-8'},
+            method='POST'
+        )
+        try:
+            return urllib.request.urlopen(request, timeout=self.timeout)
+        except urllib.error.HTTPError as e:
+            try:
+                error = json.load(e)
+            except ValueError:
+                error = {'error': 'error', 'message': str(e)}
+            finally:
+                e.close()
+            message = error.get('message', str(e))
+            if error.get('error') == 'conflict':
+                current = error.get('current')
+                raise GradeConflictError(args[0], None if current is None else Grade(*current)) from None
+            if error.get('error') == 'value':
+                raise ValueError(message) from None
+            logger.error(f"成績サービスエラー ({repository}.{name}): {message}")
+            raise ServiceError(message) from None
+        except (urllib.error.URLError, OSError) as e:
+            logger.error(f"成績サービス接続エラー ({repository}.{name}): {e}")
+            raise ServiceError(f"成績サービスに接続できません ({self.base_url}): {e}") from e
+
+
+class RemoteDatabase:
+    """
+    サービス経由で使う場合の DatabaseManager の代わり
+    
+    ビューが使う transaction() と変更イベント（events）だけを提供する。書き込みは1件ごとに
+    サービスでコミットされ（同時に届いたものはサービスがまとめてコミットする）、
+    ブロック全体を取り消すことはできない。変更イベントは書き込みが成功した時点で知らせる。
+    """
+    
+    query_stats = None
+    
+    def __init__(self, client: ServiceClient):
+        """
+        初期化
+        
+        Args:
+            client: サービスのクライアント
+        """
+        self.client = client
+        self.events = EventBus()
+    
+    @contextmanager
+    def transaction(self):
+        """ローカルの transaction() と同じ書き方をするためのブロック（何もしない）"""
+        yield self
+    
+    def close(self):
+        """何もしない（接続は1リクエストごとに閉じている）"""
+
+
+class RemoteRepository:
+    """サービスの操作をローカルのリポジトリと同じメソッド名で呼び出すクラス"""
+    
+    # リポジトリ名（OPERATIONS のキー）
+    repository = ''
+    
+    def __init__(self, db: RemoteDatabase):
+        """
+        初期化
+        
+        Args:
+            db: サービス経由のデータベース
+        """
+        self.db = db
+    
+    def __getattr__(self, name: str):
+        """公開されている操作を呼び出す関数を返す"""
+        operation = find_operation(self.repository, name)
+        if operation is None:
+            raise AttributeError(f"成績サービスで公開されていない操作です: {self.repository}.{name}")
+        
+        def call(*args, **kwargs):
+            result = self.db.client.call(self.repository, name, *args, **kwargs)
+            if operation.write:
+                self.db.events.publish(self.write_events(name, args))
+            return result
+        return call
+    
+    def write_events(self, name: str, args: tuple) -> list:
+        """
+        書き込み操作の変更イベント（ローカルのリポジトリと同じ範囲か、それより広い範囲）
+        
+        Args:
+            name: メソッド名
+            args: 位置引数
+        """
+        return []
+
+
+class RemoteCourseRepository(RemoteRepository):
+    """サービス経由の講座リポジトリ"""
+    repository = 'courses'
+
+    def write_events(self, name: str, args: tuple) -> list:
+        """講座の変更（削除・インポートでは名簿・成績も変わる）"""
+        if name in ('create_course', 'update_course'):
+            return [CourseChanged(getattr(args[0], 'course_id', None))]
+        return [CourseChanged(), RosterChanged(), GradesChanged()]
+
+
+class RemoteStudentRepository(RemoteRepository):
+    """サービス経由の生徒リポジトリ"""
+    repository = 'students'
+
+    def write_events(self, name: str, args: tuple) -> list:
+        """名簿の変更（講座が分からない場合はすべての講座）"""
+        course_id = None
+        if name in ('create_student', 'update_student'):
+            course_id = getattr(args[0], 'course_id', None)
+        elif name == 'import_from_csv_with_replacement' and len(args) > 1:
+            course_id = args[1]
+        return [RosterChanged(course_id)]
+
+
+class RemoteGradeRepository(RemoteRepository):
+    """サービス経由の成績リポジトリ"""
+    repository = 'grades'
+    
+    def write_events(self, name: str, args: tuple) -> list:
+        """成績の変更（講座・授業日が分からない場合はすべて）"""
+        if name == 'create_or_update_grade':
+            return [GradesChanged(args[0].course_id, args[0].entry_date)]
+        if name in ('delete_grades_by_filter', 'import_from_csv_with_replacement'):
+            # 差し替えインポートのフィルタ条件は第2引数
+            filters = args[0] if name == 'delete_grades_by_filter' else args[1]
+            return [GradesChanged(course_id)
+                    for course_id in (filters or {}).get('course_ids') or [None]]
+        return [GradesChanged()]
+    
+    def iter_grade_list(self, filters: Optional[dict] = None) -> Iterator:
+        """成績一覧を受け取りながら1件ずつ返す（get_grade_list と同じ並び順）"""
+        return self.db.client.iterate(self.repository, 'get_grade_list', filters)
+
+
+def connect(base_url: str, timeout: float = SERVICE_TIMEOUT_SECONDS) -> Tuple[
+        RemoteDatabase, RemoteCourseRepository, RemoteStudentRepository, RemoteGradeRepository]:
+    """
+    成績サービスに接続し、ローカルのリポジトリの代わりに使うリポジトリを作成
+    
+    Args:
+        base_url: サービスのURL
+        timeout: 応答を待つ時間（秒）
+        
+    Returns:
+        (データベース, 講座リポジトリ, 生徒リポジトリ, 成績リポジトリ)
+        
+    Raises:
+        ServiceError: サービスに接続できない場合
+    """
+    client = ServiceClient(base_url, timeout)
+    status = client.health()
+    logger.info(f"成績サービスに接続しました: {client.base_url} (データベース: {status.get('db_path')})")
+    db = RemoteDatabase(client)
+    return db, RemoteCourseRepository(db), RemoteStudentRepository(db), RemoteGradeRepository(db)
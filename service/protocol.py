@@ -0,0 +1,197 @@
+"""成績サービスの公開操作と、引数・結果のJSON形式（サーバー・クライアント共通）"""
+
+import math
+from array import array
+from dataclasses import dataclass, fields
+from typing import Any, Dict, Optional
+
+from database.repositories.course_repository import CourseRepository
+from database.repositories.student_repository import StudentRepository
+from database.repositories.grade_repository import GradeRepository
+from models.course import Course
+from models.student import Student
+from models.grade import Grade, GradeListItem, GradeEntrySummary, GradeMatrix
+
+# 操作を呼び出すパス（POST /api/{リポジトリ名}/{メソッド名}）と状態確認のパス
+API_PREFIX = "/api/"
+HEALTH_PATH = "/api/health"
+
+# 結果の形式
+RESULT_VALUE = 'value'      # JSON にそのまま変換できる値（ID・件数・結果の辞書・None）
+RESULT_MODEL = 'model'      # モデル1件（存在しない場合は None）
+RESULT_MODELS = 'models'    # モデルのリスト
+RESULT_STREAM = 'stream'    # モデルの行を少しずつ送る（NDJSON。1行は行の配列。大量の一覧用）
+RESULT_MATRIX = 'matrix'    # 成績の行列
+
+# CSVファイルの受け渡し（第1引数の csv_path）
+FILE_UPLOAD = 'upload'      # クライアントのファイルを送り、サーバーの一時ファイルでインポート
+FILE_DOWNLOAD = 'download'  # サーバーの一時ファイルにエクスポートし、クライアントのパスに保存
+
+# NDJSON の応答の Content-Type
+NDJSON_CONTENT_TYPE = "application/x-ndjson"
+CSV_CONTENT_TYPE = "text/csv"
+
+
+@dataclass(frozen=True)
+class Operation:
+    """サービスで公開するリポジトリの操作"""
+    # 書き込み（サーバーの書き込み専用スレッドでまとめてコミットする）
+    write: bool = False
+    result: str = RESULT_VALUE
+    # 結果のモデル（RESULT_MODEL / RESULT_MODELS / RESULT_STREAM）
+    model: Optional[type] = None
+    # 第1引数として辞書で受け取るモデル（保存後の内容を応答で返し、呼び出し側の引数に反映する）
+    argument: Optional[type] = None
+    file: Optional[str] = None
+    # 他の書き込みとまとめずに単独で実行する（一括ロード・バックアップを伴うインポートなど）
+    exclusive: bool = False
+    # サーバーで実際に呼ぶメソッド（省略時は操作名と同じ）
+    method: Optional[str] = None
+
+
+# リポジトリ名ごとのリポジトリのクラス
+REPOSITORY_CLASSES = {
+    'courses': CourseRepository,
+    'students': StudentRepository,
+    'grades': GradeRepository,
+}
+
+# 公開する操作（リポジトリ名 -> メソッド名 -> 操作）
+OPERATIONS: Dict[str, Dict[str, Operation]] = {
+    'courses': {
+        'get_all_courses': Operation(result=RESULT_MODELS, model=Course),
+        'get_course_by_id': Operation(result=RESULT_MODEL, model=Course),
+        'get_course_by_name': Operation(result=RESULT_MODEL, model=Course),
+        'create_course': Operation(write=True, argument=Course),
+        'update_course': Operation(write=True, argument=Course),
+        'delete_course': Operation(write=True),
+        'import_from_csv_with_replacement': Operation(write=True, file=FILE_UPLOAD, exclusive=True),
+        'export_to_csv': Operation(file=FILE_DOWNLOAD),
+    },
+    'students': {
+        'get_students_by_course': Operation(result=RESULT_MODELS, model=Student),
+        'get_student_by_number': Operation(result=RESULT_MODEL, model=Student),
+        'get_student_by_id': Operation(result=RESULT_MODEL, model=Student),
+        'search_students': Operation(result=RESULT_MODELS, model=Student),
+        'create_student': Operation(write=True, argument=Student),
+        'update_student': Operation(write=True, argument=Student),
+        'delete_student': Operation(write=True),
+        'import_from_csv_with_replacement': Operation(write=True, file=FILE_UPLOAD, exclusive=True),
+        'export_to_csv': Operation(file=FILE_DOWNLOAD),
+    },
+    'grades': {
+        'get_grades_by_course_date': Operation(result=RESULT_MODELS, model=Grade),
+        'get_grade_list': Operation(result=RESULT_STREAM, model=GradeListItem,
+                                    method='iter_grade_list'),
+        'search_grades': Operation(result=RESULT_MODELS, model=GradeListItem),
+        'get_entry_summary': Operation(result=RESULT_MODELS, model=GradeEntrySummary),
+        'get_grade_matrix': Operation(result=RESULT_MATRIX),
+        'create_or_update_grade': Operation(write=True, argument=Grade),
+        'delete_grade': Operation(write=True),
+        'delete_grades_by_filter': Operation(write=True, exclusive=True),
+        'import_from_csv_with_replacement': Operation(write=True, file=FILE_UPLOAD, exclusive=True),
+        'import_from_csv': Operation(write=True, file=FILE_UPLOAD, exclusive=True),
+        'export_to_csv': Operation(file=FILE_DOWNLOAD),
+    },
+}
+
+# モデルのフィールド名（行は from_row と同じくフィールド順の配列で送る）
+_FIELD_NAMES: Dict[type, tuple] = {}
+
+
+def create_repositories(db) -> Dict[str, Any]:
+    """
+    リポジトリ名（REPOSITORY_CLASSES のキー）ごとのリポジトリを作成
+    
+    Args:
+        db: データベースマネージャー
+        
+    Returns:
+        リポジトリ名 -> リポジトリ
+    """
+    return {name: repository_class(db) for name, repository_class in REPOSITORY_CLASSES.items()}
+
+
+def find_operation(repository: str, name: str) -> Optional[Operation]:
+    """
+    公開している操作を取得
+    
+    Args:
+        repository: リポジトリ名（OPERATIONS のキー）
+        name: メソッド名
+        
+    Returns:
+        操作（公開していない場合は None）
+    """
+    return OPERATIONS.get(repository, {}).get(name)
+
+
+def _field_names(model: type) -> tuple:
+    """モデルのフィールド名（フィールド順）"""
+    names = _FIELD_NAMES.get(model)
+    if names is None:
+        names = _FIELD_NAMES[model] = tuple(f.name for f in fields(model))
+    return names
+
+
+def encode_row(item: Any) -> list:
+    """モデルをフィールド順の配列に変換"""
+    return [getattr(item, name) for name in _field_names(type(item))]
+
+
+def decode_row(model: type, row: list) -> Any:
+    """フィールド順の配列からモデルを生成（from_row と同じく位置で受け取る）"""
+    return model(*row)
+
+
+def encode_result(operation: Operation, result: Any) -> Any:
+    """
+    操作の結果をJSONに変換できる値に変換（RESULT_STREAM 以外）
+    
+    Args:
+        operation: 操作
+        result: リポジトリのメソッドの戻り値
+        
+    Returns:
+        JSON に変換できる値
+    """
+    if operation.result == RESULT_MODEL:
+        return None if result is None else encode_row(result)
+    if operation.result == RESULT_MODELS:
+        return [encode_row(item) for item in result]
+    if operation.result == RESULT_MATRIX:
+        return {
+            'course_id': result.course_id,
+            'field': result.field,
+            'student_numbers': result.student_numbers,
+            'student_names': result.student_names,
+            'class_numbers': result.class_numbers,
+            'entry_dates': result.entry_dates,
+            # 成績がないセル（NaN）は null で送る
+            'values': [None if math.isnan(value) else value for value in result.values],
+        }
+    return result
+
+
+def decode_result(operation: Operation, data: Any) -> Any:
+    """
+    JSON の値から操作の結果を復元（RESULT_STREAM 以外）
+    
+    Args:
+        operation: 操作
+        data: encode_result で変換した値
+        
+    Returns:
+        リポジトリのメソッドと同じ形式の戻り値
+    """
+    if operation.result == RESULT_MODEL:
+        return None if data is None else decode_row(operation.model, data)
+    if operation.result == RESULT_MODELS:
+        return [decode_row(operation.model, row) for row in data]
+    if operation.result == RESULT_MATRIX:
+        values = data.pop('values')
+        return GradeMatrix(
+            values=array('d', [math.nan if value is None else value for value in values]),
+            **data
+        )
+    return data
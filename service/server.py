@@ -0,0 +1,523 @@
+#!/usr/bin/env python3
+"""
+成績サービス（ローカルHTTPサーバー）
+
+1つのプロセスがデータベースファイルを開き、講座・生徒・成績のリポジトリの操作を
+JSON のエンドポイント（POST /api/{courses|students|grades}/{メソッド名}）として公開する。
+複数のデスクトップアプリやスクリプトはファイルを共有せず、このサービスを経由して使う。
+
+- 読み取りは指定した数のワーカースレッドで並行して実行する（スレッドごとの接続）
+- 書き込みは1つの書き込み専用スレッドが順に受け取り、同時に届いたものをまとめて
+  1回のトランザクションでコミットする（1件ずつセーブポイントで実行するため、
+  失敗した書き込みだけが取り消される）
+- 成績一覧は1行ずつ NDJSON で送り、サーバーでも全件をリストにしない
+
+使い方:
+    python -m service.server [--db data/database.db] [--host 127.0.0.1] [--port 8765] [--workers 4]
+"""
+
+import argparse
+import base64
+import json
+import logging
+import os
+import queue
+import sys
+import tempfile
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+# プロジェクトルートをパスに追加（python service/server.py で起動した場合）
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from config.settings import (
+    DB_PATH, USE_WAL, CLUSTERED_GRADE_ENTRIES, BUSY_TIMEOUT_SECONDS, LOG_FORMAT,
+    SERVICE_HOST, SERVICE_PORT, SERVICE_WORKERS, SERVICE_WRITE_BATCH_SIZE, SERVICE_WRITE_QUEUE_SIZE
+)
+from database.db_manager import DatabaseManager
+from database.repositories.grade_repository import GradeConflictError
+from service.protocol import (
+    Operation, create_repositories, find_operation, encode_row, encode_result,
+    API_PREFIX, HEALTH_PATH, RESULT_STREAM, FILE_UPLOAD, FILE_DOWNLOAD,
+    NDJSON_CONTENT_TYPE, CSV_CONTENT_TYPE
+)
+
+logger = logging.getLogger(__name__)
+
+# 書き込みの待ち行列が一杯のとき、空くのを待つ時間（秒。超えた場合は 503 を返す）
+WRITE_QUEUE_TIMEOUT = 10.0
+# 成績一覧を送るときに1回のチャンク（NDJSON の1行）にまとめる行数
+STREAM_CHUNK_ROWS = 500
+# 接続してからリクエストが届くまで待つ時間（秒。届かない接続でワーカーがふさがらないよう短くする）
+REQUEST_TIMEOUT = 5.0
+
+# 書き込み専用スレッドを止める印
+_STOP = object()
+
+# 応答のJSON化（呼び出しごとにエンコーダーを作らない）
+_encode_json = json.JSONEncoder(ensure_ascii=False).encode
+
+
+class ServiceBusyError(Exception):
+    """書き込みの待ち行列が一杯で、受け付けられなかった"""
+
+
+class WriteRequest:
+    """書き込み専用スレッドで実行する1件の書き込み"""
+    
+    def __init__(self, repository: str, name: str, operation: Operation,
+                 args: list, kwargs: dict):
+        self.repository = repository
+        self.name = name
+        self.operation = operation
+        self.args = args
+        self.kwargs = kwargs
+        self.future: Future = Future()
+
+
+class GradeService:
+    """
+    リポジトリの操作を読み取りと書き込みに振り分けて実行するクラス（HTTPの処理とは独立）
+    
+    読み取りは呼び出したスレッドごとの DatabaseManager で、書き込みは書き込み専用スレッドの
+    DatabaseManager で実行する。
+    """
+    
+    def __init__(self, db_path: str = DB_PATH,
+                 write_batch_size: int = SERVICE_WRITE_BATCH_SIZE,
+                 write_queue_size: int = SERVICE_WRITE_QUEUE_SIZE,
+                 use_wal: bool = USE_WAL,
+                 clustered_grades: bool = CLUSTERED_GRADE_ENTRIES,
+                 busy_timeout: float = BUSY_TIMEOUT_SECONDS):
+        """
+        初期化（データベースを開き、書き込み専用スレッドを開始）
+        
+        Args:
+            db_path: データベースファイルのパス
+            write_batch_size: 1回のトランザクションでまとめてコミットする書き込みの最大件数
+            write_queue_size: 書き込みの待ち行列の上限
+            use_wal: WALモードを使用するか（読み取りと書き込みを並行させるため通常は True）
+            clustered_grades: 成績を講座・授業日・生徒ID順に格納するか
+            busy_timeout: 他の接続の書き込みが終わるのを待つ時間（秒）
+        """
+        self.db_path = db_path
+        self.write_batch_size = write_batch_size
+        self._db_options = {
+            'use_wal': use_wal,
+            'clustered_grades': clustered_grades,
+            'busy_timeout': busy_timeout,
+        }
+        # 作成・移行は書き込み用の接続で先に済ませる
+        self._writer_db = DatabaseManager(db_path, **self._db_options)
+        self._writer_repositories = create_repositories(self._writer_db)
+        self._writes: queue.Queue = queue.Queue(maxsize=write_queue_size)
+        self._local = threading.local()
+        self._readers: List[DatabaseManager] = []
+        self._readers_lock = threading.Lock()
+        self.write_count = 0
+        self.batch_count = 0
+        self.max_batch_size = 0
+        self._writer = threading.Thread(target=self._write_loop, name="grade-service-writer",
+                                        daemon=True)
+        self._writer.start()
+    
+    def _reader_repositories(self) -> Dict[str, Any]:
+        """呼び出したスレッド用のリポジトリ（初回にそのスレッドの接続を開く）"""
+        repositories = getattr(self._local, 'repositories', None)
+        if repositories is None:
+            db = DatabaseManager(self.db_path, **self._db_options)
+            with self._readers_lock:
+                self._readers.append(db)
+            repositories = self._local.repositories = create_repositories(db)
+        return repositories
+    
+    def call(self, repository: str, name: str, args: list, kwargs: dict) -> Any:
+        """
+        操作を実行して結果を返す（書き込みはコミットされるまで待つ）
+        
+        Args:
+            repository: リポジトリ名
+            name: メソッド名（find_operation で公開を確認済み）
+            args: 位置引数
+            kwargs: キーワード引数
+            
+        Returns:
+            リポジトリのメソッドの戻り値
+            
+        Raises:
+            ServiceBusyError: 書き込みの待ち行列が一杯の場合
+        """
+        operation = find_operation(repository, name)
+        if operation.write:
+            return self.submit_write(repository, name, operation, args, kwargs).result()
+        method = getattr(self._reader_repositories()[repository], operation.method or name)
+        return method(*args, **kwargs)
+    
+    def iterate(self, repository: str, name: str, args: list, kwargs: dict) -> Iterator:
+        """
+        読み取りの結果を1件ずつ返す（RESULT_STREAM の操作用）
+        
+        Args:
+            repository: リポジトリ名
+            name: メソッド名
+            args: 位置引数
+            kwargs: キーワード引数
+            
+        Returns:
+            結果のイテレーター
+        """
+        operation = find_operation(repository, name)
+        method = getattr(self._reader_repositories()[repository], operation.method or name)
+        return iter(method(*args, **kwargs))
+    
+    def submit_write(self, repository: str, name: str, operation: Operation,
+                     args: list, kwargs: dict) -> Future:
+        """
+        書き込みを待ち行列に追加
+        
+        Returns:
+            コミット後に結果（または例外）が設定される Future
+            
+        Raises:
+            ServiceBusyError: WRITE_QUEUE_TIMEOUT 秒待っても待ち行列が空かない場合
+        """
+        request = WriteRequest(repository, name, operation, args, kwargs)
+        try:
+            self._writes.put(request, timeout=WRITE_QUEUE_TIMEOUT)
+        except queue.Full:
+            raise ServiceBusyError("書き込みが混み合っています。しばらくしてから再度実行してください")
+        return request.future
+    
+    def _write_loop(self):
+        """書き込み専用スレッド: 届いた書き込みをまとめて実行する"""
+        carried = None
+        while True:
+            request = carried if carried is not None else self._writes.get()
+            carried = None
+            if request is _STOP:
+                break
+            if request.operation.exclusive:
+                self._run_exclusive(request)
+                continue
+            
+            # 待ち行列に溜まっている書き込みを上限までまとめる（単独で実行するものの手前まで）
+            batch = [request]
+            while len(batch) < self.write_batch_size:
+                try:
+                    request = self._writes.get_nowait()
+                except queue.Empty:
+                    break
+                if request is _STOP or request.operation.exclusive:
+                    carried = request
+                    break
+                batch.append(request)
+            self._run_batch(batch)
+    
+    def _execute(self, request: WriteRequest) -> Any:
+        """書き込み用のリポジトリで1件の書き込みを実行"""
+        repository = self._writer_repositories[request.repository]
+        method = getattr(repository, request.operation.method or request.name)
+        return method(*request.args, **request.kwargs)
+    
+    def _run_batch(self, batch: List[WriteRequest]):
+        """書き込みを1つのトランザクションで実行し、コミット後に結果を返す"""
+        outcomes = []
+        try:
+            with self._writer_db.transaction():
+                for request in batch:
+                    try:
+                        # 1件ずつセーブポイントで実行（失敗した書き込みだけを取り消す）
+                        with self._writer_db.transaction():
+                            outcomes.append((request, self._execute(request), None))
+                    except Exception as e:
+                        outcomes.append((request, None, e))
+        except Exception as e:
+            logger.error(f"書き込みのコミットエラー ({len(batch)}件): {e}")
+            for request in batch:
+                request.future.set_exception(e)
+            return
+        
+        self.write_count += len(batch)
+        self.batch_count += 1
+        self.max_batch_size = max(self.max_batch_size, len(batch))
+        for request, result, error in outcomes:
+            if error is None:
+                request.future.set_result(result)
+            else:
+                request.future.set_exception(error)
+    
+    def _run_exclusive(self, request: WriteRequest):
+        """他の書き込みとまとめずに実行（メソッド自身がトランザクションを管理する）"""
+        try:
+            result = self._execute(request)
+        except Exception as e:
+            request.future.set_exception(e)
+            return
+        self.write_count += 1
+        self.batch_count += 1
+        request.future.set_result(result)
+    
+    def status(self) -> dict:
+        """サービスの状態（状態確認のエンドポイント用）"""
+        return {
+            'status': 'ok',
+            'db_path': str(self.db_path),
+            'pending_writes': self._writes.qsize(),
+            'writes': self.write_count,
+            'write_batches': self.batch_count,
+            'max_batch_size': self.max_batch_size,
+            'lock_waits': self._writer_db.lock_stats.snapshot(),
+        }
+    
+    def close(self):
+        """書き込み専用スレッドを止め、すべての接続を閉じる"""
+        self._writes.put(_STOP)
+        self._writer.join()
+        with self._readers_lock:
+            for db in self._readers:
+                db.close()
+            self._readers.clear()
+        self._writer_db.close()
+        logger.info("成績サービスを停止しました")
+
+
+class ServiceRequestHandler(BaseHTTPRequestHandler):
+    """成績サービスのHTTPリクエストを処理するクラス"""
+    
+    # チャンク形式で成績一覧を送るため HTTP/1.1 で応答する
+    protocol_version = "HTTP/1.1"
+    timeout = REQUEST_TIMEOUT
+    server: 'ServiceHTTPServer'
+    
+    def end_headers(self):
+        """
+        応答ごとに接続を閉じる（Connection: close）
+        
+        クライアントは1リクエストごとに接続し直すため、キープアライブで次のリクエストを
+        待つと、その間ワーカースレッドがふさがり、他のクライアントの処理が待たされる。
+        """
+        if not self.close_connection:
+            self.send_header('Connection', 'close')
+        super().end_headers()
+    
+    def do_GET(self):
+        """状態確認"""
+        if self.path != HEALTH_PATH:
+            self._send_error(HTTPStatus.NOT_FOUND, 'not_found', f"不明なパスです: {self.path}")
+            return
+        self._send_json(HTTPStatus.OK, self.server.service.status())
+    
+    def do_POST(self):
+        """リポジトリの操作を実行"""
+        repository, _, name = self.path[len(API_PREFIX):].partition('/')
+        operation = find_operation(repository, name) if self.path.startswith(API_PREFIX) else None
+        if operation is None:
+            self._send_error(HTTPStatus.NOT_FOUND, 'not_found', f"公開されていない操作です: {self.path}")
+            return
+        
+        try:
+            length = int(self.headers.get('Content-Length') or 0)
+            body = json.loads(self.rfile.read(length) or b'{}')
+            args = list(body.get('args') or [])
+            kwargs = dict(body.get('kwargs') or {})
+            if operation.argument is not None:
+                args[0] = operation.argument.from_dict(args[0])
+        except (ValueError, KeyError, IndexError, TypeError) as e:
+            self._send_error(HTTPStatus.BAD_REQUEST, 'bad_request', f"不正なリクエストです: {e}")
+            return
+        
+        try:
+            if operation.file == FILE_UPLOAD:
+                self._call_with_upload(repository, name, operation, args, kwargs, body.get('file'))
+            elif operation.file == FILE_DOWNLOAD:
+                self._call_with_download(repository, name, args, kwargs)
+            elif operation.result == RESULT_STREAM:
+                self._stream(repository, name, operation, args, kwargs)
+            else:
+                result = self.server.service.call(repository, name, args, kwargs)
+                self._send_result(operation, args, result)
+        except GradeConflictError as e:
+            self._send_error(HTTPStatus.CONFLICT, 'conflict', str(e), current=(
+                None if e.current is None else encode_row(e.current)
+            ))
+        except ValueError as e:
+            self._send_error(HTTPStatus.BAD_REQUEST, 'value', str(e))
+        except ServiceBusyError as e:
+            self._send_error(HTTPStatus.SERVICE_UNAVAILABLE, 'busy', str(e))
+        except Exception as e:
+            logger.error(f"サービス実行エラー ({repository}.{name}): {e}")
+            self._send_error(HTTPStatus.INTERNAL_SERVER_ERROR, 'error', str(e))
+    
+    def _send_result(self, operation: Operation, args: list, result: Any):
+        """結果をJSONで送る（モデルを受け取る操作は保存後のモデルも返す）"""
+        data = {'result': encode_result(operation, result)}
+        if operation.argument is not None:
+            data['argument'] = args[0].to_dict()
+        self._send_json(HTTPStatus.OK, data)
+    
+    def _call_with_upload(self, repository: str, name: str, operation: Operation,
+                          args: list, kwargs: dict, content: Optional[str]):
+        """送られたCSVを一時ファイルに保存し、そのパスを第1引数にして実行"""
+        if content is None:
+            raise ValueError("CSVファイルの内容がありません")
+        fd, path = tempfile.mkstemp(suffix=".csv", prefix="upload_")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(base64.b64decode(content))
+            result = self.server.service.call(repository, name, [path] + args, kwargs)
+            self._send_result(operation, args, result)
+        finally:
+            os.unlink(path)
+    
+    def _call_with_download(self, repository: str, name: str, args: list, kwargs: dict):
+        """一時ファイルにエクスポートし、その内容を送る"""
+        with tempfile.TemporaryDirectory(prefix="download_") as directory:
+            path = Path(directory) / "export.csv"
+            self.server.service.call(repository, name, [str(path)] + args, kwargs)
+            content = path.read_bytes()
+        self.send_response(HTTPStatus.OK)
+        self.send_header('Content-Type', CSV_CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+    
+    def _stream(self, repository: str, name: str, operation: Operation,
+                args: list, kwargs: dict):
+        """
+        結果を NDJSON のチャンクで送る（1行は最大 STREAM_CHUNK_ROWS 件の行の配列）
+        
+        最初の1件を読んでから応答を始めるため、条件の誤りはエラーの応答になる。
+        読み込み中に失敗した場合は最後の行に {"error": ...} を送る。
+        クライアントが受信を中断した場合は読み込みを打ち切る。
+        """
+        rows = self.server.service.iterate(repository, name, args, kwargs)
+        try:
+            first = next(rows, None)
+            
+            self.send_response(HTTPStatus.OK)
+            self.send_header('Content-Type', NDJSON_CONTENT_TYPE)
+            self.send_header('Transfer-Encoding', 'chunked')
+            self.end_headers()
+            
+            batch = [] if first is None else [encode_row(first)]
+            try:
+                for item in rows:
+                    batch.append(encode_row(item))
+                    if len(batch) >= STREAM_CHUNK_ROWS:
+                        self._write_chunk(_encode_json(batch))
+                        batch = []
+                if batch:
+                    self._write_chunk(_encode_json(batch))
+            except ConnectionError:
+                raise
+            except Exception as e:
+                logger.error(f"一覧の送信エラー ({repository}.{name}): {e}")
+                self._write_chunk(_encode_json({'error': str(e)}))
+            self.wfile.write(b"0\r\n\r\n")
+        except ConnectionError:
+            logger.info(f"クライアントが一覧の受信を中断しました ({repository}.{name})")
+            self.close_connection = True
+        finally:
+            close = getattr(rows, 'close', None)
+            if close is not None:
+                close()
+    
+    def _write_chunk(self, line: str):
+        """NDJSON の1行を1つのチャンクとして送る"""
+        data = (line + "\n").encode('utf-8')
+        self.wfile.write(f"{len(data):X}\r\n".encode('ascii') + data + b"\r\n")
+    
+    def _send_json(self, status: HTTPStatus, data: dict):
+        """JSON の応答を送る"""
+        content = _encode_json(data).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+    
+    def _send_error(self, status: HTTPStatus, error: str, message: str, **extra):
+        """エラーの応答を送る（error: エラーの種類, message: 表示用のメッセージ）"""
+        self._send_json(status, {'error': error, 'message': message, **extra})
+    
+    def log_message(self, format: str, *args):
+        """アクセスログは DEBUG レベルで記録"""
+        logger.debug(f"{self.address_string()} - {format % args}")
+
+
+class ServiceHTTPServer(HTTPServer):
+    """リクエストを決まった数のワーカースレッドで処理するHTTPサーバー"""
+    
+    def __init__(self, address: tuple, service: GradeService, workers: int = SERVICE_WORKERS):
+        """
+        初期化
+        
+        Args:
+            address: 待ち受けるアドレス (ホスト, ポート)
+            service: 操作を実行するサービス
+            workers: ワーカースレッドの数（同時に処理するリクエストの数）
+        """
+        super().__init__(address, ServiceRequestHandler)
+        self.service = service
+        self.workers = workers
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="grade-service")
+    
+    def process_request(self, request, client_address):
+        """受け付けた接続をワーカースレッドで処理"""
+        self._executor.submit(self._process_request_thread, request, client_address)
+    
+    def _process_request_thread(self, request, client_address):
+        """ワーカースレッドでの接続の処理"""
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+    
+    def server_close(self):
+        """待ち受けを終了し、処理中のリクエストの完了を待つ"""
+        super().server_close()
+        self._executor.shutdown(wait=True)
+
+
+def parse_args(argv):
+    """コマンドライン引数を解析"""
+    parser = argparse.ArgumentParser(description="成績サービス（ローカルHTTPサーバー）")
+    parser.add_argument("--db", default=DB_PATH, help="データベースファイルのパス")
+    parser.add_argument("--host", default=SERVICE_HOST, help="待ち受けるアドレス")
+    parser.add_argument("--port", type=int, default=SERVICE_PORT, help="待ち受けるポート")
+    parser.add_argument("--workers", type=int, default=SERVICE_WORKERS,
+                        help="リクエストを処理するワーカースレッドの数")
+    parser.add_argument("--write-batch-size", type=int, default=SERVICE_WRITE_BATCH_SIZE,
+                        help="1回のトランザクションでまとめてコミットする書き込みの最大件数")
+    return parser.parse_args(argv[1:])
+
+
+def main():
+    """成績サービスを起動（Ctrl+C で停止）"""
+    logging.basicConfig(level=logging.INFO, format=LOG_FORMAT)
+    args = parse_args(sys.argv)
+    
+    service = GradeService(args.db, write_batch_size=args.write_batch_size)
+    server = ServiceHTTPServer((args.host, args.port), service, args.workers)
+    logger.info(
+        f"成績サービスを開始しました: http://{args.host}:{server.server_port} "
+        f"(データベース: {args.db}, ワーカー: {args.workers})"
+    )
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
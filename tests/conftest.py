@@ -0,0 +1,81 @@
+"""テスト共通のフィクスチャ（サンプルデータを入れた一時データベース）"""
+
+import logging
+import sys
+from pathlib import Path
+
+import pytest
+
+# プロジェクトルートをパスに追加
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root))
+
+logging.disable(logging.INFO)
+
+from database.dates import to_day_number
+from database.db_manager import DatabaseManager
+from database.repositories.course_repository import CourseRepository
+from database.repositories.grade_repository import GradeRepository
+from database.repositories.student_repository import StudentRepository
+
+COURSE_COUNT = 20
+STUDENTS_PER_COURSE = 40
+DAY_COUNT = 60
+
+
+def prepare_database(db_path: Path) -> DatabaseManager:
+    """講座・名簿・成績のサンプルデータを登録し、統計情報を更新したデータベースを作成"""
+    db = DatabaseManager(str(db_path))
+    db.execute_many(
+        "INSERT INTO courses (course_name) VALUES (?)",
+        [(f"講座{course:02d}",) for course in range(COURSE_COUNT)]
+    )
+    student_ids = StudentRepository(db).register_student_numbers(
+        f"S{student:04d}" for student in range(STUDENTS_PER_COURSE)
+    )
+    db.execute_many(
+        "INSERT INTO course_students "
+        "(course_id, student_id, student_number, class_number, student_name) "
+        "VALUES (?, ?, ?, ?, ?)",
+        [(course + 1, student_ids[f"S{student:04d}"], f"S{student:04d}",
+          str(student % 8 + 1), f"生徒{student:04d}")
+         for course in range(COURSE_COUNT) for student in range(STUDENTS_PER_COURSE)]
+    )
+    db.execute_many(
+        "INSERT INTO grade_entries (course_id, entry_date, student_id, grade1) "
+        "VALUES (?, ?, ?, ?)",
+        [(course + 1, to_day_number(f"2024-{day // 28 + 1:02d}-{day % 28 + 1:02d}"),
+          student_ids[f"S{student:04d}"], day % 5)
+         for day in range(DAY_COUNT)
+         for course in range(COURSE_COUNT)
+         for student in range(STUDENTS_PER_COURSE)]
+    )
+    db.commit()
+    db.maintenance.analyze()
+    return db
+
+
+@pytest.fixture(scope="session")
+def sample_db(tmp_path_factory):
+    """サンプルデータを入れたデータベース（テスト全体で共有。変更するテストはロールバックすること）"""
+    db = prepare_database(tmp_path_factory.mktemp("sample") / "sample.db")
+    yield db
+    db.close()
+
+
+@pytest.fixture(scope="session")
+def sample_repos(sample_db):
+    """サンプルデータベースのリポジトリ（'course', 'student', 'grade'）"""
+    return {
+        'course': CourseRepository(sample_db),
+        'student': StudentRepository(sample_db),
+        'grade': GradeRepository(sample_db),
+    }
+
+
+@pytest.fixture
+def db(tmp_path):
+    """空のデータベース（テストごとに作成）"""
+    db = DatabaseManager(str(tmp_path / "test.db"))
+    yield db
+    db.close()
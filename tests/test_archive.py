@@ -0,0 +1,186 @@
+"""年度末アーカイブのテスト"""
+
+import sqlite3
+from datetime import date
+
+import pytest
+
+from database.archive import academic_year_of
+from database.repositories.course_repository import CourseRepository
+from database.repositories.grade_repository import GradeRepository
+from database.repositories.student_repository import StudentRepository
+from models.course import Course
+from models.grade import Grade
+from models.student import Student
+
+# 終了した年度（アーカイブする）と、その後の年度（作業用データベースに残す）
+CLOSED_YEAR = 2022
+LATER_DATE = "2025-05-12"
+
+
+@pytest.fixture
+def school(db):
+    """
+    終了した年度だけに成績のある講座（old）と、その後の年度にも成績のある講座（current）
+    
+    Returns:
+        講座名から講座IDへの辞書
+    """
+    courses = CourseRepository(db)
+    students = StudentRepository(db)
+    grades = GradeRepository(db)
+    course_ids = {name: courses.create_course(Course(None, name)) for name in ("old", "current")}
+    for course_id in course_ids.values():
+        for number in ("S0001", "S0002"):
+            students.create_student(Student(None, course_id, number, "1", f"生徒{number}"))
+    
+    for entry_date, note in (("2022-04-11", "欠席連絡あり"), ("2023-03-20", None)):
+        for course_id in course_ids.values():
+            for number in ("S0001", "S0002"):
+                grades.create_or_update_grade(Grade(
+                    None, course_id, entry_date, number, grade1=1,
+                    note1=note if number == "S0002" else None
+                ))
+    for number in ("S0001", "S0002"):
+        grades.create_or_update_grade(Grade(
+            None, course_ids["current"], LATER_DATE, number, grade1=2,
+            note1="欠席連絡あり" if number == "S0002" else None
+        ))
+    return course_ids
+
+
+def archived_grades(db) -> list:
+    """アーカイブの成績 (id, row_version, grade1) を ID 順に取得"""
+    connection = sqlite3.connect(db.archives.archive_path(CLOSED_YEAR))
+    try:
+        return connection.execute(
+            "SELECT id, row_version, grade1 FROM grade_entries ORDER BY id"
+        ).fetchall()
+    finally:
+        connection.close()
+
+
+def year_grade_ids(db) -> list:
+    """作業用データベースに残っている終了した年度の成績ID"""
+    rows = db.fetch_all(
+        "SELECT id FROM grade_entries WHERE entry_date < ? ORDER BY id",
+        (date(CLOSED_YEAR + 1, 4, 1).toordinal(),)
+    )
+    return [row['id'] for row in rows]
+
+
+def test_archive_moves_closed_year(db, school):
+    """終了した年度の成績をアーカイブに移し、成績が残らない講座は名簿とともに削除する"""
+    ids = year_grade_ids(db)
+    
+    record = db.archives.archive_year(CLOSED_YEAR)
+    
+    assert year_grade_ids(db) == []
+    assert [row[0] for row in archived_grades(db)] == ids
+    assert (record.academic_year, record.course_count, record.grade_count) == (CLOSED_YEAR, 2, 8)
+    assert (record.start_date, record.end_date) == ("2022-04-01", "2023-03-31")
+    
+    courses = {course.course_name for course in CourseRepository(db).get_all_courses()}
+    assert courses == {"current"}
+    assert StudentRepository(db).get_students_by_course(school["old"]) == []
+    assert len(GradeRepository(db).get_grades_by_course_date(school["current"], LATER_DATE)) == 2
+    # 年度の移動は変更ログに削除として記録しない
+    assert db.fetch_one(
+        "SELECT COUNT(*) AS n FROM change_log WHERE operation = 'D'"
+    )['n'] == 0
+
+
+def test_archive_refuses_current_year(db, school):
+    """終了していない年度はアーカイブしない"""
+    with pytest.raises(ValueError):
+        db.archives.archive_year(academic_year_of(date.today()))
+    assert db.archives.list_archives() == []
+
+
+def test_archive_refuses_inside_transaction(db, school):
+    """トランザクション中はアーカイブしない"""
+    ids = year_grade_ids(db)
+    with db.transaction():
+        with pytest.raises(RuntimeError):
+            db.archives.archive_year(CLOSED_YEAR)
+    assert year_grade_ids(db) == ids
+    assert not db.archives.archive_path(CLOSED_YEAR).exists()
+
+
+def test_archive_again_adds_later_grades(db, school):
+    """同じ年度をもう一度アーカイブすると、その後に入力された成績だけを重複なく追加する"""
+    first = db.archives.archive_year(CLOSED_YEAR)
+    GradeRepository(db).create_or_update_grade(
+        Grade(None, school["current"], "2023-02-06", "S0001", grade1=3)
+    )
+    added = year_grade_ids(db)
+    
+    second = db.archives.archive_year(CLOSED_YEAR)
+    
+    assert year_grade_ids(db) == []
+    ids = [row[0] for row in archived_grades(db)]
+    assert len(ids) == len(set(ids)) == first.grade_count + 1
+    assert added[0] in ids
+    assert second.grade_count == first.grade_count + 1
+
+
+def test_archive_interrupted_before_delete_loses_nothing(db, school, monkeypatch):
+    """
+    アーカイブへの複製の後、作業用データベースからの削除の前に失敗しても成績は残り、
+    もう一度アーカイブすると、その間に変更された成績も最新の内容で移す
+    """
+    ids = year_grade_ids(db)
+    
+    def fail(*args):
+        raise sqlite3.OperationalError("中断")
+    monkeypatch.setattr(db.archives, '_remove_year', fail)
+    with pytest.raises(sqlite3.OperationalError):
+        db.archives.archive_year(CLOSED_YEAR)
+    monkeypatch.undo()
+    
+    assert year_grade_ids(db) == ids
+    assert [row[0] for row in archived_grades(db)] == ids
+    
+    # 中断の後に変更された成績
+    grade = GradeRepository(db).get_grades_by_course_date(school["current"], "2022-04-11")[0]
+    grade.grade1 = 4
+    GradeRepository(db).create_or_update_grade(grade, check_conflict=True)
+    
+    db.archives.archive_year(CLOSED_YEAR)
+    
+    assert year_grade_ids(db) == []
+    archived = {row[0]: row for row in archived_grades(db)}
+    assert sorted(archived) == ids
+    assert archived[grade.id][1:] == (grade.row_version, 4)
+
+
+def test_grade_list_spans_archive_and_working_database(db, school):
+    """期間がアーカイブと作業用データベースにまたがる成績一覧は、各行を1回ずつ返す"""
+    before = GradeRepository(db).get_grade_list({'start_date': "2022-04-01", 'end_date': "2025-12-31"})
+    db.archives.archive_year(CLOSED_YEAR)
+    
+    repo = GradeRepository(db)
+    period = {'start_date': "2022-04-01", 'end_date': "2025-12-31"}
+    items = repo.get_grade_list(period)
+    ids = [item.id for item in items]
+    assert len(ids) == len(set(ids)) == 10
+    assert sorted(ids) == sorted(item.id for item in before)
+    
+    # アーカイブの全文検索の索引でも絞り込む
+    by_number = repo.get_grade_list({**period, 'student_number': "0002"})
+    assert sorted((item.entry_date, item.course_name) for item in by_number) == [
+        ("2022-04-11", "current"), ("2022-04-11", "old"),
+        ("2023-03-20", "current"), ("2023-03-20", "old"),
+        (LATER_DATE, "current"),
+    ]
+    assert {item.student_number for item in by_number} == {"S0002"}
+    
+    by_keyword = repo.get_grade_list({**period, 'keyword': "欠席連絡"})
+    assert sorted((item.entry_date, item.course_name) for item in by_keyword) == [
+        ("2022-04-11", "current"), ("2022-04-11", "old"), (LATER_DATE, "current"),
+    ]
+    
+    # 期間がアーカイブと重ならなければ作業用データベースのみを読む
+    assert {item.entry_date for item in repo.get_grade_list(
+        {'start_date': "2025-04-01", 'end_date': "2025-12-31"}
+    )} == {LATER_DATE}
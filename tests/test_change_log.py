@@ -0,0 +1,151 @@
+"""変更ログ（トリガーによる記録・差分エクスポート・古いログの削除）のテスト"""
+
+import csv
+
+import pytest
+
+from database.change_log import OPERATION_DELETE, OPERATION_UPSERT
+from database.repositories.course_repository import CourseRepository
+from database.repositories.grade_repository import GradeRepository
+from database.repositories.student_repository import StudentRepository
+from models.course import Course
+from models.grade import Grade
+from models.student import Student
+
+
+def logged_since(db, seq: int) -> list:
+    """通し番号 seq より後の変更ログ (表名, 行ID, 操作) のリスト"""
+    rows = db.fetch_all(
+        "SELECT table_name, row_id, operation FROM change_log WHERE seq > ? ORDER BY seq", (seq,)
+    )
+    return [tuple(row) for row in rows]
+
+
+@pytest.fixture
+def repos(db):
+    """空のデータベースのリポジトリ（'course', 'student', 'grade'）"""
+    return {
+        'course': CourseRepository(db),
+        'student': StudentRepository(db),
+        'grade': GradeRepository(db),
+    }
+
+
+def save_grade(repos, course_id: int, entry_date: str, grade1: int) -> Grade:
+    """生徒 S0001 の成績を保存"""
+    grade = Grade(None, course_id, entry_date, "S0001", grade1=grade1)
+    repos['grade'].create_or_update_grade(grade)
+    return grade
+
+
+def test_triggers_log_insert_update_delete(db, repos):
+    """講座・名簿・成績の追加・更新・削除がそれぞれ変更ログに記録される"""
+    seq = db.changes.watermark()
+    course_id = repos['course'].create_course(Course(None, "数学"))
+    repos['course'].update_course(Course(course_id, "数学I"))
+    assert logged_since(db, seq) == [('courses', course_id, 'I'), ('courses', course_id, 'U')]
+    
+    seq = db.changes.watermark()
+    student_id = repos['student'].create_student(Student(None, course_id, "S0001", "1", "生徒1"))
+    repos['student'].update_student(Student(student_id, course_id, "S0001", "2", "生徒1"))
+    repos['student'].delete_student(student_id)
+    assert logged_since(db, seq) == [
+        ('course_students', student_id, 'I'),
+        ('course_students', student_id, 'U'),
+        ('course_students', student_id, 'D'),
+    ]
+    
+    seq = db.changes.watermark()
+    grade = save_grade(repos, course_id, "2024-04-08", 1)
+    grade.grade1 = 2
+    repos['grade'].create_or_update_grade(grade)
+    repos['grade'].delete_grade(grade.id)
+    assert logged_since(db, seq) == [
+        ('grade_entries', grade.id, 'I'),
+        ('grade_entries', grade.id, 'U'),
+        ('grade_entries', grade.id, 'D'),
+    ]
+    assert db.changes.watermark() == seq + 3
+
+
+def test_rolled_back_changes_are_not_logged(db, repos):
+    """ロールバックした変更は変更ログに残らない"""
+    course_id = repos['course'].create_course(Course(None, "数学"))
+    seq = db.changes.watermark()
+    
+    with pytest.raises(RuntimeError):
+        with db.transaction():
+            save_grade(repos, course_id, "2024-04-08", 1)
+            raise RuntimeError("取り消し")
+    
+    assert logged_since(db, seq) == []
+
+
+def test_export_since_watermark_returns_only_newer_changes(db, repos, tmp_path):
+    """ウォーターマーク N からのエクスポートには通し番号が N より後の変更だけが含まれる"""
+    course_id = repos['course'].create_course(Course(None, "数学"))
+    unchanged = save_grade(repos, course_id, "2024-04-08", 1)
+    updated = save_grade(repos, course_id, "2024-04-09", 1)
+    deleted = save_grade(repos, course_id, "2024-04-10", 1)
+    since = db.changes.watermark()
+    
+    updated.grade1 = 3
+    repos['grade'].create_or_update_grade(updated)
+    repos['grade'].delete_grade(deleted.id)
+    added = save_grade(repos, course_id, "2024-04-11", 4)
+    
+    result = db.changes.export_changes(str(tmp_path / "export"), since=since)
+    
+    assert (result.since, result.watermark) == (since, db.changes.watermark())
+    assert result.counts == {'courses': (0, 0), 'course_students': (0, 0), 'grade_entries': (2, 1)}
+    with open(result.paths['grade_entries'], encoding='utf-8-sig', newline='') as f:
+        rows = {int(row['id']): row for row in csv.DictReader(f)}
+    assert unchanged.id not in rows
+    assert rows[updated.id]['operation'] == OPERATION_UPSERT
+    assert rows[updated.id]['grade1'] == '3'
+    assert rows[added.id]['operation'] == OPERATION_UPSERT
+    assert rows[added.id]['entry_date'] == "2024-04-11"
+    assert rows[deleted.id]['operation'] == OPERATION_DELETE
+    
+    # 返されたウォーターマークからのエクスポートは、その後の変更がなければ空
+    again = db.changes.export_changes(str(tmp_path / "again"), since=result.watermark)
+    assert again.row_count == 0
+
+
+def test_prune_keeps_changes_after_exported_watermark(db, repos, tmp_path):
+    """エクスポートしたウォーターマークまでを削除しても、その後の変更は次のエクスポートに含まれる"""
+    course_id = repos['course'].create_course(Course(None, "数学"))
+    first = save_grade(repos, course_id, "2024-04-08", 1)
+    exported = db.changes.export_changes(str(tmp_path / "first"))
+    
+    later = save_grade(repos, course_id, "2024-04-09", 2)
+    first.grade1 = 4
+    repos['grade'].create_or_update_grade(first)
+    pending = logged_since(db, exported.watermark)
+    
+    removed = db.changes.prune(exported.watermark)
+    
+    assert removed == exported.watermark
+    remaining = db.fetch_all("SELECT seq FROM change_log")
+    assert min(row['seq'] for row in remaining) > exported.watermark
+    assert logged_since(db, 0) == pending
+    
+    result = db.changes.export_changes(str(tmp_path / "second"), since=exported.watermark)
+    assert result.counts['grade_entries'] == (2, 0)
+    with open(result.paths['grade_entries'], encoding='utf-8-sig', newline='') as f:
+        assert {int(row['id']) for row in csv.DictReader(f)} == {first.id, later.id}
+
+
+def test_prune_does_not_reuse_sequence_numbers(db, repos, tmp_path):
+    """すべてのログを削除してもウォーターマークは戻らず、新しい変更は前回より後の通し番号になる"""
+    course_id = repos['course'].create_course(Course(None, "数学"))
+    save_grade(repos, course_id, "2024-04-08", 1)
+    watermark = db.changes.watermark()
+    
+    db.changes.prune(watermark)
+    assert db.fetch_one("SELECT COUNT(*) AS n FROM change_log")['n'] == 0
+    assert db.changes.watermark() == watermark
+    
+    save_grade(repos, course_id, "2024-04-09", 1)
+    result = db.changes.export_changes(str(tmp_path / "export"), since=watermark)
+    assert result.counts['grade_entries'] == (1, 0)
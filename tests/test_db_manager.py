@@ -0,0 +1,44 @@
+"""データベースマネージャーのテスト"""
+
+from database.query_stats import normalize_query
+
+QUERY = "SELECT value FROM generate_numbers"
+
+
+def fill(db, count: int):
+    """count 行の表 generate_numbers を作成"""
+    db.execute_query("CREATE TABLE generate_numbers (value INTEGER)")
+    db.execute_many("INSERT INTO generate_numbers (value) VALUES (?)", [(i,) for i in range(count)])
+    db.commit()
+
+
+def recorded(db, query: str) -> dict:
+    """クエリ計測の記録（正規化したSQL文で検索）"""
+    key = normalize_query(query)
+    return next(stat for stat in db.query_stats.snapshot() if stat['query'] == key)
+
+
+def test_fetch_iter_records_query_after_full_read(db):
+    """最後まで読み込んだ fetch_iter はすべての行数で記録される"""
+    fill(db, 25)
+    db.enable_query_stats()
+    
+    assert len(list(db.fetch_iter(QUERY, batch_size=10))) == 25
+    
+    stat = recorded(db, QUERY)
+    assert (stat['calls'], stat['rows']) == (1, 25)
+
+
+def test_fetch_iter_records_query_when_closed_early(db):
+    """途中で閉じた fetch_iter もそれまでに読み込んだ行数で記録される"""
+    fill(db, 25)
+    db.enable_query_stats()
+    
+    rows = db.fetch_iter(QUERY, batch_size=10)
+    for index, _ in enumerate(rows):
+        if index == 4:
+            break
+    rows.close()
+    
+    stat = recorded(db, QUERY)
+    assert (stat['calls'], stat['rows']) == (1, 10)
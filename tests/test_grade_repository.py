@@ -0,0 +1,175 @@
+"""成績リポジトリのテスト"""
+
+import threading
+from typing import Optional
+
+import pytest
+
+from database.db_manager import DatabaseManager
+from database.repositories.course_repository import CourseRepository
+from database.repositories.grade_repository import (
+    SORT_COLUMNS, SORT_ORDERS, GradeConflictError, GradeRepository
+)
+from models.course import Course
+from models.grade import Grade
+
+ENTRY_DATE = "2024-04-08"
+
+
+@pytest.mark.parametrize("sort_by", list(SORT_COLUMNS))
+@pytest.mark.parametrize("sort_order", list(SORT_ORDERS) + ['desc'])
+def test_grade_list_order_by_whitelist(db, sort_by, sort_order):
+    """許可した列・ソート順は ORDER BY にそのまま使われ、パラメータには含まれない"""
+    query, params = GradeRepository(db).build_grade_list_query(
+        {'sort_by': sort_by, 'sort_order': sort_order}
+    )
+    expected = ", ".join(f"{column} {sort_order.upper()}" for column in SORT_COLUMNS[sort_by])
+    assert query.endswith(f" ORDER BY {expected}")
+    assert params == ()
+
+
+@pytest.mark.parametrize("sort_by", [
+    "grade1",
+    "entry_date; DROP TABLE grade_entries",
+    "entry_date DESC, (SELECT 1)",
+])
+def test_grade_list_rejects_unknown_sort_by(db, sort_by):
+    """許可していない並べ替え列は ValueError（SQL に埋め込まない）"""
+    with pytest.raises(ValueError, match="並べ替えできない列です"):
+        GradeRepository(db).build_grade_list_query({'sort_by': sort_by})
+
+
+@pytest.mark.parametrize("sort_order", ["UP", "ASC; DROP TABLE grade_entries", "ASC, course_id"])
+def test_grade_list_rejects_unknown_sort_order(db, sort_order):
+    """許可していないソート順は ValueError（SQL に埋め込まない）"""
+    with pytest.raises(ValueError, match="不正なソート順です"):
+        GradeRepository(db).build_grade_list_query({'sort_order': sort_order})
+
+
+def test_get_grade_list_rejects_unknown_sort(db):
+    """成績一覧の取得でも不正な並べ替えは実行前に ValueError になる"""
+    with pytest.raises(ValueError):
+        GradeRepository(db).get_grade_list({'sort_by': 'grade1'})
+
+
+@pytest.fixture
+def course_id(db):
+    """成績を登録する講座"""
+    return CourseRepository(db).create_course(Course(None, "数学"))
+
+
+def load_grade(db, course_id: int, student_number: str = "S0001") -> Optional[Grade]:
+    """成績入力画面と同じく、講座・授業日の成績を読み込む（未登録なら None）"""
+    grades = GradeRepository(db).get_grades_by_course_date(course_id, ENTRY_DATE)
+    return next((g for g in grades if g.student_number == student_number), None)
+
+
+def test_row_version_increments_on_each_save(db, course_id):
+    """保存するたびに行バージョンが1増え、保存した成績に反映される"""
+    repo = GradeRepository(db)
+    grade = Grade(None, course_id, ENTRY_DATE, "S0001", grade1=1)
+    grade_id = repo.create_or_update_grade(grade, check_conflict=True)
+    assert (grade.id, grade.row_version) == (grade_id, 1)
+    
+    for expected, value in ((2, 2), (3, 3)):
+        grade.grade1 = value
+        assert repo.create_or_update_grade(grade, check_conflict=True) == grade_id
+        assert grade.row_version == expected
+    
+    stored = load_grade(db, course_id)
+    assert (stored.id, stored.row_version, stored.grade1) == (grade_id, 3, 3)
+    assert db.lock_stats.conflicts == 0
+
+
+def test_stale_row_version_raises_conflict(db, course_id):
+    """読み込んだ後に他の利用者が更新していた成績は保存せず、現在の内容を添えて GradeConflictError"""
+    repo = GradeRepository(db)
+    repo.create_or_update_grade(Grade(None, course_id, ENTRY_DATE, "S0001", grade1=1),
+                                check_conflict=True)
+    mine = load_grade(db, course_id)
+    theirs = load_grade(db, course_id)
+    theirs.grade1 = 4
+    repo.create_or_update_grade(theirs, check_conflict=True)
+    
+    mine.grade1 = 2
+    with pytest.raises(GradeConflictError) as excinfo:
+        repo.create_or_update_grade(mine, check_conflict=True)
+    
+    assert excinfo.value.grade is mine
+    current = excinfo.value.current
+    assert (current.id, current.row_version, current.grade1) == (theirs.id, 2, 4)
+    assert mine.row_version == 1
+    assert load_grade(db, course_id).grade1 == 4
+    assert db.lock_stats.conflicts == 1
+
+
+def test_save_over_deleted_grade_raises_conflict(db, course_id):
+    """読み込んだ後に他の利用者が削除した成績は作り直さず、current が None の GradeConflictError"""
+    repo = GradeRepository(db)
+    grade = Grade(None, course_id, ENTRY_DATE, "S0001", grade1=1)
+    repo.create_or_update_grade(grade, check_conflict=True)
+    repo.delete_grade(grade.id)
+    
+    grade.grade1 = 2
+    with pytest.raises(GradeConflictError) as excinfo:
+        repo.create_or_update_grade(grade, check_conflict=True)
+    
+    assert excinfo.value.current is None
+    assert load_grade(db, course_id) is None
+
+
+def test_concurrent_creates_keep_first_grade(tmp_path, db, course_id):
+    """
+    未登録の成績を2つの接続が同時に作成した場合は、先に保存した方だけが残り、
+    後の方は先に保存された内容を添えて GradeConflictError
+    """
+    other = DatabaseManager(str(tmp_path / "test.db"))
+    try:
+        assert load_grade(db, course_id) is None
+        assert load_grade(other, course_id) is None
+        first = Grade(None, course_id, ENTRY_DATE, "S0001", grade1=1)
+        second = Grade(None, course_id, ENTRY_DATE, "S0001", grade1=3)
+        
+        GradeRepository(other).create_or_update_grade(first, check_conflict=True)
+        with pytest.raises(GradeConflictError) as excinfo:
+            GradeRepository(db).create_or_update_grade(second, check_conflict=True)
+        
+        current = excinfo.value.current
+        assert (current.id, current.row_version, current.grade1) == (first.id, 1, 1)
+        assert second.id is None
+        assert len(GradeRepository(db).get_grades_by_course_date(course_id, ENTRY_DATE)) == 1
+    finally:
+        other.close()
+
+
+def test_concurrent_creates_from_threads(tmp_path, db, course_id):
+    """同時に作成を始めた複数のスレッドのうち、保存できるのは1つだけ"""
+    path = str(tmp_path / "test.db")
+    workers = 4
+    barrier = threading.Barrier(workers)
+    results = []
+    
+    def save(value: int):
+        manager = DatabaseManager(path)
+        try:
+            grade = Grade(None, course_id, ENTRY_DATE, "S0001", grade1=value)
+            barrier.wait()
+            try:
+                GradeRepository(manager).create_or_update_grade(grade, check_conflict=True)
+                results.append(('saved', value))
+            except GradeConflictError as e:
+                results.append(('conflict', e.current.grade1))
+        finally:
+            manager.close()
+    
+    threads = [threading.Thread(target=save, args=(value,)) for value in range(workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    saved = [value for status, value in results if status == 'saved']
+    assert len(results) == workers
+    assert len(saved) == 1
+    assert all(value == saved[0] for status, value in results if status == 'conflict')
+    assert load_grade(db, course_id).grade1 == saved[0]
@@ -0,0 +1,216 @@
+"""
+既存のデータベースのマイグレーションのテスト
+
+最初のリリースのスキーマ（fixtures/baseline_schema.sql）で作成したデータベースに
+DatabaseManager を接続し、create_tables() ですべてのマイグレーションを適用した結果を確認する。
+"""
+
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+from database.dates import from_day_number, to_day_number
+from database.db_manager import DatabaseManager
+from database.repositories.grade_repository import GradeRepository
+from models.grade import Grade
+
+BASELINE_SCHEMA = Path(__file__).parent / "fixtures" / "baseline_schema.sql"
+
+
+def create_baseline_database(db_path: Path, courses, roster, grades):
+    """
+    最初のリリースのスキーマでデータベースを作成
+    
+    Args:
+        db_path: データベースファイルのパス
+        courses: (course_id, course_name) のリスト
+        roster: (course_id, student_number, student_name) のリスト
+        grades: (id, course_id, entry_date, student_number, grade1, grade4, updated_at) のリスト
+    """
+    connection = sqlite3.connect(db_path)
+    try:
+        connection.executescript(BASELINE_SCHEMA.read_text(encoding='utf-8'))
+        connection.executemany("INSERT INTO courses (course_id, course_name) VALUES (?, ?)", courses)
+        connection.executemany(
+            "INSERT INTO course_students (course_id, student_number, student_name) VALUES (?, ?, ?)",
+            roster
+        )
+        connection.executemany(
+            "INSERT INTO grade_entries "
+            "(id, course_id, entry_date, student_number, grade1, grade4, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            grades
+        )
+        connection.commit()
+    finally:
+        connection.close()
+
+
+@pytest.fixture
+def migrate(tmp_path):
+    """最初のリリースのスキーマのデータベースを作成してマイグレーションを適用する関数"""
+    managers = []
+    
+    def run(courses, roster, grades) -> DatabaseManager:
+        db_path = tmp_path / "baseline.db"
+        create_baseline_database(db_path, courses, roster, grades)
+        db = DatabaseManager(str(db_path))
+        managers.append(db)
+        return db
+    
+    yield run
+    for db in managers:
+        db.close()
+
+
+# 006: 授業日の日番号への変換
+
+COURSES = [(1, "数学"), (2, "国語")]
+ROSTER = [(1, "S0001", "生徒1"), (1, "S0002", "生徒2"), (2, "S0001", "生徒1")]
+OLD = "2024-01-01 09:00:00"
+NEW = "2024-02-01 09:00:00"
+
+# (id, course_id, entry_date, student_number, grade1, grade4, updated_at) と変換後の授業日
+CONVERTED_GRADES = [
+    ((1, 1, "2024-01-05", "S0001", 1, 70.5, OLD), "2024-01-05"),
+    ((2, 1, "2024/1/9", "S0001", 2, None, OLD), "2024-01-09"),
+    ((3, 1, "2024/12/31", "S0002", 3, 80, OLD), "2024-12-31"),
+    ((4, 2, " 2024/2/29 ", "S0001", 4, None, OLD), "2024-02-29"),
+    ((5, 2, "0001-01-01", "S0001", 0, None, OLD), "0001-01-01"),
+    # 同じ講座・授業日・生徒に揃う行のうち、更新の新しい行
+    ((6, 1, "2024/1/10", "S0002", 4, None, NEW), "2024-01-10"),
+]
+# 移せない行（元の値のまま grade_entries_rejected に移る）
+REJECTED_GRADES = [
+    (7, 1, "2024/2/30", "S0001", 1, None, OLD),        # 存在しない日付
+    (8, 1, "2023-13-01", "S0001", 1, None, OLD),       # 存在しない月
+    (9, 1, "来週", "S0001", 1, None, OLD),              # 日付ではない
+    (10, 1, "2024-01-20", "S0001", 1, "欠席", OLD),    # 数値の成績に文字列
+    (11, 1, "2024-01-10", "S0002", 2, None, OLD),      # id 6 と重複する更新の古い行
+]
+
+
+def test_entry_dates_become_day_numbers(migrate):
+    """YYYY-MM-DD と YYYY/M/D の授業日が日番号になり、YYYY-MM-DD として読み戻せる"""
+    db = migrate(COURSES, ROSTER, [row for row, _ in CONVERTED_GRADES] + REJECTED_GRADES)
+    
+    stored = {row['id']: row for row in db.fetch_all(
+        "SELECT id, entry_date, typeof(entry_date) AS type FROM grade_entries"
+    )}
+    assert set(stored) == {row[0] for row, _ in CONVERTED_GRADES}
+    for row, expected in CONVERTED_GRADES:
+        assert stored[row[0]]['type'] == 'integer'
+        assert stored[row[0]]['entry_date'] == to_day_number(expected)
+        assert from_day_number(stored[row[0]]['entry_date']) == expected
+    
+    # リポジトリからは変換前と同じ成績が YYYY-MM-DD の授業日で読める
+    repo = GradeRepository(db)
+    for row, expected in CONVERTED_GRADES:
+        grades = repo.get_grades_by_course_date(row[1], expected)
+        grade = next(g for g in grades if g.id == row[0])
+        assert (grade.student_number, grade.grade1, grade.grade4) == (row[3], row[4], row[5])
+    
+    items = repo.get_grade_list({'start_date': "2024-01-01", 'end_date': "2024-12-31"})
+    assert sorted((item.id, item.entry_date) for item in items) == sorted(
+        (row[0], expected) for row, expected in CONVERTED_GRADES if expected.startswith("2024")
+    )
+
+
+def test_unparseable_rows_move_to_rejected_table(migrate):
+    """変換できない行・重複した古い行は削除せず、元の値のまま grade_entries_rejected に移す"""
+    db = migrate(COURSES, ROSTER, [row for row, _ in CONVERTED_GRADES] + REJECTED_GRADES)
+    
+    rejected = db.fetch_all(
+        "SELECT id, course_id, entry_date, student_number, grade1, grade4, updated_at "
+        "FROM grade_entries_rejected ORDER BY id"
+    )
+    assert [tuple(row) for row in rejected] == REJECTED_GRADES
+    
+    # 移した行も含めて1行も失われていない
+    kept = db.fetch_one("SELECT COUNT(*) AS n FROM grade_entries")['n']
+    assert kept + len(rejected) == len(CONVERTED_GRADES) + len(REJECTED_GRADES)
+    
+    # grade_entries_rejected に移した行の成績IDは再利用しない
+    grade_id = GradeRepository(db).create_or_update_grade(Grade(None, 1, "2024-03-01", "S0001"))
+    assert grade_id == max(row[0] for row in REJECTED_GRADES) + 1
+
+
+# 007: 生徒番号から整数の生徒IDへの置き換え
+
+STUDENT_COURSES = [(1, "数学"), (2, "国語")]
+# S0001 は2つの講座の名簿に重複して登録され、"S0002 " は名簿の "S0002" と前後の空白だけが異なる
+STUDENT_ROSTER = [
+    (1, "S0001", "生徒1"), (1, "S0002", "生徒2"), (2, "S0001", "生徒1"), (2, "S0002 ", "生徒2"),
+]
+STUDENT_GRADES = [
+    (1, 1, "2024-01-05", "S0001", 1, None, OLD),
+    (2, 1, "2024-01-05", "S0002", 2, None, OLD),
+    (3, 2, "2024-01-05", "S0001", 3, None, OLD),
+    (4, 2, "2024-01-05", "S0002 ", 4, None, OLD),
+    # 空白違いの番号の成績は同じ講座・授業日でも別の生徒として残る
+    (5, 1, "2024-01-05", " S0002", 0, None, OLD),
+    # 名簿にない生徒の成績
+    (6, 1, "2024-01-06", "S0003", 2, None, OLD),
+]
+
+
+def test_student_ids_map_to_student_numbers(migrate):
+    """すべての名簿・成績の行が、元の生徒番号の students の行を参照する"""
+    db = migrate(STUDENT_COURSES, STUDENT_ROSTER, STUDENT_GRADES)
+    
+    grades = db.fetch_all(
+        "SELECT ge.id, s.student_number FROM grade_entries ge "
+        "JOIN students s ON s.student_id = ge.student_id ORDER BY ge.id"
+    )
+    assert [(row['id'], row['student_number']) for row in grades] == [
+        (row[0], row[3]) for row in STUDENT_GRADES
+    ]
+    
+    roster = db.fetch_all(
+        "SELECT cs.course_id, cs.student_number, s.student_number AS student_number_by_id "
+        "FROM course_students cs JOIN students s ON s.student_id = cs.student_id"
+    )
+    assert len(roster) == len(STUDENT_ROSTER)
+    assert all(row['student_number'] == row['student_number_by_id'] for row in roster)
+    
+    # 名簿にない生徒の成績も残り、名簿の生徒の成績は成績一覧に表示される
+    items = GradeRepository(db).get_grade_list({'start_date': "2024-01-05", 'end_date': "2024-01-05"})
+    assert sorted((item.course_id, item.student_number) for item in items) == [
+        (1, "S0001"), (1, "S0002"), (2, "S0001"), (2, "S0002 "),
+    ]
+
+
+def test_duplicate_and_whitespace_student_numbers(migrate):
+    """
+    重複した生徒番号は1つの生徒IDを共有し、前後の空白だけが異なる番号は
+    （これまでの名簿と成績の対応付けと同じく）別の生徒として生徒番号順に生徒IDを割り当てる
+    """
+    db = migrate(STUDENT_COURSES, STUDENT_ROSTER, STUDENT_GRADES)
+    
+    students = db.fetch_all("SELECT student_id, student_number FROM students ORDER BY student_id")
+    numbers = sorted({row[1] for row in STUDENT_ROSTER} | {row[3] for row in STUDENT_GRADES})
+    assert [row['student_number'] for row in students] == numbers
+    student_ids = {row['student_number']: row['student_id'] for row in students}
+    
+    roster_ids = db.fetch_all(
+        "SELECT DISTINCT student_id FROM course_students WHERE student_number = 'S0001'"
+    )
+    assert [row['student_id'] for row in roster_ids] == [student_ids["S0001"]]
+    grade_ids = db.fetch_all("SELECT DISTINCT student_id FROM grade_entries WHERE id IN (1, 3)")
+    assert [row['student_id'] for row in grade_ids] == [student_ids["S0001"]]
+    
+    assert len({student_ids["S0002"], student_ids["S0002 "], student_ids[" S0002"]}) == 3
+
+
+def test_student_migration_leaves_foreign_keys_consistent(migrate):
+    """マイグレーション後に外部キー制約違反がなく、外部キー制約が有効"""
+    db = migrate(STUDENT_COURSES, STUDENT_ROSTER, STUDENT_GRADES)
+    
+    assert db.fetch_all("PRAGMA foreign_key_check") == []
+    assert db.fetch_one("PRAGMA foreign_keys")[0] == 1
+    
+    with pytest.raises(sqlite3.IntegrityError):
+        db.execute_query(
+            "INSERT INTO grade_entries (id, course_id, entry_date, student_id) VALUES (100, 1, 1, 999)"
+        )
@@ -0,0 +1,215 @@
+"""
+リポジトリクエリの実行計画のテスト
+
+サンプルデータを入れたデータベースで各リポジトリのメソッドを実行し、発行されたSQL文ごとに
+EXPLAIN QUERY PLAN を確認する。以下が含まれる場合は失敗（ケースごとに許可したものを除く）:
+- USE TEMP B-TREE（ORDER BY がインデックスで満たされず一時B-treeでソート）
+- USE TEMP B-TREE FOR RIGHT PART OF ORDER BY（ORDER BY の先頭の列はインデックスで満たされ、
+  同じ値の行の中だけを一時B-treeでソート）
+- テーブルの SCAN（インデックスで絞り込めない全件走査。全文検索の MATCH は除く）
+
+失敗したケースは、そのSQL文の実行計画（不合格の行に ! を付ける）を表示する。
+"""
+
+import re
+
+import pytest
+
+from database.change_watcher import ChangeSet, ChangeWatcher
+
+# 一時B-treeでのソート（ORDER BY がインデックスで満たされていない）
+TEMP_SORT = "USE TEMP B-TREE"
+# ORDER BY の後ろの列のみの一時B-treeでのソート（先頭の列が同じ値の行の中だけで並べ替える）
+PARTIAL_SORT = "USE TEMP B-TREE FOR RIGHT PART OF ORDER BY"
+# 全件走査（SCAN の後のテーブル名または別名）
+SCAN_PATTERN = re.compile(r"^SCAN (\w+)")
+# FTS5 の MATCH（SCAN と表示されるが全文検索インデックスを使用）
+FTS_MATCH_PATTERN = re.compile(r"VIRTUAL TABLE INDEX \d+:M")
+# 実行計画を確認するSQL文（トランザクション制御やPRAGMAは除く）
+PLANNED_STATEMENT = re.compile(r"^\s*(SELECT|UPDATE|DELETE|WITH)\b", re.IGNORECASE)
+# FTS5 が内部で発行するSQL文（'main'.'テーブル名' の形で参照する）
+INTERNAL_STATEMENT = re.compile(r"'main'\.'\w+'")
+
+START_DATE = "2024-01-01"
+END_DATE = "2024-01-31"
+
+
+def capture_statements(db, action) -> list:
+    """
+    action の実行中に発行されたSQL文（パラメータ展開済み）を取得
+    
+    Returns:
+        実行計画を確認する対象のSQL文のリスト（重複なし）
+    """
+    statements = []
+    connections = {db.connection, db._get_read_connection()}
+    for connection in connections:
+        connection.set_trace_callback(statements.append)
+    try:
+        action()
+    finally:
+        for connection in connections:
+            connection.set_trace_callback(None)
+    return list(dict.fromkeys(
+        s for s in statements
+        if PLANNED_STATEMENT.match(s) and not INTERNAL_STATEMENT.search(s)
+    ))
+
+
+def find_problems(plan: list, allowed: tuple) -> list:
+    """実行計画から不合格の行を抽出"""
+    problems = []
+    for line in plan:
+        if PARTIAL_SORT in line:
+            if PARTIAL_SORT not in allowed and TEMP_SORT not in allowed:
+                problems.append(line)
+            continue
+        if TEMP_SORT in line:
+            if TEMP_SORT not in allowed:
+                problems.append(line)
+            continue
+        scan = SCAN_PATTERN.match(line)
+        if scan and scan.group(1) not in allowed and not FTS_MATCH_PATTERN.search(line):
+            problems.append(line)
+    return problems
+
+
+def assert_plans(db, action, allowed: tuple):
+    """action が発行したすべてのSQL文の実行計画に、許可していない走査・ソートがないことを確認"""
+    statements = capture_statements(db, action)
+    assert statements, "確認対象のSQL文がありません"
+    
+    failures = []
+    for statement in statements:
+        plan = db.explain_query_plan(statement)
+        problems = find_problems(plan, allowed)
+        if problems:
+            failures.append(
+                f"{' '.join(statement.split())}\n"
+                + "\n".join(f"  {'!' if line in problems else ' '} {line}" for line in plan)
+            )
+    assert not failures, "\n\n".join(failures)
+
+
+def rolled_back(db, action):
+    """action をトランザクション内で実行して取り消す（共有のサンプルデータを変更しない）"""
+    class Rollback(Exception):
+        pass
+    
+    def run():
+        try:
+            with db.transaction():
+                action()
+                raise Rollback
+        except Rollback:
+            pass
+    return run
+
+
+PERIOD = {'start_date': START_DATE, 'end_date': END_DATE}
+
+# 成績一覧のフィルタ・並べ替えの組み合わせ (説明, フィルタ, 許可するもの（テーブル名・TEMP_SORT・PARTIAL_SORT）)
+GRADE_LIST_CASES = [
+    # 成績は生徒ID順に並ぶため、同じ授業日・講座の中（名簿の人数以下の行）だけ生徒番号で並べ替える
+    ("期間のみ", PERIOD, (PARTIAL_SORT,)),
+    ("講座＋期間", {'course_ids': [3], **PERIOD}, (PARTIAL_SORT,)),
+    ("期間＋クラス", {**PERIOD, 'class_number': '2'}, (PARTIAL_SORT,)),
+    ("期間のみ（降順）", {**PERIOD, 'sort_order': 'DESC'}, (PARTIAL_SORT,)),
+    # 講座名順は講座を講座名のインデックス順に読み、講座ごとに成績を検索する
+    ("期間のみ・講座名順", {**PERIOD, 'sort_by': 'course_name'}, ('c', PARTIAL_SORT)),
+    ("講座＋期間・講座名順", {'course_ids': [3], **PERIOD, 'sort_by': 'course_name'}, (PARTIAL_SORT,)),
+    # 生徒番号順は成績のインデックス（生徒ID順）で満たせないため、絞り込んだ行を一時B-treeで並べ替える
+    ("期間のみ・生徒番号順", {**PERIOD, 'sort_by': 'student_number'}, ('c', TEMP_SORT)),
+    ("フィルタなし", None, ('ge', PARTIAL_SORT)),
+    # 全文検索は一致した行を成績IDで引くため、並べ替えは一致した行のみの一時B-treeで行う
+    ("期間＋生徒番号（部分一致）", {**PERIOD, 'student_number': '0001'}, (TEMP_SORT,)),
+    ("キーワード", {'keyword': '生徒0001'}, (TEMP_SORT,)),
+]
+
+
+# (説明, 呼び出し関数 (リポジトリ, 一時フォルダ) -> None, 許可するもの（テーブル名・TEMP_SORT）)
+REPOSITORY_CASES = [
+    # 講座の取得（ID・講座名指定を含む）は講座一覧の共有キャッシュから返すため、読み込みのみ確認する
+    ("講座: 講座一覧の読み込み",
+     lambda r, tmp: r['course'].db.course_catalog._load(), ('courses',)),
+    ("生徒: 講座の名簿", lambda r, tmp: r['student'].get_students_by_course(3), ()),
+    ("生徒: 生徒番号指定", lambda r, tmp: r['student'].get_student_by_number(3, "S0001"), ()),
+    ("生徒: ID指定", lambda r, tmp: r['student'].get_student_by_id(1), ()),
+    ("生徒: 検索", lambda r, tmp: r['student'].search_students("生徒0001"), (TEMP_SORT,)),
+    ("生徒: 講座の名簿エクスポート",
+     lambda r, tmp: r['student'].export_to_csv(str(tmp / "students.csv"), 3), ()),
+    ("生徒: 全名簿エクスポート",
+     lambda r, tmp: r['student'].export_to_csv(str(tmp / "students_all.csv")), ('c',)),
+    # 講座・授業日で絞り込んだ行（名簿の人数以下）だけを生徒番号で並べ替える
+    ("成績: 講座・授業日指定",
+     lambda r, tmp: r['grade'].get_grades_by_course_date(3, "2024-01-05"), (TEMP_SORT,)),
+    # 授業日順はインデックスで読み、同じ授業日の中（講座数以下の行）だけ講座名で並べ替える
+    ("成績: 入力状況（期間）",
+     lambda r, tmp: r['grade'].get_entry_summary({'start_date': START_DATE, 'end_date': END_DATE}),
+     (TEMP_SORT,)),
+    ("成績: 入力状況（講座・未入力のみ）",
+     lambda r, tmp: r['grade'].get_entry_summary({'course_ids': [3], 'missing_only': True}), ()),
+    # 統計は絞り込んだ行（ranked）を走査し、順位付けとグループ化を一時B-treeで行う
+    ("成績: 講座別統計（期間）",
+     lambda r, tmp: r['grade'].get_grade_statistics(
+         'course', {'start_date': START_DATE, 'end_date': END_DATE}),
+     (TEMP_SORT, 'ranked')),
+    ("成績: 授業日別統計（講座）",
+     lambda r, tmp: r['grade'].get_grade_statistics('date', {'course_ids': [3]}),
+     (TEMP_SORT, 'ranked')),
+    # 行列は名簿を生徒番号順に読み、授業日の列番号（DENSE_RANK）と行の並べ替えに一時B-treeを使う
+    ("成績: 生徒×授業日の行列",
+     lambda r, tmp: r['grade'].get_grade_matrix(3, 'grade1', START_DATE, END_DATE), (TEMP_SORT,)),
+    # 変更ログは通し番号の範囲を読んで行IDを一時B-treeでまとめ（changed）、行ごとに現在の内容を引く
+    # （スナップショットの開始とウォーターマークの取得はテーブル数程度の行しかない表を読む）
+    ("変更ログ: 差分エクスポート",
+     lambda r, tmp: r['grade'].db.changes.export_changes(str(tmp / "changes"), since=1),
+     ('changed', TEMP_SORT, 'sqlite_master', 'sqlite_sequence')),
+    # 変更の検知は通し番号の範囲を読み、表・講座・授業日ごとに一時B-treeでまとめる
+    ("変更ログ: 他の接続による変更の範囲",
+     lambda r, tmp: ChangeWatcher(r['grade'].db)._read_changes(
+         ChangeSet(since=1, watermark=r['grade'].db.changes.watermark())),
+     (TEMP_SORT, 'sqlite_sequence', 'grade_archives')),
+]
+
+# 削除はロールバックして実行する
+DELETE_CASES = [
+    ("成績: 講座＋期間で削除",
+     lambda r: r['grade'].delete_grades_by_filter(
+         {'course_ids': [3], 'start_date': START_DATE, 'end_date': END_DATE}), ()),
+    ("成績: 期間で削除",
+     lambda r: r['grade'].delete_grades_by_filter(
+         {'start_date': START_DATE, 'end_date': "2024-01-07"}), ()),
+]
+
+
+@pytest.mark.parametrize("action, allowed",
+                         [case[1:] for case in REPOSITORY_CASES],
+                         ids=[case[0] for case in REPOSITORY_CASES])
+def test_repository_query_plan(sample_db, sample_repos, tmp_path, action, allowed):
+    """リポジトリの読み取りが全件走査・一時B-treeのソートをしない（許可したものを除く）"""
+    assert_plans(sample_db, lambda: action(sample_repos, tmp_path), allowed)
+
+
+@pytest.mark.parametrize("filters, allowed",
+                         [case[1:] for case in GRADE_LIST_CASES],
+                         ids=[case[0] for case in GRADE_LIST_CASES])
+def test_grade_list_query_plan(sample_db, sample_repos, filters, allowed):
+    """よく使うフィルタの成績一覧が全件走査・全体の一時B-treeのソートをしない（許可したものを除く）"""
+    assert_plans(sample_db, lambda: sample_repos['grade'].get_grade_list(filters), allowed)
+
+
+@pytest.mark.parametrize("action, allowed",
+                         [case[1:] for case in DELETE_CASES],
+                         ids=[case[0] for case in DELETE_CASES])
+def test_delete_query_plan(sample_db, sample_repos, action, allowed):
+    """条件を指定した削除が全件走査しない"""
+    assert_plans(sample_db, rolled_back(sample_db, lambda: action(sample_repos)), allowed)
+
+
+def test_find_problems_reports_scan_and_sort():
+    """許可していない全件走査・一時B-treeのソートを検出する"""
+    plan = ["SCAN grade_entries", "USE TEMP B-TREE FOR ORDER BY",
+            "SEARCH courses USING INTEGER PRIMARY KEY (rowid=?)"]
+    assert find_problems(plan, ()) == plan[:2]
+    assert find_problems(plan, ('grade_entries', TEMP_SORT)) == []
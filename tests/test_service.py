@@ -0,0 +1,61 @@
+"""成績サービス（HTTP）のテスト"""
+
+import http.client
+import json
+import socket
+import threading
+import time
+
+import pytest
+
+from service.protocol import HEALTH_PATH
+from service.server import GradeService, ServiceHTTPServer
+
+
+@pytest.fixture
+def server(tmp_path):
+    """ワーカー1つで起動した成績サービス"""
+    service = GradeService(str(tmp_path / "service.db"))
+    server = ServiceHTTPServer(('127.0.0.1', 0), service, workers=1)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    service.close()
+
+
+def test_response_closes_connection(server):
+    """応答ごとに Connection: close を返し、次のリクエストを待たずに接続を閉じる"""
+    client = socket.create_connection(('127.0.0.1', server.server_port), timeout=2)
+    try:
+        client.sendall(f"GET {HEALTH_PATH} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode('ascii'))
+        received = b""
+        while chunk := client.recv(4096):
+            received += chunk
+    finally:
+        client.close()
+    
+    # サーバーが閉じたため、タイムアウトせずに EOF まで読める
+    head, _, body = received.partition(b"\r\n\r\n")
+    assert head.startswith(b"HTTP/1.1 200")
+    assert b"\r\nConnection: close" in head
+    assert json.loads(body)['status'] == 'ok'
+
+
+def test_idle_client_does_not_hold_worker(server):
+    """応答を受け取った後も接続を開いたままのクライアントがいても、次のクライアントが待たされない"""
+    idle = socket.create_connection(('127.0.0.1', server.server_port), timeout=2)
+    try:
+        idle.sendall(f"GET {HEALTH_PATH} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode('ascii'))
+        assert idle.recv(4096).startswith(b"HTTP/1.1 200")
+        
+        started = time.perf_counter()
+        connection = http.client.HTTPConnection('127.0.0.1', server.server_port, timeout=2)
+        try:
+            connection.request('GET', HEALTH_PATH)
+            assert connection.getresponse().status == 200
+        finally:
+            connection.close()
+        assert time.perf_counter() - started < 1.0
+    finally:
+        idle.close()
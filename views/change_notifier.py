@@ -0,0 +1,46 @@
+"""他の利用者・スクリプトによるデータベースの変更を画面に知らせる"""
+
+from PySide6.QtCore import QObject, QTimer
+import logging
+
+from config.settings import CHANGE_POLL_INTERVAL_MS
+from database.change_watcher import ChangeWatcher
+from database.db_manager import DatabaseManager
+
+logger = logging.getLogger(__name__)
+
+
+class DatabaseChangeNotifier(QObject):
+    """
+    一定間隔で他の接続・プロセスのコミットを確認し、変更があった場合のみ
+    変更イベントをデータベースのイベントバス（db.events）に流す
+    
+    各画面は自身の書き込みと同じく、受け取った ChangeBatch から表示中の講座・授業日に
+    関わる変更かどうかを判断して必要な部分だけを更新する。
+    """
+    
+    def __init__(self, db: DatabaseManager, interval_ms: int = CHANGE_POLL_INTERVAL_MS,
+                 parent=None):
+        super().__init__(parent)
+        
+        self.db = db
+        self.watcher = ChangeWatcher(db)
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.poll)
+        if interval_ms > 0:
+            self.timer.start(interval_ms)
+    
+    def poll(self):
+        """変更を確認して、あれば変更イベントを流す"""
+        try:
+            changes = self.watcher.poll()
+        except Exception:
+            # 一時的なロックなど。次の確認で同じ範囲を読み直す
+            return
+        if changes is not None:
+            # 他の接続のコミット済みの変更のため、ためずにそのまま知らせる
+            self.db.events.publish(changes.events())
+    
+    def stop(self):
+        """確認を止める（データベースを閉じる前に呼ぶ）"""
+        self.timer.stop()
@@ -8,6 +8,7 @@ from PySide6.QtCore import Qt
 import logging
 
 from database.repositories.course_repository import CourseRepository
+from database.events import ChangeBatch
 from models.course import Course
 
 logger = logging.getLogger(__name__)
@@ -183,6 +184,18 @@ class CourseManagementView(QWidget):
                 f"講座の読み込みに失敗しました:\n{str(e)}"
             )
     
+    def on_data_changed(self, changes: ChangeBatch):
+        """
+        講座・名簿・成績の変更を反映（database.events の購読者。講座が変更された場合のみ）
+        
+        この画面での追加・編集・削除・インポートもコミット後にここで読み込み直す。
+        
+        Args:
+            changes: 変更イベント
+        """
+        if changes.courses_changed():
+            self.load_courses()
+    
     def update_table(self):
         """テーブルを更新"""
         self.table.setRowCount(len(self.courses))
@@ -202,7 +215,6 @@ class CourseManagementView(QWidget):
             try:
                 course = dialog.get_course_data()
                 self.course_repo.create_course(course)
-                self.load_courses()
                 
                 QMessageBox.information(
                     self,
@@ -234,7 +246,6 @@ class CourseManagementView(QWidget):
             try:
                 updated_course = dialog.get_course_data()
                 self.course_repo.update_course(updated_course)
-                self.load_courses()
                 
                 QMessageBox.information(
                     self,
@@ -273,7 +284,6 @@ class CourseManagementView(QWidget):
         if reply == QMessageBox.StandardButton.Yes:
             try:
                 self.course_repo.delete_course(course.course_id)
-                self.load_courses()
                 
                 QMessageBox.information(
                     self,
@@ -336,8 +346,6 @@ class CourseManagementView(QWidget):
                 if len(result['errors']) > 5:
                     message += f"\n... 他 {len(result['errors']) - 5}件"
             
-            self.load_courses()
-            
             QMessageBox.information(self, "インポート完了", message)
             logger.info(f"CSVインポート完了: {file_path}")
         
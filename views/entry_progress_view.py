@@ -0,0 +1,180 @@
+from PySide6.QtWidgets import (
+    QWidget, QVBoxLayout, QHBoxLayout, QPushButton,
+    QTableWidget, QTableWidgetItem, QHeaderView,
+    QMessageBox, QDateEdit, QLabel, QGroupBox, QCheckBox
+)
+from PySide6.QtCore import Qt, QDate, Signal
+from PySide6.QtGui import QColor
+import logging
+
+from database.repositories.grade_repository import GradeRepository
+from database.events import ChangeBatch
+
+logger = logging.getLogger(__name__)
+
+
+class EntryProgressView(QWidget):
+    """入力状況ダッシュボード（講座・授業日ごとの入力済み人数）"""
+    
+    # 授業が選択された（講座ID, 授業日 YYYY-MM-DD）
+    lesson_selected = Signal(int, str)
+    
+    def __init__(self, grade_repo: GradeRepository, parent=None):
+        super().__init__(parent)
+        
+        self.grade_repo = grade_repo
+        self.summaries = []
+        # 表示中の入力状況の条件（未表示の場合は None）と、非表示の間に変更されたか
+        self.loaded_filters = None
+        self.stale = False
+        
+        self.init_ui()
+    
+    def init_ui(self):
+        """UI初期化"""
+        layout = QVBoxLayout(self)
+        
+        # フィルタエリア
+        filter_group = QGroupBox("表示条件")
+        filter_layout = QHBoxLayout(filter_group)
+        
+        filter_layout.addWidget(QLabel("期間:"))
+        
+        self.start_date = QDateEdit()
+        self.start_date.setCalendarPopup(True)
+        self.start_date.setDate(QDate.currentDate().addMonths(-3))
+        filter_layout.addWidget(self.start_date)
+        
+        filter_layout.addWidget(QLabel("〜"))
+        
+        self.end_date = QDateEdit()
+        self.end_date.setCalendarPopup(True)
+        self.end_date.setDate(QDate.currentDate())
+        filter_layout.addWidget(self.end_date)
+        
+        self.missing_only_check = QCheckBox("未入力がある授業のみ")
+        self.missing_only_check.setChecked(True)
+        self.missing_only_check.toggled.connect(self.load_summary)
+        filter_layout.addWidget(self.missing_only_check)
+        
+        filter_layout.addStretch()
+        
+        refresh_btn = QPushButton("更新")
+        refresh_btn.clicked.connect(self.load_summary)
+        filter_layout.addWidget(refresh_btn)
+        
+        layout.addWidget(filter_group)
+        
+        # テーブル
+        self.table = QTableWidget()
+        self.table.setColumnCount(6)
+        self.table.setHorizontalHeaderLabels([
+            "授業日", "講座名", "登録", "入力済", "未入力", "最終更新"
+        ])
+        
+        header = self.table.horizontalHeader()
+        for i in range(6):
+            header.setSectionResizeMode(i, QHeaderView.ResizeMode.Interactive)
+        header.setSectionResizeMode(1, QHeaderView.ResizeMode.Stretch)
+        
+        self.table.setColumnWidth(0, 100)  # 授業日
+        self.table.setColumnWidth(2, 60)   # 登録
+        self.table.setColumnWidth(3, 60)   # 入力済
+        self.table.setColumnWidth(4, 60)   # 未入力
+        self.table.setColumnWidth(5, 150)  # 最終更新
+        
+        self.table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
+        self.table.setSelectionMode(QTableWidget.SelectionMode.SingleSelection)
+        self.table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self.table.cellDoubleClicked.connect(self.on_row_double_clicked)
+        
+        layout.addWidget(self.table)
+        
+        # 件数表示
+        self.count_label = QLabel("0件")
+        layout.addWidget(self.count_label)
+    
+    def load_summary(self):
+        """入力状況を読み込む"""
+        try:
+            filters = {
+                'start_date': self.start_date.date().toString("yyyy-MM-dd"),
+                'end_date': self.end_date.date().toString("yyyy-MM-dd"),
+                'missing_only': self.missing_only_check.isChecked()
+            }
+            self.summaries = self.grade_repo.get_entry_summary(filters)
+            self.loaded_filters = filters
+            self.stale = False
+            self.update_table()
+        except Exception as e:
+            logger.error(f"入力状況読み込みエラー: {e}")
+            QMessageBox.critical(self, "エラー", f"入力状況の読み込みに失敗しました:\n{str(e)}")
+    
+    def on_data_changed(self, changes: ChangeBatch):
+        """
+        講座・名簿・成績の変更を反映（database.events の購読者）
+        
+        表示中の期間の成績・名簿（登録人数）・講座名が変更された場合のみ読み込み直す
+        （非表示の間は次に表示したときに読み込む）。
+        
+        Args:
+            changes: 変更イベント
+        """
+        filters = self.loaded_filters
+        if filters is None:
+            return
+        if not (changes.courses_changed() or changes.roster_changed() or changes.grades_changed(
+                None, filters['start_date'], filters['end_date'])):
+            return
+        
+        if self.isVisible():
+            self.reload_summary()
+        else:
+            self.stale = True
+    
+    def reload_summary(self):
+        """表示中の入力状況を同じ条件で読み込み直す"""
+        self.stale = False
+        try:
+            self.summaries = self.grade_repo.get_entry_summary(self.loaded_filters)
+            self.update_table()
+        except Exception as e:
+            logger.error(f"入力状況読み込みエラー: {e}")
+    
+    def showEvent(self, event):
+        """表示時の処理（初めて表示したときに読み込み、非表示の間に変更されていれば読み込み直す）"""
+        super().showEvent(event)
+        if self.loaded_filters is None:
+            self.load_summary()
+        elif self.stale:
+            self.reload_summary()
+    
+    def update_table(self):
+        """テーブルを更新"""
+        self.table.setRowCount(len(self.summaries))
+        missing_color = QColor("#FFF3CD")
+        
+        for row, summary in enumerate(self.summaries):
+            last_updated = (summary.last_updated_at.strftime("%Y-%m-%d %H:%M")
+                            if summary.last_updated else "")
+            values = [
+                str(summary.entry_date), summary.course_name,
+                str(summary.roster_size), str(summary.entered_count),
+                str(summary.missing_count), last_updated
+            ]
+            for col, value in enumerate(values):
+                item = QTableWidgetItem(value)
+                if 2 <= col <= 4:
+                    item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+                if summary.missing_count:
+                    item.setBackground(missing_color)
+                self.table.setItem(row, col, item)
+        
+        missing_lessons = sum(1 for summary in self.summaries if summary.missing_count)
+        self.count_label.setText(f"{len(self.summaries)}件（未入力あり: {missing_lessons}件）")
+    
+    def on_row_double_clicked(self, row: int, column: int):
+        """行のダブルクリックでその授業の成績入力を開く"""
+        if 0 <= row < len(self.summaries):
+            summary = self.summaries[row]
+            self.lesson_selected.emit(summary.course_id, str(summary.entry_date))
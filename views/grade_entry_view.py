@@ -5,14 +5,17 @@ from PySide6.QtWidgets import (
 )
 from PySide6.QtCore import Qt, QDate
 import logging
+from contextlib import contextmanager
 from pathlib import Path
 
 from database.repositories.course_repository import CourseRepository
 from database.repositories.student_repository import StudentRepository
-from database.repositories.grade_repository import GradeRepository
+from database.repositories.grade_repository import GradeRepository, GradeConflictError
+from database.events import ChangeBatch
 from models.grade import Grade
 from views.widgets.image_preview_widget import ImagePreviewWidget
 from views.widgets.student_grade_card import StudentGradeCard
+from views.widgets.course_combo import fill_course_combo
 from config.settings import SUPPORTED_IMAGE_FORMATS
 from views.widgets.split_settings_dialog import SplitSettingsDialog
 from views.pdf_split_view import PDFSplitView
@@ -38,6 +41,8 @@ class GradeEntryView(QWidget):
         self.current_course_id = None
         self.current_entry_date = None
         self.student_cards = []
+        # この画面で成績を保存中か（保存した成績の変更イベントでは読み込み直さない）
+        self.saving_grades = False
         
         self.init_ui()
         self.refresh_courses()
@@ -192,10 +197,10 @@ class GradeEntryView(QWidget):
     def refresh_courses(self):
         """講座リストを更新"""
         try:
-            self.course_combo.clear()
             courses = self.course_repo.get_all_courses()
-            for course in courses:
-                self.course_combo.addItem(course.course_name, course.course_id)
+            # 選択中の講座が残っていれば、読み込み済みの生徒カードはそのまま
+            if fill_course_combo(self.course_combo, courses):
+                self.on_course_changed()
             logger.debug(f"講座リストを更新しました ({len(courses)}件)")
         except Exception as e:
             logger.error(f"講座リスト更新エラー: {e}")
@@ -259,14 +264,133 @@ class GradeEntryView(QWidget):
     def update_summary(self):
         """サマリーを更新"""
         if not self.student_cards:
-            self.summary_label.setText("講座と日付を選択してください")
+            self.update_saved_summary()
             return
         
-        entered = sum(1 for card in self.student_cards 
-                     if any(v for v in card.get_grade_data().values() if v is not None))
+        # 入力状況サマリー（grade_entry_summary）と同じく成績1〜6のいずれかがあれば入力済み
+        grade_keys = ('grade1', 'grade2', 'grade3', 'grade4', 'grade5', 'grade6')
+        entered = 0
+        for card in self.student_cards:
+            grade_data = card.get_grade_data()
+            if any(grade_data[key] is not None for key in grade_keys):
+                entered += 1
         total = len(self.student_cards)
         self.summary_label.setText(f"登録: {total}名 | 入力済: {entered}名 | 未入力: {total - entered}名")
     
+    def update_saved_summary(self):
+        """読み込み前は保存済みの入力状況をサマリーテーブルから表示"""
+        if not self.current_course_id or not self.current_entry_date:
+            self.summary_label.setText("講座と日付を選択してください")
+            return
+        
+        try:
+            summaries = self.grade_repo.get_entry_summary({
+                'course_ids': [self.current_course_id],
+                'start_date': self.current_entry_date,
+                'end_date': self.current_entry_date
+            })
+        except Exception as e:
+            logger.error(f"入力状況取得エラー: {e}")
+            summaries = []
+        
+        if summaries:
+            summary = summaries[0]
+            self.summary_label.setText(
+                f"保存済み 登録: {summary.roster_size}名 | 入力済: {summary.entered_count}名 | "
+                f"未入力: {summary.missing_count}名（読み込みで編集）"
+            )
+        else:
+            self.summary_label.setText("この授業の成績は未登録です（読み込みで入力を開始）")
+    
+    def on_data_changed(self, changes: ChangeBatch):
+        """
+        講座・名簿・成績の変更を反映（database.events の購読者。選択中の講座・授業日に関わる場合のみ）
+        
+        Args:
+            changes: 変更イベント
+        """
+        if self.saving_grades:
+            # この画面での保存: 生徒カードは保存した内容のまま
+            return
+        if changes.courses_changed():
+            self.refresh_courses()
+        if not self.current_course_id or not self.current_entry_date:
+            return
+        
+        roster_changed = changes.roster_changed(self.current_course_id)
+        grades_changed = changes.grades_changed(
+            [self.current_course_id], self.current_entry_date, self.current_entry_date
+        )
+        if not (roster_changed or grades_changed):
+            return
+        if not self.student_cards:
+            self.update_saved_summary()
+        elif roster_changed:
+            # 入力途中の生徒カードがなければ名簿を読み込み直す
+            if not any(card.has_unsaved_changes() for card in self.student_cards):
+                self.load_students()
+        else:
+            self.refresh_saved_grades()
+    
+    def refresh_saved_grades(self):
+        """
+        他の利用者が保存した成績を、未保存の入力がない生徒カードに反映
+        
+        入力途中のカードはそのままにし、保存時に競合として知らせる。
+        """
+        try:
+            grades = {
+                g.student_number: g for g in self.grade_repo.get_grades_by_course_date(
+                    self.current_course_id, self.current_entry_date
+                )
+            }
+        except Exception as e:
+            logger.error(f"成績再読み込みエラー: {e}")
+            return
+        
+        reloaded = 0
+        for card in self.student_cards:
+            current = grades.get(card.student.student_number)
+            existing = card.existing_grade
+            if ((current.row_version if current else None)
+                    == (existing.row_version if existing else None)):
+                continue
+            if not card.has_unsaved_changes():
+                card.reload_grade(current)
+                reloaded += 1
+        self.update_summary()
+        if reloaded:
+            logger.info(f"他の利用者が保存した成績を反映しました ({reloaded}名)")
+    
+    @contextmanager
+    def saving(self):
+        """この画面での成績の保存（ブロック内のコミットによる変更イベントでは読み込み直さない）"""
+        self.saving_grades = True
+        try:
+            yield
+        finally:
+            self.saving_grades = False
+    
+    def open_lesson(self, course_id: int, entry_date: str):
+        """
+        講座と授業日を選択して生徒を読み込む
+        
+        Args:
+            course_id: 講座ID
+            entry_date: 授業日 (YYYY-MM-DD)
+        """
+        index = self.course_combo.findData(course_id)
+        if index < 0:
+            self.refresh_courses()
+            index = self.course_combo.findData(course_id)
+        if index < 0:
+            QMessageBox.warning(self, "警告", "講座が見つかりません")
+            return
+        
+        self.course_combo.setCurrentIndex(index)
+        self.date_edit.setDate(QDate.fromString(entry_date, "yyyy-MM-dd"))
+        self.load_students()
+    
     def on_grade_saved(self, student_number: str):
         """個別保存時の処理"""
         try:
@@ -275,22 +399,15 @@ class GradeEntryView(QWidget):
             if not card:
                 return
             
-            grade_data = card.get_grade_data()
-            grade = Grade(
-                id=None,
-                course_id=self.current_course_id,
-                entry_date=self.current_entry_date,
-                student_number=student_number,
-                grade1=grade_data['grade1'],
-                grade2=grade_data['grade2'],
-                grade3=grade_data['grade3'],
-                grade4=grade_data['grade4'],
-                grade5=grade_data['grade5'],
-                grade6=grade_data['grade6'],
-                note1=grade_data['note1'],
-                note2=grade_data['note2']
-            )
-            self.grade_repo.create_or_update_grade(grade)
+            grade = self.build_grade(card)
+            try:
+                with self.saving():
+                    self.grade_repo.create_or_update_grade(grade, check_conflict=True)
+            except GradeConflictError as e:
+                self.resolve_conflicts([(card, e)])
+                self.update_summary()
+                return
+            card.existing_grade = grade
             self.update_summary()
             QMessageBox.information(self, "保存完了", "成績を保存しました")
         except Exception as e:
@@ -304,39 +421,108 @@ class GradeEntryView(QWidget):
             return
         
         try:
-            saved_count = 0
-            for card in self.student_cards:
-                grade_data = card.get_grade_data()
-                
-                # 何か入力されている場合のみ保存
-                if not any([grade_data['grade1'], grade_data['grade2'], grade_data['grade3'],
-                           grade_data['grade4'], grade_data['grade5'], grade_data['grade6']]):
-                    continue
-                
-                grade = Grade(
-                    id=None,
-                    course_id=self.current_course_id,
-                    entry_date=self.current_entry_date,
-                    student_number=grade_data['student_number'],
-                    grade1=grade_data['grade1'],
-                    grade2=grade_data['grade2'],
-                    grade3=grade_data['grade3'],
-                    grade4=grade_data['grade4'],
-                    grade5=grade_data['grade5'],
-                    grade6=grade_data['grade6'],
-                    note1=grade_data['note1'],
-                    note2=grade_data['note2']
-                )
-                self.grade_repo.create_or_update_grade(grade)
-                saved_count += 1
+            saved = []
+            conflicts = []
+            # 全員分を1トランザクションでまとめて保存（他の利用者と競合した生徒は保存しない）
+            with self.saving(), self.grade_repo.db.transaction():
+                for card in self.student_cards:
+                    grade_data = card.get_grade_data()
+                    
+                    # 何か入力されている場合のみ保存
+                    if not any([grade_data['grade1'], grade_data['grade2'], grade_data['grade3'],
+                               grade_data['grade4'], grade_data['grade5'], grade_data['grade6']]):
+                        continue
+                    
+                    grade = self.build_grade(card)
+                    try:
+                        self.grade_repo.create_or_update_grade(grade, check_conflict=True)
+                    except GradeConflictError as e:
+                        conflicts.append((card, e))
+                        continue
+                    saved.append((card, grade))
+            
+            # コミット後に保存した行バージョンを反映（次の保存の比較に使う）
+            for card, grade in saved:
+                card.existing_grade = grade
+            if conflicts:
+                self.resolve_conflicts(conflicts)
             
             self.update_summary()
-            QMessageBox.information(self, "保存完了", f"{saved_count}名分の成績を保存しました")
-            logger.info(f"一括保存完了: {saved_count}名")
+            QMessageBox.information(self, "保存完了", f"{len(saved)}名分の成績を保存しました")
+            logger.info(f"一括保存完了: {len(saved)}名 (競合: {len(conflicts)}名)")
         except Exception as e:
             logger.error(f"一括保存エラー: {e}")
             QMessageBox.critical(self, "エラー", f"一括保存に失敗しました:\n{str(e)}")
     
+    def build_grade(self, card: StudentGradeCard) -> Grade:
+        """
+        カードの入力内容から保存する成績を作成
+        
+        ID と行バージョンは読み込んだ（前回保存した）成績のものを使い、
+        その後に他の利用者が保存していれば保存時に競合として検出する。
+        """
+        grade_data = card.get_grade_data()
+        existing = card.existing_grade
+        return Grade(
+            id=existing.id if existing else None,
+            course_id=self.current_course_id,
+            entry_date=self.current_entry_date,
+            student_number=grade_data['student_number'],
+            grade1=grade_data['grade1'],
+            grade2=grade_data['grade2'],
+            grade3=grade_data['grade3'],
+            grade4=grade_data['grade4'],
+            grade5=grade_data['grade5'],
+            grade6=grade_data['grade6'],
+            note1=grade_data['note1'],
+            note2=grade_data['note2'],
+            row_version=existing.row_version if existing else None
+        )
+    
+    def resolve_conflicts(self, conflicts: list):
+        """
+        他の利用者と競合した成績の扱いを選択
+        
+        最新の内容を読み込む（自分の入力を破棄）か、自分の入力で上書きするかを選ぶ。
+        
+        Args:
+            conflicts: (生徒カード, GradeConflictError) のリスト
+        """
+        names = "\n".join(
+            f"・{card.student.student_name}（{card.student.student_number}）"
+            + ("：削除されています" if e.current is None
+               else f"：{e.current.updated_at} に更新されています")
+            for card, e in conflicts
+        )
+        reply = QMessageBox.question(
+            self, "保存の競合",
+            f"次の生徒の成績は、読み込んだ後に他の利用者が保存しています。\n{names}\n\n"
+            "「はい」で自分の入力で上書きします。\n"
+            "「いいえ」で最新の内容を読み込みます（自分の入力は破棄されます）。",
+            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
+            QMessageBox.StandardButton.No
+        )
+        
+        if reply == QMessageBox.StandardButton.No:
+            for card, e in conflicts:
+                card.reload_grade(e.current)
+            return
+        
+        # 最新の行バージョンを基準にして保存し直す（その間にさらに変更されていれば再度競合する）
+        retry = []
+        for card, e in conflicts:
+            grade = e.grade
+            grade.id = e.current.id if e.current else None
+            grade.row_version = e.current.row_version if e.current else None
+            try:
+                with self.saving():
+                    self.grade_repo.create_or_update_grade(grade, check_conflict=True)
+                card.existing_grade = grade
+            except GradeConflictError as retry_error:
+                retry.append((card, retry_error))
+        if retry:
+            self.resolve_conflicts(retry)
+    
     def select_image_file(self):
         """画像ファイルを選択"""
         # PDFをデフォルトに変更
@@ -11,6 +11,8 @@ from pathlib import Path
 
 from database.repositories.course_repository import CourseRepository
 from database.repositories.grade_repository import GradeRepository
+from database.events import ChangeBatch
+from views.widgets.course_combo import fill_course_combo
 
 logger = logging.getLogger(__name__)
 
@@ -126,6 +128,9 @@ class GradeListView(QWidget):
         self.course_repo = course_repo
         self.grade_repo = grade_repo
         self.grade_list = []
+        # 表示中の一覧の条件（未表示の場合は None）と、非表示の間に変更されたか
+        self.loaded_filters = None
+        self.stale = False
         
         self.init_ui()
         self.refresh_courses()
@@ -165,7 +170,7 @@ class GradeListView(QWidget):
         date_layout.addStretch()
         filter_layout.addLayout(date_layout)
         
-        # 生徒番号・クラス
+        # 生徒番号・クラス・キーワード
         search_layout = QHBoxLayout()
         
         search_layout.addWidget(QLabel("生徒番号:"))
@@ -178,6 +183,12 @@ class GradeListView(QWidget):
         self.class_number_input.setPlaceholderText("例: 1-A")
         search_layout.addWidget(self.class_number_input)
         
+        search_layout.addWidget(QLabel("キーワード:"))
+        self.keyword_input = QLineEdit()
+        self.keyword_input.setPlaceholderText("生徒番号・氏名・備考（部分一致）")
+        self.keyword_input.returnPressed.connect(self.apply_filters)
+        search_layout.addWidget(self.keyword_input, 1)
+        
         search_layout.addStretch()
         filter_layout.addLayout(search_layout)
         
@@ -260,12 +271,8 @@ class GradeListView(QWidget):
     def refresh_courses(self):
         """講座リストを更新"""
         try:
-            self.course_combo.clear()
-            self.course_combo.addItem("全て", None)
-            
             courses = self.course_repo.get_all_courses()
-            for course in courses:
-                self.course_combo.addItem(course.course_name, course.course_id)
+            fill_course_combo(self.course_combo, courses, all_label="全て")
             
             logger.debug(f"講座リストを更新しました ({len(courses)}件)")
         except Exception as e:
@@ -291,6 +298,10 @@ class GradeListView(QWidget):
         if class_number:
             filters['class_number'] = class_number
         
+        keyword = self.keyword_input.text().strip()
+        if keyword:
+            filters['keyword'] = keyword
+        
         return filters
     
     def apply_filters(self):
@@ -298,6 +309,8 @@ class GradeListView(QWidget):
         try:
             filters = self.get_filter_params()
             self.grade_list = self.grade_repo.get_grade_list(filters)
+            self.loaded_filters = filters
+            self.stale = False
             self.update_table()
             logger.info(f"成績一覧を取得しました ({len(self.grade_list)}件)")
         except Exception as e:
@@ -311,9 +324,56 @@ class GradeListView(QWidget):
         self.end_date.setDate(QDate.currentDate())
         self.student_number_input.clear()
         self.class_number_input.clear()
+        self.keyword_input.clear()
         self.grade_list = []
+        self.loaded_filters = None
         self.update_table()
     
+    def on_data_changed(self, changes: ChangeBatch):
+        """
+        講座・名簿・成績の変更を反映（database.events の購読者）
+        
+        表示中の一覧の講座・期間の成績、名簿（氏名・クラス）、講座名が変更された場合のみ
+        同じ条件で読み込み直す（非表示の間は次に表示したときに読み込む）。
+        この画面での削除・インポートもコミット後にここで読み込み直す。
+        
+        Args:
+            changes: 変更イベント
+        """
+        if changes.courses_changed():
+            self.refresh_courses()
+        
+        filters = self.loaded_filters
+        if filters is None:
+            return
+        course_ids = filters.get('course_ids')
+        roster_changed = (any(changes.roster_changed(course_id) for course_id in course_ids)
+                          if course_ids else changes.roster_changed())
+        if not (changes.courses_changed() or roster_changed or changes.grades_changed(
+                course_ids, filters.get('start_date'), filters.get('end_date'))):
+            return
+        
+        if self.isVisible():
+            self.reload_list()
+        else:
+            self.stale = True
+    
+    def reload_list(self):
+        """表示中の成績一覧を同じ条件で読み込み直す"""
+        self.stale = False
+        try:
+            self.grade_list = self.grade_repo.get_grade_list(self.loaded_filters)
+            self.update_table()
+            logger.info(f"成績一覧を読み込み直しました ({len(self.grade_list)}件)")
+        except Exception as e:
+            logger.error(f"成績一覧取得エラー: {e}")
+    
+    def showEvent(self, event):
+        """表示時の処理（非表示の間に変更されていれば読み込み直す）"""
+        super().showEvent(event)
+        if self.stale and self.loaded_filters is not None:
+            self.reload_list()
+    
     def update_table(self):
         """テーブルを更新"""
         self.table.setSortingEnabled(False)
@@ -357,7 +417,6 @@ class GradeListView(QWidget):
         if reply == QMessageBox.StandardButton.Yes:
             try:
                 self.grade_repo.delete_grade(grade.id)
-                self.apply_filters()
                 QMessageBox.information(self, "成功", "成績を削除しました")
             except Exception as e:
                 logger.error(f"成績削除エラー: {e}")
@@ -420,7 +479,7 @@ class GradeListView(QWidget):
                 if len(result['errors']) > 5:
                     message += f"\n... 他 {len(result['errors']) - 5}件"
             
-            self.apply_filters()
+            # 表示中の一覧はコミット時の変更イベント（on_data_changed）で読み込み直される
             QMessageBox.information(self, "インポート完了", message)
             
         except Exception as e:
@@ -0,0 +1,239 @@
+from PySide6.QtWidgets import (
+    QWidget, QVBoxLayout, QHBoxLayout, QPushButton,
+    QTableView, QHeaderView, QMessageBox, QComboBox,
+    QDateEdit, QLabel, QGroupBox
+)
+from PySide6.QtCore import Qt, QDate, QAbstractTableModel, QModelIndex
+from PySide6.QtGui import QColor
+import logging
+import math
+from typing import Optional
+
+from database.repositories.course_repository import CourseRepository
+from database.repositories.grade_repository import GradeRepository
+from database.events import ChangeBatch
+from models.grade import GradeMatrix, GRADE_COLUMNS, LEVEL_GRADE_COLUMNS
+from views.widgets.course_combo import fill_course_combo
+
+logger = logging.getLogger(__name__)
+
+
+class GradeMatrixModel(QAbstractTableModel):
+    """
+    GradeMatrix を表示するテーブルモデル（読み取り専用）
+    
+    セルごとのウィジェットや項目を作らず、表示されるセルの値だけを配列から読む。
+    """
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.matrix: Optional[GradeMatrix] = None
+        self.missing_color = QColor("#F0F0F0")
+    
+    def set_matrix(self, matrix: Optional[GradeMatrix]):
+        """表示する行列を設定"""
+        self.beginResetModel()
+        self.matrix = matrix
+        self.endResetModel()
+    
+    def rowCount(self, parent=QModelIndex()):
+        """行数（生徒数）"""
+        if parent.isValid() or self.matrix is None:
+            return 0
+        return self.matrix.row_count
+    
+    def columnCount(self, parent=QModelIndex()):
+        """列数（授業日数）"""
+        if parent.isValid() or self.matrix is None:
+            return 0
+        return self.matrix.column_count
+    
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        """セルの表示内容（成績がないセルは空欄・灰色）"""
+        if not index.isValid() or self.matrix is None:
+            return None
+        
+        value = self.matrix.values[index.row() * self.matrix.column_count + index.column()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            if math.isnan(value):
+                return ""
+            if self.matrix.field in LEVEL_GRADE_COLUMNS:
+                return str(int(value))
+            return f"{value:g}"
+        if role == Qt.ItemDataRole.TextAlignmentRole:
+            return Qt.AlignmentFlag.AlignCenter
+        if role == Qt.ItemDataRole.BackgroundRole and math.isnan(value):
+            return self.missing_color
+        return None
+    
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        """見出し（列: 授業日、行: 生徒番号と氏名）"""
+        if self.matrix is None:
+            return None
+        
+        if orientation == Qt.Orientation.Horizontal:
+            if role == Qt.ItemDataRole.DisplayRole:
+                # YYYY-MM-DD → MM/DD
+                return self.matrix.entry_dates[section][5:].replace("-", "/")
+            if role == Qt.ItemDataRole.ToolTipRole:
+                return self.matrix.entry_dates[section]
+        elif role == Qt.ItemDataRole.DisplayRole:
+            return f"{self.matrix.student_numbers[section]} {self.matrix.student_names[section]}"
+        elif role == Qt.ItemDataRole.ToolTipRole:
+            class_number = self.matrix.class_numbers[section]
+            return f"クラス: {class_number}" if class_number else None
+        return None
+
+
+class GradeMatrixView(QWidget):
+    """成績マトリクスビュー（講座の生徒×授業日、読み取り専用）"""
+    
+    def __init__(self, course_repo: CourseRepository,
+                 grade_repo: GradeRepository, parent=None):
+        super().__init__(parent)
+        
+        self.course_repo = course_repo
+        self.grade_repo = grade_repo
+        # 表示中の行列の条件（講座ID, 項目, 開始日, 終了日。未表示の場合は None）と、
+        # 非表示の間に変更されたか
+        self.loaded_params = None
+        self.stale = False
+        
+        self.init_ui()
+        self.refresh_courses()
+    
+    def init_ui(self):
+        """UI初期化"""
+        layout = QVBoxLayout(self)
+        
+        # 表示条件
+        filter_group = QGroupBox("表示条件")
+        filter_layout = QHBoxLayout(filter_group)
+        
+        filter_layout.addWidget(QLabel("講座:"))
+        self.course_combo = QComboBox()
+        filter_layout.addWidget(self.course_combo, 1)
+        
+        filter_layout.addWidget(QLabel("項目:"))
+        self.field_combo = QComboBox()
+        for i, field in enumerate(GRADE_COLUMNS, start=1):
+            self.field_combo.addItem(f"成績{i}", field)
+        filter_layout.addWidget(self.field_combo)
+        
+        filter_layout.addWidget(QLabel("期間:"))
+        
+        self.start_date = QDateEdit()
+        self.start_date.setCalendarPopup(True)
+        self.start_date.setDate(QDate.currentDate().addMonths(-4))
+        filter_layout.addWidget(self.start_date)
+        
+        filter_layout.addWidget(QLabel("〜"))
+        
+        self.end_date = QDateEdit()
+        self.end_date.setCalendarPopup(True)
+        self.end_date.setDate(QDate.currentDate())
+        filter_layout.addWidget(self.end_date)
+        
+        show_btn = QPushButton("表示")
+        show_btn.clicked.connect(self.load_matrix)
+        filter_layout.addWidget(show_btn)
+        
+        layout.addWidget(filter_group)
+        
+        # 行列（モデルから表示中のセルだけを描画）
+        self.model = GradeMatrixModel(self)
+        self.table = QTableView()
+        self.table.setModel(self.model)
+        self.table.setEditTriggers(QTableView.EditTrigger.NoEditTriggers)
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+        self.table.horizontalHeader().setDefaultSectionSize(48)
+        self.table.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+        self.table.verticalHeader().setDefaultSectionSize(22)
+        layout.addWidget(self.table)
+        
+        # 件数表示
+        self.count_label = QLabel("")
+        layout.addWidget(self.count_label)
+    
+    def refresh_courses(self):
+        """講座リストを更新"""
+        try:
+            courses = self.course_repo.get_all_courses()
+            fill_course_combo(self.course_combo, courses)
+            logger.debug(f"講座リストを更新しました ({len(courses)}件)")
+        except Exception as e:
+            logger.error(f"講座リスト更新エラー: {e}")
+            QMessageBox.critical(self, "エラー", f"講座リストの更新に失敗しました:\n{str(e)}")
+    
+    def load_matrix(self):
+        """選択した講座・項目・期間の行列を読み込む"""
+        course_id = self.course_combo.currentData()
+        if not course_id:
+            QMessageBox.warning(self, "警告", "講座を選択してください")
+            return
+        
+        try:
+            self.show_matrix((
+                course_id,
+                self.field_combo.currentData(),
+                self.start_date.date().toString("yyyy-MM-dd"),
+                self.end_date.date().toString("yyyy-MM-dd")
+            ))
+        except Exception as e:
+            logger.error(f"成績マトリクス読み込みエラー: {e}")
+            QMessageBox.critical(self, "エラー", f"成績マトリクスの読み込みに失敗しました:\n{str(e)}")
+
+    def show_matrix(self, params: tuple):
+        """
+        行列を読み込んで表示
+        
+        Args:
+            params: (講座ID, 項目, 開始日, 終了日)
+        """
+        self.stale = False
+        matrix = self.grade_repo.get_grade_matrix(*params)
+        self.loaded_params = params
+        self.model.set_matrix(matrix)
+        self.count_label.setText(
+            f"生徒: {matrix.row_count}名 | 授業日: {matrix.column_count}日"
+        )
+    
+    def on_data_changed(self, changes: ChangeBatch):
+        """
+        講座・名簿・成績の変更を反映（database.events の購読者）
+        
+        表示中の講座の名簿・期間内の成績が変更された場合のみ読み込み直す
+        （非表示の間は次に表示したときに読み込む）。
+        
+        Args:
+            changes: 変更イベント
+        """
+        if changes.courses_changed():
+            self.refresh_courses()
+        
+        if self.loaded_params is None:
+            return
+        course_id, _, start_date, end_date = self.loaded_params
+        if not (changes.roster_changed(course_id)
+                or changes.grades_changed([course_id], start_date, end_date)):
+            return
+        
+        if self.isVisible():
+            self.reload_matrix()
+        else:
+            self.stale = True
+    
+    def reload_matrix(self):
+        """表示中の行列を同じ条件で読み込み直す"""
+        try:
+            self.show_matrix(self.loaded_params)
+        except Exception as e:
+            # 講座が削除された場合など
+            logger.error(f"成績マトリクス読み込みエラー: {e}")
+            self.stale = False
+    
+    def showEvent(self, event):
+        """表示時の処理（非表示の間に変更されていれば読み込み直す）"""
+        super().showEvent(event)
+        if self.stale and self.loaded_params is not None:
+            self.reload_matrix()
@@ -1,7 +1,8 @@
 import sys
+from datetime import date
 from PySide6.QtWidgets import (
     QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
-    QTabWidget, QMessageBox, QMenuBar, QMenu
+    QTabWidget, QMessageBox, QMenuBar, QMenu, QFileDialog, QInputDialog
 )
 from PySide6.QtCore import Qt
 from PySide6.QtGui import QAction
@@ -9,16 +10,23 @@ import logging
 
 from config.settings import (
     APP_NAME, APP_VERSION, WINDOW_WIDTH, WINDOW_HEIGHT,
-    MIN_WINDOW_WIDTH, MIN_WINDOW_HEIGHT
+    MIN_WINDOW_WIDTH, MIN_WINDOW_HEIGHT,
+    QUERY_STATS_ENABLED, SLOW_QUERY_THRESHOLD_MS, SLOW_QUERY_LOG, USE_WAL,
+    CLUSTERED_GRADE_ENTRIES, BUSY_TIMEOUT_SECONDS, SERVICE_URL, CHANGE_POLL_INTERVAL_MS
 )
+from database.archive import academic_year_of
 from database.db_manager import DatabaseManager
 from database.repositories.course_repository import CourseRepository
 from database.repositories.student_repository import StudentRepository
 from database.repositories.grade_repository import GradeRepository
+from service import client as service_client
 from views.grade_entry_view import GradeEntryView
 from views.course_management_view import CourseManagementView
 from views.student_management_view import StudentManagementView
 from views.grade_list_view import GradeListView
+from views.entry_progress_view import EntryProgressView
+from views.grade_matrix_view import GradeMatrixView
+from views.change_notifier import DatabaseChangeNotifier
 
 logger = logging.getLogger(__name__)
 
@@ -26,20 +34,32 @@ logger = logging.getLogger(__name__)
 class MainWindow(QMainWindow):
     """メインウィンドウ"""
     
-    def __init__(self):
+    def __init__(self, query_stats_path: str = None, service_url: str = None):
         super().__init__()
+        self.query_stats_path = query_stats_path
+        # 成績サービスのURL（指定時はデータベースファイルの代わりにサービスを使う）
+        self.service_url = service_url or SERVICE_URL
         self.db = None
         self.course_repo = None
         self.student_repo = None
         self.grade_repo = None
+        self.change_notifier = None
         
         self.init_database()
         self.init_ui()
+        self.init_change_notifier()
     
     def init_database(self):
         """データベース初期化"""
+        if self.service_url:
+            self.connect_service()
+            return
         try:
-            self.db = DatabaseManager()
+            self.db = DatabaseManager(use_wal=USE_WAL,
+                                      clustered_grades=CLUSTERED_GRADE_ENTRIES,
+                                      busy_timeout=BUSY_TIMEOUT_SECONDS)
+            if QUERY_STATS_ENABLED or self.query_stats_path:
+                self.db.enable_query_stats(SLOW_QUERY_THRESHOLD_MS, SLOW_QUERY_LOG)
             self.course_repo = CourseRepository(self.db)
             self.student_repo = StudentRepository(self.db)
             self.grade_repo = GradeRepository(self.db)
@@ -49,6 +69,17 @@ class MainWindow(QMainWindow):
             QMessageBox.critical(self, "エラー", f"データベースの初期化に失敗しました:\n{str(e)}")
             sys.exit(1)
     
+    def connect_service(self):
+        """成績サービスに接続（バックアップ・最適化などファイルを直接扱う操作は使えない）"""
+        try:
+            self.db, self.course_repo, self.student_repo, self.grade_repo = (
+                service_client.connect(self.service_url)
+            )
+        except Exception as e:
+            logger.error(f"成績サービス接続エラー: {e}")
+            QMessageBox.critical(self, "エラー", f"成績サービスに接続できませんでした:\n{str(e)}")
+            sys.exit(1)
+    
     def init_ui(self):
         """UI初期化"""
         self.setWindowTitle(f"{APP_NAME} v{APP_VERSION}")
@@ -70,16 +101,41 @@ class MainWindow(QMainWindow):
         self.course_management_view = CourseManagementView(self.course_repo)
         self.student_management_view = StudentManagementView(self.course_repo, self.student_repo)
         self.grade_list_view = GradeListView(self.course_repo, self.grade_repo)
+        self.entry_progress_view = EntryProgressView(self.grade_repo)
+        self.grade_matrix_view = GradeMatrixView(self.course_repo, self.grade_repo)
         
         self.tab_widget.addTab(self.grade_entry_view, "成績入力")
         self.tab_widget.addTab(self.course_management_view, "講座管理")
         self.tab_widget.addTab(self.student_management_view, "生徒名簿管理")
         self.tab_widget.addTab(self.grade_list_view, "成績一覧表")
+        self.tab_widget.addTab(self.entry_progress_view, "入力状況")
+        self.tab_widget.addTab(self.grade_matrix_view, "成績マトリクス")
         
-        self.tab_widget.currentChanged.connect(self.on_tab_changed)
+        self.entry_progress_view.lesson_selected.connect(self.open_lesson)
         
         logger.info("UIを初期化しました")
     
+    def init_change_notifier(self):
+        """
+        講座・名簿・成績の変更を各画面に知らせる
+        
+        各画面は変更イベント（database.events）を購読し、表示中の内容に関わる変更のみ
+        読み込み直す（タブの切り替えでは読み込まない）。他の利用者・スクリプトの変更は
+        DatabaseChangeNotifier が同じイベントバスに流す。
+        """
+        for view in (self.grade_entry_view, self.course_management_view,
+                     self.student_management_view, self.grade_list_view,
+                     self.entry_progress_view, self.grade_matrix_view):
+            self.db.events.subscribe(view.on_data_changed)
+        
+        # サービス経由の場合はデータベースファイルを直接開かないため確認しない
+        if self.service_url or CHANGE_POLL_INTERVAL_MS <= 0:
+            return
+        try:
+            self.change_notifier = DatabaseChangeNotifier(self.db, parent=self)
+        except Exception as e:
+            logger.error(f"変更検知の初期化エラー: {e}")
+    
     def create_menu_bar(self):
         """メニューバー作成"""
         menubar = self.menuBar()
@@ -90,6 +146,23 @@ class MainWindow(QMainWindow):
         backup_action.triggered.connect(self.backup_database)
         file_menu.addAction(backup_action)
         
+        query_stats_action = QAction("クエリ統計をエクスポート(&Q)...", self)
+        query_stats_action.triggered.connect(self.export_query_stats)
+        file_menu.addAction(query_stats_action)
+        
+        maintenance_action = QAction("データベースを最適化(&O)", self)
+        maintenance_action.triggered.connect(self.run_maintenance)
+        file_menu.addAction(maintenance_action)
+        
+        archive_action = QAction("年度末アーカイブ(&Y)...", self)
+        archive_action.triggered.connect(self.archive_academic_year)
+        file_menu.addAction(archive_action)
+        
+        # データベースファイルを直接扱う操作は、サービス経由ではサービス側で行う
+        if self.service_url:
+            for action in (backup_action, query_stats_action, maintenance_action, archive_action):
+                action.setEnabled(False)
+        
         file_menu.addSeparator()
         
         exit_action = QAction("終了(&X)", self)
@@ -103,16 +176,10 @@ class MainWindow(QMainWindow):
         about_action.triggered.connect(self.show_about)
         help_menu.addAction(about_action)
     
-    def on_tab_changed(self, index):
-        """タブ変更時の処理"""
-        if index == 0:
-            self.grade_entry_view.refresh_courses()
-        elif index == 1:
-            self.course_management_view.load_courses()
-        elif index == 2:
-            self.student_management_view.refresh_courses()
-        elif index == 3:
-            self.grade_list_view.refresh_courses()
+    def open_lesson(self, course_id: int, entry_date: str):
+        """入力状況で選択された授業を成績入力タブで開く"""
+        self.tab_widget.setCurrentIndex(0)
+        self.grade_entry_view.open_lesson(course_id, entry_date)
     
     def backup_database(self):
         """データベースバックアップ"""
@@ -123,6 +190,80 @@ class MainWindow(QMainWindow):
             logger.error(f"バックアップエラー: {e}")
             QMessageBox.critical(self, "エラー", f"バックアップに失敗しました:\n{str(e)}")
     
+    def run_maintenance(self):
+        """データベースの最適化（空き領域の解放・統計情報の更新）"""
+        try:
+            records = self.db.maintenance.run_all()
+            lines = [
+                f"{r.task}: {r.duration:.2f}秒 "
+                f"({r.size_before / 1024:,.0f}KB → {r.size_after / 1024:,.0f}KB)"
+                for r in records
+            ]
+            QMessageBox.information(self, "最適化完了", "データベースを最適化しました:\n\n" + "\n".join(lines))
+        except Exception as e:
+            logger.error(f"データベース最適化エラー: {e}")
+            QMessageBox.critical(self, "エラー", f"データベースの最適化に失敗しました:\n{str(e)}")
+    
+    def archive_academic_year(self):
+        """終了した年度の講座・名簿・成績をアーカイブファイルに移す"""
+        last_year = academic_year_of(date.today()) - 1
+        year, ok = QInputDialog.getInt(
+            self, "年度末アーカイブ", "アーカイブする年度:", last_year, 2000, last_year
+        )
+        if not ok:
+            return
+        
+        reply = QMessageBox.question(
+            self, "年度末アーカイブ",
+            f"{year}年度の成績と、その年度のみの講座・名簿を\n"
+            f"{self.db.archives.archive_path(year).name} に移します。\n"
+            "アーカイブした成績は期間を指定した成績一覧・統計で参照できますが、編集はできません。\n\n"
+            "実行しますか？",
+            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
+            QMessageBox.StandardButton.No
+        )
+        if reply != QMessageBox.StandardButton.Yes:
+            return
+        
+        try:
+            record = self.db.archives.archive_year(year)
+            QMessageBox.information(
+                self, "アーカイブ完了",
+                f"{year}年度をアーカイブしました:\n{record.path}\n\n"
+                f"講座: {record.course_count}件\n成績: {record.grade_count:,}件"
+            )
+        except ValueError as e:
+            QMessageBox.warning(self, "年度末アーカイブ", str(e))
+        except Exception as e:
+            logger.error(f"アーカイブエラー: {e}")
+            QMessageBox.critical(self, "エラー", f"アーカイブに失敗しました:\n{str(e)}")
+    
+    def export_query_stats(self):
+        """クエリ統計をJSONでエクスポート"""
+        if self.db.query_stats is None:
+            reply = QMessageBox.question(
+                self, "クエリ計測",
+                "クエリ計測が有効になっていません。\n今から計測を開始しますか？",
+                QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
+                QMessageBox.StandardButton.Yes
+            )
+            if reply == QMessageBox.StandardButton.Yes:
+                self.db.enable_query_stats(SLOW_QUERY_THRESHOLD_MS, SLOW_QUERY_LOG)
+            return
+        
+        file_path, _ = QFileDialog.getSaveFileName(
+            self, "クエリ統計を保存", "query_stats.json", "JSONファイル (*.json)"
+        )
+        if not file_path:
+            return
+        
+        try:
+            self.db.query_stats.export_json(file_path, lock_waits=self.db.lock_stats.snapshot())
+            QMessageBox.information(self, "エクスポート完了", f"クエリ統計をエクスポートしました:\n{file_path}")
+        except Exception as e:
+            logger.error(f"クエリ統計エクスポートエラー: {e}")
+            QMessageBox.critical(self, "エラー", f"クエリ統計のエクスポートに失敗しました:\n{str(e)}")
+    
     def show_about(self):
         """バージョン情報表示"""
         QMessageBox.about(
@@ -140,7 +281,16 @@ class MainWindow(QMainWindow):
         )
         
         if reply == QMessageBox.StandardButton.Yes:
+            if self.change_notifier:
+                self.change_notifier.stop()
             if self.db:
+                if self.query_stats_path and self.db.query_stats:
+                    try:
+                        self.db.query_stats.export_json(
+                            self.query_stats_path, lock_waits=self.db.lock_stats.snapshot()
+                        )
+                    except Exception as e:
+                        logger.error(f"クエリ統計エクスポートエラー: {e}")
                 self.db.close()
             logger.info("アプリケーションを終了しました")
             event.accept()
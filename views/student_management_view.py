@@ -9,7 +9,9 @@ import logging
 
 from database.repositories.course_repository import CourseRepository
 from database.repositories.student_repository import StudentRepository
+from database.events import ChangeBatch
 from models.student import Student
+from views.widgets.course_combo import fill_course_combo
 
 logger = logging.getLogger(__name__)
 
@@ -212,11 +214,9 @@ class StudentManagementView(QWidget):
     def refresh_courses(self):
         """講座リストを更新"""
         try:
-            self.course_combo.clear()
             courses = self.course_repo.get_all_courses()
-            
-            for course in courses:
-                self.course_combo.addItem(course.course_name, course.course_id)
+            if fill_course_combo(self.course_combo, courses):
+                self.on_course_changed()
             
             logger.debug(f"講座リストを更新しました ({len(courses)}件)")
         except Exception as e:
@@ -233,6 +233,23 @@ class StudentManagementView(QWidget):
         if self.current_course_id:
             self.load_students()
     
+    def on_data_changed(self, changes: ChangeBatch):
+        """
+        講座・名簿・成績の変更を反映（database.events の購読者。講座一覧と、選択中の講座の名簿のみ）
+        
+        この画面での追加・編集・削除・インポートもコミット後にここで読み込み直す。
+        
+        Args:
+            changes: 変更イベント
+        """
+        course_id = self.current_course_id
+        if changes.courses_changed():
+            # 選択中の講座が削除された場合は on_course_changed で読み込み直される
+            self.refresh_courses()
+        if (course_id and self.current_course_id == course_id
+                and changes.roster_changed(course_id)):
+            self.load_students()
+    
     def load_students(self):
         """生徒一覧を読み込む"""
         if not self.current_course_id:
@@ -276,7 +293,6 @@ class StudentManagementView(QWidget):
             try:
                 student = dialog.get_student_data()
                 self.student_repo.create_student(student)
-                self.load_students()
                 
                 QMessageBox.information(
                     self,
@@ -308,7 +324,6 @@ class StudentManagementView(QWidget):
             try:
                 updated_student = dialog.get_student_data()
                 self.student_repo.update_student(updated_student)
-                self.load_students()
                 
                 QMessageBox.information(
                     self,
@@ -346,7 +361,6 @@ class StudentManagementView(QWidget):
         if reply == QMessageBox.StandardButton.Yes:
             try:
                 self.student_repo.delete_student(student.id)
-                self.load_students()
                 
                 QMessageBox.information(
                     self,
@@ -427,8 +441,6 @@ class StudentManagementView(QWidget):
                 if len(result['errors']) > 5:
                     message += f"\n... 他 {len(result['errors']) - 5}件"
             
-            self.load_students()
-            
             QMessageBox.information(self, "インポート完了", message)
             logger.info(f"CSVインポート完了: {file_path}")
         
@@ -0,0 +1,38 @@
+"""講座の選択欄（QComboBox）の共通処理"""
+
+from typing import Iterable, Optional
+from PySide6.QtWidgets import QComboBox
+
+from models.course import Course
+
+
+def fill_course_combo(combo: QComboBox, courses: Iterable[Course],
+                      all_label: Optional[str] = None) -> bool:
+    """
+    講座の選択欄を作り直す（選択中の講座が残っていればそのまま選択する）
+    
+    作り直しの間は currentIndexChanged を発行しないため、選択中の講座が変わった場合の
+    処理は戻り値を見て呼び出し側で行う。
+    
+    Args:
+        combo: 講座の選択欄（項目のデータは講座ID）
+        courses: 講座のリスト
+        all_label: 先頭に追加する「全て」の項目の表示名（データは None。None の場合は追加しない）
+        
+    Returns:
+        選択中の講座が変わったか（初回・選択中の講座が削除された場合など）
+    """
+    current_id = combo.currentData()
+    combo.blockSignals(True)
+    try:
+        combo.clear()
+        if all_label is not None:
+            combo.addItem(all_label, None)
+        for course in courses:
+            combo.addItem(course.course_name, course.course_id)
+        
+        index = combo.findData(current_id) if current_id is not None else -1
+        combo.setCurrentIndex(index if index >= 0 else 0)
+    finally:
+        combo.blockSignals(False)
+    return combo.currentData() != current_id
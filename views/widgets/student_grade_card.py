@@ -228,6 +228,18 @@ class StudentGradeCard(QWidget):
         
         return data
     
+    def has_unsaved_changes(self) -> bool:
+        """入力内容が読み込んだ（前回保存した）成績と異なるか"""
+        data = self.get_grade_data()
+        saved = self.existing_grade
+        for key in ('grade1', 'grade2', 'grade3', 'grade4', 'grade5', 'grade6'):
+            if data[key] != (getattr(saved, key) if saved else None):
+                return True
+        for key in ('note1', 'note2'):
+            if data[key] != ((getattr(saved, key) or None) if saved else None):
+                return True
+        return False
+    
     def clear_inputs(self):
         """入力をクリア"""
         for btn in self.grade1_group[1].buttons():
@@ -254,6 +266,18 @@ class StudentGradeCard(QWidget):
         self.radio_helper.reset_all()
         logger.debug(f"入力をクリアしました: {self.student.student_name}")
     
+    def reload_grade(self, grade: Grade = None):
+        """
+        データベース上の成績で入力内容を置き換える（保存時に他の利用者と競合した場合）
+        
+        Args:
+            grade: 現在の成績（削除されていた場合は None）
+        """
+        self.clear_inputs()
+        self.existing_grade = grade
+        if grade:
+            self.load_grade_data(grade)
+    
     def save_grade(self):
         """成績を保存"""
         try: